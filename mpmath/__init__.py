@@ -23,6 +23,9 @@
 from . import ctx_mp as _ctx_mp
 _ctx_mp._mpf_module.mpf = mp.mpf
 _ctx_mp._mpf_module.mpc = mp.mpc
+from .matrices import matrices as _matrices_module
+_matrices_module.matrix = mp.matrix
+jet = mp.jet
 
 make_mpf = mp.make_mpf
 make_mpc = mp.make_mpc
@@ -34,6 +37,15 @@
 autoprec = mp.autoprec
 maxcalls = mp.maxcalls
 memoize = mp.memoize
+vectorize = mp.vectorize
+cache_info = mp.cache_info
+clear_caches = mp.clear_caches
+set_cache_limit = mp.set_cache_limit
+set_cache_stats = mp.set_cache_stats
+set_constant_workers = mp.set_constant_workers
+set_constant_store = mp.set_constant_store
+dumps = mp.dumps
+loads = mp.loads
 
 mag = mp.mag
 
@@ -60,6 +72,7 @@
 splot = mp.splot
 
 odefun = mp.odefun
+odestream = mp.odestream
 
 jacobian = mp.jacobian
 findroot = mp.findroot
@@ -101,6 +114,7 @@
 quad = mp.quad
 quadgl = mp.quadgl
 quadts = mp.quadts
+quad_prewarm = mp.quad_prewarm
 quadosc = mp.quadosc
 
 invertlaplace = mp.invertlaplace
@@ -129,6 +143,11 @@
 pade = mp.pade
 polyval = mp.polyval
 polyroots = mp.polyroots
+polyval_multi = mp.polyval_multi
+polyinterp = mp.polyinterp
+polymul = mp.polymul
+polydiv = mp.polydiv
+polycompose = mp.polycompose
 fourier = mp.fourier
 fourierval = mp.fourierval
 sumem = mp.sumem
@@ -147,6 +166,7 @@
 extend = mp.extend
 norm = mp.norm
 mnorm = mp.mnorm
+matmul = mp.matmul
 
 lu_solve = mp.lu_solve
 lu = mp.lu
@@ -294,6 +314,7 @@
 #pentagamma = mp.pentagamma
 harmonic = mp.harmonic
 bernoulli = mp.bernoulli
+bernoulli_table = mp.bernoulli_table
 bernfrac = mp.bernfrac
 stieltjes = mp.stieltjes
 hurwitz = mp.hurwitz
@@ -320,6 +341,10 @@
 hyp3f2 = mp.hyp3f2
 hyperu = mp.hyperu
 hypercomb = mp.hypercomb
+hypsum_list = mp.hypsum_list
+hypsum_prewarm = mp.hypsum_prewarm
+hypsum_export = mp.hypsum_export
+hypsum_import = mp.hypsum_import
 meijerg = mp.meijerg
 appellf1 = mp.appellf1
 appellf2 = mp.appellf2
@@ -405,8 +430,11 @@
 loggamma = mp.loggamma
 siegeltheta = mp.siegeltheta
 siegelz = mp.siegelz
+siegelz_grid = mp.siegelz_grid
+zeta_batch = mp.zeta_batch
 grampoint = mp.grampoint
 zetazero = mp.zetazero
+zetazeros = mp.zetazeros
 riemannr = mp.riemannr
 primepi = mp.primepi
 primepi2 = mp.primepi2
@@ -96,9 +96,10 @@ def diff(ctx, f, x, n=1, **options):
     The following optional keyword arguments are recognized:
 
     ``method``
-        Supported methods are ``'step'`` or ``'quad'``: derivatives may be
-        computed using either a finite difference with a small step
-        size `h` (default), or numerical quadrature.
+        Supported methods are ``'step'``, ``'quad'`` or ``'ad'``:
+        derivatives may be computed using either a finite difference
+        with a small step size `h` (default), numerical quadrature,
+        or automatic differentiation.
     ``direction``
         Direction of finite difference: can be -1 for a left
         difference, 0 for a central difference (default), or +1
@@ -131,6 +132,19 @@ def diff(ctx, f, x, n=1, **options):
     derivatives, this method may thus be faster if f is very expensive to
     evaluate at high precision.
 
+    With automatic differentiation, `f` is evaluated once at a
+    truncated power series `x + t + O(t^{n+1})` (see :class:`jet`) at
+    the working precision plus a few guard bits, which gives the exact
+    Taylor coefficients up to rounding errors. This requires that `f`
+    is built from arithmetic operations and elementary functions
+    (including powers, ``gamma`` and ``loggamma``); other functions
+    raise an exception::
+
+        >>> diff(lambda x: exp(sin(x))/(1+x**2), 0.5, 10, method='ad')
+        754733.519448737
+        >>> diff(lambda x: exp(sin(x))/(1+x**2), 0.5, 10)
+        754733.519448737
+
     **Further examples**
 
     The direction option is useful for computing left- or right-sided
@@ -188,6 +202,8 @@ def diff(ctx, f, x, n=1, **options):
             values, norm, workprec = hsteps(ctx, f, x, n, prec, **options)
             ctx.prec = workprec
             v = ctx.difference(values, n) / norm**n
+        elif method == 'ad':
+            v = _taylor_ad(ctx, f, x, n)[n] * ctx.factorial(n)
         elif method == 'quad':
             ctx.prec += 10
             radius = ctx.convert(options.get('radius', 0.25))
@@ -203,6 +219,23 @@ def g(t):
         ctx.prec = prec
     return +v
 
+def _taylor_ad(ctx, f, x, n):
+    # Taylor coefficients of f at x up to degree n, from a single
+    # evaluation at a jet
+    prec = ctx.prec
+    try:
+        ctx.prec += 20
+        x = ctx.convert(x)
+        t = ctx.jet([x, 1] + [0]*(n-1) if n else [x])
+        y = f(t)
+        if isinstance(y, ctx.jet):
+            if len(y) != n+1:
+                raise ValueError("f returned a jet of the wrong length")
+            return y.coeffs
+        return [ctx.convert(y)] + [ctx.zero]*n
+    finally:
+        ctx.prec = prec
+
 def _partial_diff(ctx, f, xs, orders, options):
     if not orders:
         return f()
@@ -262,7 +295,22 @@ def diffs(ctx, f, x, n=None, **options):
         n = ctx.inf
     else:
         n = int(n)
-    if options.get('method', 'step') != 'step':
+    method = options.get('method', 'step')
+    if method == 'ad':
+        # recompute with doubled degree when more derivatives are needed
+        k = 0
+        N = min(n, 8)
+        while 1:
+            c = _taylor_ad(ctx, f, x, N)
+            fac = ctx.factorial(k)
+            while k <= N:
+                yield c[k] * fac
+                k += 1
+                fac *= k
+            if k > n:
+                return
+            N = min(2*N, n)
+    if method != 'step':
         k = 0
         while k < n + 1:
             yield ctx.diff(f, x, k, **options)
@@ -339,23 +387,112 @@ def diffs_prod(ctx, factors):
         -12.4632923122697
 
     """
+    factors = [iterable_to_function(f) for f in factors]
+    # Dividing by n! rounds, so only floating-point derivatives are
+    # multiplied as Taylor coefficients; exact numbers and intervals
+    # are combined with the binomial coefficients instead
+    if not all(hasattr(f(0), '_mpf_') or hasattr(f(0), '_mpc_')
+        for f in factors):
+        for c in _diffs_prod_binomial(ctx, factors):
+            yield c
+        return
+    fac = 1
+    n = 0
+    for c in _diffs_prod_taylor(ctx, factors):
+        yield c * fac
+        n += 1
+        fac *= n
+
+def _diffs_prod_binomial(ctx, factors):
     N = len(factors)
     if N == 1:
-        for c in factors[0]:
+        for c in _function_values(factors[0]):
             yield c
+        return
+    u = iterable_to_function(_diffs_prod_binomial(ctx, factors[:N//2]))
+    v = iterable_to_function(_diffs_prod_binomial(ctx, factors[N//2:]))
+    n = 0
+    while 1:
+        #yield sum(binomial(n,k)*u(n-k)*v(k) for k in xrange(n+1))
+        s = u(n) * v(0)
+        a = 1
+        for k in xrange(1,n+1):
+            a = a * (n-k+1) // k
+            s += a * u(n-k) * v(k)
+        yield s
+        n += 1
+
+def _function_values(f):
+    n = 0
+    while 1:
+        yield f(n)
+        n += 1
+
+def _taylor_coefficients(ctx, diffs):
+    fac = 1
+    n = 0
+    for d in diffs:
+        yield d / fac
+        n += 1
+        fac *= n
+
+def _diffs_prod_taylor(ctx, factors):
+    # Taylor coefficients of the product of the factors
+    N = len(factors)
+    if N == 1:
+        return _taylor_coefficients(ctx, _function_values(factors[0]))
+    u = iterable_to_function(_diffs_prod_taylor(ctx, factors[:N//2]))
+    v = iterable_to_function(_diffs_prod_taylor(ctx, factors[N//2:]))
+    return _relaxed_mul(ctx, u, v)
+
+def _relaxed_mul(ctx, a, b):
+    r"""
+    Generate the coefficients `c_0, c_1, \ldots` of the product of two
+    power series whose coefficients are given by the functions a(k) and
+    b(k), requesting a(k) and b(k) only when computing c_k (so that b
+    can depend on c, as in diffs_exp()).
+
+    Instead of the naive sum for each `c_n`, products of blocks of
+    `p = 2^j` coefficients are added once the coefficients they involve
+    are known: the block `[p-1, 2p-1)` times itself when `n = 2p-2`,
+    and the block `[p-1, 2p-1)` times `[n-p+1, n+1)` and vice versa
+    whenever `p` divides `n+2` with `n+2 \ge 3p`. The large blocks are
+    multiplied with :func:`~mpmath.polymul`, which makes the total cost
+    quasi-linear in the number of coefficients times a logarithmic factor.
+    """
+    c = []
+    n = 0
+    while 1:
+        p = 1
+        while (n+2) % p == 0:
+            m = (n+2) // p
+            if m == 2:
+                x = [a(i) for i in xrange(p-1, 2*p-1)]
+                y = [b(i) for i in xrange(p-1, 2*p-1)]
+                _add_block_product(ctx, c, n, x, y)
+            elif m >= 3:
+                x = [a(i) for i in xrange(p-1, 2*p-1)]
+                y = [b(i) for i in xrange(n-p+1, n+1)]
+                _add_block_product(ctx, c, n, x, y)
+                x = [a(i) for i in xrange(n-p+1, n+1)]
+                y = [b(i) for i in xrange(p-1, 2*p-1)]
+                _add_block_product(ctx, c, n, x, y)
+            p *= 2
+        yield c[n]
+        n += 1
+
+def _add_block_product(ctx, c, start, x, y):
+    # c[start+k] += sum_{i+j=k} x[i]*y[j]
+    L = len(x) + len(y) - 1
+    if len(c) < start + L:
+        c.extend([ctx.zero] * (start + L - len(c)))
+    if len(x) < 8:
+        for i, u in enumerate(x):
+            for j, v in enumerate(y):
+                c[start+i+j] += u*v
     else:
-        u = iterable_to_function(ctx.diffs_prod(factors[:N//2]))
-        v = iterable_to_function(ctx.diffs_prod(factors[N//2:]))
-        n = 0
-        while 1:
-            #yield sum(binomial(n,k)*u(n-k)*v(k) for k in xrange(n+1))
-            s = u(n) * v(0)
-            a = 1
-            for k in xrange(1,n+1):
-                a = a * (n-k+1) // k
-                s += a * u(n-k) * v(k)
-            yield s
-            n += 1
+        for k, t in enumerate(ctx.polymul(x[::-1], y[::-1])[::-1]):
+            c[start+k] += t
 
 def dpoly(n, _cache={}):
     """
@@ -434,16 +571,18 @@ def diffs_exp(ctx, fdiffs):
         3.44996501352367
 
     """
-    fn = iterable_to_function(fdiffs)
-    f0 = ctx.exp(fn(0))
-    yield f0
-    i = 1
+    # The Taylor coefficients of g satisfy k g_k = sum_{j=1}^k j f_j g_{k-j}
+    # (from g' = f' g), where the products are accumulated online
+    fn = iterable_to_function(_taylor_coefficients(ctx, fdiffs))
+    g = [ctx.exp(fn(0))]
+    h = _relaxed_mul(ctx, lambda k: (k+1)*fn(k+1), lambda k: g[k])
+    fac = 1
+    n = 0
     while 1:
-        s = ctx.mpf(0)
-        for powers, c in iteritems(dpoly(i)):
-            s += c*ctx.fprod(fn(k+1)**p for (k,p) in enumerate(powers) if p)
-        yield s * f0
-        i += 1
+        yield g[n] * fac
+        n += 1
+        fac *= n
+        g.append(next(h) / n)
 
 @defun
 def differint(ctx, f, x, n=1, x0=0):
@@ -557,7 +696,14 @@ def taylor(ctx, f, x, n, **options):
     The coefficients are computed using high-order numerical
     differentiation. The function must be possible to evaluate
     to arbitrary precision. See :func:`~mpmath.diff` for additional details
-    and supported keyword options.
+    and supported keyword options. With *method='ad'*, the coefficients
+    are instead obtained by automatic differentiation from a single
+    evaluation of `f` at a truncated power series (see :class:`jet`),
+    which is much faster if `f` is built from functions that support
+    jets::
+
+        >>> nprint(taylor(lambda x: exp(sin(x)), 0, 4, method='ad'))
+        [1.0, 1.0, 0.5, 0.0, -0.125]
 
     Note that to evaluate the Taylor polynomial as an approximation
     of `f`, e.g. with :func:`~mpmath.polyval`, the coefficients must be reversed,
@@ -571,7 +717,11 @@ def taylor(ctx, f, x, n, **options):
         12.1824939607035
 
     """
-    gen = enumerate(ctx.diffs(f, x, n, **options))
+    if options.get('method') == 'ad':
+        c = _taylor_ad(ctx, f, x, n)
+        gen = enumerate(c[k]*ctx.factorial(k) for k in xrange(n+1))
+    else:
+        gen = enumerate(ctx.diffs(f, x, n, **options))
     if options.get("chop", True):
         return [ctx.chop(d)/ctx.factorial(i) for i, d in gen]
     else:
@@ -610,7 +760,7 @@ def pade(ctx, a, L, M):
         >>> p, q = pade(a, 3, 3)
         >>> x = 10
         >>> polyval(p[::-1], x)/polyval(q[::-1], x)
-        1.38169105566806
+        1.38169105566805
         >>> f(x)
         1.38169855941551
 
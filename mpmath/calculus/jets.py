@@ -0,0 +1,621 @@
+"""
+Truncated power series ("jets") for Taylor-mode automatic differentiation.
+
+A jet represents c_0 + c_1 t + ... + c_n t^n + O(t^(n+1)). Arithmetic
+operations and the elementary functions of the mp context act on jets
+by the usual recurrences for the coefficients of composite power series,
+so that evaluating f at the jet x + t gives the Taylor coefficients of f
+at x to degree n in one pass at the working precision.
+
+The recurrences are online: they are written as generators that produce
+coefficient k of the result from the coefficients 0, ..., k of the
+operands. An ordinary jet simply runs them to its length. A jet on a
+tape (see new_tape()) only has the coefficients computed so far, and
+every operation on it is recorded on the tape, so that all jets in a
+computation can later be extended together by one coefficient; this
+is what the ODE solvers use to generate Taylor series with one
+evaluation of the right-hand side.
+"""
+
+from ..libmp.backend import xrange
+
+
+class _jet(object):
+    r"""
+    Truncated power series `c_0 + c_1 t + \ldots + c_n t^n` with
+    coefficients in a context, for Taylor-mode automatic differentiation::
+
+        >>> from mpmath import *
+        >>> mp.dps = 15; mp.pretty = True
+        >>> x = jet([2, 1, 0, 0])
+        >>> x**3
+        jet([8.0, 12.0, 6.0, 1.0])
+        >>> nprint(exp(x).coeffs)
+        [7.38906, 7.38906, 3.69453, 1.23151]
+
+    Arithmetic with numbers and other jets of the same length, and the
+    elementary functions (``exp``, ``log``, ``sqrt``, ``cbrt``, ``root``,
+    ``power``, the trigonometric and hyperbolic functions and their
+    inverses, including ``cot``, ``sec``, ``csc`` and their relatives,
+    ``sinpi``, ``cospi``, ``expj``, ``expjpi``) as well as ``gamma``,
+    ``loggamma``, ``digamma`` and ``factorial`` of the mp context accept
+    jets. Comparisons and ``abs`` only look at the constant term.
+
+    This is used by :func:`~mpmath.diff` and :func:`~mpmath.taylor`
+    with ``method='ad'`` and by the ODE solvers.
+    """
+
+    _tape = None
+
+    def __init__(self, coeffs):
+        convert = self.ctx.convert
+        self.coeffs = [convert(c) for c in coeffs]
+        if not self.coeffs:
+            raise ValueError("a jet needs at least one coefficient")
+
+    def _new(self, coeffs):
+        j = object.__new__(self.__class__)
+        j.coeffs = coeffs
+        j._tape = self._tape
+        return j
+
+    def _result(self, g):
+        # The jet whose coefficients are generated by g
+        if self._tape is None:
+            return self._new([next(g) for k in xrange(len(self.coeffs))])
+        coeffs = [next(g)]
+        self._tape.append((coeffs, g))
+        return self._new(coeffs)
+
+    def __repr__(self):
+        return "jet(%s)" % repr(self.coeffs)
+
+    def __str__(self):
+        return "jet(%s)" % ", ".join(str(c) for c in self.coeffs)
+
+    def __len__(self):
+        return len(self.coeffs)
+
+    def __getitem__(self, k):
+        return self.coeffs[k]
+
+    def _coerce(self, other):
+        # Coefficients of other, or None if it is not a jet or number
+        if isinstance(other, _jet):
+            if other._tape is not self._tape:
+                raise ValueError("jets from different computations")
+            if self._tape is None and len(other.coeffs) != len(self.coeffs):
+                raise ValueError("jets of different lengths")
+            return other.coeffs
+        try:
+            other = self.ctx.convert(other)
+        except TypeError:
+            return None
+        return _Constant(other, self.ctx.zero)
+
+    def __pos__(self):
+        return self._result(_g_map(self.coeffs, lambda c: +c))
+
+    def __neg__(self):
+        return self._result(_g_map(self.coeffs, lambda c: -c))
+
+    def __add__(self, other):
+        b = self._coerce(other)
+        if b is None:
+            return NotImplemented
+        return self._result(_g_add(self.coeffs, b))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        b = self._coerce(other)
+        if b is None:
+            return NotImplemented
+        return self._result(_g_sub(self.coeffs, b))
+
+    def __rsub__(self, other):
+        b = self._coerce(other)
+        if b is None:
+            return NotImplemented
+        return self._result(_g_sub(b, self.coeffs))
+
+    def __mul__(self, other):
+        b = self._coerce(other)
+        if b is None:
+            return NotImplemented
+        if isinstance(b, _Constant):
+            c = b.value
+            return self._result(_g_map(self.coeffs, lambda x: x*c))
+        if self._tape is None and len(b) >= 16:
+            # long products are faster with polymul
+            n = len(b)
+            ctx = self.ctx
+            return self._new(ctx.polymul(self.coeffs[::-1], b[::-1])[::-1][:n])
+        return self._result(_g_mul(self.coeffs, b))
+
+    __rmul__ = __mul__
+
+    def __div__(self, other):
+        b = self._coerce(other)
+        if b is None:
+            return NotImplemented
+        if isinstance(b, _Constant):
+            c = b.value
+            return self._result(_g_map(self.coeffs, lambda x: x/c))
+        return self._result(_g_div(self.coeffs, b))
+
+    def __rdiv__(self, other):
+        a = self._coerce(other)
+        if a is None:
+            return NotImplemented
+        return self._result(_g_div(a, self.coeffs))
+
+    __truediv__ = __div__
+    __rtruediv__ = __rdiv__
+
+    def __pow__(self, other):
+        ctx = self.ctx
+        if isinstance(other, _jet):
+            return ctx.exp(other * ctx.ln(self))
+        try:
+            other = ctx.convert(other)
+        except TypeError:
+            return NotImplemented
+        if ctx.isint(other):
+            n = int(other)
+            if n >= 0:
+                # binary powering, exact for polynomials
+                r = None
+                a = self
+                while n:
+                    if n & 1:
+                        r = a if r is None else r * a
+                    n >>= 1
+                    if n:
+                        a = a * a
+                return self*0 + 1 if r is None else r
+            return 1 / self**(-n)
+        a0 = self.coeffs[0]
+        return self._result(_g_power(ctx, self.coeffs, other,
+            ctx.power(a0, other)))
+
+    def __rpow__(self, other):
+        ctx = self.ctx
+        try:
+            other = ctx.convert(other)
+        except TypeError:
+            return NotImplemented
+        return ctx.exp(self * ctx.ln(other))
+
+    def __abs__(self):
+        ctx = self.ctx
+        c = self.coeffs[0]
+        if ctx._is_complex_type(c):
+            return ctx.sqrt(self * self.conjugate())
+        if c < 0:
+            return -self
+        return +self
+
+    def __nonzero__(self):
+        return any(self.coeffs)
+
+    __bool__ = __nonzero__
+
+    def __eq__(self, other):
+        b = self._coerce(other)
+        if b is None:
+            return NotImplemented
+        return all(self.coeffs[k] == b[k] for k in xrange(len(self.coeffs)))
+
+    def __ne__(self, other):
+        r = self.__eq__(other)
+        if r is NotImplemented:
+            return r
+        return not r
+
+    def _cmp_value(self, other):
+        if isinstance(other, _jet):
+            return other.coeffs[0]
+        return other
+
+    def __lt__(self, other):
+        return self.coeffs[0] < self._cmp_value(other)
+
+    def __le__(self, other):
+        return self.coeffs[0] <= self._cmp_value(other)
+
+    def __gt__(self, other):
+        return self.coeffs[0] > self._cmp_value(other)
+
+    def __ge__(self, other):
+        return self.coeffs[0] >= self._cmp_value(other)
+
+    __hash__ = None
+
+    @property
+    def real(self):
+        return self._result(_g_map(self.coeffs, self.ctx._re))
+
+    @property
+    def imag(self):
+        return self._result(_g_map(self.coeffs, self.ctx._im))
+
+    def conjugate(self):
+        return self._result(_g_map(self.coeffs, self.ctx.conj))
+
+    def _root(self, n, k=0):
+        """
+        The k-th n-th root of the jet (see :func:`~mpmath.root`).
+        """
+        ctx = self.ctx
+        a0 = self.coeffs[0]
+        return self._result(_g_power(ctx, self.coeffs, ctx.one/n,
+            ctx.root(a0, n, k)))
+
+    def _function(self, name):
+        """
+        Apply the function of the mp context with the given name (the
+        name of its mpf_ implementation without prefix) to the jet.
+        """
+        try:
+            f = _functions[name]
+        except KeyError:
+            raise NotImplementedError("%s of a jet" % name)
+        return self._result(f(self.ctx, self.coeffs))
+
+
+class _Constant(object):
+    # The coefficients of a constant, as an infinite sequence
+
+    def __init__(self, value, zero):
+        self.value = value
+        self.zero = zero
+
+    def __getitem__(self, k):
+        if k:
+            return self.zero
+        return self.value
+
+
+def new_tape():
+    """
+    Return an empty tape for jets whose coefficients are extended one
+    at a time with extend_tape().
+    """
+    return []
+
+def tape_variable(ctx, tape, coeffs):
+    """
+    Return a jet on the tape whose coefficients are the list coeffs,
+    which the caller extends (before calling extend_tape()).
+    """
+    j = object.__new__(ctx.jet)
+    j.coeffs = coeffs
+    j._tape = tape
+    return j
+
+def extend_tape(tape):
+    """
+    Compute the next coefficient of every jet computed on the tape.
+    """
+    for coeffs, g in tape:
+        coeffs.append(next(g))
+
+
+#-----------------------------------------------------------------------------#
+# Online recurrences: each generator yields coefficient k of the result
+# after reading at most coefficient k of its operands
+#-----------------------------------------------------------------------------#
+
+def _g_map(a, f):
+    k = 0
+    while 1:
+        yield f(a[k])
+        k += 1
+
+def _g_add(a, b):
+    k = 0
+    while 1:
+        yield a[k] + b[k]
+        k += 1
+
+def _g_sub(a, b):
+    k = 0
+    while 1:
+        yield a[k] - b[k]
+        k += 1
+
+def _g_shift(a, c):
+    yield a[0] + c
+    k = 1
+    while 1:
+        yield a[k]
+        k += 1
+
+def _g_mul(a, b):
+    k = 0
+    while 1:
+        s = a[0]*b[k]
+        for j in xrange(1, k+1):
+            s += a[j]*b[k-j]
+        yield s
+        k += 1
+
+def _g_div(a, b):
+    # q_k = (a_k - sum_{j=1}^k b_j q_{k-j}) / b_0
+    q = []
+    k = 0
+    while 1:
+        s = a[k]
+        for j in xrange(1, k+1):
+            s -= b[j]*q[k-j]
+        q.append(s / b[0])
+        yield q[k]
+        k += 1
+
+def _g_then(gens, make):
+    # Feed the outputs of the generators gens into the generator made
+    # by make() from the lists of these outputs
+    lists = [[next(g)] for g in gens]
+    h = make(*lists)
+    yield next(h)
+    while 1:
+        for l, g in zip(lists, gens):
+            l.append(next(g))
+        yield next(h)
+
+def _g_exp(ctx, a, e0=None):
+    # k e_k = sum_{j=1}^k j a_j e_{k-j}
+    e = [ctx.exp(a[0]) if e0 is None else e0]
+    yield e[0]
+    k = 1
+    while 1:
+        s = a[1]*e[k-1]
+        for j in xrange(2, k+1):
+            s += j*a[j]*e[k-j]
+        e.append(s / k)
+        yield e[k]
+        k += 1
+
+def _g_log(ctx, a):
+    # l_k = (a_k - (1/k) sum_{j=1}^{k-1} j l_j a_{k-j}) / a_0
+    l = [ctx.ln(a[0])]
+    yield l[0]
+    k = 1
+    while 1:
+        s = ctx.zero
+        for j in xrange(1, k):
+            s += j*l[j]*a[k-j]
+        l.append((a[k] - s/k) / a[0])
+        yield l[k]
+        k += 1
+
+def _g_power(ctx, a, r, p0):
+    # p_k = (1/(k a_0)) sum_{j=0}^{k-1} (r(k-j) - j) a_{k-j} p_j
+    p = [p0]
+    yield p0
+    if not a[0]:
+        raise ValueError("power series of a jet with zero constant term")
+    k = 1
+    while 1:
+        s = ctx.zero
+        for j in xrange(k):
+            s += (r*(k-j) - j) * a[k-j] * p[j]
+        p.append(s / (k*a[0]))
+        yield p[k]
+        k += 1
+
+def _g_sincos(ctx, a, s0, c0, scale=1, hyperbolic=False, which=0):
+    # k s_k = sum j a_j c_{k-j}, k c_k = -+ sum j a_j s_{k-j}
+    s = [s0]
+    c = [c0]
+    sign = 1 if hyperbolic else -1
+    yield (s0, c0)[which]
+    k = 1
+    while 1:
+        u = v = ctx.zero
+        for j in xrange(1, k+1):
+            t = j*a[j]
+            u += t*c[k-j]
+            v += t*s[k-j]
+        s.append(scale*u/k)
+        c.append(sign*scale*v/k)
+        yield (s[k], c[k])[which]
+        k += 1
+
+def _sin(ctx, a):
+    return _g_sincos(ctx, a, ctx.sin(a[0]), ctx.cos(a[0]))
+
+def _cos(ctx, a):
+    return _g_sincos(ctx, a, ctx.sin(a[0]), ctx.cos(a[0]), which=1)
+
+def _tan(ctx, a):
+    s0, c0 = ctx.sin(a[0]), ctx.cos(a[0])
+    return _g_then([_g_sincos(ctx, a, s0, c0),
+        _g_sincos(ctx, a, s0, c0, which=1)], _g_div)
+
+def _sinpi(ctx, a):
+    return _g_sincos(ctx, a, ctx.sinpi(a[0]), ctx.cospi(a[0]), ctx.pi)
+
+def _cospi(ctx, a):
+    return _g_sincos(ctx, a, ctx.sinpi(a[0]), ctx.cospi(a[0]), ctx.pi,
+        which=1)
+
+def _sinh(ctx, a):
+    return _g_sincos(ctx, a, ctx.sinh(a[0]), ctx.cosh(a[0]), 1, True)
+
+def _cosh(ctx, a):
+    return _g_sincos(ctx, a, ctx.sinh(a[0]), ctx.cosh(a[0]), 1, True, 1)
+
+def _tanh(ctx, a):
+    s0, c0 = ctx.sinh(a[0]), ctx.cosh(a[0])
+    return _g_then([_g_sincos(ctx, a, s0, c0, 1, True),
+        _g_sincos(ctx, a, s0, c0, 1, True, 1)], _g_div)
+
+def _exp(ctx, a):
+    return _g_exp(ctx, a)
+
+def _log(ctx, a):
+    return _g_log(ctx, a)
+
+def _expj(ctx, a):
+    j = ctx.j
+    return _g_then([_g_map(a, lambda c: j*c)],
+        lambda b: _g_exp(ctx, b, ctx.expj(a[0])))
+
+def _expjpi(ctx, a):
+    jpi = ctx.j*ctx.pi
+    return _g_then([_g_map(a, lambda c: jpi*c)],
+        lambda b: _g_exp(ctx, b, ctx.expjpi(a[0])))
+
+def _sqrt(ctx, a):
+    return _g_power(ctx, a, ctx.mpf(0.5), ctx.sqrt(a[0]))
+
+def _cbrt(ctx, a):
+    return _g_power(ctx, a, ctx.one/3, ctx.cbrt(a[0]))
+
+def _g_inverse(ctx, a, f0, w):
+    # f with f_0 = f0 and f' = a' w, where w is generated online from a
+    yield f0
+    ws = []
+    k = 1
+    while 1:
+        ws.append(next(w))
+        s = a[1]*ws[k-1]
+        for j in xrange(1, k):
+            s += (j+1)*a[j+1]*ws[k-1-j]
+        yield s / k
+        k += 1
+
+def _one_plus_square(ctx, a, sign):
+    # 1 + sign*a^2
+    return _g_then([_g_mul(a, a)], lambda b: _g_shift(_Scaled(b, sign), 1))
+
+class _Scaled(object):
+    # The sequence c*a, for a growing list a
+
+    def __init__(self, a, c):
+        self.a = a
+        self.c = c
+
+    def __getitem__(self, k):
+        return self.c * self.a[k]
+
+def _atan(ctx, a):
+    one = _Constant(ctx.one, ctx.zero)
+    return _g_inverse(ctx, a, ctx.atan(a[0]),
+        _g_then([_one_plus_square(ctx, a, 1)], lambda d: _g_div(one, d)))
+
+def _atanh(ctx, a):
+    one = _Constant(ctx.one, ctx.zero)
+    return _g_inverse(ctx, a, ctx.atanh(a[0]),
+        _g_then([_one_plus_square(ctx, a, -1)], lambda d: _g_div(one, d)))
+
+def _asin(ctx, a):
+    h = -ctx.mpf(0.5)
+    return _g_inverse(ctx, a, ctx.asin(a[0]),
+        _g_then([_one_plus_square(ctx, a, -1)],
+            lambda d: _g_power(ctx, d, h, 1/ctx.sqrt(1-a[0]**2))))
+
+def _acos(ctx, a):
+    h = -ctx.mpf(0.5)
+    return _g_inverse(ctx, a, ctx.acos(a[0]),
+        _g_then([_one_plus_square(ctx, a, -1)],
+            lambda d: _g_power(ctx, d, h, -1/ctx.sqrt(1-a[0]**2))))
+
+def _asinh(ctx, a):
+    h = -ctx.mpf(0.5)
+    return _g_inverse(ctx, a, ctx.asinh(a[0]),
+        _g_then([_one_plus_square(ctx, a, 1)],
+            lambda d: _g_power(ctx, d, h, 1/ctx.sqrt(1+a[0]**2))))
+
+def _acosh(ctx, a):
+    # acosh'(x) = 1/(sqrt(x-1) sqrt(x+1))
+    h = -ctx.mpf(0.5)
+    a0 = a[0]
+    u = _g_then([_g_shift(a, -1)],
+        lambda b: _g_power(ctx, b, h, 1/ctx.sqrt(a0-1)))
+    v = _g_then([_g_shift(a, 1)],
+        lambda b: _g_power(ctx, b, h, 1/ctx.sqrt(a0+1)))
+    return _g_inverse(ctx, a, ctx.acosh(a0), _g_then([u, v], _g_mul))
+
+def _g_compose(ctx, a, deriv):
+    # sum_m deriv(m)/m! (a - a_0)^m, where deriv(m) is the m-th derivative
+    # of the function at a_0; P[m] holds the coefficients of (a - a_0)^m
+    yield deriv(0)
+    c = [None]
+    P = [None]
+    k = 1
+    while 1:
+        c.append(deriv(k) / ctx.factorial(k))
+        P.append([ctx.zero] * k)
+        for m in xrange(k, 1, -1):
+            Pm = P[m-1]
+            s = ctx.zero
+            for j in xrange(1, k-m+2):
+                s += a[j]*Pm[k-j]
+            P[m].append(s)
+        P[1].append(a[k])
+        s = ctx.zero
+        for m in xrange(1, k+1):
+            s += c[m]*P[m][k]
+        yield s
+        k += 1
+
+def _psi(ctx, a0, shift=0):
+    def deriv(m):
+        return ctx.psi(m-shift, a0)
+    return deriv
+
+def _loggamma(ctx, a):
+    a0 = a[0]
+    d = _psi(ctx, a0, 1)
+    return _g_compose(ctx, a, lambda m: d(m) if m else ctx.loggamma(a0))
+
+def _digamma(ctx, a):
+    return _g_compose(ctx, a, _psi(ctx, a[0]))
+
+def _gamma(ctx, a):
+    # gamma(a_0) exp(loggamma(a) - loggamma(a_0)); the differences
+    # are real for real a_0, also where loggamma(a_0) is complex
+    a0 = a[0]
+    d = _psi(ctx, a0, 1)
+    return _g_then([_g_compose(ctx, a, lambda m: d(m) if m else ctx.zero)],
+        lambda b: _g_exp(ctx, b, ctx.gamma(a0)))
+
+def _factorial(ctx, a):
+    return _g_then([_g_shift(a, 1)], lambda b: _gamma(ctx, b))
+
+_functions = {
+    'exp' : _exp,
+    'log' : _log,
+    'sqrt' : _sqrt,
+    'cbrt' : _cbrt,
+    'sin' : _sin,
+    'cos' : _cos,
+    'tan' : _tan,
+    'sin_pi' : _sinpi,
+    'cos_pi' : _cospi,
+    'sinh' : _sinh,
+    'cosh' : _cosh,
+    'tanh' : _tanh,
+    'expj' : _expj,
+    'expjpi' : _expjpi,
+    'atan' : _atan,
+    'asin' : _asin,
+    'acos' : _acos,
+    'asinh' : _asinh,
+    'acosh' : _acosh,
+    'atanh' : _atanh,
+    'gamma' : _gamma,
+    'loggamma' : _loggamma,
+    'psi0' : _digamma,
+    'factorial' : _factorial,
+}
+
+
+class JetMethods(object):
+
+    def __init__(ctx):
+        ctx.jet = type('jet', (_jet,), {})
+        ctx.jet.ctx = ctx
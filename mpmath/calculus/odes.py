@@ -1,9 +1,39 @@
 from bisect import bisect
 from ..libmp.backend import xrange
+from .. import libmp
+from .jets import new_tape, tape_variable, extend_tape
 
 class ODEMethods(object):
     pass
 
+def _forward_differences(ctx, ys):
+    """
+    Return the forward differences of ys, computed exactly from the
+    binary representations of the values when possible.
+    """
+    n = len(ys) - 1
+    prec, rounding = ctx._prec_rounding
+    ys = [ctx.convert(y) for y in ys]
+    if all(hasattr(y, '_mpf_') for y in ys):
+        d = libmp.mpf_forward_differences([y._mpf_ for y in ys], prec, rounding)
+        return [ctx.make_mpf(v) for v in d]
+    if all(hasattr(y, '_mpc_') or hasattr(y, '_mpf_') for y in ys):
+        ys = [ctx.mpc(y)._mpc_ for y in ys]
+        re = libmp.mpf_forward_differences([y[0] for y in ys], prec, rounding)
+        im = libmp.mpf_forward_differences([y[1] for y in ys], prec, rounding)
+        return [ctx.make_mpc(v) for v in zip(re, im)]
+    diffs = []
+    for j in range(n+1):
+        s = 0
+        b = (-1) ** (j & 1)
+        k = 1
+        for i in range(j+1):
+            s += b * ys[i]
+            b = (b * (j-k+1)) // (-k)
+            k += 1
+        diffs.append(s)
+    return diffs
+
 def ode_taylor(ctx, derivs, x0, y0, tol_prec, n):
     h = tol = ctx.ldexp(1, -tol_prec)
     dim = len(y0)
@@ -24,30 +54,109 @@ def ode_taylor(ctx, derivs, x0, y0, tol_prec, n):
             ys.append(y)
         # Compute derivatives
         ser = [[] for d in range(dim)]
+        diffs = [_forward_differences(ctx, [ys[i][d] for i in range(n+1)])
+            for d in range(dim)]
         for j in range(n+1):
-            s = [0]*dim
-            b = (-1) ** (j & 1)
-            k = 1
-            for i in range(j+1):
-                for d in range(dim):
-                    s[d] += b * ys[i][d]
-                b = (b * (j-k+1)) // (-k)
-                k += 1
             scale = h**(-j) / ctx.fac(j)
             for d in range(dim):
-                s[d] = s[d] * scale
-                ser[d].append(s[d])
+                ser[d].append(diffs[d][j] * scale)
     finally:
         ctx.prec = orig
     # Estimate radius for which we can get full accuracy.
-    # XXX: do this right for zeros
+    # The trailing differences of the sample values can vanish exactly,
+    # so use the last nonzero coefficient of each series
     radius = ctx.one
     for ts in ser:
-        if ts[-1]:
-            radius = min(radius, ctx.nthroot(tol/abs(ts[-1]), n))
+        for k in range(n, 0, -1):
+            if ts[k]:
+                radius = min(radius, ctx.nthroot(tol/abs(ts[k]), k))
+                break
     radius /= 2  # XXX
     return ser, x0+radius
 
+def ode_taylor_ad(ctx, F, x0, y0, n):
+    """
+    Return the Taylor coefficients to degree n of the solution of
+    y' = F(x, y) through (x0, y0), by evaluating F once at jets on a
+    tape. Coefficient k of F(x, y) depends only on the coefficients
+    0, ..., k of y, so the coefficients of y and of all intermediate
+    jets can be extended together, one at a time.
+    """
+    tape = new_tape()
+    xs = [ctx.convert(x0)]
+    ser = [[ctx.convert(y)] for y in y0]
+    x = tape_variable(ctx, tape, xs)
+    f = F(x, [tape_variable(ctx, tape, s) for s in ser])
+    f = [fd.coeffs if isinstance(fd, ctx.jet) else [ctx.convert(fd)]
+        for fd in f]
+    for k in xrange(1, n+1):
+        for s, fd in zip(ser, f):
+            s.append(fd[k-1] / k if k-1 < len(fd) else ctx.zero)
+        xs.append(ctx.one if k == 1 else ctx.zero)
+        if k < n:
+            extend_tape(tape)
+    return ser
+
+def ode_step_size(ctx, ser, tol):
+    """
+    Choose a step size for the Taylor series ser (one per component) of
+    degree n. The radius of convergence R is estimated by the root test
+    from the upper half of the coefficients, which is robust against
+    series in which some coefficients vanish, and the truncation error
+    (h/R)^(n+1) relative to the solution is made about tol. Returns None
+    if the series give no bound (if they are constant).
+    """
+    n = len(ser[0]) - 1
+    # The error is controlled relative to the largest component, so that
+    # small solutions (for example decaying ones) keep full accuracy; at a
+    # point where the solution vanishes, the coefficients give the scale
+    scale = max(abs(s[0]) for s in ser)
+    if not scale:
+        scale = max(abs(c) for s in ser for c in s)
+    R = None
+    for k in xrange(max(1, (n+1)//2), n+1):
+        norm = max(abs(s[k]) for s in ser)
+        if norm:
+            r = ctx.nthroot(scale/norm, k)
+            if R is None or r < R:
+                R = r
+    if R is None:
+        return None
+    return R * ctx.nthroot(tol, n+1) * ctx.mpf(0.9)
+
+def ode_segments(ctx, F, x0, y0, tol, degree, direction=1, x1=None,
+    hmax=None):
+    """
+    Generate the local solutions (xa, xb, ser) of y' = F(x, y) in
+    consecutive steps from x0 in the given direction, each given by
+    Taylor series ser around xa, up to x1 if given. The step sizes are
+    chosen adaptively by ode_step_size().
+    """
+    xa = x0
+    y = y0
+    h = None
+    while 1:
+        ser = ode_taylor_ad(ctx, F, xa, y, degree)
+        hnew = ode_step_size(ctx, ser, tol)
+        if hnew is None:
+            # polynomial solution or no information: grow the last step
+            hnew = 2*h if h else (hmax or ctx.one)
+        if hmax is not None:
+            hnew = min(hnew, hmax)
+        h = hnew
+        if h <= abs(xa) * ctx.eps:
+            raise ctx.NoConvergence("step size underflow at x = %s; "
+                "the solution is probably singular" % ctx.nstr(xa))
+        xb = xa + direction*h
+        last = x1 is not None and (x1 - xb)*direction <= 0
+        if last:
+            xb = x1
+        yield xa, xb, ser
+        if last:
+            return
+        y = [ctx.polyval(s[::-1], xb-xa) for s in ser]
+        xa = xb
+
 def odefun(ctx, F, x0, y0, tol=None, degree=None, method='taylor', verbose=False):
     r"""
     Returns a function `y(x) = [y_0(x), y_1(x), \ldots, y_n(x)]`
@@ -91,6 +200,26 @@ def odefun(ctx, F, x0, y0, tol=None, degree=None, method='taylor', verbose=False
     *F* must be possible to evaluate to very high precision
     for the generation of Taylor series to work.
 
+    With *method='ad'*, the Taylor series are instead generated by
+    automatic differentiation: *F* is evaluated once per step at
+    jets (see :class:`~mpmath.jet`), so it must be built from
+    arithmetic operations and functions that accept jets. The step
+    sizes are chosen adaptively from the decay of the Taylor
+    coefficients. This is usually much faster, particularly at
+    high precision::
+
+        >>> from mpmath import *
+        >>> mp.dps = 30; mp.pretty = True
+        >>> f = odefun(lambda x, y: x*sin(y), 0, pi/2, method='ad')
+        >>> f(2)
+        2.87255666284091171910747795501
+        >>> 2*atan(exp(2))
+        2.87255666284091171910747795501
+
+    The function :func:`~mpmath.odestream` uses the same method to
+    generate the solution as a stream of points, also for `x < x_0`,
+    and can locate events.
+
     To get a faster but less accurate solution, you can set a large
     value for *tol* (which defaults roughly to *eps*). If you just
     want to plot the solution or perform a basic simulation,
@@ -218,10 +347,10 @@ def odefun(ctx, F, x0, y0, tol=None, degree=None, method='taylor', verbose=False
 
     **TODO**
 
-    * Better automatic choice of degree and step size
-    * Make determination of Taylor series convergence radius
-      more robust
-    * Allow solution for `x < x_0`
+    * Better automatic choice of degree and step size with
+      *method='taylor'*
+    * Allow solution for `x < x_0` (supported by
+      :func:`~mpmath.odestream`)
     * Allow solution for complex `x`
     * Test for difficult (ill-conditioned) problems
     * Implement Runge-Kutta and other algorithms
@@ -231,7 +360,6 @@ def odefun(ctx, F, x0, y0, tol=None, degree=None, method='taylor', verbose=False
         tol_prec = int(-ctx.log(tol, 2))+10
     else:
         tol_prec = ctx.prec+10
-    degree = degree or (3 + int(3*ctx.dps/2.))
     workprec = ctx.prec + 40
     try:
         len(y0)
@@ -241,12 +369,29 @@ def odefun(ctx, F, x0, y0, tol=None, degree=None, method='taylor', verbose=False
         F = lambda x, y: [F_(x, y[0])]
         y0 = [y0]
         return_vector = False
-    ser, xb = ode_taylor(ctx, F, x0, y0, tol_prec, degree)
-    series_boundaries = [x0, xb]
-    series_data = [(ser, x0, xb)]
     # We will be working with vectors of Taylor series
     def mpolyval(ser, a):
         return [ctx.polyval(s[::-1], a) for s in ser]
+    if method == 'taylor':
+        degree = degree or (3 + int(3*ctx.dps/2.))
+        def taylor_segments():
+            xa = x0
+            ser, xb = ode_taylor(ctx, F, xa, y0, tol_prec, degree)
+            while 1:
+                yield xa, xb, ser
+                y = mpolyval(ser, xb-xa)
+                xa = xb
+                ser, xb = ode_taylor(ctx, F, xa, y, tol_prec, degree)
+        segments = taylor_segments()
+    elif method == 'ad':
+        degree = degree or (2 + int(0.35*tol_prec))
+        segments = ode_segments(ctx, F, x0, y0, ctx.ldexp(1, -tol_prec),
+            degree)
+    else:
+        raise ValueError("unknown method: %r" % method)
+    xa, xb, ser = next(segments)
+    series_boundaries = [x0, xb]
+    series_data = [(ser, x0, xb)]
     # Find nearest expansion point; compute if necessary
     def get_series(x):
         if x < x0:
@@ -255,12 +400,10 @@ def get_series(x):
         if n < len(series_boundaries):
             return series_data[n-1]
         while 1:
-            ser, xa, xb = series_data[-1]
             if verbose:
+                ser, xa, xb = series_data[-1]
                 print("Computing Taylor series for [%f, %f]" % (xa, xb))
-            y = mpolyval(ser, xb-xa)
-            xa = xb
-            ser, xb = ode_taylor(ctx, F, xb, y, tol_prec, degree)
+            xa, xb, ser = next(segments)
             series_boundaries.append(xb)
             series_data.append((ser, xa, xb))
             if x <= xb:
@@ -283,6 +426,188 @@ def interpolant(x):
 
 ODEMethods.odefun = odefun
 
+# Number of subintervals of each step in which odestream looks for events
+ODE_EVENT_SAMPLES = 4
+
+def odestream(ctx, F, x0, y0, x1=None, tol=None, degree=None, step=None,
+    events=None, terminal=False):
+    r"""
+    Solves the ODE system `y'(x) = F(x, y(x))`, `y(x_0) = y_0` like
+    :func:`~mpmath.odefun` with *method='ad'*, but generates the
+    solution as a stream of points `(x, y(x))` instead of returning
+    a function. Only the current local solution is kept in memory,
+    so arbitrarily long integrations can be followed.
+
+    The first point is `(x_0, y_0)`. Without *step*, the following
+    points are the ends of the adaptively chosen steps; with *step*,
+    they are the points `x_0 + k \cdot` *step* for `k = 1, 2, \ldots`,
+    evaluated from the local Taylor polynomials (dense output).
+    If *x1* is given, the integration stops at `x_1`, which is
+    always the last point; otherwise the generator is infinite.
+    If `x_1 < x_0`, the ODE is solved backwards.
+
+    Like with :func:`~mpmath.odefun`, *y0* and the values of *F*
+    can be scalars for a one-dimensional system, and *tol* and
+    *degree* set the tolerance and the degree of the Taylor series.
+
+    The exponential function, at every step of the integration and
+    backwards at steps of 1/4::
+
+        >>> from mpmath import *
+        >>> mp.dps = 15; mp.pretty = True
+        >>> for x, y in odestream(lambda x, y: y, 0, 1, 3):
+        ...     print((x, y, exp(x)))
+        ...
+        (0.0, 1.0, 1.0)
+        (0.829866692366899, 2.29301304374726, 2.29301304374726)
+        (1.6597333847338, 5.25790881879509, 5.25790881879509)
+        (2.4896000771007, 12.0564535043309, 12.0564535043309)
+        (3.0, 20.0855369231877, 20.0855369231877)
+        >>> for x, y in odestream(lambda x, y: y, 0, 1, -1, step=0.25):
+        ...     print((x, y, exp(x)))
+        ...
+        (0.0, 1.0, 1.0)
+        (-0.25, 0.778800783071405, 0.778800783071405)
+        (-0.5, 0.606530659712633, 0.606530659712633)
+        (-0.75, 0.472366552741015, 0.472366552741015)
+        (-1.0, 0.367879441171442, 0.367879441171442)
+
+    **Events**
+
+    *events* can be a list of functions `g_k(x, y)`. A zero of
+    `g_k(x, y(x))` at which `g_k` changes sign is an event. With
+    events, the stream consists of triples `(x, y(x), k)`, where
+    `k` is the index of the event function for event points and
+    ``None`` for the other points. The events are located with
+    :func:`~mpmath.findroot` on the local Taylor polynomials. With
+    *terminal=True*, the integration stops at the first event.
+
+    An event is only found if `g_k` has different signs at two
+    consecutive sample points: the points of the stream and a few points
+    inside each step. Two zeros closer together than this are missed,
+    as when `g_k` just touches zero; a smaller *step* makes the
+    detection finer.
+
+    A ball thrown upwards with speed 10 at the height 2 falls
+    back to the ground at `x = 1 + \sqrt{1.4}`::
+
+        >>> F = lambda x, y: [y[1], -10]
+        >>> hit = lambda x, y: y[0]
+        >>> for x, y, k in odestream(F, 0, [2, 10], events=[hit],
+        ...         terminal=True):
+        ...     print((x, k))
+        ...
+        (0.0, None)
+        (1.0, None)
+        (2.18321595661992, 0)
+        >>> 1 + sqrt(1.4)
+        2.18321595661992
+
+    """
+    if tol:
+        tol_prec = int(-ctx.log(tol, 2))+10
+    else:
+        tol_prec = ctx.prec+10
+    degree = degree or (2 + int(0.35*tol_prec))
+    orig = ctx.prec
+    workprec = ctx.prec + 40
+    try:
+        len(y0)
+        return_vector = True
+    except TypeError:
+        F_ = F
+        F = lambda x, y: [F_(x, y[0])]
+        y0 = [y0]
+        return_vector = False
+    events = events or []
+    if not return_vector:
+        events = [(lambda g: lambda x, y: g(x, y[0]))(g) for g in events]
+    try:
+        ctx.prec = workprec
+        x0 = ctx.convert(x0)
+        y0 = [ctx.convert(y) for y in y0]
+        direction = 1
+        if x1 is not None:
+            x1 = ctx.convert(x1)
+            if x1 < x0:
+                direction = -1
+        if step is not None:
+            step = abs(ctx.convert(step))
+            if not step:
+                raise ValueError("step must be nonzero")
+            # grid points this close to x1 are replaced by x1
+            close = 16*ctx.eps*max(abs(x0), abs(x1 or 0), step)
+        segments = ode_segments(ctx, F, x0, y0, ctx.ldexp(1, -tol_prec),
+            degree, direction, x1)
+        gvalues = [g(x0, y0) for g in events]
+    finally:
+        ctx.prec = orig
+    def output(x, y, k=None):
+        x = +x
+        if return_vector:
+            y = [+yk for yk in y]
+        else:
+            y = +y[0]
+        if events:
+            return x, y, k
+        return x, y
+    yield output(x0, y0)
+    if x1 == x0:
+        return
+    m = 1
+    while 1:
+        points = []
+        try:
+            ctx.prec = workprec
+            xa, xb, ser = next(segments)
+            def p(x):
+                return [ctx.polyval(s[::-1], x-xa) for s in ser]
+            last = xb == x1
+            yb = p(xb)
+            if step is None:
+                points.append((xb, yb, None))
+            else:
+                while 1:
+                    x = x0 + direction*m*step
+                    if last and direction*(x1-x) <= close:
+                        points.append((xb, yb, None))
+                        break
+                    if direction*(xb-x) < 0:
+                        break
+                    points.append((x, p(x), None))
+                    m += 1
+            if events:
+                # look for sign changes of the event functions between
+                # the output points and a few points inside the step
+                samples = [(xa + (xb-xa)*i/ODE_EVENT_SAMPLES, None)
+                    for i in xrange(1, ODE_EVENT_SAMPLES)]
+                samples += [(x, y) for (x, y, k) in points]
+                samples.sort(key=lambda t: direction*t[0])
+                samples = [(x, y or p(x)) for (x, y) in samples]
+            for k, g in enumerate(events):
+                xc = xa
+                for x, y in samples:
+                    gc = gvalues[k]
+                    gx = gvalues[k] = g(x, y)
+                    if gc and (not gx or (gc > 0) != (gx > 0)):
+                        if gx:
+                            x = ctx.findroot(lambda x: g(x, p(x)), (xc, x),
+                                solver='anderson')
+                        points.append((x, p(x), k))
+                    xc = x
+            # checkpoints before events at the same point
+            points.sort(key=lambda t: (direction*t[0], t[2] is not None))
+        finally:
+            ctx.prec = orig
+        for x, y, k in points:
+            yield output(x, y, k)
+            if terminal and k is not None:
+                return
+        if last:
+            return
+
+ODEMethods.odestream = odestream
+
 if __name__ == "__main__":
     import doctest
     doctest.testmod()
@@ -1,4 +1,5 @@
 from ..libmp.backend import xrange
+from .. import libmp
 from .calculus import defun
 
 #----------------------------------------------------------------------------#
@@ -43,9 +44,280 @@ def polyval(ctx, coeffs, x, derivative=False):
     else:
         return p
 
+@defun
+def polyval_multi(ctx, coeffs, xs, derivative=False):
+    r"""
+    Evaluates the polynomial with coefficients `[c_n, \ldots, c_0]`
+    at each of the points in the list *xs*, returning a list of values
+    (or of tuples `(P(x), P'(x))` if *derivative=True* is set). The
+    result is the same as ``[polyval(coeffs, x) for x in xs]`` up to
+    rounding errors::
+
+        >>> from mpmath import *
+        >>> mp.dps = 15; mp.pretty = True
+        >>> polyval_multi([3, 0, 2], [0.5, 1, 2])
+        [2.75, 5.0, 14.0]
+        >>> polyval_multi([3, 0, 2], [0.5, 2], derivative=True)
+        [(2.75, 3.0), (14.0, 12.0)]
+        >>> polyval_multi([3, 0, 2], [2j, 1+1j])
+        [(-10.0 + 0.0j), (2.0 + 6.0j)]
+
+    Each value is computed with an error of a few units in the last
+    place relative to the sum of the absolute values of the terms
+    `c_k x^k`, which is what Horner's scheme in floating-point
+    arithmetic achieves at best. This is the case even when the terms
+    have very different magnitudes, for example when evaluating a
+    Taylor polynomial far from its center::
+
+        >>> c = taylor(exp, 0, 60)[::-1]
+        >>> polyval_multi(c, [-10, 10])
+        [4.5399929479508e-5, 22026.4657948067]
+
+    (note that the first value suffers from cancellation, as would
+    summing the Taylor series directly).
+
+    Instead of performing the arithmetic with mpf or mpc values,
+    the coefficients are converted to integers sharing a common
+    exponent, and each point to an integer with as many fractional
+    bits as it needs, so that Horner's scheme only involves integer
+    multiplications and shifts, and each value is rounded once. This
+    is several times faster than :func:`~mpmath.polyval` when evaluating
+    a polynomial of high degree at many points.
+    """
+    xs = [ctx.convert(x) for x in xs]
+    coeffs = [ctx.convert(c) for c in coeffs]
+    # Other contexts (intervals, floats) and infinities use polyval
+    if not coeffs or ctx._fixed_precision or \
+        not all((hasattr(v, '_mpf_') or hasattr(v, '_mpc_')) and \
+            ctx.isfinite(v) for v in coeffs + xs):
+        return [ctx.polyval(coeffs, x, derivative) for x in xs]
+    prec, rounding = ctx._prec_rounding
+    if all(hasattr(v, '_mpf_') for v in coeffs + xs):
+        values = libmp.mpf_polyval_multi([c._mpf_ for c in coeffs],
+            [x._mpf_ for x in xs], prec, rounding, derivative)
+        make = ctx.make_mpf
+    else:
+        values = libmp.mpc_polyval_multi([ctx.mpc(c)._mpc_ for c in coeffs],
+            [ctx.mpc(x)._mpc_ for x in xs], prec, rounding, derivative)
+        make = ctx.make_mpc
+    if derivative:
+        return [(make(p), make(d)) for (p, d) in values]
+    return [make(p) for p in values]
+
+@defun
+def polyinterp(ctx, xs, ys):
+    r"""
+    Given `n` distinct points `x_k` and values `y_k`, returns the
+    coefficients `[c_{n-1}, \ldots, c_0]` of the unique polynomial `P`
+    of degree at most `n-1` with `P(x_k) = y_k`, in the format used by
+    :func:`~mpmath.polyval`::
+
+        >>> from mpmath import *
+        >>> mp.dps = 15; mp.pretty = True
+        >>> polyinterp([1, 2, 3], [2, 3, 6])
+        [1.0, -2.0, 3.0]
+        >>> polyinterp([-1, 1, 1j], [0, 2, 1j])
+        [(0.5 + 0.0j), (1.0 + 0.0j), (0.5 + 0.0j)]
+
+    Together with :func:`~mpmath.polyval_multi`, this converts between
+    the coefficients of a polynomial and its values at given points::
+
+        >>> xs = linspace(-1, 1, 20)
+        >>> c = polyinterp(xs, [cos(x) for x in xs])
+        >>> nprint(polyval_multi(c, [0.25, 0.5]), 12)
+        [0.968912421711, 0.87758256189]
+        >>> nprint([cos(0.25), cos(0.5)], 12)
+        [0.968912421711, 0.87758256189]
+
+    The coefficients are computed from the divided differences of the
+    values (the coefficients of the Newton form of `P`) with a few guard
+    bits, using `O(n^2)` arithmetic operations on raw numbers. Note that
+    the coefficients of an interpolating polynomial can be very sensitive
+    to the values; increasing the working precision is recommended
+    if the points are numerous or clustered.
+    """
+    xs = [ctx.convert(x) for x in xs]
+    ys = [ctx.convert(y) for y in ys]
+    if len(xs) != len(ys):
+        raise ValueError("xs and ys must have the same length")
+    if ctx._fixed_precision or \
+        not all(hasattr(v, '_mpf_') or hasattr(v, '_mpc_') for v in xs + ys):
+        return ctx._polyinterp_generic(xs, ys)
+    prec, rounding = ctx._prec_rounding
+    if all(hasattr(v, '_mpf_') for v in xs + ys):
+        c = libmp.mpf_polyinterp([x._mpf_ for x in xs], [y._mpf_ for y in ys],
+            prec, rounding)
+        return [ctx.make_mpf(v) for v in c]
+    c = libmp.mpc_polyinterp([ctx.mpc(x)._mpc_ for x in xs],
+        [ctx.mpc(y)._mpc_ for y in ys], prec, rounding)
+    return [ctx.make_mpc(v) for v in c]
+
+@defun
+def _polyinterp_generic(ctx, xs, ys):
+    n = len(xs)
+    if len(set(xs)) < n:
+        raise ValueError("the interpolation nodes must be distinct")
+    d = list(ys)
+    for k in xrange(1, n):
+        for i in xrange(n-1, k-1, -1):
+            d[i] = (d[i] - d[i-1]) / (xs[i] - xs[i-k])
+    if not n:
+        return []
+    c = [d[n-1]]
+    for k in xrange(n-2, -1, -1):
+        c = [d[k] - xs[k]*c[0]] + \
+            [c[j-1] - xs[k]*c[j] for j in xrange(1, len(c))] + [c[-1]]
+    return c[::-1]
+
+def _raw_vectors(ctx, *vectors):
+    # Lists of raw mpf/mpc tuples for the libmp polynomial functions,
+    # or None if these do not apply
+    if ctx._fixed_precision:
+        return None
+    raw = []
+    for v in vectors:
+        r = []
+        for x in v:
+            if hasattr(x, '_mpf_'):
+                r.append(x._mpf_)
+            elif hasattr(x, '_mpc_'):
+                r.append(x._mpc_)
+            else:
+                return None
+        raw.append(r)
+    return raw
+
+def _from_raw(ctx, v):
+    return [ctx.make_mpc(x) if len(x) == 2 else ctx.make_mpf(x) for x in v]
+
+@defun
+def polymul(ctx, p, q):
+    r"""
+    Returns the coefficients of the product of the polynomials with
+    coefficients *p* and *q*, given in the format used by
+    :func:`~mpmath.polyval` (highest degree first)::
+
+        >>> from mpmath import *
+        >>> mp.dps = 15; mp.pretty = True
+        >>> polymul([1, 2], [1, -2])
+        [1.0, 0.0, -4.0]
+        >>> polymul([1, 1j], [2, 0, 3])
+        [(2.0 + 0.0j), (0.0 + 2.0j), (3.0 + 0.0j), (0.0 + 3.0j)]
+
+    Unless one of the polynomials has very few terms, the coefficients
+    are converted to integers with a common exponent and multiplied
+    with a single big integer multiplication (Kronecker substitution),
+    so that the cost is close to that of one multiplication of numbers
+    with as many bits as the whole product. Each coefficient is then
+    rounded once from the exact product, except that coefficients much
+    smaller than the largest ones (after a rescaling of the variable)
+    may be truncated::
+
+        >>> p = polymul([1]*100, [1, -1])
+        >>> p[0], p[50], p[100]
+        (1.0, 0.0, -1.0)
+        >>> p = polymul([1, 1e-30], [1, -1e-30])
+        >>> p
+        [1.0, 0.0, -1.0e-60]
+
+    """
+    p = [ctx.convert(c) for c in p]
+    q = [ctx.convert(c) for c in q]
+    raw = _raw_vectors(ctx, p, q)
+    if raw is None:
+        if not (p and q):
+            return []
+        r = [ctx.zero] * (len(p) + len(q) - 1)
+        for i, x in enumerate(p):
+            for j, y in enumerate(q):
+                r[i+j] += x*y
+        return r
+    prec, rounding = ctx._prec_rounding
+    return _from_raw(ctx, libmp.mp_poly_mul(raw[0], raw[1], prec, rounding))
+
+@defun
+def polydiv(ctx, p, q):
+    r"""
+    Divides the polynomial *p* by the polynomial *q* (both given in the
+    format used by :func:`~mpmath.polyval`), returning the coefficients
+    of the quotient `s` and the remainder `r` as a tuple *(s, r)*, with
+    `p = q s + r` and `\deg r < \deg q`::
+
+        >>> from mpmath import *
+        >>> mp.dps = 15; mp.pretty = True
+        >>> polydiv([1, 0, 0, -1], [1, -1])
+        ([1.0, 1.0, 1.0], [0.0])
+        >>> polydiv([1, 2, 3, 4, 5], [2, 0, 1])
+        ([0.5, 1.0, 1.25], [3.0, 3.75])
+
+    The remainder always has `\deg q` coefficients (at least one).
+    The leading coefficient of *q* must be nonzero.
+
+    The quotient is computed as the quotient of the power series in
+    `1/x` given by the reversed polynomials, using Newton iteration
+    for the inverse of the divisor and :func:`~mpmath.polymul` for
+    the products. This requires `O(\log n)` polynomial
+    multiplications rather than `O(n)` scalar operations per
+    coefficient as in long division.
+    """
+    p = [ctx.convert(c) for c in p]
+    q = [ctx.convert(c) for c in q]
+    if not q or not q[0]:
+        raise ZeroDivisionError("the leading coefficient of the divisor "
+            "must be nonzero")
+    raw = _raw_vectors(ctx, p, q)
+    if raw is None:
+        r = list(p)
+        s = []
+        for i in xrange(len(p) - len(q) + 1):
+            c = r[i] / q[0]
+            s.append(c)
+            for j in xrange(1, len(q)):
+                r[i+j] -= c*q[j]
+        r = r[len(s):]
+        r = [ctx.zero] * (len(q) - 1 - len(r)) + r
+        return s, r or [ctx.zero]
+    prec, rounding = ctx._prec_rounding
+    s, r = libmp.mp_poly_divmod(raw[0], raw[1], prec, rounding)
+    return _from_raw(ctx, s), _from_raw(ctx, r)
+
+@defun
+def polycompose(ctx, p, q):
+    r"""
+    Returns the coefficients of the polynomial `p(q(x))`, where *p* and
+    *q* are given in the format used by :func:`~mpmath.polyval`::
+
+        >>> from mpmath import *
+        >>> mp.dps = 15; mp.pretty = True
+        >>> polycompose([1, 0, 1], [1, 1])
+        [1.0, 2.0, 2.0]
+        >>> c = polycompose([1, 2, 3, 4], [1, -1, 0.5])
+        >>> polyval(c, 0.25), polyval([1, 2, 3, 4], polyval([1, -1, 0.5], 0.25))
+        (5.163330078125, 5.163330078125)
+
+    The composition is computed by splitting `p` into halves,
+    `p = p_0 + x^h p_1`, so that `p(q) = p_0(q) + q^h p_1(q)` with
+    `h` a power of two, and recursively, using :func:`~mpmath.polymul`
+    for the products.
+    """
+    p = [ctx.convert(c) for c in p]
+    q = [ctx.convert(c) for c in q]
+    raw = _raw_vectors(ctx, p, q)
+    if raw is None:
+        r = []
+        for c in p:
+            r = ctx.polymul(r, q) if r else []
+            if r:
+                r[-1] += c
+            else:
+                r = [c]
+        return r
+    prec, rounding = ctx._prec_rounding
+    return _from_raw(ctx, libmp.mp_poly_compose(raw[0], raw[1], prec, rounding))
+
 @defun
 def polyroots(ctx, coeffs, maxsteps=50, cleanup=True, extraprec=10,
-        error=False):
+        error=False, method='aberth', workers=None, executor=None):
     """
     Computes all roots (real or complex) of a given polynomial.
 
@@ -73,8 +345,8 @@ def polyroots(ctx, coeffs, maxsteps=50, cleanup=True, extraprec=10,
         >>> for r in roots:
         ...     print(r)
         ...
-        (-0.375 + 0.59947894041409j)
         (-0.375 - 0.59947894041409j)
+        (-0.375 + 0.59947894041409j)
         >>>
         >>> err
         2.22044604925031e-16
@@ -92,10 +364,10 @@ def polyroots(ctx, coeffs, maxsteps=50, cleanup=True, extraprec=10,
         ...     print(r)
         ...
         1.0
-        (-0.8090169943749474241 + 0.58778525229247312917j)
         (-0.8090169943749474241 - 0.58778525229247312917j)
-        (0.3090169943749474241 + 0.95105651629515357212j)
+        (-0.8090169943749474241 + 0.58778525229247312917j)
         (0.3090169943749474241 - 0.95105651629515357212j)
+        (0.3090169943749474241 + 0.95105651629515357212j)
 
     **Precision and conditioning**
 
@@ -117,7 +389,7 @@ def polyroots(ctx, coeffs, maxsteps=50, cleanup=True, extraprec=10,
 
         >>> mp.dps = 60
         >>> for r in polyroots([1, 0, -10, 0, 1]):
-        ...     print r
+        ...     print(r)
         ...
         -3.14626436994197234232913506571557044551247712918732870123249
         -0.317837245195782244725757617296174288373133378433432554879127
@@ -131,23 +403,49 @@ def polyroots(ctx, coeffs, maxsteps=50, cleanup=True, extraprec=10,
 
     **Algorithm**
 
-    :func:`~mpmath.polyroots` implements the Durand-Kerner method [1], which
-    uses complex arithmetic to locate all roots simultaneously.
-    The Durand-Kerner method can be viewed as approximately performing
-    simultaneous Newton iteration for all the roots. In particular,
-    the convergence to simple roots is quadratic, just like Newton's
-    method.
+    By default, :func:`~mpmath.polyroots` implements the Aberth-Ehrlich
+    method [1], which uses complex arithmetic to locate all roots
+    simultaneously. Each approximation is corrected by a Newton step
+    for the polynomial divided by the other approximations, which gives
+    cubic convergence to simple roots. The initial approximations are
+    placed on circles whose radii are determined by the Newton polygon
+    of the coefficients [2], so that roots of very different magnitudes
+    are found in few steps. The iteration is first performed in double
+    precision and then continued at the working precision, in which
+    all roots are updated on integers with a common exponent, and roots
+    which have converged are no longer updated. The steps of both
+    phases count towards *maxsteps*. The error estimate returned with
+    *error=True* is the largest radius `n |p(z)| / |p'(z)|` (allowing
+    for rounding errors in `p(z)`) of the disks around the computed
+    roots `z` that are known to contain a root. Unlike the size of the
+    last correction, this remains valid near multiple roots, which can
+    only be computed to a fraction of the working precision.
+
+    The updates of the roots in each step can be distributed over
+    several processes by passing *workers* (the number of processes to
+    start) or an existing *executor* (for example a
+    :class:`multiprocessing.Pool`). This only pays off for polynomials
+    of high degree at high precision.
+
+    With *method='durand-kerner'*, the Durand-Kerner method [3] is used
+    instead. It can be viewed as approximately performing simultaneous
+    Newton iteration for all the roots, with quadratic convergence to
+    simple roots.
 
     Although all roots are internally calculated using complex arithmetic, any
     root found to have an imaginary part smaller than the estimated numerical
     error is truncated to a real number (small real parts are also chopped).
     Real roots are placed first in the returned list, sorted by value. The
     remaining complex roots are sorted by their real parts so that conjugate
-    roots end up next to each other.
+    roots end up next to each other, the one with negative imaginary part
+    first.
 
     **References**
 
-    1. http://en.wikipedia.org/wiki/Durand-Kerner_method
+    1. http://en.wikipedia.org/wiki/Aberth_method
+    2. D. A. Bini, "Numerical computation of polynomial zeros by means of
+       Aberth's method", Numerical Algorithms 13 (1996), 179-200
+    3. http://en.wikipedia.org/wiki/Durand-Kerner_method
 
     """
     if len(coeffs) <= 1:
@@ -160,46 +458,88 @@ def polyroots(ctx, coeffs, maxsteps=50, cleanup=True, extraprec=10,
     tol = +ctx.eps
     with ctx.extraprec(extraprec):
         deg = len(coeffs) - 1
-        # Must be monic
-        lead = ctx.convert(coeffs[0])
-        if lead == 1:
-            coeffs = [ctx.convert(c) for c in coeffs]
+        if method == 'aberth':
+            roots, err, converged = _polyroots_aberth(ctx, coeffs, maxsteps,
+                orig, workers, executor, error)
+        elif method == 'durand-kerner':
+            roots, err, converged = _polyroots_durand_kerner(ctx, coeffs,
+                maxsteps, tol)
         else:
-            coeffs = [c/lead for c in coeffs]
-        f = lambda x: ctx.polyval(coeffs, x)
-        roots = [ctx.mpc((0.4+0.9j)**n) for n in xrange(deg)]
-        err = [ctx.one for n in xrange(deg)]
-        # Durand-Kerner iteration until convergence
-        for step in xrange(maxsteps):
-            if abs(max(err)) < tol:
-                break
-            for i in xrange(deg):
-                p = roots[i]
-                x = f(p)
-                for j in range(deg):
-                    if i != j:
-                        try:
-                            x /= (p-roots[j])
-                        except ZeroDivisionError:
-                            continue
-                roots[i] = p - x
-                err[i] = abs(x)
-        if abs(max(err)) >= tol:
+            raise ValueError("unknown method %r" % method)
+        if not converged:
             raise ctx.NoConvergence("Didn't converge in maxsteps=%d steps." \
                     % maxsteps)
-        # Remove small real or imaginary parts
+        # Remove small real or imaginary parts (relative to the root,
+        # if it is large)
         if cleanup:
             for i in xrange(deg):
-                if abs(roots[i]) < tol:
+                r = abs(roots[i])
+                if r < tol:
                     roots[i] = ctx.zero
-                elif abs(ctx._im(roots[i])) < tol:
+                elif abs(ctx._im(roots[i])) < tol*max(r, 1):
                     roots[i] = roots[i].real
-                elif abs(ctx._re(roots[i])) < tol:
+                elif abs(ctx._re(roots[i])) < tol*max(r, 1):
                     roots[i] = roots[i].imag * 1j
-        roots.sort(key=lambda x: (abs(ctx._im(x)), ctx._re(x)))
+    # Sort the rounded roots, so that the guard bits do not decide the
+    # order of conjugate pairs
+    roots = [+r for r in roots]
+    roots.sort(key=lambda x: (abs(ctx._im(x)), ctx._re(x), ctx._im(x)))
     if error:
         err = max(err)
         err = max(err, ctx.ldexp(1, -orig+1))
-        return [+r for r in roots], +err
+        return roots, +err
     else:
-        return [+r for r in roots]
+        return roots
+
+def _polyroots_durand_kerner(ctx, coeffs, maxsteps, tol):
+    deg = len(coeffs) - 1
+    # Must be monic
+    lead = ctx.convert(coeffs[0])
+    if lead == 1:
+        coeffs = [ctx.convert(c) for c in coeffs]
+    else:
+        coeffs = [c/lead for c in coeffs]
+    f = lambda x: ctx.polyval(coeffs, x)
+    roots = [ctx.mpc((0.4+0.9j)**n) for n in xrange(deg)]
+    err = [ctx.one for n in xrange(deg)]
+    # Durand-Kerner iteration until convergence
+    for step in xrange(maxsteps):
+        if abs(max(err)) < tol:
+            break
+        for i in xrange(deg):
+            p = roots[i]
+            x = f(p)
+            for j in range(deg):
+                if i != j:
+                    try:
+                        x /= (p-roots[j])
+                    except ZeroDivisionError:
+                        continue
+            roots[i] = p - x
+            err[i] = abs(x)
+    return roots, err, abs(max(err)) < tol
+
+def _polyroots_aberth(ctx, coeffs, maxsteps, orig, workers, executor, error):
+    coeffs = [ctx.convert(c) for c in coeffs]
+    if not coeffs[0]:
+        raise ValueError("The leading coefficient must be nonzero")
+    coeffs = [ctx.mpc(c)._mpc_ for c in coeffs]
+    pool = None
+    try:
+        if workers or executor is not None:
+            if executor is None:
+                from multiprocessing import Pool
+                pool = executor = Pool(workers)
+            chunks = 2*(workers or 4)
+        else:
+            chunks = 1
+        roots, err, steps = libmp.mpc_polyroots(coeffs, ctx.prec, orig,
+            maxsteps, executor, chunks, error)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    roots = [ctx.make_mpc(r) for r in roots]
+    if err is not None:
+        err = [ctx.make_mpf(e) for e in err]
+    return roots, err, steps <= maxsteps
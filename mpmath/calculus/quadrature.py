@@ -1,6 +1,178 @@
 import math
+import os
+import struct
 
 from ..libmp.backend import xrange
+from ..libmp import encode_values, decode_values
+
+# Version of the file format used for persistent node storage
+NODE_FILE_VERSION = 2
+NODE_FILE_MAGIC = b'MPQN'
+
+def _encode_nodes(nodes):
+    """
+    Encode a list of (x, w) pairs of real mpf values in the compact
+    binary format of ctx.dumps (see libmp.libserial).
+    """
+    values = []
+    for x, w in nodes:
+        values.append(x._mpf_)
+        values.append(w._mpf_)
+    return bytes(encode_values(values))
+
+def _decode_nodes(ctx, data, offset):
+    values, offset = decode_values(data, offset)
+    if offset != len(data):
+        raise ValueError("trailing data")
+    make_mpf = ctx.make_mpf
+    values = [make_mpf(v) for v in values]
+    return list(zip(values[::2], values[1::2]))
+
+def _to_raw(x):
+    # values cross process boundaries as raw mpf/mpc tuples
+    if hasattr(x, '_mpf_'):
+        return x._mpf_
+    if hasattr(x, '_mpc_'):
+        return x._mpc_
+    return x
+
+def _from_raw(ctx, x):
+    if type(x) is tuple:
+        if len(x) == 2:
+            return ctx.make_mpc(x)
+        return ctx.make_mpf(x)
+    return x
+
+def _get_rule(ctx, rule):
+    if type(rule) is str:
+        if rule == 'tanh-sinh':
+            return ctx._tanh_sinh
+        elif rule == 'gauss-legendre':
+            return ctx._gauss_legendre
+        else:
+            raise ValueError("unknown quadrature rule: %s" % rule)
+    return rule(ctx)
+
+def _outer_integrand(ctx, f, rule, points, prec, epsilon, m):
+    """
+    Return the function of the first variable that is integrated by
+    quad, performing the integrations over the remaining variables
+    (given by the list *points*) for a multiple integral.
+    """
+    if len(points) == 0:
+        return f
+    if len(points) == 1:
+        return lambda x: \
+            rule.summation(lambda y: f(x,y), \
+            points[0], prec, epsilon, m)[0]
+    if len(points) == 2:
+        return lambda x: \
+            rule.summation(lambda y: \
+                rule.summation(lambda z: f(x,y,z), \
+                points[1], prec, epsilon, m)[0],
+            points[0], prec, epsilon, m)[0]
+    raise NotImplementedError("quadrature must have dim 1, 2 or 3")
+
+def _parallel_eval(task):
+    """
+    Evaluate an integrand at a list of points in a worker process.
+    """
+    kind, wp, method, points, prec, epsilon, m, f, xs = task
+    from .. import mp, fp
+    if kind == 'fp':
+        ctx = fp
+    else:
+        ctx = mp
+        orig = ctx.prec
+        ctx.prec = wp
+        points = [[_from_raw(ctx, p) for p in q] for q in points]
+        epsilon = _from_raw(ctx, epsilon)
+    try:
+        rule = _get_rule(ctx, method)
+        g = _outer_integrand(ctx, f, rule, points, prec, epsilon, m)
+        if kind == 'fp':
+            return [g(x) for x in xs]
+        # the points and values are transferred in the compact
+        # binary format of ctx.dumps
+        xs = [ctx._make_raw(x) for x in decode_values(xs)[0]]
+        return bytes(encode_values([ctx._raw_value(g(x)) for x in xs]))
+    finally:
+        if kind != 'fp':
+            ctx.prec = orig
+
+class _ParallelIntegrand(object):
+    """
+    Integrand for quad that can also be evaluated at a whole list of
+    nodes at once, with the evaluations distributed in chunks over the
+    processes of an executor. Each worker rebuilds the integrand
+    (including inner integrations for multiple integrals) from the
+    picklable function *f*, so the values are bit-for-bit the same as
+    those computed serially.
+    """
+
+    def __init__(self, ctx, f, method, points, prec, epsilon, m,
+        executor, chunks, symmetric=False):
+        self.ctx = ctx
+        self.f = f
+        self.method = method
+        self.points = points
+        self.prec = prec
+        self.epsilon = epsilon
+        self.m = m
+        self.executor = executor
+        self.chunks = chunks
+        self.symmetric = symmetric
+        self.g = _outer_integrand(ctx, f, _get_rule(ctx, method),
+            points, prec, epsilon, m)
+
+    def __call__(self, x):
+        if self.symmetric:
+            return self.g(-x) + self.g(x)
+        return self.g(x)
+
+    def symmetrized(self):
+        """
+        Return the integrand `x \to f(-x) + f(x)`.
+        """
+        return _ParallelIntegrand(self.ctx, self.f, self.method,
+            self.points, self.prec, self.epsilon, self.m, self.executor,
+            self.chunks, True)
+
+    def map(self, xs):
+        """
+        Evaluate the integrand at all points in the list *xs*.
+        """
+        if self.symmetric:
+            values = self.map_points([-x for x in xs] + list(xs))
+            n = len(xs)
+            return [u + v for u, v in zip(values[:n], values[n:])]
+        return self.map_points(xs)
+
+    def map_points(self, xs):
+        ctx = self.ctx
+        points = self.points
+        epsilon = self.epsilon
+        if ctx._fixed_precision:
+            kind = 'fp'
+            wp = None
+        else:
+            kind = 'mp'
+            wp = ctx.prec
+            points = [[_to_raw(p) for p in q] for q in points]
+            epsilon = _to_raw(epsilon)
+            xs = [ctx._raw_value(x) for x in xs]
+        size = max(1, -(-len(xs) // self.chunks))
+        chunks = [xs[i:i+size] for i in xrange(0, len(xs), size)]
+        if kind != 'fp':
+            chunks = [bytes(encode_values(chunk)) for chunk in chunks]
+        tasks = [(kind, wp, self.method, points, self.prec, epsilon,
+            self.m, self.f, chunk) for chunk in chunks]
+        values = []
+        for chunk in self.executor.map(_parallel_eval, tasks):
+            if kind != 'fp':
+                chunk = [ctx._make_raw(v) for v in decode_values(chunk)[0]]
+            values.extend(chunk)
+        return values
 
 class QuadratureRule(object):
     """
@@ -24,6 +196,75 @@ def __init__(self, ctx):
         self.transformed_cache = {}
         self.interval_count = {}
 
+    def node_file(self, degree, prec):
+        """
+        Return the path of the file in which the nodes for the given
+        degree and precision are stored persistently, or None if
+        ``ctx.quad_cache_dir`` is not set.
+        """
+        directory = getattr(self.ctx, 'quad_cache_dir', None)
+        if not directory:
+            return None
+        name = "%s-%i-%i.v%i.nodes" % (self.__class__.__name__, degree, prec,
+            NODE_FILE_VERSION)
+        return os.path.join(directory, name)
+
+    def _node_header(self, degree, prec):
+        name = self.__class__.__name__.encode('ascii')
+        return NODE_FILE_MAGIC + struct.pack('>HH', NODE_FILE_VERSION,
+            len(name)) + name + struct.pack('>II', degree, prec)
+
+    def load_nodes(self, degree, prec):
+        """
+        Load nodes for the standard interval from the persistent node
+        store. Returns None if they are not available.
+        """
+        path = self.node_file(degree, prec)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            f = open(path, 'rb')
+            try:
+                data = f.read()
+            finally:
+                f.close()
+            header = self._node_header(degree, prec)
+            if data[:len(header)] != header:
+                return None
+            return _decode_nodes(self.ctx, data, len(header))
+        except (IOError, OSError, ValueError, struct.error):
+            return None
+
+    def save_nodes(self, degree, prec, nodes):
+        """
+        Write nodes for the standard interval to the persistent node
+        store, if one is configured. Failures are ignored.
+        """
+        path = self.node_file(degree, prec)
+        if not path:
+            return
+        try:
+            data = self._node_header(degree, prec) + _encode_nodes(nodes)
+        except (AttributeError, struct.error):
+            return
+        tmp = "%s.%i.tmp" % (path, os.getpid())
+        try:
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            f = open(tmp, 'wb')
+            try:
+                f.write(data)
+            finally:
+                f.close()
+            # write to a temporary file first so that concurrent readers
+            # never see a partial file
+            os.rename(tmp, path)
+        except (IOError, OSError):
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
     def clear(self):
         """
         Delete cached node data.
@@ -58,11 +299,7 @@ def get_nodes(self, a, b, degree, prec, verbose=False):
         try:
             self.ctx.prec = prec+20
             # Get nodes on standard interval
-            if (degree, prec) in self.standard_cache:
-                nodes = self.standard_cache[degree, prec]
-            else:
-                nodes = self.calc_nodes(degree, prec, verbose)
-                self.standard_cache[degree, prec] = nodes
+            nodes = self.standard_nodes(degree, prec, verbose)
             # Transform to general interval
             nodes = self.transform_nodes(nodes, a, b, verbose)
             if key in self.interval_count:
@@ -73,6 +310,28 @@ def get_nodes(self, a, b, degree, prec, verbose=False):
             self.ctx.prec = orig
         return nodes
 
+    def standard_nodes(self, degree, prec, verbose=False):
+        """
+        Return nodes for the standard interval `[-1, 1]`. The nodes are
+        taken from the in-memory cache, or else from the persistent node
+        store if ``ctx.quad_cache_dir`` is set; otherwise they are
+        computed by calling :func:`~mpmath.calc_nodes` and are then
+        cached (and stored).
+        """
+        if (degree, prec) in self.standard_cache:
+            return self.standard_cache[degree, prec]
+        nodes = self.load_nodes(degree, prec)
+        if nodes is None:
+            orig = self.ctx.prec
+            try:
+                self.ctx.prec = prec+20
+                nodes = self.calc_nodes(degree, prec, verbose)
+            finally:
+                self.ctx.prec = orig
+            self.save_nodes(degree, prec, nodes)
+        self.standard_cache[degree, prec] = nodes
+        return nodes
+
     def transform_nodes(self, nodes, a, b, verbose=False):
         r"""
         Rescale standardized nodes (for `[-1, 1]`) to a general
@@ -220,8 +479,11 @@ def summation(self, f, points, prec, epsilon, max_degree, verbose=False):
             # but this is not good in practice. We get better accuracy
             # by having 0 as an endpoint.
             if (a, b) == (ctx.ninf, ctx.inf):
-                _f = f
-                f = lambda x: _f(-x) + _f(x)
+                if isinstance(f, _ParallelIntegrand):
+                    f = f.symmetrized()
+                else:
+                    _f = f
+                    f = lambda x: _f(-x) + _f(x)
                 a, b = (ctx.zero, ctx.inf)
             results = []
             for degree in xrange(1, max_degree+1):
@@ -251,7 +513,18 @@ def sum_next(self, f, nodes, degree, prec, previous, verbose=False):
         values computed by :func:`~mpmath.sum_next` at previous degrees, in
         case the quadrature rule is able to reuse them.
         """
-        return self.ctx.fdot((w, f(x)) for (x,w) in nodes)
+        return self.ctx.fdot(self.evaluate(f, nodes))
+
+    def evaluate(self, f, nodes):
+        r"""
+        Returns the pairs `(w_k, f(x_k))` for the `(x_k, w_k)` pairs in
+        the *nodes* list. When :func:`~mpmath.quad` is called with
+        *workers* or *executor*, the function values are computed in
+        parallel.
+        """
+        if isinstance(f, _ParallelIntegrand):
+            return zip([w for (x,w) in nodes], f.map([x for (x,w) in nodes]))
+        return ((w, f(x)) for (x,w) in nodes)
 
 
 class TanhSinh(QuadratureRule):
@@ -301,7 +574,7 @@ def sum_next(self, f, nodes, degree, prec, previous, verbose=False):
             S = previous[-1]/(h*2)
         else:
             S = self.ctx.zero
-        S += self.ctx.fdot((w,f(x)) for (x,w) in nodes)
+        S += self.ctx.fdot(self.evaluate(f, nodes))
         return h*S
 
     def calc_nodes(self, degree, prec, verbose=False):
@@ -512,6 +785,13 @@ def quad(ctx, f, *points, **kwargs):
             quitting.
         *verbose*
             Print details about progress.
+        *workers*
+            Number of processes over which the evaluations of the
+            integrand are distributed (see below).
+        *executor*
+            Executor (e.g. a :class:`multiprocessing.Pool` or a
+            :class:`concurrent.futures.ProcessPoolExecutor`) to use for
+            parallel evaluation instead of starting a new pool.
 
         **Algorithms**
 
@@ -716,51 +996,92 @@ def quad(ctx, f, *points, **kwargs):
             >>> quad(f, [-100, 0, 100])   # Also good
             3.12159332021646
 
+        **Parallel evaluation**
+
+        For expensive integrands, the function evaluations can be spread
+        over several processes by passing *workers* (the number of
+        processes to start) or an existing *executor*. The nodes of each
+        degree are sent to the processes in chunks, as raw tuples, and for
+        a multiple integral each process performs the inner integrations
+        for its nodes of the outermost variable. The result is identical
+        to that of a serial computation. The integrand must be picklable,
+        e.g. a function defined at the top level of a module::
+
+            # in a module mymodule.py
+            def f(x):
+                return besselj(0, x) * hyp2f1(0.5, 1.5, 2, -x**2)
+
+            quad(f, [0, 1, 2, 3], workers=4)
+
         **References**
 
         1. http://mathworld.wolfram.com/DoubleIntegral.html
 
         """
-        rule = kwargs.get('method', 'tanh-sinh')
-        if type(rule) is str:
-            if rule == 'tanh-sinh':
-                rule = ctx._tanh_sinh
-            elif rule == 'gauss-legendre':
-                rule = ctx._gauss_legendre
-            else:
-                raise ValueError("unknown quadrature rule: %s" % rule)
-        else:
-            rule = rule(ctx)
+        method = kwargs.get('method', 'tanh-sinh')
+        rule = _get_rule(ctx, method)
         verbose = kwargs.get('verbose')
         dim = len(points)
+        if not 1 <= dim <= 3:
+            raise NotImplementedError("quadrature must have dim 1, 2 or 3")
         orig = prec = ctx.prec
         epsilon = ctx.eps/8
         m = kwargs.get('maxdegree') or rule.guess_degree(prec)
         points = [ctx._as_points(p) for p in points]
+        workers = kwargs.get('workers')
+        executor = kwargs.get('executor')
+        pool = None
         try:
             ctx.prec += 20
-            if dim == 1:
-                v, err = rule.summation(f, points[0], prec, epsilon, m, verbose)
-            elif dim == 2:
-                v, err = rule.summation(lambda x: \
-                        rule.summation(lambda y: f(x,y), \
-                        points[1], prec, epsilon, m)[0],
-                    points[0], prec, epsilon, m, verbose)
-            elif dim == 3:
-                v, err = rule.summation(lambda x: \
-                        rule.summation(lambda y: \
-                            rule.summation(lambda z: f(x,y,z), \
-                            points[2], prec, epsilon, m)[0],
-                        points[1], prec, epsilon, m)[0],
-                    points[0], prec, epsilon, m, verbose)
+            if workers or executor is not None:
+                if executor is None:
+                    from multiprocessing import Pool
+                    pool = executor = Pool(workers)
+                g = _ParallelIntegrand(ctx, f, method, points[1:], prec,
+                    epsilon, m, executor, 4*(workers or 4))
             else:
-                raise NotImplementedError("quadrature must have dim 1, 2 or 3")
+                g = _outer_integrand(ctx, f, rule, points[1:], prec,
+                    epsilon, m)
+            v, err = rule.summation(g, points[0], prec, epsilon, m, verbose)
         finally:
             ctx.prec = orig
+            if pool is not None:
+                pool.close()
+                pool.join()
         if kwargs.get("error"):
             return +v, err
         return +v
 
+    def quad_prewarm(ctx, method='tanh-sinh', maxdegree=None):
+        """
+        Computes the nodes used by :func:`~mpmath.quad` with the given
+        *method* at the current working precision, for all degrees up to
+        *maxdegree* (by default the maximum degree tried by
+        :func:`~mpmath.quad`), so that later integrations do not have to.
+
+        If ``mp.quad_cache_dir`` is set (the default value is taken from
+        the environment variable ``MPMATH_QUAD_CACHE_DIR``), nodes are
+        stored persistently in that directory, and nodes found there are
+        loaded instead of being recomputed. Calling this function once
+        fills the store, so that a new process integrating at the same
+        precision can start without computing any nodes::
+
+            >>> from mpmath import *
+            >>> mp.dps = 15
+            >>> mp.quad_cache_dir = '/tmp/mpmath-nodes' # doctest: +SKIP
+            >>> quad_prewarm() # doctest: +SKIP
+            >>> quad_prewarm('gauss-legendre', maxdegree=4) # doctest: +SKIP
+
+        The files are keyed by rule, degree and precision, and are
+        versioned so that files written in an incompatible format are
+        ignored.
+        """
+        rule = _get_rule(ctx, method)
+        prec = ctx.prec
+        m = maxdegree or rule.guess_degree(prec)
+        for degree in xrange(1, m+1):
+            rule.standard_nodes(degree, prec)
+
     def quadts(ctx, *args, **kwargs):
         """
         Performs tanh-sinh quadrature. The call
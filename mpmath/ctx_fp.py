@@ -6,7 +6,7 @@
 
 from . import function_docs
 
-from .libmp import mpf_bernoulli, to_float, int_types
+from .libmp import mpf_bernoulli, mpf_bernoulli_table, to_float, int_types
 from . import libmp
 
 class FPContext(StandardBaseContext):
@@ -60,6 +60,13 @@ def f_wrapped(ctx, *args, **kwargs):
         f_wrapped.__doc__ = function_docs.__dict__.get(name, f.__doc__)
         setattr(cls, name, f_wrapped)
 
+    def _from_object_array(ctx, a):
+        import numpy
+        try:
+            return a.astype(numpy.float64)
+        except TypeError:
+            return a.astype(numpy.complex128)
+
     def bernoulli(ctx, n):
         cache = ctx._bernoulli_cache
         if n in cache:
@@ -67,6 +74,10 @@ def bernoulli(ctx, n):
         cache[n] = to_float(mpf_bernoulli(n, 53, 'n'), strict=True)
         return cache[n]
 
+    def bernoulli_table(ctx, n):
+        return [to_float(b, strict=True) for b in \
+            mpf_bernoulli_table(int(n), 53, 'n')]
+
     pi = math2.pi
     e = math2.e
     euler = math2.euler
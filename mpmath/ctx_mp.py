@@ -4,11 +4,12 @@
 """
 __docformat__ = 'plaintext'
 
+import os
 import re
 
 from .ctx_base import StandardBaseContext
 
-from .libmp.backend import basestring, BACKEND
+from .libmp.backend import basestring, BACKEND, xrange
 
 from . import libmp
 
@@ -72,6 +73,17 @@ def __init__(ctx):
 
         ctx.hyp_summators = {}
 
+        # file with precompiled hypergeometric summators
+        path = os.environ.get('MPMATH_HYPSUM_CACHE')
+        if path and os.path.exists(path):
+            try:
+                ctx.hypsum_import(path)
+            except (IOError, OSError, ValueError, EOFError, TypeError):
+                pass
+
+        # directory for persistent storage of quadrature nodes
+        ctx.quad_cache_dir = os.environ.get('MPMATH_QUAD_CACHE_DIR')
+
         ctx._init_aliases()
 
         # XXX: automate
@@ -252,6 +264,40 @@ def _agm(ctx, a, b=1):
     def bernoulli(ctx, n):
         return ctx.make_mpf(libmp.mpf_bernoulli(int(n), *ctx._prec_rounding))
 
+    def bernoulli_table(ctx, n, **kwargs):
+        r"""
+        Returns the list `[B_0, B_1, \ldots, B_n]` of Bernoulli numbers
+        (see :func:`~mpmath.bernoulli`), computed at the working
+        precision or at the precision given by the keyword argument
+        *prec* or *dps*::
+
+            >>> from mpmath import *
+            >>> mp.dps = 15; mp.pretty = True
+            >>> bernoulli_table(6)
+            [1.0, -0.5, 0.166666666666667, 0.0, -0.0333333333333333, 0.0, 0.0238095238095238]
+            >>> nstr(bernoulli_table(1000, dps=30)[1000], 30)
+            '-5.31870446941552203648291374377e+1769'
+
+        The whole table is computed at once, which is much faster than
+        computing the numbers one at a time for large `n` or at high
+        precision: the small numbers are found exactly from the
+        tangent numbers, and the others from the zeta function at the
+        even integers, with the terms of the zeta series for `B_n`
+        obtained from those for `B_{n-2}`. The table is cached at the
+        highest precision requested so far and extended when larger
+        `n` are requested. Requests at lower precision round the
+        entries of the cached table, and :func:`~mpmath.bernoulli`
+        also takes its values from the table when it is available::
+
+            >>> T = bernoulli_table(2000)
+            >>> bernoulli(2000) == T[2000]
+            True
+
+        """
+        prec, rounding = ctx._parse_prec(kwargs)
+        table = libmp.mpf_bernoulli_table(int(n), prec, rounding)
+        return [ctx.make_mpf(b) for b in table]
+
     def _zeta_int(ctx, n):
         return ctx.make_mpf(libmp.mpf_zeta_int(int(n), *ctx._prec_rounding))
 
@@ -663,6 +709,96 @@ def _parse_prec(ctx, kwargs):
 using a working precision of %i bits. Try with a higher maxprec,
 maxterms, or set zeroprec."""
 
+    def hypsum_list(ctx):
+        """
+        Returns a sorted list of the keys ``(p, q, param_types, ztype)``
+        of the hypergeometric series summators that have been generated
+        so far. A summator is generated (as Python code, which is then
+        compiled) the first time :func:`~mpmath.hyper` or a function
+        based on it needs a series with `p` upper and `q` lower
+        parameters of the given types (``'Z'`` for integers, ``'Q'``
+        for rationals, ``'R'`` for reals and ``'C'`` for complex
+        numbers) and an argument of type ``ztype`` (``'R'`` or ``'C'``).
+
+            >>> from mpmath import *
+            >>> mp.dps = 15
+            >>> _ = hyp2f1(1, pi, '1/3', 0.25)
+            >>> (2, 1, ('Z', 'R', 'Q'), 'R') in hypsum_list()
+            True
+
+        """
+        return sorted(ctx.hyp_summators)
+
+    def hypsum_prewarm(ctx, keys=None):
+        """
+        Generates the hypergeometric series summators with the given
+        keys (see :func:`~mpmath.hypsum_list`), so that the first call
+        of a function needing them is not slowed down by their
+        generation. By default, all summators for `_0F_1`, `_1F_0`,
+        `_1F_1`, `_2F_0`, `_2F_1` and `_1F_2` with any parameter types
+        are generated.
+        """
+        if keys is None:
+            keys = libmp.common_hyp_summator_keys()
+        for key in keys:
+            p, q, flags, ztype = key
+            key = p, q, tuple(flags), ztype
+            if key not in ctx.hyp_summators:
+                ctx.hyp_summators[key] = libmp.make_hyp_summator(key)[1]
+
+    def hypsum_export(ctx, path, keys=None):
+        """
+        Writes the compiled code of the hypergeometric series summators
+        with the given keys (by default, all that have been generated
+        so far) to the file *path*. Loading this file with
+        :func:`~mpmath.hypsum_import` is much faster than generating
+        the summators again. This is useful for reducing the startup
+        time of worker processes::
+
+            >>> from mpmath import *
+            >>> hypsum_prewarm()
+            >>> hypsum_export('/tmp/mpmath-hypsum.bin') # doctest: +SKIP
+
+        If the environment variable ``MPMATH_HYPSUM_CACHE`` is set to
+        the path of such a file when mpmath is imported, the file is
+        loaded automatically.
+
+        The file contains Python bytecode, so it can only be loaded by
+        the same version of Python, and it should only be loaded from
+        a trusted location.
+        """
+        summators = ctx.hyp_summators
+        if keys is not None:
+            ctx.hypsum_prewarm(keys)
+            summators = dict((key, summators[key[0], key[1], tuple(key[2]),
+                key[3]]) for key in keys)
+        data = libmp.dump_hyp_summators(summators)
+        # write to a temporary file first so that concurrent readers
+        # never see a partial file
+        tmp = "%s.%i.tmp" % (path, os.getpid())
+        f = open(tmp, 'wb')
+        try:
+            f.write(data)
+        finally:
+            f.close()
+        os.rename(tmp, path)
+
+    def hypsum_import(ctx, path):
+        """
+        Loads hypergeometric series summators written by
+        :func:`~mpmath.hypsum_export` from the file *path*. Returns the
+        number of summators loaded. Raises ValueError if the file was
+        written by an incompatible version of mpmath or Python.
+        """
+        f = open(path, 'rb')
+        try:
+            data = f.read()
+        finally:
+            f.close()
+        summators = libmp.load_hyp_summators(data)
+        ctx.hyp_summators.update(summators)
+        return len(summators)
+
     def hypsum(ctx, p, q, flags, coeffs, z, accurate_small=True, **kwargs):
         if hasattr(z, "_mpf_"):
             key = p, q, flags, 'R'
@@ -703,6 +839,20 @@ def hypsum(ctx, p, q, flags, coeffs, z, accurate_small=True, **kwargs):
                     magnitude_check[n] = d
                 extraprec = max(extraprec, d - prec + 60)
             max_total_jump += abs(d)
+        # At high precision, sum series with rational parameters and
+        # real argument by binary splitting, unless they converge too
+        # slowly for that to pay off
+        if prec >= libmp.HYPSUM_BS_PREC and key[3] == 'R':
+            for f in flags:
+                if f != 'Z' and f != 'Q':
+                    break
+            else:
+                rational = [(int(c), 1) if f == 'Z' else c._mpq_
+                    for f, c in zip(flags, coeffs)]
+                zv = libmp.mpf_hypsum_rational(p, q, rational, v, prec,
+                    round_nearest, kwargs.get('maxterms'), maxprec)
+                if zv is not None:
+                    return ctx.make_mpf(zv)
         while 1:
             if extraprec > maxprec:
                 raise ValueError(ctx._hypsum_msg % (prec, prec+extraprec))
@@ -1264,6 +1414,327 @@ def absmin(ctx, x):
     def absmax(ctx, x):
         return abs(ctx.convert(x))
 
+    def cache_info(ctx, name=None):
+        """
+        Returns statistics about the internal caches used by the
+        low-level functions (Bernoulli numbers, Taylor coefficients for
+        elementary functions and the gamma function, etc.). With no
+        argument, a dict mapping the name of each cache to its statistics
+        is returned; otherwise only the statistics for the named cache.
+        The statistics are given as a dict with the keys ``'hits'``,
+        ``'misses'``, ``'evictions'``, ``'size'`` (number of entries),
+        ``'bytes'`` (estimated memory usage), ``'maxsize'`` and
+        ``'maxbytes'`` (the limits, or None).
+
+        To keep lookups fast, hits are only counted for caches that
+        have a limit or for which counting has been enabled with
+        :func:`~mpmath.set_cache_stats`; otherwise ``'hits'`` is None.
+
+            >>> from mpmath import *
+            >>> mp.dps = 15
+            >>> mp.clear_caches()
+            >>> mp.set_cache_stats(True, 'bernoulli')
+            >>> _ = bernoulli(10); _ = bernoulli(8)
+            >>> info = mp.cache_info('bernoulli')
+            >>> info['hits'], info['misses'], info['size']
+            (1, 1, 1)
+            >>> mp.set_cache_stats(False, 'bernoulli')
+            >>> 'gamma_taylor' in mp.cache_info()
+            True
+
+        Limits can be set with :func:`~mpmath.set_cache_limit`.
+        """
+        return libmp.cache_info(name)
+
+    def clear_caches(ctx, name=None):
+        """
+        Empties the named internal cache, or all internal caches, and
+        resets their statistics (see :func:`~mpmath.cache_info`).
+        """
+        libmp.clear_caches(name)
+
+    def set_cache_limit(ctx, name, maxsize=None, maxbytes=None):
+        """
+        Limits the named internal cache (see :func:`~mpmath.cache_info`)
+        to at most *maxsize* entries and about *maxbytes* bytes of
+        memory. When a limit is exceeded, the least recently used entries
+        are discarded. None means no limit (the default).
+
+            >>> from mpmath import *
+            >>> mp.set_cache_limit('bernoulli', maxsize=2)
+            >>> for mp.dps in [15, 30, 60, 120]:
+            ...     _ = bernoulli(10)
+            ...
+            >>> mp.dps = 15
+            >>> mp.cache_info('bernoulli')['size']
+            2
+            >>> mp.set_cache_limit('bernoulli', None)
+
+        """
+        libmp.set_cache_limit(name, maxsize, maxbytes)
+
+    def set_cache_stats(ctx, enabled=True, name=None):
+        """
+        Enables (or disables) counting the hits of the named internal
+        cache, or of all internal caches, for :func:`~mpmath.cache_info`.
+        This adds some overhead to every lookup in the cache.
+        """
+        libmp.set_cache_stats(enabled, name)
+
+    def set_constant_workers(ctx, workers=0, minprec=None):
+        """
+        Enables computing the constants :data:`~mpmath.pi`, :data:`~mpmath.e`,
+        :data:`~mpmath.ln2`, :data:`~mpmath.catalan` and :data:`~mpmath.apery`
+        with *workers* processes at precisions of *minprec* bits and
+        higher (default 100000 bits). The constants are evaluated with
+        binary splitting; the top level of the splitting is distributed
+        over a :class:`multiprocessing.Pool` and the partial results are
+        merged in the current process. With *workers* = 0 (the default),
+        everything is computed in the current process.
+
+        Since the final merge and division are done serially, the
+        speedup is limited to a factor 2-3 even with many processes.
+        The computed values are cached as usual, so this only matters
+        the first time a constant is needed at a given precision::
+
+            >>> from mpmath import *
+            >>> mp.set_constant_workers(4)
+            >>> mp.dps = 50000
+            >>> x = +pi                                 # doctest: +SKIP
+            >>> mp.set_constant_workers(0)
+            >>> mp.dps = 15
+
+        """
+        libmp.set_bs_workers(workers, minprec)
+
+    def set_constant_store(ctx, directory, minprec=None):
+        """
+        Enables persistent storage of mathematical constants
+        (:data:`~mpmath.pi`, :data:`~mpmath.e`, :data:`~mpmath.ln2`,
+        :data:`~mpmath.euler`, :data:`~mpmath.catalan`, etc.) in the
+        given directory. Whenever a constant is needed at a precision of
+        *minprec* bits or higher (default 5000 bits) and has not been
+        computed yet in the current process, the stored value is
+        truncated to the required precision if it is accurate enough;
+        otherwise the constant is computed and the new value is written
+        back to the store. This way only the first job needing, say,
+        a million bits of `\pi` has to compute it.
+
+        Each constant is stored in a separate file with a versioned
+        header and a checksum; files that do not match are ignored.
+        Passing None disables the store. The initial directory is
+        taken from the environment variable ``MPMATH_CONSTANT_STORE``.
+
+            >>> from mpmath import *
+            >>> mp.set_constant_store('/tmp/mpmath-constants') # doctest: +SKIP
+            >>> mp.dps = 100000
+            >>> x = +pi                                  # doctest: +SKIP
+            >>> mp.dps = 15
+
+        """
+        libmp.set_constant_store(directory, minprec)
+
+    def _raw_value(ctx, x):
+        x = ctx.convert(x)
+        if hasattr(x, '_mpf_'):
+            return x._mpf_
+        if hasattr(x, '_mpc_'):
+            return x._mpc_
+        raise TypeError("cannot serialize %r" % x)
+
+    def dumps(ctx, x, out=None):
+        r"""
+        Serializes a number, a list or tuple of numbers, or a matrix in
+        a compact binary format, returning a bytes object. The format
+        stores the exponent and mantissa of each number in binary,
+        together with the matrix shape, so the values are restored
+        exactly (and much faster than with :mod:`pickle`) by
+        :func:`~mpmath.loads`::
+
+            >>> from mpmath import *
+            >>> mp.dps = 15; mp.pretty = False
+            >>> s = dumps(pi)
+            >>> len(s)
+            14
+            >>> loads(s)
+            mpf('3.1415926535897931')
+            >>> loads(dumps([1, 2+3j, 0.5]))
+            [mpf('1.0'), mpc(real='2.0', imag='3.0'), mpf('0.5')]
+            >>> A = matrix([[1, 2], [3, 4]])
+            >>> loads(dumps(A)) == A
+            True
+
+        If *out* is given, it must be a :class:`bytearray`; the data is
+        appended to it and *out* is returned. This allows filling a
+        buffer that is then written to a file, socket or shared memory
+        without copying. Pickling of :class:`mpf`, :class:`mpc` and
+        :class:`matrix` instances (including transfer to other
+        processes with :mod:`multiprocessing`) uses the same format.
+        """
+        ret = out is None
+        if ret:
+            out = bytearray()
+        if isinstance(x, ctx.matrix):
+            out += libmp.serial_header(b'm')
+            libmp.encode_varint(x.rows, out)
+            libmp.encode_varint(x.cols, out)
+            if x.sparse:
+                data = x._matrix__data
+                keys = sorted(data)
+                out.append(1)
+                libmp.encode_varint(len(keys), out)
+                for i, j in keys:
+                    libmp.encode_varint(i, out)
+                    libmp.encode_varint(j, out)
+                values = [data[key] for key in keys]
+            else:
+                out.append(0)
+                values = [v for row in x._get_rows() for v in row]
+            libmp.encode_values([ctx._raw_value(v) for v in values], out)
+        elif isinstance(x, (list, tuple)):
+            out += libmp.serial_header(b'l')
+            libmp.encode_values([ctx._raw_value(v) for v in x], out)
+        else:
+            x = ctx._raw_value(x)
+            if len(x) == 2:
+                out += libmp.serial_header(b'c')
+                libmp.encode_mpc(x, out)
+            else:
+                out += libmp.serial_header(b'f')
+                libmp.encode_mpf(x, out)
+        if ret:
+            return bytes(out)
+        return out
+
+    def loads(ctx, data):
+        """
+        Restores a number, list or matrix serialized with
+        :func:`~mpmath.dumps` from a bytes object or any other object
+        supporting the buffer protocol. Raises ValueError if the data
+        is not valid.
+        """
+        data = libmp.libserial.as_buffer(data)
+        try:
+            kind, offset = libmp.read_serial_header(data)
+            if kind == b'f':
+                v, offset = libmp.decode_mpf(data, offset)
+                result = ctx.make_mpf(v)
+            elif kind == b'c':
+                v, offset = libmp.decode_mpc(data, offset)
+                result = ctx.make_mpc(v)
+            elif kind == b'l':
+                values, offset = libmp.decode_values(data, offset)
+                result = [ctx._make_raw(v) for v in values]
+            elif kind == b'm':
+                rows, offset = libmp.decode_varint(data, offset)
+                cols, offset = libmp.decode_varint(data, offset)
+                sparse = data[offset]
+                offset += 1
+                if sparse:
+                    n, offset = libmp.decode_varint(data, offset)
+                    keys = []
+                    for k in xrange(n):
+                        i, offset = libmp.decode_varint(data, offset)
+                        j, offset = libmp.decode_varint(data, offset)
+                        keys.append((i, j))
+                values, offset = libmp.decode_values(data, offset)
+                values = [ctx._make_raw(v) for v in values]
+                result = ctx.matrix(rows, cols, sparse=bool(sparse))
+                if sparse:
+                    for key, v in zip(keys, values):
+                        result[key] = v
+                else:
+                    if len(values) != rows*cols:
+                        raise ValueError("wrong number of matrix elements")
+                    result._set_rows([values[i*cols:(i+1)*cols] \
+                        for i in xrange(rows)])
+            else:
+                raise ValueError("unknown object type")
+        except IndexError:
+            raise ValueError("truncated data")
+        if offset != len(data):
+            raise ValueError("trailing data")
+        return result
+
+    def _make_raw(ctx, v):
+        if len(v) == 2:
+            return ctx.make_mpc(v)
+        return ctx.make_mpf(v)
+
+    def _raw_rows(ctx, rows):
+        """
+        Return the raw values of a matrix given as a list of rows, with
+        complex values as mpc tuples and real values as mpf tuples, and
+        lists of flags telling which rows and columns contain complex
+        values. Returns None if the matrix contains other types.
+        """
+        mpf = ctx.mpf
+        mpc = ctx.mpc
+        raw = []
+        rflags = []
+        cflags = [False] * (rows and len(rows[0]))
+        for row in rows:
+            rawrow = []
+            rflag = False
+            for j, x in enumerate(row):
+                t = type(x)
+                if t is mpf:
+                    rawrow.append(x._mpf_)
+                elif t is mpc:
+                    rawrow.append(x._mpc_)
+                    rflag = cflags[j] = True
+                else:
+                    return None
+            raw.append(rawrow)
+            rflags.append(rflag)
+        return raw, rflags, cflags
+
+    def _mul_rows(ctx, A, B, method='auto'):
+        a = ctx._raw_rows(A)
+        b = ctx._raw_rows(B)
+        if a is None or b is None:
+            return StandardBaseContext._mul_rows(ctx, A, B, method)
+        a, arflags, acflags = a
+        b, brflags, bcflags = b
+        prec, rounding = ctx._prec_rounding
+        if not (True in arflags or True in bcflags):
+            C = libmp.mpf_matrix_mul(a, b, prec, rounding, method)
+            return [[ctx.make_mpf(c) for c in row] for row in C]
+        # an entry of the product is complex if the row of A or the
+        # column of B contains a complex value
+        to_mpc = lambda x: x if len(x) == 2 else (x, fzero)
+        a = [[to_mpc(x) for x in row] for row in a]
+        b = [[to_mpc(x) for x in row] for row in b]
+        C = libmp.mpc_matrix_mul(a, b, prec, rounding, method)
+        return [[ctx.make_mpc(c) if (rflag or cflag) else ctx.make_mpf(c[0])
+                 for c, cflag in zip(row, bcflags)]
+                for row, rflag in zip(C, arflags)]
+
+    def _LU_decomp_rows(ctx, rows, tol):
+        a = ctx._raw_rows(rows)
+        if a is not None and not (True in a[1]) and hasattr(tol, '_mpf_'):
+            a = a[0]
+            prec, rounding = ctx._prec_rounding
+            p = libmp.mpf_lu_decomp(a, tol._mpf_, prec, rounding)
+            if p is not None:
+                for row, rawrow in zip(rows, a):
+                    row[:] = [ctx.make_mpf(x) for x in rawrow]
+                return p
+        return StandardBaseContext._LU_decomp_rows(ctx, rows, tol)
+
+    def _LU_solve(ctx, A, p, B):
+        a = ctx._raw_rows(A._get_rows())
+        b = ctx._raw_rows(B._get_rows())
+        if a is not None and b is not None and \
+            not (True in a[1] or True in b[1]):
+            prec, rounding = ctx._prec_rounding
+            X = libmp.mpf_lu_solve(a[0], p, b[0], prec, rounding)
+            if X is not None:
+                x = ctx.matrix(B.rows, B.cols)
+                x._set_rows([[ctx.make_mpf(v) for v in row] for row in X])
+                return x
+        return StandardBaseContext._LU_solve(ctx, A, p, B)
+
     def _as_points(ctx, x):
         # XXX: remove this?
         if hasattr(x, '_mpi_'):
@@ -1298,6 +1769,37 @@ def _zetasum_fast(ctx, s, a, n, derivatives=[0], reflect=False):
         ys = [ctx.make_mpc(y) for y in ys]
         return xs, ys
 
+    def _zetasum_grid(ctx, t0, dt, lengths):
+        t0 = ctx.convert(t0)
+        dt = ctx.convert(dt)
+        if not (hasattr(t0, "_mpf_") and hasattr(dt, "_mpf_")):
+            raise NotImplementedError
+        prec = ctx._prec
+        sums = libmp.mpc_zetasum_grid(t0._mpf_, dt._mpf_, lengths, prec)
+        return [ctx.make_mpc(x) for x in sums]
+
+    def _zetasum_multi(ctx, ss, a, n, derivatives):
+        if ctx.isint(a):
+            a = int(a)
+            if a < 1:
+                raise NotImplementedError
+        else:
+            a = ctx.convert(a)
+            if not (hasattr(a, "_mpf_") and a > 0):
+                raise NotImplementedError
+            a = a._mpf_
+        raw = []
+        for s in ss:
+            if hasattr(s, "_mpf_"):
+                raw.append((s._mpf_, libmp.fzero))
+            elif hasattr(s, "_mpc_"):
+                raw.append(s._mpc_)
+            else:
+                raise NotImplementedError
+        prec = ctx._prec
+        sums = libmp.mpc_zetasum_multi(raw, a, n, derivatives, prec)
+        return [[ctx.make_mpc(x) for x in xs] for xs in sums]
+
 class PrecisionManager:
     def __init__(self, ctx, precfun, dpsfun, normalize_output=False):
         self.ctx = ctx
@@ -5,6 +5,7 @@
 from .libmp import (MPZ, MPZ_ZERO, MPZ_ONE, int_types, repr_dps,
     round_floor, round_ceiling, dps_to_prec, round_nearest, prec_to_dps,
     ComplexResult, to_pickable, from_pickable, normalize,
+    mpf_to_bytes, mpf_from_bytes, mpc_to_bytes, mpc_from_bytes,
     from_int, from_float, from_str, to_int, to_float, to_str,
     from_rational, from_man_exp,
     fone, fzero, finf, fninf, fnan,
@@ -128,8 +129,13 @@ def mpf_convert_lhs(cls, x):
 
     conjugate = lambda self: self
 
-    def __getstate__(self): return to_pickable(self._mpf_)
-    def __setstate__(self, val): self._mpf_ = from_pickable(val)
+    def __getstate__(self): return mpf_to_bytes(self._mpf_)
+    def __setstate__(self, val):
+        # Tuples are written by older versions
+        if type(val) is tuple:
+            self._mpf_ = from_pickable(val)
+        else:
+            self._mpf_ = mpf_from_bytes(val)
 
     def __repr__(s):
         if s.context.pretty:
@@ -379,10 +385,14 @@ def __new__(cls, real=0, imag=0):
     imag = property(lambda self: self.context.make_mpf(self._mpc_[1]))
 
     def __getstate__(self):
-        return to_pickable(self._mpc_[0]), to_pickable(self._mpc_[1])
+        return mpc_to_bytes(self._mpc_)
 
     def __setstate__(self, val):
-        self._mpc_ = from_pickable(val[0]), from_pickable(val[1])
+        # Tuples are written by older versions
+        if type(val) is tuple:
+            self._mpc_ = from_pickable(val[0]), from_pickable(val[1])
+        else:
+            self._mpc_ = mpc_from_bytes(val)
 
     def __repr__(s):
         if s.context.pretty:
@@ -978,9 +988,15 @@ def _wrap_libmp_function(ctx, mpf_f, mpc_f=None, mpi_f=None, doc="<no doc>"):
         the input; the exception is that propagation from mpf to mpc is possible
         by raising ComplexResult.
 
+        The returned function has an attribute batch which evaluates
+        the function at each element of a list. The precision is
+        resolved once, and real arguments are passed directly to mpf_f.
+
         """
         def f(x, **kwargs):
             if type(x) not in ctx.types:
+                if isinstance(x, ctx.jet):
+                    return x._function(name)
                 x = ctx.convert(x)
             prec, rounding = ctx._prec_rounding
             if kwargs:
@@ -999,8 +1015,35 @@ def f(x, **kwargs):
             elif hasattr(x, '_mpc_'):
                 return ctx.make_mpc(mpc_f(x._mpc_, prec, rounding))
             raise NotImplementedError("%s of a %s" % (name, type(x)))
+        def batch(xs, **kwargs):
+            prec, rounding = ctx._prec_rounding
+            if kwargs:
+                prec = kwargs.get('prec', prec)
+                if 'dps' in kwargs:
+                    prec = dps_to_prec(kwargs['dps'])
+                rounding = kwargs.get('rounding', rounding)
+            types = ctx.types
+            convert = ctx.convert
+            make_mpf = ctx.make_mpf
+            make_mpc = ctx.make_mpc
+            mpf_type = ctx.mpf
+            out = []
+            append = out.append
+            for x in xs:
+                if type(x) is mpf_type:
+                    try:
+                        append(make_mpf(mpf_f(x._mpf_, prec, rounding)))
+                        continue
+                    except ComplexResult:
+                        pass
+                elif type(x) not in types and isinstance(x, ctx.jet):
+                    append(x._function(name))
+                    continue
+                append(f(x, prec=prec, rounding=rounding))
+            return out
         name = mpf_f.__name__[4:]
         f.__doc__ = function_docs.__dict__.get(name, "Computes the %s of x" % doc)
+        f.batch = batch
         return f
 
     # Called by SpecialFunctions.__init__()
@@ -1009,7 +1052,13 @@ def _wrap_specfun(cls, name, f, wrap):
         if wrap:
             def f_wrapped(ctx, *args, **kwargs):
                 convert = ctx.convert
-                args = [convert(a) for a in args]
+                try:
+                    args = [convert(a) for a in args]
+                except TypeError:
+                    # jets are passed on to the functions in terms
+                    # of which f is written
+                    args = [a if isinstance(a, ctx.jet) else convert(a)
+                        for a in args]
                 prec = ctx.prec
                 try:
                     ctx.prec += 10
@@ -2253,6 +2253,11 @@
 
 For larger `n`, `B_n` is evaluated in terms of the Riemann zeta
 function.
+
+To compute many Bernoulli numbers, particularly for large `n` or at
+high precision, it is much faster to compute them all at once with
+:func:`~mpmath.bernoulli_table`. Once such a table has been computed,
+:func:`~mpmath.bernoulli` takes its values from it.
 """
 
 stieltjes = r"""
@@ -6832,6 +6837,42 @@
 
 """
 
+siegelz_grid = r"""
+Computes the Z-function (see :func:`~mpmath.siegelz`) at the
+*count* equally spaced points `t_k = t_0 + k \, \Delta t`,
+`0 \le k < \mathrm{count}`, returning a list of the values::
+
+    >>> from mpmath import *
+    >>> mp.dps = 15; mp.pretty = True
+    >>> siegelz_grid(1000000, 0.25, 4)
+    [-2.8061338784307, -3.7807274370661, -0.935580651567935, 0.493027469512516]
+    >>> [siegelz(1000000 + 0.25*k) for k in range(4)]
+    [-2.8061338784307, -3.7807274370661, -0.935580651567935, 0.493027469512516]
+
+The points `t_k` are computed exactly. When all `|t_k|` exceed
+`500 \cdot` ``mp.prec`` (about `26500` at the default precision),
+where :func:`~mpmath.siegelz` uses the Riemann-Siegel formula,
+evaluating on a grid is faster than evaluating at each point
+separately: the data of the Riemann-Siegel expansion that only depends
+on the size of `t` is shared between the points, and the terms
+`n^{-1/2-it}` of the main sum are updated from one point to the next
+by multiplying them by `n^{-i \Delta t}`. At the default precision,
+the speedup for a few hundred points is about 5 to 7 for `t` between
+`10^5` and `10^8` (the per-point part of the Riemann-Siegel correction
+remains). For smaller `t`, :func:`~mpmath.siegelz` is simply called
+at each point. This makes
+:func:`~mpmath.siegelz_grid` suitable for scanning an interval for
+sign changes of `Z(t)`, i.e. for zeros of the Riemann zeta function
+on the critical line::
+
+    >>> zs = siegelz_grid(1000000, 0.25, 20)
+    >>> sum(1 for (a, b) in zip(zs, zs[1:]) if a*b < 0)
+    8
+    >>> nzeros(1000004.75) - nzeros(1000000)
+    8
+
+"""
+
 riemannr = r"""
 Evaluates the Riemann R function, a smooth approximation of the
 prime counting function `\pi(x)` (see :func:`~mpmath.primepi`). The Riemann
@@ -6931,10 +6972,14 @@
 the number of primes less than or equal to `x`. The argument
 `x` may be fractional.
 
-The prime counting function is very expensive to evaluate
-precisely for large `x`, and the present implementation is
-not optimized in any way. For numerical approximation of the
-prime counting function, it is better to use :func:`~mpmath.primepi2`
+The prime counting function is expensive to evaluate
+precisely for large `x`. Small values are found by counting the
+entries of a sieve of Eratosthenes; for larger `x`, the
+combinatorial method of Meissel and Lehmer is used, which
+requires time and memory roughly proportional to `x^{2/3}`.
+This makes it feasible to compute `\pi(x)` for `x` up to about
+`10^{12}`. For numerical approximation of the prime counting
+function, it is better to use :func:`~mpmath.primepi2`
 or :func:`~mpmath.riemannr`.
 
 Some values of the prime counting function::
@@ -6946,6 +6991,8 @@
     2
     >>> primepi(100000)
     9592
+    >>> primepi(10**9)
+    50847534
 
 """
 
@@ -8982,6 +9029,42 @@
 
 """
 
+zeta_batch = r"""
+Evaluates the Hurwitz zeta function `\zeta(s,a)` (see :func:`~mpmath.zeta`)
+for each `s` in the list *ss*, with `a` fixed. If *derivatives* is an
+integer `d`, the list of the values `\zeta^{(d)}(s,a)` is returned;
+if it is a list of integers, a list containing the list of the
+requested derivatives for each `s` is returned::
+
+    >>> from mpmath import *
+    >>> mp.dps = 15; mp.pretty = True
+    >>> zeta_batch([2, 3, 4], 0.5)
+    [4.93480220054468, 8.41439832211716, 16.2348485056671]
+    >>> [zeta(s, 0.5) for s in [2, 3, 4]]
+    [4.93480220054468, 8.41439832211716, 16.2348485056671]
+    >>> zeta_batch([0.5+14j, 2], 3, [0, 1, 2])      # doctest: +NORMALIZE_WHITESPACE
+    [[(-0.298050019079162 - 0.298183481088673j),
+      (0.277095431243248 + 0.33954849597911j),
+      (-0.241799206744273 - 0.383136589994567j)],
+     [0.394934066848226, -0.764261459175857, 1.86916698081935]]
+    >>> [zeta(0.5+14j, 3, d) for d in range(3)]     # doctest: +NORMALIZE_WHITESPACE
+    [(-0.298050019079162 - 0.298183481088673j),
+     (0.277095431243248 + 0.33954849597911j),
+     (-0.241799206744273 - 0.383136589994567j)]
+
+For positive real `a`, all the points are evaluated together using
+the Euler-Maclaurin formula. The logarithms `\log(a+k)` in the
+truncated sum `\sum_k (a+k)^{-s}` and the Bernoulli number terms of
+the tail are computed once and shared by all the `s` values, and
+all the requested derivatives are obtained at once by expanding the
+tail as a power series in `s`. This is considerably faster than
+calling :func:`~mpmath.zeta` at each point, particularly when several
+derivatives are wanted or `a` is not an integer. Points with
+`\Re(s) < 0`, as well as points where :func:`~mpmath.zeta` uses the
+Riemann-Siegel formula, are evaluated separately with
+:func:`~mpmath.zeta`.
+"""
+
 dirichlet = r"""
 Evaluates the Dirichlet L-function
 
@@ -72,6 +72,8 @@ def _gamma_upper_int(ctx, z, a): raise NotImplementedError
     def _expint_int(ctx, n, z): raise NotImplementedError
     def _zeta(ctx, s): raise NotImplementedError
     def _zetasum_fast(ctx, s, a, n, derivatives, reflect): raise NotImplementedError
+    def _zetasum_grid(ctx, t0, dt, lengths): raise NotImplementedError
+    def _zetasum_multi(ctx, ss, a, n, derivatives): raise NotImplementedError
     def _ei(ctx, z): raise NotImplementedError
     def _e1(ctx, z): raise NotImplementedError
     def _ci(ctx, z): raise NotImplementedError
@@ -219,6 +221,8 @@ def _rootof1(ctx, k, n):
 @defun
 def root(ctx, x, n, k=0):
     n = int(n)
+    if isinstance(x, ctx.jet):
+        return x._root(n, k)
     x = ctx.convert(x)
     if k:
         # Special case: there is an exact real root
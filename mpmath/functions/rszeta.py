@@ -11,15 +11,18 @@
   for  0 <= k <= der. Used by zeta_offline and z_offline
 
 * Rzeta_set(s, derivatives) computes Rzeta^(k)(s) for given derivatives, used by
-  z_half(t,k) and zeta_half
+  z_half(t,k) and zeta_half. It is split into Rzeta_plan (the part shared
+  by nearby points), Rzeta_correction and Rzeta_combine
 
 * z_offline(w,k): Z(w) and its derivatives of order k <= 4
 * z_half(t,k): Z(t) (Riemann Siegel function) and its derivatives of order k <= 4
+* z_half_grid(ts, dt): Z(t) at the equally spaced points ts, sharing the work
 * zeta_offline(s): zeta(s) and its derivatives of order k<= 4
 * zeta_half(1/2+it,k):  zeta(s)  and its derivatives of order k<= 4
 
 * rs_zeta(s,k=0) Computes zeta^(k)(s)   Unifies zeta_half and zeta_offline
 * rs_z(w,k=0)    Computes Z^(k)(w)      Unifies z_offline and z_half
+* rs_z_grid(ts, dt) Computes Z(t) for t in ts, all with the same sign
 ----------------------------------------------------------------------
 
 This program uses Riemann-Siegel expansion even to compute
@@ -781,7 +784,6 @@ def Rzeta_set(ctx, s, derivatives=[0]):
 
     To this function we apply the Riemann-Siegel expansion.
     """
-    der = max(derivatives)
     # First we take the value of ctx.prec
     # During the computation we will change ctx.prec, and finally we will
     # restaurate the initial value
@@ -789,6 +791,43 @@ def Rzeta_set(ctx, s, derivatives=[0]):
     # Take the real and imaginary part of s
     t = ctx._im(s)
     sigma = ctx._re(s)
+    try:
+        plan = Rzeta_plan(ctx, t, sigma, derivatives)
+        N, rssum, S3 = Rzeta_correction(ctx, plan, t)
+        # COMPUTING S1 the zetasum
+        # See II Section 3.18
+        ctx.prec = 15
+        wpsum = 4 + ctx.mag((N+ctx.power(N,1-sigma))*ctx.ln(N)/plan['eps1'])
+        ctx.prec = wpsum + 10
+        '''
+        # This can be improved
+        S1 = {}
+        for chi in derivatives:
+            S1[chi] = 0
+        for n in range(1,int(N)+1):
+            ln = ctx.ln(n)
+            expn = ctx.exp(-ln*(sigma+ctx.j*t))
+            for chi in derivatives:
+                term = ctx.power(-ln, chi)*expn
+                S1[chi] += term
+        '''
+        S1 = ctx._zetasum(s, 1, int(N)-1, derivatives)[0]
+        return Rzeta_combine(ctx, plan, S1, rssum, S3)
+    finally:
+        ctx.prec = wpinitial
+
+def Rzeta_plan(ctx, t, sigma, derivatives=[0]):
+    r"""
+    Computes the part of the Riemann-Siegel expansion of `R(\sigma+it)`
+    that only depends on `\sigma`, on ctx.prec and on the size of `t`:
+    the number of terms and the working precisions, the coefficients of
+    the derivatives of `F` (see :func:`coef`) and the numbers `d_{n,k}`.
+
+    The result can be reused for all `t` with the same ``plan['key']``.
+    The precision ctx.prec is not restored.
+    """
+    der = max(derivatives)
+    wpinitial = ctx.prec
     # Now compute several parameter that appear on the program
     ctx.prec = 15
     a = ctx.sqrt(t/(2*ctx.pi))     #  Careful
@@ -831,7 +870,6 @@ def Rzeta_set(ctx, s, derivatives=[0]):
     #  an additional technical  condition in Section 3.17 Proposition 17
     if ((3*L >= 2*a*a/25.) or (3*L+2+sigma<0) or (abs(sigma)> a/2.)):
         #print 'Error Riemann-Siegel can not compute with such precision'
-        ctx.prec = wpinitial
         raise NotImplementedError("Riemann-Siegel can not compute with such precision")
 
     #  INITIALIZATION (CONTINUATION)
@@ -847,9 +885,6 @@ def Rzeta_set(ctx, s, derivatives=[0]):
 
     # COMPUTING M.  NUMBER OF DERIVATIVES Fp[m] TO COMPUTE
     M = aux_M_Fp(ctx, A, eps4, a, B1, L)
-    Fp = {}
-    for n in range(M, 3*L-2):
-        Fp[n] = 0
 
     #  But I have not seen an instance of  M != 3*L-3
     #
@@ -883,22 +918,6 @@ def Rzeta_set(ctx, s, derivatives=[0]):
     wpfp = ctx.mag(44*J)
     for m in range(0, twenty):
         wpfp = max(wpfp, ctx.mag(aux*ctx.gamma(m+1)/eps5[m]))
-    # COMPUTING N AND p
-    #  See II Section
-    ctx.prec = wpfp + ctx.mag(t) + 20
-    a = ctx.sqrt(t/(2*ctx.pi))
-    N = ctx.floor(a)
-    p = 1-2*(a-N)
-
-    # now we get a rounded version of p to the precision wpfp
-    # this possibly is not necessary
-    num = ctx.floor(p*(ctx.mpf(2)**wpfp))
-    difference = p * (ctx.mpf(2)**wpfp)-num
-    if difference < 0.5:
-        num = num
-    else:
-        num = num+1
-    p = ctx.convert(num * (ctx.mpf(2)**(-wpfp)))
 
     # COMPUTING THE COEFFICIENTS c[n] = cc[n]
     # We shall use the notation cc[n], since there is
@@ -912,19 +931,24 @@ def Rzeta_set(ctx, s, derivatives=[0]):
     eps6 = ctx.power(2*ctx.pi, J)/(ctx.gamma(J+1)*3*J)
 
     #  Now we compute the coefficients
-    cc={}
-    cont={}
     cont, pipowers = coef(ctx, J, eps6)
     cc = cont.copy()   # we need a copy since we have
-    Fp={}
-    for n in range(M, 3*L-2):
-        Fp[n] = 0
+    # Fcoef[m] are the Taylor coefficients of the m-th derivative
+    # of F, evaluated at p by Rzeta_correction(). Since F is even,
+    # only the coefficients of the powers p**k with k = m (mod 2)
+    # are nonzero, and only these are kept. Except in fixed precision,
+    # the real and imaginary parts are kept as fixed-point integers
+    # with wpF bits; the guard bits cover the J roundings of the
+    # Horner scheme in Rzeta_correction()
+    wpF = wpfp + J.bit_length() + 10
+    Fcoef = []
     ctx.prec = wpfp
     for m in range(0,M+1):
-        sumP = 0
-        for k in range(2*J-m-1,-1,-1):
-            sumP = (sumP * p) + cc[k]
-        Fp[m] = sumP
+        coefs = [ctx.convert(cc[k]) for k in range(m%2,2*J-m,2)]
+        if not ctx._fixed_precision:
+            coefs = ([ctx.to_fixed(ctx._re(c), wpF) for c in coefs],
+                [ctx.to_fixed(ctx._im(c), wpF) for c in coefs])
+        Fcoef.append(coefs)
         # preparation of the new coefficients
         for k in range(0, 2*J-m-1):
             cc[k] = (k+1) * cc[k+1]
@@ -940,7 +964,7 @@ def Rzeta_set(ctx, s, derivatives=[0]):
     const = ctx.ln(8/(ctx.pi*ctx.pi*a*a*B1*B1)) /2
     for n in range(0,L):
         d3 = ctx.mag(ctx.sqrt(ctx.gamma(n-0.5)))-ctx.floor(n*const)+d2
-        wpd[n] = max(d3,d1)
+        wpd[n] = int(max(d3,d1))
 
     # procedure of II Section 3.17
     ctx.prec = wpd[1]+10
@@ -990,12 +1014,107 @@ def Rzeta_set(ctx, s, derivatives=[0]):
     c4 = ctx.mag(B1*a*math.sqrt(ctx.pi))-1
     for k in range(0,L):
         c3 = c2 - k*c4+ctx.mag(ctx.fac(k+0.5))/2.
-        wptcoef[k] = max(c1,c3-ctx.mag(eps4)+1)+1 +10
-        wpterm[k] = max(c1,ctx.mag(L+2)+c3-ctx.mag(eps3)+1)+1 +10
+        wptcoef[k] = int(max(c1,c3-ctx.mag(eps4)+1)+1 +10)
+        wpterm[k] = int(max(c1,ctx.mag(L+2)+c3-ctx.mag(eps3)+1)+1 +10)
 
     # check of power of pi
 
+    # the factors d[mu,k,ell]/(pi**(2k-ell) (2j)**ell) of the
+    # fortcoef[mu,k,ell] computed by Rzeta_correction()
+    dcoef = {}
+    for mu in derivatives:
+        for k in range(0,L):
+            ctx.prec = wptcoef[k]
+            for ell in range(0,3*k//2+1):
+                dcoef[mu,k,ell] = d[mu,k,ell]/pipowers[2*k-ell]
+                dcoef[mu,k,ell] = dcoef[mu,k,ell]/((2*ctx.j)**ell)
+
+    # precision of rssum
+    # See II Section 3.5
+    ctx.prec=15
+    rsbound = math.sqrt(ctx.pi) * c /(b*a)
+    ctx.prec=15
+    wprssum = ctx.mag(4.4*((L+3)**2)*rsbound / eps2)
+    wprssum = max(wprssum, ctx.mag(10*(L+1)))
+
+    plan = {'derivatives':list(derivatives), 'wpinitial':wpinitial,
+        'sigma':sigma, 'eps':eps, 'eps1':eps1, 'L':L, 'M':M,
+        'wpfp':wpfp, 'wpF':wpF, 'Fcoef':Fcoef, 'dcoef':dcoef, 'wptcoef':wptcoef,
+        'wpterm':wpterm, 'wprssum':wprssum}
+    plan['key'] = (L, M, J, wpfp, wprssum,
+        tuple(wpd[n] for n in range(L)),
+        tuple(wptcoef[k] for k in range(L)),
+        tuple(wpterm[k] for k in range(L)))
+    return plan
+
+def Rzeta_correction(ctx, plan, t):
+    r"""
+    Given a plan computed by :func:`Rzeta_plan`, computes the length
+    `N` of the main sum and the quantities ``rssum`` and `S_3` of the
+    Riemann-Siegel correction at `\sigma+it`, so that the derivatives
+    of `R` are ``S1[chi] + rssum[chi]*S3`` where ``S1`` is the sum of
+    `n^{-s}` for `n \le N` (see :func:`Rzeta_combine`).
+    The precision ctx.prec is not restored.
+    """
+    derivatives = plan['derivatives']
+    sigma = plan['sigma']
+    L = plan['L']
+    M = plan['M']
+    wpfp = plan['wpfp']
+    wptcoef = plan['wptcoef']
+    wpterm = plan['wpterm']
+    # COMPUTING N AND p
+    #  See II Section
+    ctx.prec = wpfp + ctx.mag(t) + 20
+    a = ctx.sqrt(t/(2*ctx.pi))
+    N = ctx.floor(a)
+    p = 1-2*(a-N)
+
+    # now we get a rounded version of p to the precision wpfp
+    # this possibly is not necessary
+    num = ctx.floor(p*(ctx.mpf(2)**wpfp))
+    difference = p * (ctx.mpf(2)**wpfp)-num
+    if difference < 0.5:
+        num = num
+    else:
+        num = num+1
+    p = ctx.convert(num * (ctx.mpf(2)**(-wpfp)))
+
+    # COMPUTING THE DERIVATIVES Fp[m] OF F AT p
+    # See II Section 3.14
+    # p = num/2**wpfp exactly, so the series are summed in fixed
+    # point with wpF bits (see Rzeta_plan)
+    Fp={}
+    for n in range(M, 3*L-2):
+        Fp[n] = 0
+    ctx.prec = wpfp
+    Fcoef = plan['Fcoef']
+    if ctx._fixed_precision:
+        p2 = p*p
+        for m in range(0,M+1):
+            sumP = 0
+            for c in reversed(Fcoef[m]):
+                sumP = (sumP * p2) + c
+            if m % 2:
+                sumP = sumP * p
+            Fp[m] = sumP
+    else:
+        wpF = plan['wpF']
+        pfixed = int(num) << (wpF-wpfp)
+        p2fixed = (pfixed*pfixed) >> wpF
+        for m in range(0,M+1):
+            parts = []
+            for coefs in Fcoef[m]:
+                sumP = 0
+                for c in reversed(coefs):
+                    sumP = ((sumP*p2fixed) >> wpF) + c
+                if m % 2:
+                    sumP = (sumP*pfixed) >> wpF
+                parts.append(ctx.ldexp(sumP, -wpF))
+            Fp[m] = ctx.mpc(*parts)
+
     # computing the fortcoef[mu,k,ell]
+    dcoef = plan['dcoef']
     fortcoef={}
     for mu in derivatives:
         for k in range(0,L):
@@ -1006,8 +1125,7 @@ def Rzeta_set(ctx, s, derivatives=[0]):
         for k in range(0,L):
             ctx.prec = wptcoef[k]
             for ell in range(0,3*k//2+1):
-                fortcoef[mu,k,ell]=d[mu,k,ell]*Fp[3*k-2*ell]/pipowers[2*k-ell]
-                fortcoef[mu,k,ell]=fortcoef[mu,k,ell]/((2*ctx.j)**ell)
+                fortcoef[mu,k,ell]=dcoef[mu,k,ell]*Fp[3*k-2*ell]
 
     def trunc_a(t):
         wp = ctx.prec
@@ -1026,14 +1144,20 @@ def trunc_a(t):
     aa = trunc_a(t)
     la = -ctx.ln(aa)
 
+    # the factors binomial(chi,mu) * la**mu do not depend on k, ell
+    ctx.prec = max(wptcoef.values())
+    lafactor = {}
+    for chi in derivatives:
+        for mu in range(0, chi+1):
+            lafactor[chi,mu] = ctx.binomial(chi,mu) * la**mu
+
     for chi in derivatives:
         for k in range(0,L):
             ctx.prec = wptcoef[k]
             for ell in range(0,3*k//2+1):
                 tcoef[chi,k,ell] = 0
                 for mu in range(0, chi+1):
-                    tcoefter = ctx.binomial(chi,mu) * la**mu * \
-                        fortcoef[chi-mu,k,ell]
+                    tcoefter = lafactor[chi,mu] * fortcoef[chi-mu,k,ell]
                     tcoef[chi,k,ell] += tcoefter
 
     # COMPUTING tv[k,ell]
@@ -1074,12 +1198,7 @@ def trunc_a(t):
     # COMPUTING  rssum
     # See II Section 3.5
     rssum={}
-    ctx.prec=15
-    rsbound = math.sqrt(ctx.pi) * c /(b*a)
-    ctx.prec=15
-    wprssum = ctx.mag(4.4*((L+3)**2)*rsbound / eps2)
-    wprssum = max(wprssum, ctx.mag(10*(L+1)))
-    ctx.prec = wprssum
+    ctx.prec = plan['wprssum']
     for chi in derivatives:
         rssum[chi] = 0
         for k in range(1,L+1):
@@ -1089,7 +1208,7 @@ def trunc_a(t):
     # See II Section 3.19
     ctx.prec = 15
     A2 = 2**(ctx.mag(rssum[0]))
-    eps8 = eps/(3* A2)
+    eps8 = plan['eps']/(3* A2)
     T = t * ctx.ln(t/(2*ctx.pi))
     wps3 = 5 + ctx.mag((1+(2/eps8)*ctx.power(a,-sigma))*T)
 
@@ -1100,38 +1219,25 @@ def trunc_a(t):
     a = trunc_a(t)
     asigma = ctx.power(a, -sigma)
     S3 = ((-1)**(N-1)) * asigma * U
+    return N, rssum, S3
 
-    # COMPUTING S1 the zetasum
-    # See II Section 3.18
-    ctx.prec = 15
-    wpsum = 4 + ctx.mag((N+ctx.power(N,1-sigma))*ctx.ln(N)/eps1)
-
-    ctx.prec = wpsum + 10
-    '''
-    # This can be improved
-    S1 = {}
-    for chi in derivatives:
-        S1[chi] = 0
-    for n in range(1,int(N)+1):
-        ln = ctx.ln(n)
-        expn = ctx.exp(-ln*(sigma+ctx.j*t))
-        for chi in derivatives:
-            term = ctx.power(-ln, chi)*expn
-            S1[chi] += term
-    '''
-    S1 = ctx._zetasum(s, 1, int(N)-1, derivatives)[0]
-
+def Rzeta_combine(ctx, plan, S1, rssum, S3):
+    r"""
+    Adds the main sum ``S1`` and the correction of
+    :func:`Rzeta_correction`, giving the derivatives of `R(s)`.
+    """
     # END OF COMPUTATION
     #  See II Section 3.1
+    derivatives = plan['derivatives']
+    der = max(derivatives)
     ctx.prec = 15
     absS1 = abs(S1[der])
     absS2 = abs(rssum[der] * S3)
-    wpend = max(6, wpinitial + ctx.mag(6*(3*absS1+7*absS2)))
+    wpend = max(6, plan['wpinitial'] + ctx.mag(6*(3*absS1+7*absS2)))
     ctx.prec = wpend
     rz = {}
     for chi in derivatives:
         rz[chi] = S1[chi]+rssum[chi]*S3
-    ctx.prec = wpinitial
     return rz
 
 
@@ -1175,6 +1281,73 @@ def z_half(ctx,t,der=0):
     ctx.prec = wpinitial
     return ctx._re(z)
 
+def z_half_grid(ctx, ts, dt):
+    r"""
+    Computes Z(t) for the positive points ts[k] = ts[0] + k*dt.
+    Consecutive points share the data of Rzeta_plan() as long as they
+    have the same key, and the main sums are computed together by
+    ctx._zetasum_grid(), which updates them from point to point.
+    """
+    wpinitial = ctx.prec
+    count = len(ts)
+    sigma = ctx.mpf('0.5')
+    try:
+        ctx.prec = 15
+        tt = max(ts[0], ts[-1])/(2*ctx.pi)
+        wptheta = wpinitial +1 + ctx.mag(3*(tt**1.5)*ctx.ln(tt))
+        wpz = wpinitial + 1 + ctx.mag(12*tt*ctx.ln(tt))
+        # Bisect the grid until both ends of each piece have the
+        # same plan; since the parameters of the plan are monotonic
+        # in t, the plan is then valid for the whole piece
+        cache = {}
+        def plan(k):
+            if k not in cache:
+                ctx.prec = wpz
+                cache[k] = Rzeta_plan(ctx, ts[k], sigma)
+            return cache[k]
+        plans = [None] * count
+        pieces = [(0, count-1)]
+        while pieces:
+            i, j = pieces.pop()
+            if plan(i)['key'] == plan(j)['key']:
+                for k in range(i, j+1):
+                    plans[k] = cache[i]
+            elif j - i <= 1:
+                plans[i] = cache[i]
+                plans[j] = cache[j]
+            else:
+                m = (i+j)//2
+                pieces.append((i, m))
+                pieces.append((m, j))
+        corrections = []
+        for k in range(count):
+            ctx.prec = wpz
+            corrections.append(Rzeta_correction(ctx, plans[k], ts[k]))
+        # The main sums, with the precision needed for the largest one
+        # (see Rzeta_set)
+        lengths = [int(N) for (N, rssum, S3) in corrections]
+        N = max(lengths)
+        ctx.prec = 15
+        wpsum = 4 + ctx.mag((N+ctx.sqrt(N))*ctx.ln(N)/plans[0]['eps1'])
+        ctx.prec = wpsum + 10
+        try:
+            S1 = ctx._zetasum_grid(ts[0], dt, lengths)
+        except NotImplementedError:
+            S1 = [ctx._zetasum(sigma+ctx.j*ts[k], 1, lengths[k]-1)[0][0]
+                for k in range(count)]
+        values = []
+        for k in range(count):
+            N, rssum, S3 = corrections[k]
+            rz = Rzeta_combine(ctx, plans[k], {0:S1[k]}, rssum, S3)
+            ctx.prec = wptheta
+            theta = ctx.siegeltheta(ts[k])
+            ctx.prec = wpz
+            z = 2*ctx.expj(theta)*rz[0]
+            values.append(ctx._re(z))
+    finally:
+        ctx.prec = wpinitial
+    return [+z for z in values]
+
 def zeta_half(ctx, s, k=0):
     """
     zeta_half(s,k=0) Computes zeta^(k)(s) when Re s = 0.5
@@ -1401,3 +1574,10 @@ def rs_z(ctx, w, derivative=0):
         return z_half(ctx, w, derivative)
     else:
         return z_offline(ctx, w, derivative)
+
+@defun
+def rs_z_grid(ctx, ts, dt):
+    if ts[0] < 0:
+        ts = [ctx.fneg(t, exact=True) for t in ts]
+        dt = ctx.fneg(dt, exact=True)
+    return z_half_grid(ctx, ts, dt)
@@ -158,6 +158,24 @@ def terms():
         h = lambda x: ctx.siegelz(x, derivative=4)
         return ctx.diff(h, t, n=d-4)
 
+@defun
+def siegelz_grid(ctx, t0, dt, count):
+    t0 = ctx.convert(t0)
+    dt = ctx.convert(dt)
+    count = int(count)
+    ts = [ctx.fadd(t0, ctx.fmul(dt, k, exact=True), exact=True)
+        for k in range(count)]
+    if count > 1 and ctx._is_real_type(t0) and ctx._is_real_type(dt) \
+        and not ctx._fixed_precision:
+        t1 = ts[0]
+        t2 = ts[-1]
+        if min(abs(t1), abs(t2)) > 500*ctx.prec and (t1 > 0) == (t2 > 0):
+            try:
+                return ctx.rs_z_grid(ts, dt)
+            except NotImplementedError:
+                pass
+    return [ctx.siegelz(t) for t in ts]
+
 
 _zeta_zeros = [
 14.134725142,21.022039639,25.010857580,30.424876126,32.935061588,
@@ -231,7 +249,7 @@ def primepi(ctx, x):
     x = int(x)
     if x < 2:
         return 0
-    return len(ctx.list_primes(x))
+    return ctx._count_primes(x)
 
 # TODO: fix the interface wrt contexts
 @defun_wrapped
@@ -790,6 +808,158 @@ def _zetasum(ctx, s, a, n, derivatives=[0], reflect=False):
                 ys[0] += yterm
     return xs, ys
 
+def _zetasum_batch(ctx, ss, a, n, derivatives):
+    # Like _zetasum (without reflection) for each s in ss, returning
+    # the sums for exactly the given derivatives
+    if max(abs(ctx.re(s)) for s in ss) < 0.5 * ctx.prec:
+        try:
+            return ctx._zetasum_multi(ss, a, n, derivatives)
+        except NotImplementedError:
+            pass
+    if len(derivatives) == 1:
+        return [ctx._zetasum(s, a, n, derivatives)[0] for s in ss]
+    r = list(range(max(derivatives)+1))
+    return [[xs[d] for d in derivatives] for xs in \
+        (ctx._zetasum(s, a, n, r)[0] for s in ss)]
+
+def _hurwitz_em_tail(ctx, s, Na, E, derivatives, N, coeff, tol):
+    # Euler-Maclaurin tail for the sum over k >= M, where Na = M+a.
+    # Writing s+eps in place of s, the tail is Na^(-s) Na^(-eps) times
+    #
+    #   Na/(s-1+eps) + 1/2 + sum_j B_(2j)/(2j)! Na^(1-2j) (s+eps)_(2j-1)
+    #
+    # and E holds the power series of Na^(-eps); all derivatives
+    # are obtained from truncated power series in eps.
+    r = len(E)
+    Nas = Na**(-s)
+    tol -= ctx.mag(Nas)
+    inv = 1/(s-1)
+    A = []
+    t = Na*inv
+    for k in xrange(r):
+        A.append(t)
+        t = -t*inv
+    A[0] += 0.5
+    # Rising factorial (s+eps)_(2j-1)
+    P = ([s, ctx.one] + [ctx.zero]*r)[:r]
+    for j in xrange(1, N+1):
+        c = coeff(j)
+        term = [c*p for p in P]
+        for k in xrange(r):
+            A[k] += term[k]
+        if max(ctx.mag(t) for t in term) < tol:
+            break
+        for b in (s+(2*j-1), s+2*j):
+            P = [b*P[0]] + [b*P[k] + P[k-1] for k in xrange(1, r)]
+    else:
+        return None
+    return [ctx._ifac(d) * Nas * ctx.fdot(A[:d+1], E[d::-1]) \
+        for d in derivatives]
+
+def _hurwitz_em_batch(ctx, ss, a, derivatives, prec):
+    # Batched version of _hurwitz_em: the truncated sums are computed
+    # together, and the tail coefficients are shared by all s
+    maxd = max(derivatives)
+    tol = -prec
+    M1 = 0
+    M2 = prec // 3
+    N = M2
+    lsums = [[0]*len(derivatives) for s in ss]
+    out = [None] * len(ss)
+    pending = list(range(len(ss)))
+    while pending:
+        sums = _zetasum_batch(ctx, [ss[i] for i in pending], M1+a, M2-M1-1,
+            derivatives)
+        for i, xs in zip(pending, sums):
+            lsums[i] = [x+y for (x, y) in zip(lsums[i], xs)]
+        Na = ctx.convert(M2+a)
+        L = ctx.ln(Na)
+        E = [ctx.one]
+        for k in xrange(1, maxd+1):
+            E.append(E[-1]*(-L)/k)
+        # The derivatives of the tail terms grow like d! log(Na)^d
+        extra = ctx.mag((maxd+1)*ctx._ifac(maxd)*max(1, L)**maxd)
+        coeffs = []
+        def coeff(j):
+            while len(coeffs) < j:
+                k = 2*(len(coeffs)+1)
+                coeffs.append(ctx.bernoulli(k)/ctx.factorial(k)*Na**(1-k))
+            return coeffs[j-1]
+        remaining = []
+        for i in pending:
+            # The tolerance is relative to the first term when it is small
+            mag = min(0, ctx.mag(ctx.power(a, -ss[i])))
+            T2 = _hurwitz_em_tail(ctx, ss[i], Na, E, derivatives, N, coeff,
+                tol-extra+mag)
+            if T2 is None:
+                remaining.append(i)
+            else:
+                out[i] = lsums[i], T2
+        pending = remaining
+        M1, M2 = M2, M2*2
+    return out
+
+@defun
+def zeta_batch(ctx, ss, a=1, derivatives=0, **kwargs):
+    if isinstance(derivatives, (list, tuple)):
+        ds = [int(d) for d in derivatives]
+    else:
+        ds = [int(derivatives)]
+    ss = [ctx.convert(s) for s in ss]
+    if not ss:
+        return []
+    prec = ctx.prec
+    if ctx._fixed_precision:
+        batch = False
+    elif ctx.isint(a):
+        a = int(a)
+        batch = a >= 1
+    else:
+        a = ctx.convert(a)
+        batch = ctx._is_real_type(a) and a > 0
+    maxd = max(ds)
+    values = [None] * len(ss)
+    pending = []
+    for i, s in enumerate(ss):
+        re = ctx.re(s)
+        # Points handled better (or only) by zeta(): poles, infinities,
+        # the reflection formula and the Riemann-Siegel formula
+        if not batch or not ctx.isfinite(s) or s == 1 or re < 0 or \
+            (a == 1 and abs(ctx.im(s)) > 500*prec and 10*re < prec and \
+            maxd <= 4):
+            values[i] = [ctx.zeta(s, a, d, **kwargs) for d in ds]
+        else:
+            pending.append(i)
+    extraprec = 10
+    try:
+        while pending:
+            ctx.prec = prec + extraprec
+            em = _hurwitz_em_batch(ctx, [ss[i] for i in pending], a, ds,
+                prec+10)
+            retry = []
+            cancellation = 0
+            for i, (T1, T2) in zip(pending, em):
+                c = max(ctx.mag(x) - ctx.mag(x+y) for (x, y) in zip(T1, T2))
+                if c < extraprec:
+                    v = [x+y for (x, y) in zip(T1, T2)]
+                    if ctx._is_real_type(ss[i]):
+                        v = [ctx._re(x) for x in v]
+                    values[i] = v
+                else:
+                    retry.append(i)
+                    cancellation = max(cancellation, c)
+            if retry:
+                extraprec = max(2*extraprec, min(cancellation + 5, 100*prec))
+                if extraprec > kwargs.get('maxprec', 100*prec):
+                    raise ctx.NoConvergence("zeta: too much cancellation")
+            pending = retry
+    finally:
+        ctx.prec = prec
+    values = [[+x for x in v] for v in values]
+    if isinstance(derivatives, (list, tuple)):
+        return values
+    return [v[0] for v in values]
+
 @defun
 def dirichlet(ctx, s, chi=[1], derivative=0):
     s = ctx.convert(s)
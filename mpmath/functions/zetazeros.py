@@ -15,6 +15,9 @@
 Lehman, Brent and Trudgian  to find a suitable B.
 """
 
+import os
+import binascii
+
 from .functions import defun, defun_wrapped
 
 def find_rosser_block_zero(ctx, n):
@@ -429,6 +432,160 @@ def zetazero(ctx, n, info=False, round=True):
     else:
         return v
 
+ZEROS_FILE_VERSION = 1
+
+def read_zeros_checkpoint(ctx, filename):
+    """Reads the zeros saved in the checkpoint file written by zetazeros.
+    Returns the precision and a dict mapping n to the imaginary part
+    of the n-th zero, or (None, {}) if the file does not exist.
+    An incomplete last line, left by an interrupted run, is removed."""
+    if not os.path.exists(filename):
+        return None, {}
+    f = open(filename, 'r+')
+    try:
+        header = f.readline().split()
+        if len(header) != 3 or header[0] != 'mpmath-zetazeros':
+            raise ValueError("%s is not a zetazeros checkpoint file" % filename)
+        if int(header[1]) != ZEROS_FILE_VERSION:
+            raise ValueError("unsupported checkpoint file version %s" % header[1])
+        prec = int(header[2])
+        zeros = {}
+        valid = f.tell()
+        while 1:
+            line = f.readline()
+            if not line.endswith('\n'):
+                break
+            n, data = line.split()
+            t = ctx._mp.loads(binascii.unhexlify(data.encode('ascii')))
+            zeros[int(n)] = ctx.convert(t)
+            valid = f.tell()
+        f.seek(valid)
+        f.truncate()
+    finally:
+        f.close()
+    return prec, zeros
+
+def _zetazeros_task(task):
+    """
+    Computes the zeros n1 <= n < n2 in a worker process.
+    """
+    prec, n1, n2 = task
+    from .. import mp
+    orig = mp.prec
+    mp.prec = prec
+    try:
+        return [(n, mp.zetazero(n).imag._mpf_) for n in range(n1, n2)]
+    finally:
+        mp.prec = orig
+
+@defun
+def zetazeros(ctx, n1, n2, workers=None, executor=None, checkpoint=None,
+    chunksize=None):
+    r"""
+    Computes the nontrivial zeros `\rho_n` of `\zeta(s)` with
+    `n_1 \le n < n_2` (see :func:`~mpmath.zetazero`), returning a list
+    ``[zetazero(n1), ..., zetazero(n2-1)]``::
+
+        >>> from mpmath import *
+        >>> mp.dps = 15; mp.pretty = True
+        >>> zetazeros(1, 4)
+        [(0.5 + 14.1347251417347j), (0.5 + 21.0220396387716j), (0.5 + 25.0108575801457j)]
+        >>> zetazeros(1000, 1003) == [zetazero(n) for n in range(1000, 1003)]
+        True
+
+    Each zero is computed independently, as by :func:`~mpmath.zetazero`;
+    almost all of the time goes into locating the zero to full precision,
+    which is not shared between zeros. Large ranges can be computed faster
+    by using several processes.
+
+    The zeros can be computed in parallel by passing *workers* (the
+    number of processes to start) or an existing *executor* (for
+    example a :class:`multiprocessing.Pool` or a
+    :class:`concurrent.futures.ProcessPoolExecutor`). The range is then
+    cut into chunks of *chunksize* consecutive zeros (by default, about
+    four chunks per process), each handled by one process.
+
+    If *checkpoint* is the name of a file, each computed zero is
+    appended to this file. When :func:`~mpmath.zetazeros` is called
+    again with the same file (at the same precision), for example after
+    the computation was interrupted, the zeros found in the file are
+    not computed again::
+
+        >>> import os, shutil, tempfile
+        >>> d = tempfile.mkdtemp()
+        >>> f = os.path.join(d, 'zeros.txt')
+        >>> v = zetazeros(100, 103, checkpoint=f)
+        >>> zetazeros(100, 105, checkpoint=f)[:3] == v
+        True
+        >>> len(open(f).readlines())
+        6
+        >>> shutil.rmtree(d)
+
+    The file starts with a header line followed by one line per zero,
+    giving `n` and the imaginary part of `\rho_n`, exactly, in the
+    format of :func:`~mpmath.dumps` written in hexadecimal.
+    """
+    n1 = int(n1)
+    n2 = int(n2)
+    if n1 < 1:
+        raise ValueError("n1 must be positive")
+    prec = ctx.prec
+    zeros = {}
+    out = None
+    if checkpoint is not None:
+        fprec, zeros = read_zeros_checkpoint(ctx, checkpoint)
+        if fprec is None:
+            out = open(checkpoint, 'w')
+            out.write("mpmath-zetazeros %i %i\n" % (ZEROS_FILE_VERSION, prec))
+            out.flush()
+        elif fprec != prec:
+            raise ValueError("the checkpoint file was written with "
+                "precision %i, not %i" % (fprec, prec))
+        else:
+            out = open(checkpoint, 'a')
+    # the ranges of zeros still to be computed
+    ranges = []
+    for n in range(n1, n2):
+        if n not in zeros:
+            if ranges and ranges[-1][1] == n:
+                ranges[-1][1] = n+1
+            else:
+                ranges.append([n, n+1])
+    def save(n, t):
+        zeros[n] = t
+        if out is not None:
+            data = binascii.hexlify(ctx._mp.dumps(ctx._mp.convert(t)))
+            out.write("%i %s\n" % (n, data.decode('ascii')))
+            out.flush()
+    pool = None
+    try:
+        if (workers or executor is not None) and not ctx._fixed_precision:
+            if chunksize is None:
+                total = sum(b-a for (a, b) in ranges)
+                chunksize = max(1, -(-total // (4*(workers or 4))))
+            tasks = []
+            for a, b in ranges:
+                for k in range(a, b, chunksize):
+                    tasks.append((prec, k, min(b, k+chunksize)))
+            if executor is None:
+                from multiprocessing import Pool
+                pool = executor = Pool(workers)
+            imap = getattr(executor, 'imap', executor.map)
+            for results in imap(_zetazeros_task, tasks):
+                for n, t in results:
+                    save(n, ctx.make_mpf(t))
+        else:
+            for a, b in ranges:
+                for n in range(a, b):
+                    save(n, ctx.zetazero(n).imag)
+    finally:
+        if out is not None:
+            out.close()
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return [ctx.mpc(0.5, zeros[n]) for n in range(n1, n2)]
+
 def gram_index(ctx, t):
     if t > 10**13:
         wp = 3*ctx.log(t, 10)
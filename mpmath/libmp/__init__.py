@@ -35,9 +35,12 @@
   mpf_log, mpf_log_hypot, mpf_exp, mpf_cos_sin, mpf_cos, mpf_sin, mpf_tan,
   mpf_cos_sin_pi, mpf_cos_pi, mpf_sin_pi, mpf_cosh_sinh,
   mpf_cosh, mpf_sinh, mpf_tanh, mpf_atan, mpf_atan2, mpf_asin,
-  mpf_acos, mpf_asinh, mpf_acosh, mpf_atanh, mpf_fibonacci)
+  mpf_acos, mpf_asinh, mpf_acosh, mpf_atanh, mpf_fibonacci, set_bs_workers,
+  set_constant_store, load_constant, save_constant)
 
 from .libhyper import (NoConvergence, make_hyp_summator,
+  common_hyp_summator_keys, dump_hyp_summators, load_hyp_summators,
+  HYPSUM_BS_PREC, mpf_hypsum_rational,
   mpf_erf, mpf_erfc, mpf_ei, mpc_ei, mpf_e1, mpc_e1, mpf_expint,
   mpf_ci_si, mpf_ci, mpf_si, mpc_ci, mpc_si, mpf_besseljn,
   mpc_besseljn, mpf_agm, mpf_agm1, mpc_agm, mpc_agm1,
@@ -47,13 +50,28 @@
   khinchin_fixed, mpf_khinchin, glaisher_fixed, mpf_glaisher,
   apery_fixed, mpf_apery, euler_fixed, mpf_euler, mertens_fixed,
   mpf_mertens, twinprime_fixed, mpf_twinprime,
-  mpf_bernoulli, bernfrac, mpf_gamma_int,
+  mpf_bernoulli, mpf_bernoulli_table, bernfrac, mpf_gamma_int,
   mpf_factorial, mpc_factorial, mpf_gamma, mpc_gamma,
   mpf_loggamma, mpc_loggamma, mpf_rgamma, mpc_rgamma,
   mpf_gamma_old, mpc_gamma_old, mpf_factorial_old, mpc_factorial_old,
   mpf_harmonic, mpc_harmonic, mpf_psi0, mpc_psi0,
   mpf_psi, mpc_psi, mpf_zeta_int, mpf_zeta, mpc_zeta,
-  mpf_altzeta, mpc_altzeta, mpf_zetasum, mpc_zetasum)
+  mpf_altzeta, mpc_altzeta, mpf_zetasum, mpc_zetasum, mpc_zetasum_grid,
+  mpc_zetasum_multi)
+
+from .libcache import (LRUCache, register_cache, cache_info, clear_caches,
+  set_cache_limit, set_cache_stats)
+
+from .libmatrix import (mpf_vector_to_fixed, mpf_vector_to_fixed_round,
+  mpf_matrix_mul, mpc_matrix_mul, mpf_lu_decomp, mpf_lu_solve,
+  int_matrix_mul, int_matrix_mul_kronecker, matrix_mul_strassen,
+  matrix_mul_method)
+
+from .libpoly import (newton_polygon, complex_polyroots, mpc_polyroots,
+  mpf_polyval_multi, mpc_polyval_multi, mpf_polyinterp, mpc_polyinterp,
+  int_poly_mul, mpf_poly_mul, mpc_poly_mul, mp_poly_mul, mp_poly_divmod,
+  mp_poly_compose, mp_series_inv, mp_series_div, mp_series_exp,
+  mp_series_log, mpf_forward_differences)
 
 from .libmpi import (mpi_str,
   mpi_from_str, mpi_to_str,
@@ -70,8 +88,15 @@
   mpi_rgamma, mpci_rgamma, mpi_factorial, mpci_factorial)
 
 from .libintmath import (trailing, bitcount, numeral, bin_to_radix,
+  write_numeral, parse_numeral,
   isqrt, isqrt_small, isqrt_fast, sqrt_fixed, sqrtrem, ifib, ifac,
-  list_primes, isprime, moebius, gcd, eulernum, stirling1, stirling2)
+  list_primes, count_primes, odd_sieve, isprime, moebius, gcd, eulernum,
+  stirling1, stirling2)
+
+from .libserial import (SERIAL_VERSION, encode_varint, decode_varint,
+  encode_mpf, decode_mpf, encode_mpc, decode_mpc, encode_values,
+  decode_values, mpf_to_bytes, mpf_from_bytes, mpc_to_bytes,
+  mpc_from_bytes, serial_header, read_serial_header)
 
 from .backend import (gmpy, sage, BACKEND, STRICT, MPZ, MPZ_TYPE,
   MPZ_ZERO, MPZ_ONE, MPZ_TWO, MPZ_THREE, MPZ_FIVE, int_types,
@@ -15,12 +15,17 @@
 
 import math
 import sys
+from array import array
+from bisect import bisect
 
 from .backend import xrange
-from .backend import MPZ, MPZ_ZERO, MPZ_ONE, MPZ_THREE, gmpy
+from .backend import MPZ, MPZ_ZERO, MPZ_ONE, MPZ_THREE, gmpy, BACKEND
+from .backend import int_types
 
 from .libintmath import list_primes, ifac, ifac2, moebius
 
+from .libcache import register_cache
+
 from .libmpf import (\
     round_floor, round_ceiling, round_down, round_up,
     round_nearest, round_fast,
@@ -42,7 +47,7 @@
     mpf_exp, mpf_log, mpf_pow, mpf_cosh,
     mpf_cos_sin, mpf_cosh_sinh, mpf_cos_sin_pi, mpf_cos_pi, mpf_sin_pi,
     ln_sqrt2pi_fixed, mpf_ln_sqrt2pi, sqrtpi_fixed, mpf_sqrtpi,
-    cos_sin_fixed, exp_fixed
+    cos_sin_fixed, exp_fixed, bs_parallel
 )
 
 from .libmpc import (\
@@ -69,8 +74,41 @@
 #                             n  (2n-1) [(4n)!]
 #           n = 1
 
+# At high precision, both Lupas's series for Catalan's constant and the
+# series for zeta(3) below are summed using binary splitting. Writing
+# the series as sum a(n) [p(0)...p(n-1)] / [q(0)...q(n)], bs_*(a, b)
+# returns P = p(a)...p(b-1), Q = q(a)...q(b-1) and T = Q times the
+# partial sum over [a, b), normalized to start at a.
+
+# Precision above which binary splitting is used
+if BACKEND == 'python':
+    CATALAN_BS_PREC = 50000
+    APERY_BS_PREC = 50000
+else:
+    CATALAN_BS_PREC = 20000
+    APERY_BS_PREC = 30000
+
+def bs_pqt_merge(left, right):
+    P1, Q1, T1 = left
+    P2, Q2, T2 = right
+    return P1*P2, Q1*Q2, T1*Q2 + P1*T2
+
+def bs_catalan(a, b):
+    if b - a == 1:
+        P = MPZ(-32 * a**3 * (2*a-1))
+        Q = MPZ((16*a**2-16*a+3)**2)
+        T = MPZ(32 * (40*a**2-24*a+3))
+        return P, Q, T
+    m = (a+b)//2
+    return bs_pqt_merge(bs_catalan(a, m), bs_catalan(m, b))
+
 @constant_memo
 def catalan_fixed(prec):
+    if prec >= CATALAN_BS_PREC:
+        # The terms decrease like 4^(-n)
+        N = prec//2 + 10
+        P, Q, T = bs_parallel(bs_catalan, bs_pqt_merge, 1, N, prec)
+        return (T << (prec-6)) // Q
     prec = prec + 20
     a = one = MPZ_ONE << prec
     s, t, n = 0, 1, 1
@@ -234,8 +272,25 @@ def glaisher_fixed(prec):
 #             /___               64                      5
 #             n = 0                             ((2n+1)!)
 
+def bs_apery(a, b):
+    if b - a == 1:
+        P = MPZ(-(a+1)**5)
+        if a:
+            Q = MPZ(32*(2*a+1)**5)
+        else:
+            Q = MPZ_ONE
+        T = MPZ(205*a**2 + 250*a + 77)
+        return P, Q, T
+    m = (a+b)//2
+    return bs_pqt_merge(bs_apery(a, m), bs_apery(m, b))
+
 @constant_memo
 def apery_fixed(prec):
+    if prec >= APERY_BS_PREC:
+        # The terms decrease like 1024^(-n)
+        N = prec//10 + 10
+        P, Q, T = bs_parallel(bs_apery, bs_pqt_merge, 0, N, prec)
+        return (T << (prec-6)) // Q
     prec += 20
     d = MPZ_ONE << prec
     term = MPZ(77) << prec
@@ -388,7 +443,7 @@ def I(n):
 numerator and denominator.
 """
 
-bernoulli_cache = {}
+bernoulli_cache = register_cache('bernoulli')
 f3 = from_int(3)
 f6 = from_int(6)
 
@@ -411,6 +466,12 @@ def mpf_bernoulli(n, prec, rnd=None):
     # For odd n > 1, the Bernoulli numbers are zero
     if n & 1:
         return fzero
+    # Use the table from mpf_bernoulli_table if one has been computed
+    table = bernoulli_table_cache.get(0)
+    if table and table[0] >= prec + BERNOULLI_TABLE_EXTRA and n < len(table[1]):
+        if not rnd:
+            return mpf_pos(table[1][n], prec, round_fast)
+        return bernoulli_table_round(n, table[1][n], table[0], prec, rnd)
     # If precision is extremely high, we can save time by computing
     # the Bernoulli number at a lower precision that is sufficient to
     # obtain the exact fraction, round to the exact fraction, and
@@ -439,6 +500,7 @@ def mpf_bernoulli(n, prec, rnd=None):
         numbers = {0:fone}
         m, bin, bin1 = state = [2, MPZ(10), MPZ_ONE]
         bernoulli_cache[wp] = (numbers, state)
+    m0 = m
     while m <= n:
         #print m
         case = m % 6
@@ -472,6 +534,7 @@ def mpf_bernoulli(n, prec, rnd=None):
         if m > 6:
             bin1 = bin1 * ((2+m)*(3+m)) // ((m-7)*(m-6))
         state[:] = [m, bin, bin1]
+    bernoulli_cache.grow(wp, [numbers[k] for k in xrange(m0, m, 2)])
     return numbers[n]
 
 def mpf_bernoulli_huge(n, prec, rnd=None):
@@ -485,6 +548,163 @@ def mpf_bernoulli_huge(n, prec, rnd=None):
         v = mpf_neg(v)
     return mpf_pos(v, prec, rnd or round_fast)
 
+"""
+Whole tables of Bernoulli numbers are computed by mpf_bernoulli_table()
+in two parts. The small numbers are obtained exactly from the tangent
+numbers T_k, using B_{2k} = (-1)^(k-1) 2k T_k / (4^k (4^k-1)); the T_k
+are generated with the O(k^2) algorithm of Brent and Harvey, which
+only needs multiplications by small integers. The remaining numbers
+are obtained from
+
+    B_n = (-1)^(n/2+1) 2 n! zeta(n) / (2 pi)^n
+
+where zeta(n) is summed in fixed point over odd integers j, updating
+all the powers j^(-n) from one n to the next by multiplying them by
+j^(-2), and the factor 2 n! / (2 pi)^n is updated in the same way.
+This is cheap as soon as the number of terms 2^(prec/n) is comparable
+to n.
+
+A single table is cached, at the highest precision requested so far;
+requests at lower precision round its entries. The table is computed
+with BERNOULLI_TABLE_EXTRA guard bits, and an entry that is too close
+to a rounding boundary to be rounded correctly is rounded from the
+exact fraction instead.
+"""
+
+bernoulli_table_cache = register_cache('bernoulli_table', maxsize=1)
+
+BERNOULLI_TABLE_EXTRA = 30
+
+def bernoulli_table_round(n, b, wp, prec, rnd):
+    """Rounds the entry b = B_n of a table computed at wp bits to prec
+    bits. The entries are accurate to a few units in the last place."""
+    v = mpf_pos(b, prec, rnd)
+    sign, man, exp, bc = b
+    if n > 1 and man:
+        d = from_man_exp(MPZ_ONE, exp+bc-wp+4)
+        if mpf_pos(mpf_sub(b, d), prec, rnd) != v or \
+            mpf_pos(mpf_add(b, d), prec, rnd) != v:
+            p, q = bernfrac(n)
+            v = from_rational(p, q, prec, rnd)
+    return v
+
+def tangent_numbers(m):
+    """Returns the list [0, T_1, ..., T_m] of tangent numbers."""
+    T = [MPZ_ZERO] * (m+1)
+    if m:
+        T[1] = MPZ_ONE
+    for k in xrange(2, m+1):
+        T[k] = (k-1)*T[k-1]
+    for k in xrange(2, m+1):
+        for j in xrange(k, m+1):
+            T[j] = (j-k)*T[j-1] + (j-k+2)*T[j]
+    return T
+
+def bernoulli_zeta_cutoff(prec):
+    """Smallest even n for which the zeta series for B_n is used in
+    mpf_bernoulli_table at the given precision."""
+    n = 4
+    while prec > (n-1) * math.log(n/3.+16, 2):
+        n += 2
+    return n
+
+def bernoulli_block(n1, n2, prec):
+    """
+    Returns [B_n1, B_(n1+2), ..., B_n2] for even n1 <= n2, computed
+    together from the zeta series. Only intended for n1 at least
+    bernoulli_zeta_cutoff(prec).
+    """
+    count = (n2-n1)//2 + 1
+    wp = prec + 10 + int(math.log(count, 2))
+    one = MPZ_ONE << wp
+    # Powers j^(-n) and j^(-2) for the odd j > 1 that contribute
+    J = int(2**(float(wp)/(n1-1))) + 2
+    powers = []
+    steps = []
+    for j in xrange(3, J+1, 2):
+        p = one // MPZ(j)**n1
+        if not p:
+            break
+        powers.append(p)
+        steps.append(one // (j*j))
+    pi = mpf_pi(wp+10)
+    twopi2 = mpf_shift(mpf_mul(pi, pi, wp), 2)
+    F = mpf_div(from_int(2*ifac(n1)), mpf_pow_int(mpf_shift(pi, 1), n1, wp), wp)
+    numbers = []
+    for n in xrange(n1, n2+1, 2):
+        # zeta(n) = (1 + 3^(-n) + 5^(-n) + ...) / (1 - 2^(-n))
+        z = one + sum(powers)
+        if n < wp:
+            z = (z << wp) // (one - (one >> n))
+        b = mpf_mul(F, from_man_exp(z, -wp), prec, round_nearest)
+        if not n & 2:
+            b = mpf_neg(b)
+        numbers.append(b)
+        powers = [(p*u) >> wp for (p, u) in zip(powers, steps)]
+        while powers and not powers[-1]:
+            powers.pop()
+        F = mpf_div(mpf_mul_int(F, (n+1)*(n+2), wp), twopi2, wp)
+    return numbers
+
+def bernoulli_range(n1, n2, prec):
+    """Returns [B_n1, ..., B_n2] using tangent numbers and
+    bernoulli_block."""
+    numbers = []
+    for n in xrange(n1, min(n2, 1)+1):
+        numbers.append([fone, mpf_neg(fhalf)][n])
+    n1 = max(n1, 2)
+    cutoff = bernoulli_zeta_cutoff(prec)
+    m = min(n2, cutoff-2) // 2
+    if 2*m >= n1:
+        T = tangent_numbers(m)
+        for n in xrange(n1, 2*m+1):
+            if n & 1:
+                numbers.append(fzero)
+            else:
+                k = n // 2
+                p = (-1)**(k-1) * 2*k * T[k]
+                numbers.append(from_rational(p, 4**k*(4**k-1), prec,
+                    round_nearest))
+        n1 = 2*m+1
+    if n1 <= n2:
+        if n1 & 1:
+            numbers.append(fzero)
+            n1 += 1
+        for b in bernoulli_block(n1, n2 - (n2 & 1), prec):
+            numbers.append(b)
+            numbers.append(fzero)
+        if not n2 & 1:
+            numbers.pop()
+    return numbers
+
+def mpf_bernoulli_table(n, prec, rnd=round_fast):
+    """
+    Returns the list [B_0, B_1, ..., B_n] of Bernoulli numbers as
+    raw mpfs rounded to prec bits.
+    """
+    n = int(n)
+    if n < 0:
+        raise ValueError("Bernoulli numbers only defined for n >= 0")
+    wp = prec + BERNOULLI_TABLE_EXTRA
+    cached = bernoulli_table_cache.get(0)
+    if cached:
+        tprec, table = cached
+        if tprec >= wp and len(table) > n:
+            return [bernoulli_table_round(k, table[k], tprec, prec, rnd)
+                for k in xrange(n+1)]
+    if cached and tprec >= wp:
+        # Extend the cached table at its own precision
+        table = table + bernoulli_range(len(table), n, tprec)
+    else:
+        m = n
+        if cached:
+            m = max(m, len(table)-1)
+        tprec = wp
+        table = bernoulli_range(0, m, wp)
+    bernoulli_table_cache[0] = (tprec, table)
+    return [bernoulli_table_round(k, table[k], tprec, prec, rnd)
+        for k in xrange(n+1)]
+
 def bernfrac(n):
     r"""
     Returns a tuple of integers `(p, q)` such that `p/q = B_n` exactly,
@@ -607,7 +827,7 @@ def bernfrac(n):
 functions", SIAM Journal on Numerical Analysis 31 (1994), no. 3, 931-944.
 """
 
-spouge_cache = {}
+spouge_cache = register_cache('spouge')
 
 def calc_spouge_coefficients(a, prec):
     wp = prec + int(a*1.4)
@@ -1103,7 +1323,7 @@ def mpc_psi(m, z, prec, rnd=round_fast):
 http://en.wikipedia.org/wiki/Dirichlet_eta_function
 """
 
-borwein_cache = {}
+borwein_cache = register_cache('borwein')
 
 def borwein_coefficients(n):
     if n in borwein_cache:
@@ -1120,7 +1340,7 @@ def borwein_coefficients(n):
     return ds
 
 ZETA_INT_CACHE_MAX_PREC = 1000
-zeta_int_cache = {}
+zeta_int_cache = register_cache('zeta_int')
 
 def mpf_zeta_int(s, prec, rnd=round_fast):
     """
@@ -1374,36 +1594,32 @@ def pow_fixed(x, n, wp):
         n //= 2
     return y
 
-# TODO: optimize / cleanup interface / unify with list_primes
-sieve_cache = []
-primes_cache = []
-mult_cache = []
+# holds the largest sieve computed so far
+sieve_cache = register_cache('sieve', maxsize=1)
 
 def primesieve(n):
-    global sieve_cache, primes_cache, mult_cache
-    if n < len(sieve_cache):
-        sieve = sieve_cache#[:n+1]
-        primes = primes_cache[:primes_cache.index(max(sieve))+1]
-        mult = mult_cache#[:n+1]
-        return sieve, primes, mult
-    sieve = [0] * (n+1)
-    mult = [0] * (n+1)
+    """
+    Return (sieve, primes, mult) where primes lists the primes <= n and,
+    for 2 <= k <= n, sieve[k] is the largest prime factor of k and
+    mult[k] its multiplicity.
+    """
+    cached = sieve_cache.get(0)
+    if cached and n < len(cached[0]):
+        sieve, primes, mult = cached
+        return sieve, primes[:bisect(primes, n)], mult
     primes = list_primes(n)
+    sieve = array('l', [0]) * (n+1)
+    mult = array('b', [0]) * (n+1)
     for p in primes:
-        #sieve[p::p] = p
-        for k in xrange(p,n+1,p):
-            sieve[k] = p
-    for i, p in enumerate(sieve):
-        if i >= 2:
-            m = 1
-            n = i // p
-            while not n % p:
-                n //= p
-                m += 1
-            mult[i] = m
-    sieve_cache = sieve
-    primes_cache = primes
-    mult_cache = mult
+        sieve[p::p] = array('l', [p]) * (n//p)
+    for k in xrange(2, n+1):
+        p = sieve[k]
+        j = k // p
+        if sieve[j] == p:
+            mult[k] = mult[j] + 1
+        else:
+            mult[k] = 1
+    sieve_cache[0] = (sieve, primes, mult)
     return sieve, primes, mult
 
 def zetasum_sieved(critical_line, sre, sim, a, n, wp):
@@ -1565,6 +1781,138 @@ def mpc_zetasum(s, a, n, derivatives, reflect, prec):
         for (ya, yb) in zip(yre, yim)]
     return xs, ys
 
+def mpc_zetasum_multi(ss, a, n, derivatives, prec):
+    """
+    Fast version of mp._zetasum_multi. For each raw mpc s in ss,
+    returns the list of raw mpcs
+
+        D^d ( 1/a^s + 1/(a+1)^s + ... + 1/(a+n)^s )
+
+    with d ranging over the given derivatives, where a is a positive
+    integer or a positive raw mpf. The logarithms log(a+k) and their
+    powers are computed once and shared by all the s values.
+    """
+    derivatives = list(derivatives)
+    maxd = max(derivatives)
+    int_a = isinstance(a, int_types)
+    # The sums are computed in fixed point; add enough bits for the
+    # larger of the first two terms log(w)^d/w^s to have full relative
+    # accuracy
+    maxre = max(to_float(sre) for (sre, sim) in ss)
+    extra = 0
+    if maxre > 0:
+        if int_a:
+            fa = a
+        else:
+            fa = to_float(a)
+        for d in derivatives:
+            mags = []
+            for w in (fa, fa+1):
+                logw = math.log(w)
+                if logw or not d:
+                    mags.append(d*math.log(abs(logw) or 1, 2) - \
+                        maxre*math.log(w, 2))
+            extra = max(extra, -max(mags))
+    wp = prec + 10 + int(extra)
+
+    one = MPZ_ONE << wp
+    one_2wp = MPZ_ONE << (2*wp)
+    ln2 = ln2_fixed(wp)
+    pi2 = pi_fixed(wp-1)
+    wp2 = wp+wp
+
+    params = []
+    for sre, sim in ss:
+        critical_line = int_a and sre == fhalf
+        params.append((critical_line, to_fixed(sre, wp), to_fixed(sim, wp)))
+    nd = len(derivatives)
+    xre = [[MPZ_ZERO]*nd for s in ss]
+    xim = [[MPZ_ZERO]*nd for s in ss]
+
+    for k in xrange(n+1):
+        if int_a:
+            w = a + k
+            log = log_int_fixed(w, wp, ln2)
+        else:
+            w = mpf_add(a, from_int(k), wp+10)
+            log = to_fixed(mpf_log(w, wp+10), wp)
+        if maxd:
+            powers = [one]
+            for d in xrange(maxd):
+                powers.append((powers[-1] * log) >> wp)
+            logs = [powers[d] for d in derivatives]
+        for i, (critical_line, sre, sim) in enumerate(params):
+            if sim:
+                cos, sin = cos_sin_fixed((-sim*log)>>wp, wp, pi2)
+            else:
+                cos, sin = one, MPZ_ZERO
+            if critical_line:
+                u = one_2wp // isqrt_fast(w<<wp2)
+            else:
+                u = exp_fixed((-sre*log)>>wp, wp)
+            tre = (u * cos) >> wp
+            tim = (u * sin) >> wp
+            if maxd:
+                re_i = xre[i]
+                im_i = xim[i]
+                for j in xrange(nd):
+                    re_i[j] += (tre * logs[j]) >> wp
+                    im_i[j] += (tim * logs[j]) >> wp
+            else:
+                xre[i][0] += tre
+                xim[i][0] += tim
+    sums = []
+    for i in xrange(len(ss)):
+        xs = []
+        for j, d in enumerate(derivatives):
+            re, im = xre[i][j], xim[i][j]
+            if d % 2:
+                re, im = -re, -im
+            xs.append((from_man_exp(re, -wp, prec, 'n'),
+                from_man_exp(im, -wp, prec, 'n')))
+        sums.append(xs)
+    return sums
+
+def mpc_zetasum_grid(t0, dt, lengths, prec):
+    """
+    Computes the sums of k^(-1/2-i*t) for 1 <= k <= lengths[j], where
+    t = t0 + j*dt, for all 0 <= j < len(lengths). The terms for the
+    first point are computed directly and then multiplied by the
+    fixed factors k^(-i*dt) to step from one point to the next, so
+    each further point costs one fixed-point complex multiplication
+    per term. Extra bits are added to cover the rounding errors, which
+    grow linearly with the number of points.
+    """
+    n = max(lengths)
+    wp = prec + 10 + bitcount(len(lengths))
+    one_2wp = MPZ_ONE << (2*wp)
+    wp2 = wp+wp
+    ln2 = ln2_fixed(wp)
+    pi2 = pi_fixed(wp-1)
+    t0 = to_fixed(t0, wp)
+    dt = to_fixed(dt, wp)
+    vre = []; vim = []
+    wre = []; wim = []
+    for k in xrange(1, n+1):
+        log = log_int_fixed(k, wp, ln2)
+        u = one_2wp // isqrt_fast(k<<wp2)
+        cos, sin = cos_sin_fixed((-t0*log)>>wp, wp, pi2)
+        vre.append((u*cos) >> wp)
+        vim.append((u*sin) >> wp)
+        cos, sin = cos_sin_fixed((-dt*log)>>wp, wp, pi2)
+        wre.append(cos)
+        wim.append(sin)
+    sums = []
+    for j, m in enumerate(lengths):
+        if j:
+            for k in xrange(n):
+                a = vre[k]; b = vim[k]; c = wre[k]; d = wim[k]
+                vre[k] = (a*c-b*d) >> wp
+                vim[k] = (a*d+b*c) >> wp
+        sums.append((from_man_exp(sum(vre[:m]), -wp, prec, 'n'),
+            from_man_exp(sum(vim[:m]), -wp, prec, 'n')))
+    return sums
+
 
 #-----------------------------------------------------------------------#
 #                                                                       #
@@ -1583,8 +1931,8 @@ def mpc_zetasum(s, a, n, derivatives, reflect, prec):
 
 SMALL_FACTORIAL_CACHE_SIZE = 150
 
-gamma_taylor_cache = {}
-gamma_stirling_cache = {}
+gamma_taylor_cache = register_cache('gamma_taylor')
+gamma_stirling_cache = register_cache('gamma_stirling')
 
 small_factorial_cache = [from_int(ifac(n)) for \
     n in range(SMALL_FACTORIAL_CACHE_SIZE+1)]
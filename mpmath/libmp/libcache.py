@@ -0,0 +1,264 @@
+"""
+Registry for the module-level caches used by libmp.
+
+Many functions in libmp cache expensive intermediate results (Taylor
+coefficients, Bernoulli numbers, etc.) in module-level dictionaries.
+Several of these are keyed by precision, so a program that uses many
+different precisions would let them grow without bound. The caches are
+therefore created through register_cache(), which returns a dict
+subclass that can evict the least recently used entries when a limit on
+the number of entries or the number of bytes is exceeded. By default
+there is no limit.
+
+Lookups in these caches are on the fast path of the elementary
+functions, so an unlimited cache is a plain dict for reading: only
+stores (which follow an expensive computation) are counted, and the
+memory usage is estimated when it is queried. The per-lookup
+bookkeeping (hit counts and recency of use) is switched on only for
+caches that have a limit or for which statistics have been enabled
+with set_cache_stats().
+"""
+
+import sys
+
+caches = {}
+
+def _sizeof(obj):
+    """
+    Estimate the memory used by obj (recursively for tuples, lists and
+    dicts). Long lists are estimated from a sample of their elements.
+    """
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (tuple, list)):
+        n = len(obj)
+        if n > 100:
+            step = n // 50
+            sample = obj[::step]
+            size += sum(_sizeof(x) for x in sample) * n // len(sample)
+        else:
+            for x in obj:
+                size += _sizeof(x)
+    elif isinstance(obj, dict):
+        for k, v in obj.items():
+            size += _sizeof(k) + _sizeof(v)
+    return size
+
+class LRUCache(dict):
+    """
+    Dictionary with statistics and optional least-recently-used eviction.
+
+    Storing a new key counts as a miss (the value had to be computed).
+    If the cache has a limit or statistics are enabled (the attribute
+    stats), the instance switches to a subclass that also counts
+    lookups with [] or get() that find the key as hits, marks the
+    entries as recently used and keeps track of the memory usage.
+    Callers that extend a cached value in place can account for its
+    growth with grow().
+
+    After each store, least recently used entries are evicted until the
+    cache has at most maxsize entries and uses at most maxbytes bytes;
+    the entry that was just stored is never evicted.
+    """
+
+    def __init__(self, name, maxsize=None, maxbytes=None, stats=False):
+        dict.__init__(self)
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._maxsize = maxsize
+        self._maxbytes = maxbytes
+        self._stats = stats
+        self._update()
+
+    def _set_option(name):
+        def fget(self):
+            return getattr(self, name)
+        def fset(self, value):
+            setattr(self, name, value)
+            self._update()
+        return property(fget, fset)
+
+    maxsize = _set_option('_maxsize')
+    maxbytes = _set_option('_maxbytes')
+    stats = _set_option('_stats')
+
+    del _set_option
+
+    def _update(self):
+        # Switch between the plain and the tracked implementation
+        tracked = self._stats or self._maxsize is not None or \
+            self._maxbytes is not None
+        if tracked and not isinstance(self, _TrackedLRUCache):
+            self._sizes = {}
+            self._used = {}
+            self._clock = 0
+            self._nbytes = 0
+            for key, value in dict.items(self):
+                size = _sizeof(key) + _sizeof(value)
+                self._sizes[key] = size
+                self._nbytes += size
+                self._clock += 1
+                self._used[key] = self._clock
+            self.__class__ = _TrackedLRUCache
+            self.evict()
+        elif not tracked and isinstance(self, _TrackedLRUCache):
+            self.__class__ = LRUCache
+            del self._sizes, self._used, self._clock, self._nbytes
+
+    def __setitem__(self, key, value):
+        if not dict.__contains__(self, key):
+            self.misses += 1
+        dict.__setitem__(self, key, value)
+
+    @property
+    def nbytes(self):
+        return sum(_sizeof(k) + _sizeof(v) for k, v in dict.items(self))
+
+    def grow(self, key, added):
+        """
+        Account for the object added having been inserted into the
+        value stored for key.
+        """
+        pass
+
+    def evict(self, keep=None):
+        """
+        Remove least recently used entries (except keep) until the cache
+        is within its limits.
+        """
+        pass
+
+    def info(self):
+        """
+        Return a dict with the statistics of the cache. The number of
+        hits is None unless the lookups are tracked.
+        """
+        return {'hits':self.hits if self.__class__ is not LRUCache else None,
+            'misses':self.misses, 'evictions':self.evictions,
+            'size':len(self), 'bytes':self.nbytes, 'maxsize':self.maxsize,
+            'maxbytes':self.maxbytes}
+
+class _TrackedLRUCache(LRUCache):
+    # LRUCache with the per-lookup bookkeeping
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        self.hits += 1
+        self._clock += 1
+        self._used[key] = self._clock
+        return value
+
+    def get(self, key, default=None):
+        if dict.__contains__(self, key):
+            return self[key]
+        return default
+
+    def __setitem__(self, key, value):
+        if dict.__contains__(self, key):
+            self._nbytes -= self._sizes[key]
+        else:
+            self.misses += 1
+        dict.__setitem__(self, key, value)
+        size = _sizeof(key) + _sizeof(value)
+        self._sizes[key] = size
+        self._nbytes += size
+        self._clock += 1
+        self._used[key] = self._clock
+        self.evict(key)
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def grow(self, key, added):
+        if dict.__contains__(self, key):
+            size = _sizeof(added)
+            self._sizes[key] += size
+            self._nbytes += size
+            self.evict(key)
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self._nbytes -= self._sizes.pop(key)
+        del self._used[key]
+
+    def pop(self, key, *default):
+        if dict.__contains__(self, key):
+            value = dict.__getitem__(self, key)
+            del self[key]
+            return value
+        return dict.pop(self, key, *default)
+
+    def clear(self):
+        dict.clear(self)
+        self._sizes.clear()
+        self._used.clear()
+        self._nbytes = 0
+
+    def _full(self):
+        return (self.maxsize is not None and len(self) > self.maxsize) or \
+            (self.maxbytes is not None and self._nbytes > self.maxbytes)
+
+    def evict(self, keep=None):
+        if not self._full():
+            return
+        for key in sorted(self._used, key=self._used.get):
+            if not self._full():
+                break
+            if key != keep:
+                del self[key]
+                self.evictions += 1
+
+def register_cache(name, maxsize=None, maxbytes=None):
+    """
+    Create a cache with the given name and limits and add it to the
+    registry.
+    """
+    cache = LRUCache(name, maxsize, maxbytes)
+    caches[name] = cache
+    return cache
+
+def cache_info(name=None):
+    """
+    Return the statistics of the named cache, or a dict mapping the names
+    of all registered caches to their statistics.
+    """
+    if name is not None:
+        return caches[name].info()
+    return dict((name, cache.info()) for name, cache in caches.items())
+
+def clear_caches(name=None):
+    """
+    Empty the named cache, or all registered caches. The statistics
+    are reset as well.
+    """
+    if name is not None:
+        selected = [caches[name]]
+    else:
+        selected = caches.values()
+    for cache in selected:
+        cache.clear()
+        cache.hits = cache.misses = cache.evictions = 0
+
+def set_cache_limit(name, maxsize=None, maxbytes=None):
+    """
+    Set the maximum number of entries and/or bytes of the named cache
+    (None meaning unlimited), evicting entries if necessary.
+    """
+    cache = caches[name]
+    cache.maxsize = maxsize
+    cache.maxbytes = maxbytes
+    cache.evict()
+
+def set_cache_stats(enabled=True, name=None):
+    """
+    Enable or disable counting hits and tracking the memory usage of
+    the named cache, or of all registered caches.
+    """
+    if name is not None:
+        selected = [caches[name]]
+    else:
+        selected = caches.values()
+    for cache in selected:
+        cache.stats = enabled
@@ -9,7 +9,10 @@
 
 """
 
+import os
 import math
+import struct
+import binascii
 from bisect import bisect
 
 from .backend import xrange
@@ -32,6 +35,8 @@
 
 from .libintmath import ifib
 
+from .libcache import register_cache
+
 
 #-------------------------------------------------------------------------------
 # Tuning parameters
@@ -53,21 +58,47 @@
 else:
     COS_SIN_CACHE_PREC = 200
 COS_SIN_CACHE_STEP = 8
-cos_sin_cache = {}
+cos_sin_cache = register_cache('cos_sin')
+
+# Cutoffs for using the bit-burst algorithm for exp and cos/sin
+# (see tests/bench_elefun.py)
+if BACKEND == 'python':
+    EXP_BITBURST_CUTOFF = 20000
+    COS_SIN_BITBURST_CUTOFF = 60000
+else:
+    EXP_BITBURST_CUTOFF = 60000
+    COS_SIN_BITBURST_CUTOFF = 150000
+# Number of bits in the first chunk of the bit-burst algorithm
+BITBURST_FIRST_CHUNK = 32
 
 # Number of integer logarithms to cache (for zeta sums)
 MAX_LOG_INT_CACHE = 2000
-log_int_cache = {}
+log_int_cache = register_cache('log_int')
 
 LOG_TAYLOR_PREC = 2500  # Use Taylor series with caching up to this prec
 LOG_TAYLOR_SHIFT = 9    # Cache log values in steps of size 2^-N
-log_taylor_cache = {}
+log_taylor_cache = register_cache('log_taylor')
 # prec/size ratio of x for fastest convergence in AGM formula
 LOG_AGM_MAG_PREC_RATIO = 20
 
 ATAN_TAYLOR_PREC = 3000  # Same as for log
 ATAN_TAYLOR_SHIFT = 7   # steps of size 2^-N
-atan_taylor_cache = {}
+atan_taylor_cache = register_cache('atan_taylor')
+
+# Number of processes used for the top levels of the binary splitting
+# when computing constants (0 or 1 = serial), and the precision above
+# which they are used; see set_bs_workers()
+BS_WORKERS = 0
+BS_PARALLEL_PREC = 100000
+
+# Directory for persistent storage of constants computed with
+# constant_memo (None = disabled), and the precision from which values
+# are loaded and stored; see set_constant_store()
+CONSTANT_STORE_DIR = os.environ.get('MPMATH_CONSTANT_STORE') or None
+CONSTANT_STORE_PREC = 5000
+# Version of the file format used by the constant store
+CONSTANT_FILE_VERSION = 1
+CONSTANT_FILE_MAGIC = b'MPCS'
 
 
 # ~= next power of two + 20
@@ -82,12 +113,98 @@
 #                                                                            #
 #----------------------------------------------------------------------------#
 
+def set_constant_store(directory, minprec=None):
+    """
+    Set the directory in which values of constants computed with
+    precision *minprec* bits or higher are stored persistently
+    (None disables the store).
+    """
+    global CONSTANT_STORE_DIR, CONSTANT_STORE_PREC
+    CONSTANT_STORE_DIR = directory or None
+    if minprec is not None:
+        CONSTANT_STORE_PREC = int(minprec)
+
+def constant_file(name):
+    """
+    Return the path of the file in which the constant with the given
+    name is stored, or None if the constant store is disabled.
+    """
+    if not CONSTANT_STORE_DIR:
+        return None
+    return os.path.join(CONSTANT_STORE_DIR, "%s.v%i.const" % (name,
+        CONSTANT_FILE_VERSION))
+
+def _constant_header(name):
+    name = name.encode('ascii')
+    return CONSTANT_FILE_MAGIC + struct.pack('>HH', CONSTANT_FILE_VERSION,
+        len(name)) + name
+
+def load_constant(name):
+    """
+    Load the fixed-point value of a constant from the constant store.
+    Returns (prec, value), or None if no valid value is stored.
+    """
+    path = constant_file(name)
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        f = open(path, 'rb')
+        try:
+            data = f.read()
+        finally:
+            f.close()
+        header = _constant_header(name)
+        if data[:len(header)] != header:
+            return None
+        offset = len(header)
+        prec, crc, n = struct.unpack('>QIQ', data[offset:offset+20])
+        data = data[offset+20:]
+        if len(data) != n or binascii.crc32(data) & 0xffffffff != crc:
+            return None
+        return prec, MPZ(int(binascii.hexlify(data), 16))
+    except (IOError, OSError, ValueError, struct.error):
+        return None
+
+def save_constant(name, prec, value):
+    """
+    Write the fixed-point value of a constant to the constant store,
+    if one is configured. Failures are ignored.
+    """
+    path = constant_file(name)
+    if not path or value < 0:
+        return
+    h = '%x' % value
+    data = binascii.unhexlify('0'*(len(h)&1) + h)
+    data = _constant_header(name) + struct.pack('>QIQ', prec,
+        binascii.crc32(data) & 0xffffffff, len(data)) + data
+    tmp = "%s.%i.tmp" % (path, os.getpid())
+    try:
+        if not os.path.isdir(CONSTANT_STORE_DIR):
+            os.makedirs(CONSTANT_STORE_DIR)
+        f = open(tmp, 'wb')
+        try:
+            f.write(data)
+        finally:
+            f.close()
+        # write to a temporary file first so that concurrent readers
+        # never see a partial file
+        os.rename(tmp, path)
+    except (IOError, OSError):
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
 def constant_memo(f):
     """
     Decorator for caching computed values of mathematical
     constants. This decorator should be applied to a
     function taking a single argument prec as input and
     returning a fixed-point value with the given precision.
+
+    If the constant store is enabled (see set_constant_store), values
+    with high precision are also looked up in and written back to the
+    store, using the function name as key.
     """
     f.memo_prec = -1
     f.memo_val = None
@@ -96,8 +213,16 @@ def g(prec, **kwargs):
         if prec <= memo_prec:
             return f.memo_val >> (memo_prec-prec)
         newprec = int(prec*1.05+10)
+        stored = None
+        if CONSTANT_STORE_DIR and newprec >= CONSTANT_STORE_PREC:
+            stored = load_constant(f.__name__)
+            if stored and stored[0] >= newprec:
+                f.memo_prec, f.memo_val = stored
+                return f.memo_val >> (f.memo_prec-prec)
         f.memo_val = f(newprec, **kwargs)
         f.memo_prec = newprec
+        if CONSTANT_STORE_DIR and newprec >= CONSTANT_STORE_PREC:
+            save_constant(f.__name__, newprec, f.memo_val)
         return f.memo_val >> (newprec-prec)
     g.__name__ = f.__name__
     g.__doc__ = f.__doc__
@@ -120,6 +245,56 @@ def f(prec, rnd=round_fast):
     f.__doc__ = fixed.__doc__
     return f
 
+def set_bs_workers(workers=0, minprec=None):
+    """
+    Set the number of processes used to evaluate binary splitting
+    series for mathematical constants (pi, e, log(2), Catalan's constant,
+    zeta(3)) at precision *minprec* bits and above. The default 0
+    evaluates everything in the current process.
+    """
+    global BS_WORKERS, BS_PARALLEL_PREC
+    BS_WORKERS = max(int(workers), 0)
+    if minprec is not None:
+        BS_PARALLEL_PREC = int(minprec)
+
+def _bs_task(task):
+    bs, before, a, b, after = task
+    return bs(*(before + (a, b) + after))
+
+def bs_parallel(bs, merge, a, b, prec, before=(), after=()):
+    """
+    Evaluate the binary splitting function bs(*before, a, b, *after).
+
+    If BS_WORKERS > 1 and prec >= BS_PARALLEL_PREC, the range [a, b)
+    is cut into BS_WORKERS consecutive pieces which are evaluated in a
+    process pool, and the results are combined by calling
+    merge(left, right) pairwise in the current process. Both bs and
+    merge must be module-level functions so that they can be pickled.
+    """
+    workers = BS_WORKERS
+    if workers < 2 or prec < BS_PARALLEL_PREC or b - a < 2*workers:
+        return bs(*(before + (a, b) + after))
+    step = (b - a) // workers
+    cuts = [a + i*step for i in xrange(workers)] + [b]
+    tasks = [(bs, before, cuts[i], cuts[i+1], after) \
+        for i in xrange(workers)]
+    from multiprocessing import Pool
+    pool = Pool(workers)
+    try:
+        results = pool.map(_bs_task, tasks)
+    finally:
+        pool.close()
+        pool.join()
+    # Merge neighbours in a balanced tree so that the operands
+    # of each multiplication have similar size
+    while len(results) > 1:
+        merged = [merge(results[i], results[i+1]) \
+            for i in xrange(0, len(results)-1, 2)]
+        if len(results) & 1:
+            merged.append(results[-1])
+        results = merged
+    return results[0]
+
 def bsp_acot(q, a, b, hyperbolic):
     if b - a == 1:
         a1 = MPZ(2*a + 3)
@@ -132,6 +307,11 @@ def bsp_acot(q, a, b, hyperbolic):
     p2, q2, r2 = bsp_acot(q, m, b, hyperbolic)
     return q2*p1 + r1*p2, q1*q2, r1*r2
 
+def bsp_acot_merge(left, right):
+    p1, q1, r1 = left
+    p2, q2, r2 = right
+    return q2*p1 + r1*p2, q1*q2, r1*r2
+
 # the acoth(x) series converges like the geometric series for x^2
 # N = ceil(p*log(2)/(2*log(x)))
 def acot_fixed(a, prec, hyperbolic):
@@ -140,7 +320,8 @@ def acot_fixed(a, prec, hyperbolic):
     http://numbers.computation.free.fr/Constants/Algorithms/splitting.html
     """
     N = int(0.35 * prec/math.log(a) + 20)
-    p, q, r = bsp_acot(a, 0,N, hyperbolic)
+    p, q, r = bs_parallel(bsp_acot, bsp_acot_merge, 0, N, prec,
+        (a,), (hyperbolic,))
     return ((p+q)<<prec)//(q*a)
 
 def machin(coefs, prec, hyperbolic=False):
@@ -230,6 +411,11 @@ def bs_chudnovsky(a, b, level, verbose):
         q = q1*p2 + q2*g1
     return g, p, q
 
+def bs_chudnovsky_merge(left, right):
+    g1, p1, q1 = left
+    g2, p2, q2 = right
+    return g1*g2, p1*p2, q1*p2 + q2*g1
+
 @constant_memo
 def pi_fixed(prec, verbose=False, verbose_base=None):
     """
@@ -242,7 +428,8 @@ def pi_fixed(prec, verbose=False, verbose_base=None):
     N = int(prec/3.3219280948/14.181647462 + 2)
     if verbose:
         print("binary splitting with N =", N)
-    g, p, q = bs_chudnovsky(0, N, 0, verbose)
+    g, p, q = bs_parallel(bs_chudnovsky, bs_chudnovsky_merge, 0, N, prec,
+        after=(0, verbose))
     sqrtC = isqrt_fast(CHUD_C<<(2*prec))
     v = p*CHUD_C*sqrtC//((q+CHUD_A*p)*CHUD_D)
     return v
@@ -262,6 +449,11 @@ def bspe(a, b):
     p2, q2 = bspe(m, b)
     return p1*q2+p2, q1*q2
 
+def bspe_merge(left, right):
+    p1, q1 = left
+    p2, q2 = right
+    return p1*q2+p2, q1*q2
+
 @constant_memo
 def e_fixed(prec):
     """
@@ -275,7 +467,7 @@ def e_fixed(prec):
     # Slight overestimate of N needed for 1/N! < 2**(-prec)
     # This could be tightened for large N.
     N = int(1.1*prec/math.log(prec) + 20)
-    p, q = bspe(0,N)
+    p, q = bs_parallel(bspe, bspe_merge, 0, N, prec)
     return ((p+q)<<prec)//q
 
 @constant_memo
@@ -1083,12 +1275,123 @@ def exponential_series(x, prec, type=0):
             s = -s
         return (c>>extra), (s>>extra)
 
+"""
+The bit-burst algorithm splits the argument x = x_0 + x_1 + x_2 + ...
+where x_0 holds the first few bits of x and x_j (j >= 1) holds the bits
+between positions 2^j*BITBURST_FIRST_CHUNK and 2^(j+1)*BITBURST_FIRST_CHUNK
+after the binary point. Then x_j = p/2^m with a numerator p of only about
+m/2 bits, and since x_j < 2^(-m/2), the Taylor series for exp(x_j) (or
+cos/sin) needs about 2*prec/m terms. Each such series is evaluated
+exactly by binary splitting, and the results are multiplied together.
+The total cost is O(M(prec) log(prec)^2), compared to roughly
+O(M(prec) prec^(1/3)) for the Taylor series with argument reduction used
+by exponential_series.
+"""
+
+def bs_exp_series(c, shift, d, o, a, b, need_P=True):
+    """
+    Computes P, Q, T for the terms n = a, ..., b-1 of the series
+    sum_n prod_{k<n} c / (2^shift * q(k)) with the denominators
+    q(k) = (d*k+o+1)*(d*k+o+2)*...*(d*k+o+d), such that
+
+        sum_{n=a}^{b-1} prod_{k=a}^{n-1} c/(2^shift*q(k)) =
+            T / (Q * 2^(shift*(b-a)))
+
+    where P = c^(b-a) and Q = q(a)*...*q(b-1). If need_P is False,
+    None is returned for P, saving a multiplication.
+    """
+    if b - a == 1:
+        Q = MPZ(d*a+o+1)
+        for i in xrange(2, d+1):
+            Q *= (d*a+o+i)
+        return c, Q, Q << shift
+    m = (a+b)//2
+    P1, Q1, T1 = bs_exp_series(c, shift, d, o, a, m)
+    P2, Q2, T2 = bs_exp_series(c, shift, d, o, m, b, need_P)
+    if need_P:
+        P = P1*P2
+    else:
+        P = None
+    return P, Q1*Q2, ((T1*Q2) << (shift*(b-m))) + P1*T2
+
+def bs_exp_series_fixed(c, shift, d, o, prec):
+    """
+    Evaluates the series of bs_exp_series as a fixed-point number with
+    precision prec, summing enough terms for full accuracy.
+    """
+    # log2 of the ratio between consecutive terms, without q(k)
+    r = bitcount(abs(c)) - shift
+    log2 = math.log(2)
+    n = 0
+    logt = 0.0
+    while 1:
+        k = d*n+o
+        logt += r - math.log((k+1)*(k+d))/log2*d/2
+        n += 1
+        if logt < -prec-10:
+            break
+    P, Q, T = bs_exp_series(c, shift, d, o, 0, n, False)
+    # the value is T / (Q * 2^(shift*n))
+    e = prec - shift*n
+    if e >= 0:
+        return (T << e) // Q
+    return (T >> (-e)) // Q
+
+def bitburst_chunks(x, prec):
+    """
+    Splits the fixed-point number x (with precision prec) into chunks
+    (p, m) with x = sum of p/2^m, for the bit-burst algorithm.
+    """
+    chunks = []
+    m = BITBURST_FIRST_CHUNK
+    while x:
+        if m >= prec:
+            chunks.append((x, prec))
+            break
+        p = x >> (prec - m)
+        if p:
+            chunks.append((p, m))
+            x -= p << (prec - m)
+        m *= 2
+    return chunks
+
+def exp_bitburst(x, prec):
+    """
+    Computes exp(x) as a fixed-point number, using the bit-burst
+    algorithm. Assumes |x| < 2.
+    """
+    wp = prec + 2*bitcount(prec) + 10
+    x <<= (wp - prec)
+    v = MPZ_ONE << wp
+    for p, m in bitburst_chunks(x, wp):
+        v = (v * bs_exp_series_fixed(p, m, 1, 0, wp)) >> wp
+    return v >> (wp - prec)
+
+def cos_sin_bitburst(x, prec):
+    """
+    Computes cos(x), sin(x) as fixed-point numbers, using the bit-burst
+    algorithm. Assumes |x| < 2.
+    """
+    wp = prec + 2*bitcount(prec) + 10
+    x <<= (wp - prec)
+    c = MPZ_ONE << wp
+    s = MPZ_ZERO
+    for p, m in bitburst_chunks(x, wp):
+        p2 = -p*p
+        cj = bs_exp_series_fixed(p2, 2*m, 2, 0, wp)
+        sj = bs_exp_series_fixed(p2, 2*m, 2, 1, wp)
+        sj = (sj * p) >> m
+        c, s = (c*cj - s*sj) >> wp, (s*cj + c*sj) >> wp
+    return c >> (wp - prec), s >> (wp - prec)
+
 def exp_basecase(x, prec):
     """
     Compute exp(x) as a fixed-point number. Works for any x,
     but for speed should have |x| < 1. For an arbitrary number,
     use exp(x) = exp(x-m*log(2)) * 2^m where m = floor(x/log(2)).
     """
+    if prec > EXP_BITBURST_CUTOFF:
+        return exp_bitburst(x, prec)
     if prec > EXP_COSH_CUTOFF:
         return exponential_series(x, prec, 0)
     r = int(prec**0.5)
@@ -1112,6 +1415,9 @@ def exp_expneg_basecase(x, prec):
     """
     Computation of exp(x), exp(-x)
     """
+    if prec > EXP_BITBURST_CUTOFF:
+        a = exp_bitburst(x, prec)
+        return a, (MPZ_ONE << (prec+prec)) // a
     if prec > EXP_COSH_CUTOFF:
         cosh, sinh = exponential_series(x, prec, 1)
         return cosh+sinh, cosh-sinh
@@ -1125,6 +1431,8 @@ def cos_sin_basecase(x, prec):
     in [0, pi/2). For an arbitrary number, use x' = x - m*(pi/2)
     where m = floor(x/(pi/2)) along with quarter-period symmetries.
     """
+    if prec > COS_SIN_BITBURST_CUTOFF:
+        return cos_sin_bitburst(x, prec)
     if prec > COS_SIN_CACHE_PREC:
         return exponential_series(x, prec, 2)
     precs = prec - COS_SIN_CACHE_STEP
@@ -7,8 +7,18 @@
 
 import operator
 import math
+import marshal
+import struct
+import types
+import itertools
 
-from .backend import MPZ_ZERO, MPZ_ONE, BACKEND, xrange, exec_
+try:
+    from importlib.util import MAGIC_NUMBER as BYTECODE_MAGIC
+except ImportError:
+    from imp import get_magic
+    BYTECODE_MAGIC = get_magic()
+
+from .backend import MPZ, MPZ_ZERO, MPZ_ONE, BACKEND, xrange, exec_
 
 from .libintmath import gcd
 
@@ -323,6 +333,227 @@ def _hypsum(coeffs, z, prec, wp, epsshift, magnitude_check, **kwargs):
         return "(none)", _hypsum
 
 
+# Version of the format used by dump_hyp_summators
+HYPSUM_FILE_VERSION = 1
+HYPSUM_FILE_MAGIC = b'MPHS'
+
+# Values of (p, q) for which summators are typically needed (by hyp0f1,
+# hyp1f1, hyp2f1, hyp1f2, hyp2f0 and the functions based on them)
+HYPSUM_COMMON_PQ = [(0,1), (1,0), (1,1), (2,0), (2,1), (1,2)]
+
+def common_hyp_summator_keys(pq=HYPSUM_COMMON_PQ):
+    """
+    Return the summator keys (p, q, param_types, ztype) for all
+    combinations of parameter types and argument types, for each
+    (p, q) in the list pq.
+    """
+    keys = []
+    for p, q in pq:
+        for param_types in itertools.product('ZQRC', repeat=p+q):
+            for ztype in 'RC':
+                keys.append((p, q, param_types, ztype))
+    return keys
+
+def _hypsum_header():
+    return HYPSUM_FILE_MAGIC + struct.pack('>H', HYPSUM_FILE_VERSION) + \
+        BYTECODE_MAGIC
+
+def dump_hyp_summators(summators):
+    """
+    Serialize a dict mapping keys to summators created by
+    make_hyp_summator as a string of bytes, containing the compiled
+    code of each summator. The data can only be loaded by the same
+    version of Python. Summators that do not consist of plain code
+    (with the sage backend) are skipped.
+    """
+    codes = {}
+    for key, f in summators.items():
+        code = getattr(f, '__code__', None)
+        if code is not None and not code.co_freevars:
+            codes[key] = code
+    return _hypsum_header() + marshal.dumps(codes)
+
+def load_hyp_summators(data):
+    """
+    Inverse of dump_hyp_summators: return a dict mapping keys to
+    summators. If the data was written by an incompatible version of
+    mpmath or Python, ValueError is raised.
+    """
+    header = _hypsum_header()
+    if data[:len(header)] != header:
+        raise ValueError("incompatible hypergeometric summator data")
+    codes = marshal.loads(data[len(header):])
+    namespace = globals()
+    summators = {}
+    for key, code in codes.items():
+        summators[key] = types.FunctionType(code, namespace)
+    return summators
+
+
+#-----------------------------------------------------------------------#
+#                                                                       #
+#           Binary splitting for series with rational parameters        #
+#                                                                       #
+#-----------------------------------------------------------------------#
+
+"""
+If all parameters of a hypergeometric series are rational and z is real
+(hence also rational, being a binary fraction), the ratio between
+consecutive terms is a rational function P(n)/Q(n) with integer
+coefficients, and the sum of the first N terms can be computed exactly
+as a fraction T/Q using binary splitting. With fast multiplication this
+costs O(M(prec) log(prec)^2) instead of the O(N M(prec)) of the generated
+summators, which is much faster at very high precision.
+"""
+
+# Use binary splitting in hypsum() at and above this precision. The
+# numbers in binary splitting grow to about N*log2(N) bits for N terms,
+# so it is only used if N*log2(N) < HYPSUM_BS_TERMS_RATIO*prec; slowly
+# converging series are summed faster by the generated summators.
+if BACKEND == 'python':
+    HYPSUM_BS_PREC = 3000
+    HYPSUM_BS_TERMS_RATIO = 16
+else:
+    HYPSUM_BS_PREC = 8000
+    HYPSUM_BS_TERMS_RATIO = 128
+# The numerator and denominator of z enter every term, so binary
+# splitting only pays off if they are small compared to the precision
+HYPSUM_BS_ZBITS_RATIO = 256
+
+def bs_hypsum(ap, aq, bp, bq, cp, cq, a, b):
+    """
+    Computes P, Q, T for the terms n = a, ..., b-1 of the series with
+    term ratio P(n)/Q(n) = cp*prod(ap[i]+n*aq[i]) / (cq*(n+1)*
+    prod(bp[j]+n*bq[j])), where P = P(a)*...*P(b-1), Q = Q(a)*...*Q(b-1)
+    and T/Q is the sum of prod(P(a)...P(n-1))/prod(Q(a)...Q(n-1)).
+    """
+    if b - a == 1:
+        P = cp
+        for i in xrange(len(ap)):
+            P *= ap[i] + a*aq[i]
+        Q = cq * (a+1)
+        for j in xrange(len(bp)):
+            Q *= bp[j] + a*bq[j]
+        return P, Q, Q
+    m = (a+b)//2
+    P1, Q1, T1 = bs_hypsum(ap, aq, bp, bq, cp, cq, a, m)
+    P2, Q2, T2 = bs_hypsum(ap, aq, bp, bq, cp, cq, m, b)
+    return P1*P2, Q1*Q2, T1*Q2 + P1*T2
+
+def hypsum_terms(a_s, b_s, zmag, target, maxterms):
+    """
+    Estimates the number of terms of the hypergeometric series with
+    parameters a_s, b_s (floats) and log2|z| = zmag that must be added
+    so that the remaining terms are smaller than 2^(-target) in total.
+    Returns (N, peak) where peak is log2 of the largest term, or None
+    if more than maxterms terms would be needed.
+    """
+    ln = math.log
+    ln2 = math.log(2)
+    # beyond this point the term ratio varies monotonically
+    start = max([abs(c) for c in a_s+b_s] + [0]) + 2
+    # bound for how much the term ratio may exceed |z| when p = q+1
+    excess = sum(abs(c) for c in a_s) + 1
+    logt = peak = 0.0
+    n = 0
+    while n <= maxterms:
+        r = zmag - ln(n+1)/ln2
+        for c in a_s:
+            if c + n == 0:
+                # the series terminates
+                return n+1, peak
+            r += ln(abs(c+n))/ln2
+        for c in b_s:
+            r -= ln(abs(c+n))/ln2
+        logt += r
+        n += 1
+        if logt > peak:
+            peak = logt
+        if n > start:
+            if len(a_s) == len(b_s) + 1:
+                r = max(r, zmag + ln(1 + excess/n)/ln2)
+            # the remaining terms are bounded by a geometric series
+            if r < 0 and 2**r < 1 and logt - ln(1-2**r)/ln2 < -target:
+                return n, peak
+    return None
+
+def mpf_hypsum_rational(p, q, coeffs, z, prec, rnd=round_fast,
+    maxterms=None, maxprec=None):
+    """
+    Sums the hypergeometric series pFq(a_1, ..., a_p; b_1, ..., b_q; z)
+    using binary splitting. The parameters are given by coeffs as a list
+    of p+q pairs (numerator, denominator) and z is a real mpf value.
+    Returns None if the series cannot be summed this way: if it diverges,
+    has a pole, needs more than maxterms terms (default 100*prec), or
+    suffers from cancellation of more than maxprec bits (default prec),
+    or if z has too many bits or the series converges too slowly for
+    binary splitting to be efficient.
+    """
+    if p > q+1:
+        return None
+    zsign, zman, zexp, zbc = z
+    if not zman:
+        if z == fzero:
+            return mpf_pos(fone, prec, rnd)
+        return None
+    if (zbc + abs(zexp)) * HYPSUM_BS_ZBITS_RATIO > prec:
+        return None
+    zmag = zexp + zbc
+    if p == q+1 and zmag > 0:
+        return None
+    if maxterms is None:
+        maxterms = 100*prec
+    # limit N*log2(N) to about HYPSUM_BS_TERMS_RATIO*prec
+    cost = HYPSUM_BS_TERMS_RATIO * prec
+    maxterms = min(maxterms, int(cost / math.log(cost, 2)))
+    if maxprec is None:
+        maxprec = prec
+    ap = [MPZ(c[0]) for c in coeffs[:p]]
+    aq = [MPZ(c[1]) for c in coeffs[:p]]
+    bp = [MPZ(c[0]) for c in coeffs[p:]]
+    bq = [MPZ(c[1]) for c in coeffs[p:]]
+    for j in xrange(q):
+        if bp[j] <= 0 and not bp[j] % bq[j]:
+            return None
+    # constant factors of P(n) and Q(n)
+    cp = [zman, -zman][zsign]
+    cq = MPZ_ONE
+    if zexp >= 0:
+        cp <<= zexp
+    else:
+        cq <<= (-zexp)
+    for c in bq:
+        cp *= c
+    for c in aq:
+        cq *= c
+    a_s = [float(ap[i])/float(aq[i]) for i in xrange(p)]
+    b_s = [float(bp[j])/float(bq[j]) for j in xrange(q)]
+    zmag = math.log(zman)/math.log(2) + zexp
+    extra = 30
+    terms = hypsum_terms(a_s, b_s, zmag, prec+extra, maxterms)
+    if terms is None:
+        return None
+    # the terms need to be accurate relative to the largest term
+    target = prec + extra - int(terms[1])
+    while 1:
+        terms = hypsum_terms(a_s, b_s, zmag, target, maxterms)
+        if terms is None:
+            return None
+        N, peak = terms
+        P, Q, T = bs_hypsum(ap, aq, bp, bq, cp, cq, 0, N)
+        if not T:
+            return fzero
+        if Q < 0:
+            T, Q = -T, -Q
+        mag = bitcount(abs(T)) - bitcount(Q)
+        # is the truncation error small compared to the sum?
+        if target + mag >= prec + extra - 2:
+            return from_rational(T, Q, prec, rnd)
+        if peak - mag > maxprec:
+            return None
+        target = prec + extra - mag + 5
+
+
 #-----------------------------------------------------------------------#
 #                                                                       #
 #                              Error functions                          #
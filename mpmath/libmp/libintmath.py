@@ -8,9 +8,11 @@
 
 import math
 from bisect import bisect
+from itertools import compress
 
 from .backend import xrange
 from .backend import BACKEND, gmpy, sage, sage_utils, MPZ, MPZ_ONE, MPZ_ZERO
+from .libcache import register_cache
 
 def giant_steps(start, target, n=2):
     """
@@ -118,12 +120,101 @@ def sage_trailing(n):
 trailtable = [trailing(n) for n in range(256)]
 bctable = [bitcount(n) for n in range(1024)]
 
-# TODO: speed up for bases 2, 4, 8, 16, ...
+#----------------------------------------------------------------------------#
+#                              Radix conversion                              #
+#----------------------------------------------------------------------------#
+
+# Powers base**n (with their bit sizes and, when needed, approximate
+# reciprocals) for divide-and-conquer radix conversion. Since the
+# splitting points only depend on the size of the input, repeated
+# conversions of numbers of the same size reuse all powers.
+radix_power_cache = register_cache('radix_powers')
+
+# Number of bits from which divisions by powers of the base are done
+# by multiplication with a reciprocal computed by Newton iteration
+# (Python's long division is quadratic; multiplication uses Karatsuba)
+if BACKEND == 'python':
+    RADIX_RECIPROCAL_BITS = 5000
+else:
+    RADIX_RECIPROCAL_BITS = None
+
+# Powers base**n with fewer digits than this are cheaper to recompute
+# than to look up, and are not cached (this covers the conversion of
+# numbers to strings at ordinary precisions)
+RADIX_CACHE_DIGITS = 1000
+
+# Digit strings shorter than this are converted directly. Must be
+# below Python's integer string conversion limit (4300 digits).
+RADIX_PARSE_CUTOFF = 1000
+
+def radix_reciprocal(B):
+    """Returns an approximation of 2**(2*m)/B, where m = bitcount(B),
+    accurate to a few units. Computed with a Newton iteration that
+    only uses multiplications at the final precision."""
+    m = bitcount(B)
+    if m < 1000:
+        return (MPZ_ONE << (2*m)) // B
+    h = m//2 + 10
+    Y = radix_reciprocal(B >> (m-h)) << (m-h)
+    E = (MPZ_ONE << (2*m)) - B*Y
+    return Y + ((Y*E) >> (2*m))
+
+def _radix_entry(base, n):
+    key = base, n
+    entry = radix_power_cache.get(key)
+    if entry is None:
+        P = MPZ(base)**n
+        entry = radix_power_cache[key] = [P, bitcount(P), None]
+    return entry
+
+def radix_power(base, n):
+    """Returns base**n, cached if n is large."""
+    if n < RADIX_CACHE_DIGITS:
+        return MPZ(base)**n
+    return _radix_entry(base, n)[0]
+
+def radix_divmod(n, base, k):
+    """Computes divmod(n, base**k) for a nonnegative integer n, using
+    a cached reciprocal of base**k when n < base**(2*k)."""
+    entry = _radix_entry(base, k)
+    P, m, inv = entry
+    if RADIX_RECIPROCAL_BITS is None or m < RADIX_RECIPROCAL_BITS or \
+        bitcount(n) > 2*m:
+        return divmod(n, P)
+    if inv is None:
+        inv = entry[2] = radix_reciprocal(P)
+        radix_power_cache.grow((base, k), inv)
+    q = (n*inv) >> (2*m)
+    r = n - q*P
+    while r < 0:
+        q -= 1
+        r += P
+    while r >= P:
+        q += 1
+        r -= P
+    return q, r
+
+def radix_inverse(base, n, prec):
+    """Returns (man, exp) such that man * 2**exp approximates base**(-n)
+    with a relative error of about 2**(-prec), or None if this is not
+    faster than dividing by base**n."""
+    if RADIX_RECIPROCAL_BITS is None or prec < RADIX_RECIPROCAL_BITS or \
+        n*math.log(base, 2) > 4*prec:
+        return None
+    P, m, inv = _radix_entry(base, n)
+    w = prec + 10
+    if m > w:
+        inv = radix_reciprocal(P >> (m-w))
+    else:
+        inv = radix_reciprocal(P << (w-m))
+    return inv, -(m-w)-2*w
 
 def bin_to_radix(x, xbits, base, bdigits):
     """Changes radix of a fixed-point number; i.e., converts
     x * 2**xbits to floor(x * 10**bdigits)."""
-    return x * (MPZ(base)**bdigits) >> xbits
+    if bdigits < RADIX_CACHE_DIGITS:
+        return x * MPZ(base)**bdigits >> xbits
+    return x * radix_power(base, bdigits) >> xbits
 
 stddigits = '0123456789abcdefghijklmnopqrstuvwxyz'
 
@@ -150,12 +241,17 @@ def numeral_python(n, base=10, size=0, digits=stddigits):
         if not n:
             return "0"
         return "-" + numeral(-n, base, size, digits)
+    # The size may be an underestimate; the splitting points must
+    # be large enough for radix_divmod to avoid long division
+    size = max(size, int(bitcount(n) / math.log(base, 2)) + 1)
     # Fast enough to do directly
     if size < 250:
         return small_numeral(n, base, digits)
     # Divide in half
     half = (size // 2) + (size & 1)
-    A, B = divmod(n, base**half)
+    A, B = radix_divmod(n, base, half)
+    if not A:
+        return numeral(B, base, half, digits)
     ad = numeral(A, base, half, digits)
     bd = numeral(B, base, half, digits).rjust(half, "0")
     return ad + bd
@@ -177,7 +273,9 @@ def numeral_gmpy(n, base=10, size=0, digits=stddigits):
         return gmpy.digits(n, base)
     # Divide in half
     half = (size // 2) + (size & 1)
-    A, B = divmod(n, MPZ(base)**half)
+    A, B = radix_divmod(n, base, half)
+    if not A:
+        return numeral(B, base, half, digits)
     ad = numeral(A, base, half, digits)
     bd = numeral(B, base, half, digits).rjust(half, "0")
     return ad + bd
@@ -187,6 +285,58 @@ def numeral_gmpy(n, base=10, size=0, digits=stddigits):
 else:
     numeral = numeral_python
 
+def write_numeral(f, n, base=10, size=0, digits=stddigits, width=0):
+    """Write the digits of the integer n in the given base to the file
+    object f, without building the whole string in memory. The digits
+    are emitted from the most significant end, in chunks of at most
+    about 10000 digits, padded with zeros to at least 'width' digits.
+    The 'size' parameter is the approximate number of digits, as for
+    numeral()."""
+    if n < 0:
+        f.write("-")
+        n = -n
+    # The size may be an underestimate; the chunks must not be larger
+    # than the actual number of digits requires
+    size = max(size, int(bitcount(n) / math.log(base, 2)) + 1)
+    if size < 10000:
+        f.write(numeral(n, base, size, digits).rjust(width, "0"))
+        return
+    half = (size // 2) + (size & 1)
+    A, B = radix_divmod(n, base, half)
+    if A or width > half:
+        write_numeral(f, A, base, half, digits, max(width-half, 0))
+        write_numeral(f, B, base, half, digits, half)
+    else:
+        write_numeral(f, B, base, half, digits, width)
+
+def parse_numeral_python(s, base=10):
+    """Parse a string of digits (with an optional sign) in the given
+    base. Long strings are split in half recursively, so that the
+    conversion is subquadratic and not subject to Python's limit on
+    the length of integer strings."""
+    if s[:1] in "+-":
+        if s[0] == "-":
+            return -parse_numeral(s[1:], base)
+        s = s[1:]
+    n = len(s)
+    if n < RADIX_PARSE_CUTOFF or not (base & (base-1)):
+        return MPZ(int(s, base))
+    k = n // 2
+    return parse_numeral(s[:n-k], base) * radix_power(base, k) + \
+        parse_numeral(s[n-k:], base)
+
+def parse_numeral_gmpy(s, base=10):
+    """Parse a string of digits (with an optional sign) in the given
+    base."""
+    if s[:1] == "+":
+        s = s[1:]
+    return MPZ(s, base)
+
+if BACKEND == "gmpy":
+    parse_numeral = parse_numeral_gmpy
+else:
+    parse_numeral = parse_numeral_python
+
 _1_800 = 1<<800
 _1_600 = 1<<600
 _1_400 = 1<<400
@@ -379,15 +529,96 @@ def ifac2(n, memo_pair=[{0:1}, {1:1}]):
     ifac = lambda n: int(sage.factorial(n))
     ifib = sage.fibonacci
 
+#----------------------------------------------------------------------------#
+#                               Prime sieving                                #
+#----------------------------------------------------------------------------#
+
+# The sieve of Eratosthenes is stored as a bytearray s with one byte for
+# each odd number, s[i] being 1 if 2*i+1 is prime and 0 otherwise. Slice
+# assignment and bytearray.count() then do the crossing off and the
+# counting at C speed.
+
+# Number of odd numbers crossed off at a time when extending a sieve
+SIEVE_SEGMENT = 2**18
+
+# Sieves up to this length (in bytes) are kept for reuse
+SIEVE_CACHE_LIMIT = 2**25
+
+odd_sieve_cache = register_cache('odd_sieve', maxsize=1)
+
+_ONE = b'\x01'
+
+def sieve_odd_range(s, a, primes):
+    """
+    Cross off the multiples of the given odd primes in the bytearray s,
+    whose entries correspond to the odd numbers a, a+2, ..., a+2*len(s)-2.
+    Only primes p with p*p < a+2*len(s) need to be given.
+    """
+    m = len(s)
+    b = a + 2*m
+    for p in primes:
+        start = p*p
+        if start >= b:
+            break
+        if start < a:
+            # first odd multiple of p that is >= a
+            start = a + (-a) % p
+            if not start & 1:
+                start += p
+        i = (start - a) >> 1
+        if i < m:
+            s[i::p] = bytearray((m-i-1)//p + 1)
+
+def odd_sieve(n):
+    """
+    Return a bytearray s of length (n+1)//2 with s[i] = 1 if 2*i+1 is
+    prime and s[i] = 0 otherwise. The largest sieve computed so far is
+    cached and extended segment by segment when a longer one is needed.
+
+        >>> odd_sieve(20)
+        bytearray(b'\\x00\\x01\\x01\\x01\\x00\\x01\\x01\\x00\\x01\\x01')
+
+    """
+    m = max(0, (n+1)//2)
+    s = odd_sieve_cache.get(0)
+    if s is not None and len(s) >= m:
+        return s[:m]
+    if s is None:
+        s = bytearray()
+    r = int(isqrt(2*m))
+    # The odd primes needed for crossing off
+    if r < 3:
+        primes = []
+    else:
+        if 2*len(s) > r:
+            base = s[:(r+1)//2]
+        else:
+            base = odd_sieve(r)
+        primes = list(compress(xrange(1, r+1, 2), base))
+    s = s[:]
+    while len(s) < m:
+        seg = bytearray(_ONE) * min(SIEVE_SEGMENT, m-len(s))
+        sieve_odd_range(seg, 2*len(s)+1, primes)
+        s += seg
+    if m:
+        s[0] = 0
+    if m <= SIEVE_CACHE_LIMIT:
+        odd_sieve_cache[0] = s
+        s = s[:]
+    return s
+
 def list_primes(n):
-    n = n + 1
-    sieve = list(xrange(n))
-    sieve[:2] = [0, 0]
-    for i in xrange(2, int(n**0.5)+1):
-        if sieve[i]:
-            for j in xrange(i**2, n, i):
-                sieve[j] = 0
-    return [p for p in sieve if p]
+    """
+    Return a list of all the primes p <= n.
+
+        >>> list_primes(30)
+        [2, 3, 5, 7, 11, 13, 17, 19, 23, 29]
+
+    """
+    n = int(n)
+    if n < 2:
+        return []
+    return [2] + list(compress(xrange(1, n+1, 2), odd_sieve(n)))
 
 if BACKEND == 'sage':
     # Note: it is *VERY* important for performance that we convert
@@ -395,6 +626,97 @@ def list_primes(n):
     def list_primes(n):
         return [int(_) for _ in sage.primes(n+1)]
 
+# Tables of phi(v, k) for 0 <= v <= p_1*...*p_k and small k
+phi_wheel_cache = {}
+
+def phi_wheel(primes, k):
+    if k not in phi_wheel_cache:
+        Q = 1
+        for p in primes[:k]:
+            Q *= p
+        s = bytearray(_ONE) * (Q+1)
+        s[0] = 0
+        for p in primes[:k]:
+            s[::p] = bytearray(Q//p + 1)
+        T = [0] * (Q+1)
+        c = 0
+        for v in xrange(1, Q+1):
+            c += s[v]
+            T[v] = c
+        phi_wheel_cache[k] = Q, T
+    return phi_wheel_cache[k]
+
+def count_primes(x):
+    """
+    Return the number of primes p <= x, using the combinatorial method
+    of Meissel and Lehmer. The time and memory used are roughly
+    proportional to x^(2/3).
+
+        >>> count_primes(10**9)
+        50847534
+
+    """
+    x = int(x)
+    if x < 2:
+        return 0
+    if x < 10**6:
+        return 1 + odd_sieve(x).count(_ONE)
+    c = int(round(x**(1./3)))
+    while c**3 > x:
+        c -= 1
+    while (c+1)**3 <= x:
+        c += 1
+    r = int(isqrt(x))
+    y = max(x//(c+1), r)
+    # pi(v) for v <= y is the number of nonzero bytes in s up to v,
+    # found from running counts over blocks of B bytes
+    s = odd_sieve(y)
+    B = 2048
+    block_counts = [0]
+    for j in xrange(0, len(s), B):
+        block_counts.append(block_counts[-1] + s.count(_ONE, j, j+B))
+    def pi(v):
+        if v < 2:
+            return 0
+        m = (v+1) >> 1
+        j = m // B
+        return 1 + block_counts[j] + s.count(_ONE, j*B, m)
+    primes = [2] + list(compress(xrange(1, r+1, 2), s))
+    nprimes = len(primes)
+    # phi(v, k) is the number of integers 1 <= n <= v not divisible by
+    # any of the first k primes
+    def phi(v, k):
+        if k < nprimes:
+            p = primes[k]
+            if v < p:
+                return 1
+            if v <= y and v < p*p*p:
+                # Only 1, primes and products of two primes > primes[k-1]
+                t = pi(v) - k + 1
+                j = k
+                while j < nprimes and primes[j]**2 <= v:
+                    t += pi(v // primes[j]) - j
+                    j += 1
+                return t
+        if k <= 6:
+            Q, T = phi_wheel(primes, k)
+            return (v//Q)*T[Q] + T[v % Q]
+        t = v
+        for i in xrange(k):
+            p = primes[i]
+            if p*p > v and v <= y:
+                # the remaining terms are all 1
+                t -= max(0, min(k, pi(v)) - i)
+                break
+            t -= phi(v//p, i)
+        return t
+    a = pi(c)
+    b = pi(r)
+    res = phi(x, a) + a - 1
+    for i in xrange(a, b):
+        res -= pi(x // primes[i]) - i
+    return res
+
 small_odd_primes = (3,5,7,11,13,17,19,23,29,31,37,41,43,47)
 small_odd_primes_set = set(small_odd_primes)
 
@@ -0,0 +1,632 @@
+"""
+Low-level kernels for matrix arithmetic.
+
+The functions in this module operate on matrices given as lists of rows
+of raw mpf (or mpc) values. Instead of performing each elementary
+operation on mpf values, which requires a normalization step per
+operation, a whole row or column is converted to integers sharing one
+common exponent. Dot products and row operations then reduce to plain
+integer arithmetic, and rounding only happens when the final entries
+are converted back.
+
+Matrix products can be computed with one of several exact engines
+(see matrix_mul_method): plain integer dot products, Strassen-Winograd
+recursion on the integer matrices, or Kronecker substitution, which
+packs a row of A and all of B into two big integers so that a whole
+row of the product comes out of a single multiplication. Since the
+integer products are exact in all cases, every engine produces the
+same correctly rounded result.
+"""
+
+import operator
+
+from .backend import xrange, MPZ, BACKEND
+
+from .libmpf import (round_fast, round_up, bitcount, from_man_exp,
+    fzero, fone, mpf_neg, mpf_abs, mpf_add, mpf_mul, mpf_div, mpf_sum,
+    mpf_le)
+
+#-------------------------------------------------------------------------------
+# Tuning parameters
+#-------------------------------------------------------------------------------
+
+# Precision from which the Strassen-Winograd engine is chosen automatically.
+# Below this, the additions cost about as much as the multiplications they
+# save. With gmpy, multiplication is relatively cheaper, so the crossover
+# comes later.
+if BACKEND == 'python':
+    STRASSEN_PREC = 800
+else:
+    STRASSEN_PREC = 2500
+# Matrix dimension up to which Strassen-Winograd uses plain dot products.
+# The automatic choice requires at least twice this size, since a single
+# level of recursion barely pays off.
+STRASSEN_CUTOFF = 8
+
+def mpf_vector_to_fixed(xs, maxbits):
+    """
+    Convert a list of raw mpfs to integers with a common exponent, so that
+    xs[i] == mans[i] * 2**exp exactly. Returns (mans, exp), or None if
+    xs contains an infinity or nan, or if the integers would need more
+    than maxbits bits due to the spread in magnitude.
+    """
+    emin = None
+    top = None
+    for sign, man, exp, bc in xs:
+        if man:
+            if emin is None or exp < emin:
+                emin = exp
+            if top is None or exp+bc > top:
+                top = exp+bc
+        elif exp:
+            return None
+    if emin is None:
+        return [0]*len(xs), 0
+    if top - emin > maxbits:
+        return None
+    mans = []
+    for sign, man, exp, bc in xs:
+        if man:
+            man <<= (exp - emin)
+            if sign:
+                man = -man
+        mans.append(man)
+    return mans, emin
+
+def mpf_vector_to_fixed_round(xs, wp):
+    """
+    Convert a list of raw mpfs to integers with a common exponent, so that
+    the largest element has wp bits; smaller elements are truncated.
+    Returns (mans, exp) where exp is None if all elements are zero, or
+    None if xs contains an infinity or nan.
+    """
+    top = None
+    for sign, man, exp, bc in xs:
+        if man:
+            if top is None or exp+bc > top:
+                top = exp+bc
+        elif exp:
+            return None
+    if top is None:
+        return [0]*len(xs), None
+    e = top - wp
+    mans = []
+    for sign, man, exp, bc in xs:
+        if man:
+            shift = exp - e
+            if shift >= 0:
+                man <<= shift
+            else:
+                man >>= (-shift)
+            if sign:
+                man = -man
+        mans.append(man)
+    return mans, e
+
+def _row_to_fixed(xs, wp, maxbits):
+    """
+    Convert a list of finite raw mpfs to integers with a common exponent,
+    keeping all bits of the elements as long as at most maxbits bits are
+    needed, and at least wp bits for the largest element. Returns
+    (mans, exp) where exp is None if all elements are zero.
+    """
+    top = emin = None
+    for sign, man, exp, bc in xs:
+        if man:
+            if top is None or exp+bc > top:
+                top = exp+bc
+            if emin is None or exp < emin:
+                emin = exp
+    if top is None:
+        return [0]*len(xs), None
+    e = min(top - wp, max(emin, top - maxbits))
+    mans = []
+    for sign, man, exp, bc in xs:
+        if man:
+            shift = exp - e
+            if shift >= 0:
+                man <<= shift
+            else:
+                man >>= (-shift)
+            if sign:
+                man = -man
+        mans.append(man)
+    return mans, e
+
+def _magnitude_spread(rows):
+    """
+    Return the difference between the largest and smallest magnitude
+    (in bits) of the nonzero elements of a matrix given as a list of rows
+    of raw mpfs, or None if it contains an infinity or nan.
+    """
+    top = bottom = None
+    for row in rows:
+        for sign, man, exp, bc in row:
+            if man:
+                exp += bc
+                if top is None or exp > top:
+                    top = exp
+                if bottom is None or exp < bottom:
+                    bottom = exp
+            elif exp:
+                return None
+    if top is None:
+        return 0
+    return top - bottom
+
+def _mans_to_mpf(mans, exp, prec, rnd):
+    if exp is None:
+        return [fzero] * len(mans)
+    return [from_man_exp(man, exp, prec, rnd) for man in mans]
+
+def _fixed_axpy(R, er, fman, fexp, P, ep, pbits, start, maxbits):
+    """
+    Replace R by R - f*P in place for the entries from index start on,
+    where R and P are fixed-point rows with exponents er and ep, pbits is
+    the bit size of the largest entry of P[start:] and f = fman * 2**fexp.
+    The exponent of R is lowered as far as needed to hold the product
+    exactly, but R is truncated at the lower end to at most maxbits bits.
+    Returns the new exponent of R.
+    """
+    pexp = fexp + ep
+    ptop = pexp + bitcount(abs(fman)) + pbits
+    n = len(R)
+    if er is None:
+        shift = max(0, ptop - maxbits - pexp)
+        for k in xrange(start, n):
+            R[k] = -((fman*P[k]) >> shift)
+        return pexp + shift
+    if er > pexp:
+        top = er + bitcount(max(abs(a) for a in R))
+        shift = min(er - pexp, er + maxbits - max(top, ptop) - 1)
+        if shift > 0:
+            for k in xrange(n):
+                R[k] <<= shift
+            er -= shift
+    shift = er - pexp
+    if shift >= 0:
+        for k in xrange(start, n):
+            R[k] -= (fman*P[k]) >> shift
+    else:
+        shift = -shift
+        for k in xrange(start, n):
+            R[k] -= (fman*P[k]) << shift
+    if ptop - er >= maxbits:
+        top = bitcount(max(abs(a) for a in R))
+        if top > maxbits:
+            shift = top - maxbits
+            for k in xrange(n):
+                R[k] >>= shift
+            er += shift
+    return er
+
+def int_matrix_mul(A, B):
+    """
+    Multiply the integer matrices A and B given as lists of rows, using
+    one dot product per entry.
+    """
+    mul = operator.mul
+    cols = list(zip(*B))
+    return [[sum(map(mul, row, col)) for col in cols] for row in A]
+
+def _matrix_add(A, B):
+    add = operator.add
+    return [list(map(add, a, b)) for a, b in zip(A, B)]
+
+def _matrix_sub(A, B):
+    sub = operator.sub
+    return [list(map(sub, a, b)) for a, b in zip(A, B)]
+
+def matrix_mul_strassen(A, B, mul=int_matrix_mul, cutoff=STRASSEN_CUTOFF):
+    """
+    Multiply the matrices A and B given as lists of rows using the
+    Strassen-Winograd algorithm (7 block products and 15 block
+    additions per level), falling back to mul(A, B) once a dimension
+    is at most cutoff. Odd dimensions are padded with a zero row or
+    column. The entries only need to support + and -, so this can be
+    used with integers as well as with number objects.
+    """
+    n = len(A)
+    l = len(B)
+    m = l and len(B[0])
+    if min(n, l, m) <= cutoff:
+        return mul(A, B)
+    if n % 2:
+        A = A + [[0]*l]
+    if l % 2:
+        A = [row + [0] for row in A]
+        B = B + [[0]*m]
+    if m % 2:
+        B = [row + [0] for row in B]
+    n2 = (n + 1) // 2
+    l2 = (l + 1) // 2
+    m2 = (m + 1) // 2
+    A11 = [row[:l2] for row in A[:n2]]
+    A12 = [row[l2:] for row in A[:n2]]
+    A21 = [row[:l2] for row in A[n2:]]
+    A22 = [row[l2:] for row in A[n2:]]
+    B11 = [row[:m2] for row in B[:l2]]
+    B12 = [row[m2:] for row in B[:l2]]
+    B21 = [row[:m2] for row in B[l2:]]
+    B22 = [row[m2:] for row in B[l2:]]
+    add = _matrix_add
+    sub = _matrix_sub
+    strassen = lambda X, Y: matrix_mul_strassen(X, Y, mul, cutoff)
+    S1 = add(A21, A22)
+    S2 = sub(S1, A11)
+    S3 = sub(A11, A21)
+    S4 = sub(A12, S2)
+    T1 = sub(B12, B11)
+    T2 = sub(B22, T1)
+    T3 = sub(B22, B12)
+    T4 = sub(T2, B21)
+    P1 = strassen(A11, B11)
+    P2 = strassen(A12, B21)
+    P3 = strassen(S4, B22)
+    P4 = strassen(A22, T4)
+    P5 = strassen(S1, T1)
+    P6 = strassen(S2, T2)
+    P7 = strassen(S3, T3)
+    U2 = add(P1, P6)
+    U3 = add(U2, P7)
+    U4 = add(U2, P5)
+    C11 = add(P1, P2)
+    C12 = add(U4, P3)
+    C21 = sub(U3, P4)
+    C22 = add(U3, P5)
+    C = [r1 + r2 for r1, r2 in zip(C11, C12)] + \
+        [r1 + r2 for r1, r2 in zip(C21, C22)]
+    return [row[:m] for row in C[:n]]
+
+def _kronecker_pack(coeffs, k):
+    # sum(coeffs[t] << (k*t)), via hexadecimal strings to stay linear
+    w = k // 4
+    fmt = '%%0%ix' % w
+    zero = '0' * w
+    pos = ''.join([fmt % c if c > 0 else zero for c in reversed(coeffs)])
+    neg = ''.join([fmt % -c if c < 0 else zero for c in reversed(coeffs)])
+    return MPZ(pos, 16) - MPZ(neg, 16)
+
+def int_matrix_mul_kronecker(A, B):
+    """
+    Multiply the integer matrices A and B given as lists of rows using
+    Kronecker substitution. Each row of A and the columns of B (reversed
+    and placed at strides of len(B) coefficients) are packed into big
+    integers with k-bit coefficients, so that a whole row of the product
+    can be read off from a single big integer multiplication.
+    """
+    n = len(A)
+    l = len(B)
+    m = l and len(B[0])
+    if not (n and l and m):
+        return [[0]*m for i in xrange(n)]
+    abits = max(bitcount(abs(x)) for row in A for x in row)
+    bbits = max(bitcount(abs(x)) for row in B for x in row)
+    if not (abits and bbits):
+        return [[0]*m for i in xrange(n)]
+    # each coefficient is a sum of at most l products
+    k = abits + bbits + bitcount(l) + 2
+    k += (-k) % 4
+    w = k // 4
+    coeffs = []
+    for col in zip(*B):
+        coeffs.extend(reversed(col))
+    Y = _kronecker_pack(coeffs, k)
+    # adding 2**(k-1) to every coefficient makes them all nonnegative
+    T = l*m + l - 1
+    half = MPZ(1) << (k - 1)
+    bias = (((MPZ(1) << (k*T)) - 1) // ((MPZ(1) << k) - 1)) << (k - 1)
+    size = T * w
+    C = []
+    for row in A:
+        digits = ('%x' % (_kronecker_pack(row, k) * Y + bias)).zfill(size)
+        crow = []
+        for j in xrange(m):
+            t = l - 1 + l*j
+            crow.append(MPZ(digits[size-(t+1)*w:size-t*w], 16) - half)
+        C.append(crow)
+    return C
+
+def matrix_mul_method(n, l, m, prec):
+    """
+    Choose the engine used by mpf_matrix_mul and mpc_matrix_mul with
+    method='auto' for a product of an n x l and an l x m matrix at the
+    given precision.
+
+    Kronecker substitution is never chosen: a row of the product costs
+    about as many bit operations as the corresponding dot products, and
+    with the available integer backends it is slower than plain dot
+    products at all sizes and precisions.
+    """
+    if prec >= STRASSEN_PREC and min(n, l, m) > 2*STRASSEN_CUTOFF:
+        return 'strassen'
+    return 'naive'
+
+def _fixed_matrix_mul(A, B, method):
+    # A and B are rows of integers; each engine returns the exact product
+    if method == 'strassen':
+        return matrix_mul_strassen(A, B)
+    if method == 'kronecker':
+        return int_matrix_mul_kronecker(A, B)
+    raise ValueError("unknown matrix multiplication method: %r" % method)
+
+def _matrix_to_fixed(A, maxbits):
+    # convert a whole matrix to integers with one common exponent
+    if not A or not A[0]:
+        return None
+    m = len(A[0])
+    v = mpf_vector_to_fixed([x for row in A for x in row], maxbits)
+    if v:
+        mans, exp = v
+        return [mans[i:i+m] for i in xrange(0, len(mans), m)], exp
+
+def mpf_matrix_mul(A, B, prec, rnd=round_fast, method='naive'):
+    """
+    Multiply the real matrices A and B given as lists of rows of raw mpfs.
+    Each entry of the product is computed exactly and then rounded once,
+    so the result agrees with an exact dot product (fdot).
+
+    The method can be 'naive', 'strassen', 'kronecker' or 'auto'. The
+    Strassen and Kronecker engines convert each matrix to integers with
+    a single common exponent; if this is not possible because of special
+    values or a too large spread in magnitude, the naive method is used.
+    """
+    maxbits = 3*prec + 64
+    if method == 'auto':
+        method = matrix_mul_method(len(A), len(B), B and len(B[0]), prec)
+    if method != 'naive':
+        a = _matrix_to_fixed(A, maxbits)
+        b = _matrix_to_fixed(B, maxbits)
+        if a and b:
+            exp = a[1] + b[1]
+            C = _fixed_matrix_mul(a[0], b[0], method)
+            return [[from_man_exp(c, exp, prec, rnd) for c in row]
+                for row in C]
+    cols = list(zip(*B))
+    fixed_rows = [mpf_vector_to_fixed(row, maxbits) for row in A]
+    fixed_cols = [mpf_vector_to_fixed(col, maxbits) for col in cols]
+    mul = operator.mul
+    C = []
+    for row, frow in zip(A, fixed_rows):
+        crow = []
+        for col, fcol in zip(cols, fixed_cols):
+            if frow and fcol:
+                s = sum(map(mul, frow[0], fcol[0]))
+                crow.append(from_man_exp(s, frow[1]+fcol[1], prec, rnd))
+            else:
+                crow.append(mpf_sum([mpf_mul(a, b) for a, b in zip(row, col)],
+                    prec, rnd))
+        C.append(crow)
+    return C
+
+def mpc_matrix_mul(A, B, prec, rnd=round_fast, method='naive'):
+    """
+    Multiply the complex matrices A and B given as lists of rows of raw
+    mpcs. Like mpf_matrix_mul, each entry is rounded only once.
+
+    With the Strassen and Kronecker engines, the product is computed as
+    the real product [Re(A), Im(A)] * [[Re(B), Im(B)], [-Im(B), Re(B)]].
+    """
+    maxbits = 3*prec + 64
+    if method == 'auto':
+        method = matrix_mul_method(len(A), len(B), B and len(B[0]), prec)
+    if method != 'naive':
+        a = _matrix_to_fixed([[z[0] for z in row] + [z[1] for z in row]
+            for row in A], maxbits)
+        b = _matrix_to_fixed([[z[0] for z in row] + [z[1] for z in row]
+            for row in B] + [[mpf_neg(z[1]) for z in row] +
+            [z[0] for z in row] for row in B], maxbits)
+        if a and b:
+            exp = a[1] + b[1]
+            m = len(B[0])
+            C = _fixed_matrix_mul(a[0], b[0], method)
+            return [[(from_man_exp(re, exp, prec, rnd),
+                from_man_exp(im, exp, prec, rnd))
+                for re, im in zip(row[:m], row[m:])] for row in C]
+    n = len(B)
+    cols = list(zip(*B))
+    def split(vec):
+        v = mpf_vector_to_fixed([z[0] for z in vec] + [z[1] for z in vec],
+            maxbits)
+        if v:
+            mans, exp = v
+            return mans[:n], mans[n:], exp
+    fixed_rows = [split(row) for row in A]
+    fixed_cols = [split(col) for col in cols]
+    mul = operator.mul
+    C = []
+    for row, frow in zip(A, fixed_rows):
+        crow = []
+        for col, fcol in zip(cols, fixed_cols):
+            if frow and fcol:
+                ar, ai, ea = frow
+                br, bi, eb = fcol
+                re = sum(map(mul, ar, br)) - sum(map(mul, ai, bi))
+                im = sum(map(mul, ar, bi)) + sum(map(mul, ai, br))
+                crow.append((from_man_exp(re, ea+eb, prec, rnd),
+                    from_man_exp(im, ea+eb, prec, rnd)))
+            else:
+                real = []
+                imag = []
+                for (are, aim), (bre, bim) in zip(row, col):
+                    real.append(mpf_mul(are, bre))
+                    real.append(mpf_neg(mpf_mul(aim, bim)))
+                    imag.append(mpf_mul(are, bim))
+                    imag.append(mpf_mul(aim, bre))
+                crow.append((mpf_sum(real, prec, rnd), mpf_sum(imag, prec, rnd)))
+        C.append(crow)
+    return C
+
+# Precision of the rounding error bounds in mpf_lu_decomp
+NOISE_PREC = 20
+
+# Maximum spread in magnitude of the entries, as a multiple of the working
+# precision, up to which mpf_lu_decomp and mpf_lu_solve work in fixed
+# point. The rows carry twice the working precision plus the spread, so
+# that entries much smaller than the largest one in their row keep their
+# accuracy; beyond this limit, the generic code is cheaper.
+LU_MAX_SPREAD = 4
+
+def _row_max(R, exp):
+    if exp is None:
+        return fzero
+    return from_man_exp(max(abs(a) for a in R), exp, NOISE_PREC, round_up)
+
+def mpf_lu_decomp(A, tol, prec, rnd=round_fast):
+    """
+    LU decomposition of a real square matrix A given as a list of rows
+    of raw mpfs, using the same scaled partial pivoting strategy as
+    LU_decomp. Each row is held as integers with one common exponent,
+    carrying a few guard bits above prec plus the spread in magnitude of
+    the entries, so a row operation costs one integer multiplication per
+    entry and small entries are not lost next to large ones.
+
+    A is overwritten with L (below the diagonal, unit diagonal omitted)
+    and U, rounded to prec. Returns the list of pivot indices, or None
+    (leaving A untouched) if A contains an infinity or nan, or if its
+    entries are spread too far in magnitude (see LU_MAX_SPREAD). Raises
+    ZeroDivisionError if A is numerically singular, i.e. if a row sum or
+    pivot is not larger than the raw mpf tol plus the rounding errors
+    that the cancellations in its row would cause at precision prec.
+    Without this allowance, a pivot that vanishes up to rounding noise
+    would be accepted just because the fixed-point rows carry it
+    exactly.
+    """
+    n = len(A)
+    wp = prec + bitcount(n) + 20
+    spread = _magnitude_spread(A)
+    if spread is None or spread > LU_MAX_SPREAD*wp:
+        return None
+    maxbits = 2*wp + spread
+    rows = []
+    exps = []
+    for row in A:
+        v = _row_to_fixed(row, wp, maxbits)
+        rows.append(v[0])
+        exps.append(v[1])
+    # noise[i] bounds the rounding errors of the cancellations in row i,
+    # 2*ulp per subtracted multiple of a pivot row; errors inherited from
+    # the pivot rows are not propagated, since that bound grows much
+    # faster than the actual errors
+    noise = [fzero]*n
+    ulp2 = from_man_exp(1, 1-prec)
+    def singular(x, i):
+        return mpf_le(x, mpf_add(tol, noise[i], NOISE_PREC, round_up))
+    L = [[fzero]*n for i in xrange(n)]
+    p = [None]*(n - 1)
+    for j in xrange(n - 1):
+        # pivoting, choose max(abs(reciprocal row sum)*abs(pivot element)),
+        # comparing the ratios exactly by cross multiplication
+        best_a = 0
+        best_s = 1
+        for k in xrange(j, n):
+            R = rows[k]
+            s = sum(abs(a) for a in R[j:])
+            if exps[k] is None or singular(from_man_exp(s, exps[k]), k):
+                raise ZeroDivisionError('matrix is numerically singular')
+            a = abs(R[j])
+            if a * best_s > best_a * s:
+                best_a = a
+                best_s = s
+                p[j] = k
+        if p[j] is None:
+            raise ZeroDivisionError('matrix is numerically singular')
+        k = p[j]
+        rows[j], rows[k] = rows[k], rows[j]
+        exps[j], exps[k] = exps[k], exps[j]
+        noise[j], noise[k] = noise[k], noise[j]
+        L[j], L[k] = L[k], L[j]
+        P = rows[j]
+        ep = exps[j]
+        pivot = from_man_exp(P[j], ep)
+        if singular(from_man_exp(abs(P[j]), ep), j):
+            raise ZeroDivisionError('matrix is numerically singular')
+        pbits = bitcount(max(abs(a) for a in P[j+1:]))
+        pmax = _row_max(P[j+1:], ep)
+        # calculate elimination factors and subtract rows
+        for i in xrange(j + 1, n):
+            R = rows[i]
+            if not R[j]:
+                continue
+            f = mpf_div(from_man_exp(R[j], exps[i]), pivot, prec, rnd)
+            L[i][j] = f
+            R[j] = 0
+            # rounding f*P and R - f*P at precision prec
+            fp = mpf_mul(mpf_abs(f), pmax, NOISE_PREC, round_up)
+            noise[i] = mpf_add(noise[i], mpf_mul(fp, ulp2), NOISE_PREC,
+                round_up)
+            fsign, fman, fexp, fbc = f
+            if fsign:
+                fman = -fman
+            exps[i] = _fixed_axpy(R, exps[i], fman, fexp, P, ep, pbits,
+                j + 1, maxbits)
+    if exps[n-1] is None or \
+        singular(from_man_exp(abs(rows[n-1][n-1]), exps[n-1]), n-1):
+        raise ZeroDivisionError('matrix is numerically singular')
+    for i in xrange(n):
+        U = _mans_to_mpf(rows[i], exps[i], prec, rnd)
+        A[i][:] = L[i][:i] + U[i:]
+    return p
+
+def mpf_lu_solve(LU, p, B, prec, rnd=round_fast):
+    """
+    Solve A*X = B for X, given the LU decomposition (LU, p) of the real
+    matrix A as returned by mpf_lu_decomp and the right hand sides B as
+    a list of rows of raw mpfs. The forward and back substitutions are
+    performed on whole rows of B at once. Returns X as a list of rows of
+    raw mpfs, or None if LU or B contains an infinity or nan or if their
+    entries are spread too far in magnitude.
+    """
+    n = len(LU)
+    wp = prec + bitcount(n) + 20
+    spread = _magnitude_spread(LU)
+    bspread = _magnitude_spread(B)
+    if spread is None or bspread is None:
+        return None
+    spread += bspread
+    if spread > LU_MAX_SPREAD*wp:
+        return None
+    maxbits = 2*wp + spread
+    rows = []
+    exps = []
+    for row in B:
+        v = _row_to_fixed(row, wp, maxbits)
+        rows.append(v[0])
+        exps.append(v[1])
+    for k, pk in enumerate(p):
+        rows[k], rows[pk] = rows[pk], rows[k]
+        exps[k], exps[pk] = exps[pk], exps[k]
+    # bit sizes of the finished rows
+    tops = [None]*n
+    def axpy(i, f, j):
+        fsign, fman, fexp, fbc = f
+        if fman and exps[j] is not None:
+            if fsign:
+                fman = -fman
+            exps[i] = _fixed_axpy(rows[i], exps[i], fman, fexp,
+                rows[j], exps[j], tops[j], 0, maxbits)
+    def finish(i):
+        if exps[i] is not None:
+            tops[i] = bitcount(max(abs(a) for a in rows[i]))
+    # solve L*Y = B
+    finish(0)
+    for i in xrange(1, n):
+        Li = LU[i]
+        for j in xrange(i):
+            axpy(i, Li[j], j)
+        finish(i)
+    # solve U*X = Y
+    for i in xrange(n - 1, -1, -1):
+        Ui = LU[i]
+        for j in xrange(i + 1, n):
+            axpy(i, Ui[j], j)
+        if exps[i] is not None:
+            rsign, rman, rexp, rbc = mpf_div(fone, Ui[i], wp, rnd)
+            if rsign:
+                rman = -rman
+            R = rows[i]
+            for k in xrange(len(R)):
+                R[k] = (R[k] * rman) >> rbc
+            exps[i] += rexp + rbc
+        finish(i)
+    return [_mans_to_mpf(rows[i], exps[i], prec, rnd) for i in xrange(n)]
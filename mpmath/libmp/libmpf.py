@@ -20,7 +20,7 @@
 from .libintmath import (giant_steps,
     trailtable, bctable, lshift, rshift, bitcount, trailing,
     sqrt_fixed, numeral, isqrt, isqrt_fast, sqrtrem,
-    bin_to_radix)
+    bin_to_radix, parse_numeral, radix_inverse)
 
 # We don't pickle tuples directly for the following reasons:
 #   1: pickle uses str() for ints, which is inefficient when they are large
@@ -1226,7 +1226,14 @@ def to_str(s, dps, strip_zeros=True, min_fixed=None, max_fixed=None,
         # Rounding up kills some instances of "...99999"
         if len(digits) > dps and digits[dps] in '56789' and \
             (dps < 500 or digits[dps-4:dps] == '9999'):
-            digits2 = str(int(digits[:dps]) + 1)
+            # Increment the digit string (int() would be quadratic and
+            # is limited in length)
+            digits2 = digits[:dps].rstrip('9')
+            if digits2:
+                digits2 = digits2[:-1] + str(int(digits2[-1]) + 1) + \
+                    "0"*(dps-len(digits2))
+            else:
+                digits2 = "1" + "0"*dps
             if len(digits2) > dps:
                 digits2 = digits2[:dps]
                 exponent += 1
@@ -1277,7 +1284,7 @@ def str_to_man_exp(x, base=10):
         a, b = parts[0], parts[1].rstrip('0')
         exp -= len(b)
         x = a + b
-    x = MPZ(int(x, base))
+    x = parse_numeral(x, base)
     return x, exp
 
 special_str = {'inf':finf, '+inf':finf, '-inf':fninf, 'nan':fnan}
@@ -1303,6 +1310,12 @@ def from_str(x, prec, rnd=round_fast):
 
     # XXX: appropriate cutoffs & track direction
     # note no factors of 5
+    if exp < -400:
+        # At very high precision, multiply by a reciprocal computed
+        # by Newton iteration instead of dividing
+        inv = radix_inverse(10, -exp, prec+10)
+        if inv:
+            return from_man_exp(man*inv[0], inv[1], prec, rnd)
     if abs(exp) > 400:
         s = from_int(man, prec+10)
         s = mpf_mul(s, mpf_pow_int(ften, exp, prec+10), prec, rnd)
@@ -0,0 +1,1059 @@
+"""
+Low-level kernels for polynomials.
+
+Polynomials are given as lists of coefficients, highest degree first,
+as in polyval(). The coefficients are raw mpc values (or Python
+complex numbers for the double precision kernels).
+
+All roots of a polynomial are found with the Aberth-Ehrlich method.
+The initial approximations are placed on circles whose radii are read
+off the Newton polygon of the coefficients, so that polynomials with
+roots of very different magnitudes need few iterations. The iteration
+is first carried out with Python complex numbers, which usually brings
+all roots to about 40 bits of accuracy at a small cost, and is then
+continued in fixed-point arithmetic at the full working precision.
+In that second phase, all roots are represented as pairs of integers
+sharing one exponent, so that evaluating the polynomial and the Aberth
+correction at a root only involves integer multiplications and shifts.
+Roots which have converged are no longer updated.
+
+The fixed-point updates of different roots are independent apart from
+the order in which they are applied, so they can be distributed over
+several processes: aberth_fixed_task() updates one chunk of roots given
+the positions of all roots at the beginning of the step.
+
+Products of polynomials are computed with Kronecker substitution: the
+coefficients are converted to integers with a common exponent, packed
+into one big integer per factor (each coefficient taking a fixed number
+of bits, enough for any coefficient of the product), and the product
+coefficients are read off a single big integer multiplication. Since
+the integer product is exact, each coefficient of the product is
+rounded only once. Power series inversion, division, logarithm and
+exponential are computed with Newton iteration on top of this
+multiplication; power series are given as lists of coefficients in
+ascending order (the product does not depend on the order).
+"""
+
+import math
+
+from .backend import xrange, MPZ, MPZ_ZERO
+
+from .libmpf import (from_man_exp, from_float, from_int, to_fixed,
+    mpf_shift, round_fast, fzero, fone, fnan, bitcount, mpf_pos, mpf_neg,
+    mpf_add, mpf_sub, mpf_mul, mpf_div, mpf_sum)
+
+from .libelefun import mpf_exp, mpf_log
+
+from .libmpc import (mpc_zero, mpc_one, mpc_pos, mpc_neg, mpc_add, mpc_sub,
+    mpc_mul, mpc_div, mpc_mul_int, mpc_exp, mpc_log)
+
+
+from .libmatrix import (mpf_vector_to_fixed, mpf_vector_to_fixed_round,
+    _kronecker_pack)
+
+#-------------------------------------------------------------------------------
+# Tuning parameters
+#-------------------------------------------------------------------------------
+
+# Relative accuracy aimed for in the double precision phase
+DOUBLE_TOL = 2.0**-42
+DOUBLE_EPS = 2.0**-53
+# The double precision phase is skipped if the magnitudes of the
+# coefficients differ by more than 2**DOUBLE_SPREAD
+DOUBLE_SPREAD = 900
+# Polynomial products with a factor of at most this many coefficients
+# are computed directly rather than by Kronecker substitution
+KRONECKER_CUTOFF = 6
+
+#-------------------------------------------------------------------------------
+# Initial approximations
+#-------------------------------------------------------------------------------
+
+def mpf_log2abs(x):
+    """
+    Return log2(abs(x)) of a raw mpf as a Python float, or None if x is zero.
+    """
+    sign, man, exp, bc = x
+    if not man:
+        return None
+    return exp + math.log(man, 2)
+
+def mpc_log2abs(z):
+    """
+    Return log2(abs(z)) of a raw mpc as a Python float, or None if z is zero.
+    """
+    a = mpf_log2abs(z[0])
+    b = mpf_log2abs(z[1])
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if a < b:
+        a, b = b, a
+    return a + 0.5*math.log(1 + 2.0**(2*max(b-a, -600)), 2)
+
+def upper_hull(logs):
+    """
+    Given log2(abs(c_k)) for the coefficients c_k of x^k, k = 0, ..., n,
+    with None for zero coefficients, return the vertices (k, log2(abs(c_k)))
+    of the upper convex hull of these points, ordered by k.
+    """
+    hull = []
+    for k, y in enumerate(logs):
+        if y is None:
+            continue
+        while len(hull) >= 2:
+            (k0, y0), (k1, y1) = hull[-2], hull[-1]
+            if (k1-k0)*(y-y0) - (y1-y0)*(k-k0) >= 0:
+                hull.pop()
+            else:
+                break
+        hull.append((k, y))
+    return hull
+
+def newton_polygon(logs):
+    """
+    Given logs as for upper_hull(), return a list of pairs (m, log2(r))
+    describing the edges of the upper convex hull: each edge spans m
+    powers and suggests m roots of modulus r. The first and last
+    coefficient must be nonzero.
+    """
+    hull = upper_hull(logs)
+    edges = []
+    for i in xrange(len(hull)-1):
+        (k0, y0), (k1, y1) = hull[i], hull[i+1]
+        edges.append((k1-k0, (y0-y1)/(k1-k0)))
+    return edges
+
+def polygon_guesses(edges):
+    """
+    Return initial approximations for the roots as a list of pairs
+    (log2(r), theta), placing the roots of each edge of the Newton
+    polygon equally spaced on a circle of radius r.
+    """
+    n = sum(m for (m, logr) in edges)
+    guesses = []
+    for i, (m, logr) in enumerate(edges):
+        offset = 2*math.pi*i/n + 0.7
+        for j in xrange(m):
+            guesses.append((logr, 2*math.pi*j/m + offset))
+    return guesses
+
+def _to_float_shift(x, shift):
+    sign, man, exp, bc = x
+    if not man:
+        return 0.0
+    if bc > 53:
+        man >>= (bc-53)
+        exp += (bc-53)
+    if sign:
+        man = -man
+    return math.ldexp(man, exp+shift)
+
+def _fixed_from_polar(logr, theta, wp):
+    e = int(math.floor(logr))
+    f = 2.0**(logr-e)
+    re = MPZ(int(f*math.cos(theta)*2**53))
+    im = MPZ(int(f*math.sin(theta)*2**53))
+    shift = wp + e - 53
+    if shift >= 0:
+        return re << shift, im << shift
+    return re >> (-shift), im >> (-shift)
+
+#-------------------------------------------------------------------------------
+# Double precision phase
+#-------------------------------------------------------------------------------
+
+def complex_newton_ratio(coeffs, rev, z):
+    """
+    Return (p(z)/p'(z), small) for the polynomial with the given complex
+    coefficients (rev being the reversed list), where small indicates
+    that p(z) is below the rounding error of its evaluation, so that
+    z cannot be improved in double precision. The ratio is None if
+    p'(z) = 0. Points outside the unit circle are handled with the
+    reversed polynomial evaluated at 1/z, so no overflow occurs if the
+    largest coefficient has modulus about 1.
+    """
+    n = len(coeffs) - 1
+    if abs(z) <= 1:
+        a = abs(z)
+        p = coeffs[0]
+        q = 0
+        b = abs(p)
+        for c in coeffs[1:]:
+            q = q*z + p
+            p = p*z + c
+            b = b*a + abs(c)
+        small = abs(p) <= 4*n*b*DOUBLE_EPS
+    else:
+        w = 1/z
+        a = abs(w)
+        r = rev[0]
+        q = 0
+        b = abs(r)
+        for c in rev[1:]:
+            q = q*w + r
+            r = r*w + c
+            b = b*a + abs(c)
+        small = abs(r) <= 4*n*b*DOUBLE_EPS
+        # p/p' = r(w)/(w*(n*r(w) - w*r'(w))), without forming the
+        # product with w, which underflows if |z| is huge
+        p = r*z
+        q = n*r - w*q
+    if not q:
+        return None, small
+    return p/q, small
+
+def complex_aberth(coeffs, roots, maxsteps, tol):
+    """
+    Perform at most maxsteps Aberth-Ehrlich steps with Python complex
+    numbers, updating the list roots in place, until every correction
+    is smaller than tol relative to the root. A root is also left alone
+    once the value of the polynomial is dominated by rounding errors.
+
+    Returns (steps, errs, converged) where errs gives the modulus of
+    the last correction applied to each root and converged is False
+    if maxsteps was reached.
+    """
+    rev = coeffs[::-1]
+    n = len(roots)
+    active = list(xrange(n))
+    errs = [1.0] * n
+    steps = 0
+    while active and steps < maxsteps:
+        steps += 1
+        still = []
+        for i in active:
+            z = roots[i]
+            N, small = complex_newton_ratio(coeffs, rev, z)
+            if N is None:
+                if not small:
+                    still.append(i)
+                continue
+            s = sum(1/(z-y) for y in roots if y != z)
+            d = 1 - N*s
+            if d:
+                N /= d
+            roots[i] = z - N
+            errs[i] = e = abs(N)
+            if e > tol*abs(z) and not small:
+                still.append(i)
+        active = still
+    return steps, errs, not active
+
+def complex_polyroots(coeffs, maxsteps, tol):
+    """
+    Find all roots of the polynomial with the given Python complex
+    coefficients (highest degree first; the leading coefficient must be
+    nonzero), starting from the Newton polygon guesses. Returns
+    (roots, errs, steps, converged) as for complex_aberth(); exact zero
+    roots are placed first.
+    """
+    zeros = 0
+    while len(coeffs) > 1 and not coeffs[-1]:
+        coeffs = coeffs[:-1]
+        zeros += 1
+    if len(coeffs) == 1:
+        return [0j] * zeros, [0.0] * zeros, 0, True
+    logs = [math.log(abs(c), 2) if c else None for c in coeffs[::-1]]
+    scale = max(abs(c) for c in coeffs)
+    coeffs = [c/scale for c in coeffs]
+    roots = [2.0**logr * complex(math.cos(t), math.sin(t))
+        for (logr, t) in polygon_guesses(newton_polygon(logs))]
+    steps, errs, converged = complex_aberth(coeffs, roots, maxsteps, tol)
+    return [0j]*zeros + roots, [0.0]*zeros + errs, steps, converged
+
+#-------------------------------------------------------------------------------
+# Fixed-point phase
+#-------------------------------------------------------------------------------
+
+def _fixed_newton_terms(C, R, zr, zi, wp):
+    """
+    Return (pr, pi, qr, qi, e) such that p(z)/p'(z) = (pr + pi*j)/(qr + qi*j)
+    for the polynomial with fixed-point coefficients C (and reversed
+    coefficients R) at the fixed-point point z = zr + zi*j, where e
+    bounds the error in pr + pi*j due to the rounding of the coefficients
+    and the evaluation. If |z| > 1, the reversed polynomial r is
+    evaluated at w = 1/z, so that both pairs are scaled by the same
+    factor with respect to p(z) and p'(z).
+    """
+    n = len(C) - 1
+    one = MPZ(1) << wp
+    if zr*zr + zi*zi <= one*one:
+        pr, pi = C[0]
+        qr = qi = 0
+        for cr, ci in C[1:]:
+            qr, qi = ((qr*zr - qi*zi) >> wp) + pr, ((qr*zi + qi*zr) >> wp) + pi
+            pr, pi = ((pr*zr - pi*zi) >> wp) + cr, ((pr*zi + pi*zr) >> wp) + ci
+        e = 8*(n+1)
+    else:
+        m = zr*zr + zi*zi
+        wr = (zr << (2*wp)) // m
+        wi = -((zi << (2*wp)) // m)
+        pr, pi = R[0]
+        sr = si = 0
+        for cr, ci in R[1:]:
+            sr, si = ((sr*wr - si*wi) >> wp) + pr, ((sr*wi + si*wr) >> wp) + pi
+            pr, pi = ((pr*wr - pi*wi) >> wp) + cr, ((pr*wi + pi*wr) >> wp) + ci
+        # p/p' = r(w) / (w*(n*r(w) - w*r'(w))) = z*r(w) / (n*r(w) - w*r'(w));
+        # multiplying by z instead of dividing by w keeps the precision
+        # of the denominator when |z| is huge (the product w*(...) would
+        # underflow in fixed point)
+        qr = n*pr - ((wr*sr - wi*si) >> wp)
+        qi = n*pi - ((wr*si + wi*sr) >> wp)
+        pr, pi = (pr*zr - pi*zi) >> wp, (pr*zi + pi*zr) >> wp
+        e = 8*(n+1)*(((abs(zr) + abs(zi)) >> wp) + 1)
+    return pr, pi, qr, qi, e
+
+def _fixed_newton_ratio(C, R, zr, zi, wp):
+    """
+    Return (N, small) where N = p(z)/p'(z) as a pair of fixed-point
+    integers (None if p'(z) = 0) and small indicates that p(z) is
+    below the error bound of its evaluation.
+    """
+    pr, pi, qr, qi, e = _fixed_newton_terms(C, R, zr, zi, wp)
+    small = max(abs(pr), abs(pi)) <= e
+    m = qr*qr + qi*qi
+    if not m:
+        return None, small
+    return (((pr*qr + pi*qi) << wp) // m, ((pi*qr - pr*qi) << wp) // m), small
+
+def fixed_inclusion_bits(C, R, zr, zi, wp):
+    """
+    Return the bit length of n*(|p(z)| + e)/|p'(z)|, in fixed point with
+    wp fractional bits, where e bounds the error in p(z) due to the
+    rounding of the coefficients and the evaluation. A disk with this
+    radius around z contains a root of p, so it bounds the error of z
+    even when z approximates a multiple root, for which p(z) and p'(z)
+    are both small. Returns None if p'(z) vanishes.
+    """
+    n = len(C) - 1
+    pr, pi, qr, qi, e = _fixed_newton_terms(C, R, zr, zi, wp)
+    q = max(abs(qr), abs(qi))
+    if not q:
+        return None
+    p = abs(pr) + abs(pi) + e
+    return ((n*p << wp) // q).bit_length()
+
+def aberth_fixed_step(C, R, roots, indices, wp, tolprec):
+    """
+    Perform one Aberth-Ehrlich step in fixed-point arithmetic for the
+    roots with the given indices. C is the list of coefficients and R
+    the reversed list, as pairs of integers with wp fractional bits
+    (scaled so that the largest one has modulus about 1); roots is the
+    list of all current roots in the same format. The updates are
+    applied in order to a local copy of roots.
+
+    Returns a list of triples (i, root, c) where c is the bit length
+    of the correction, or None if the correction was smaller than
+    2**(-tolprec) relative to the root (or to 1, if the root is smaller).
+    A correction that rounds to zero only counts as converged if p(z)
+    is below the error of its evaluation.
+    """
+    roots = roots[:]
+    updates = []
+    one = MPZ(1) << wp
+    one3 = MPZ(1) << (3*wp)
+    for i in indices:
+        zr, zi = roots[i]
+        N, small = _fixed_newton_ratio(C, R, zr, zi, wp)
+        if N is None:
+            updates.append((i, roots[i], wp))
+            continue
+        Nr, Ni = N
+        # The Aberth sum of 1/(z_i - z_j); a single division per term
+        sr = si = 0
+        for j, (yr, yi) in enumerate(roots):
+            dr = zr - yr
+            di = zi - yi
+            m = dr*dr + di*di
+            if m and j != i:
+                m = (one3 // m)
+                sr += dr*m
+                si -= di*m
+        sr >>= wp
+        si >>= wp
+        dr = one - ((Nr*sr - Ni*si) >> wp)
+        di = -((Nr*si + Ni*sr) >> wp)
+        m = dr*dr + di*di
+        if m:
+            Nr, Ni = ((Nr*dr + Ni*di) << wp) // m, ((Ni*dr - Nr*di) << wp) // m
+        zr -= Nr
+        zi -= Ni
+        roots[i] = zr, zi
+        c = max(abs(Nr), abs(Ni)).bit_length()
+        if c + tolprec <= max(abs(zr).bit_length(), abs(zi).bit_length(), wp) \
+            and (c or small):
+            c = None
+        updates.append((i, roots[i], c))
+    return updates
+
+def aberth_fixed_task(args):
+    """
+    Wrapper of aberth_fixed_step() taking a tuple of arguments,
+    for use with the map() method of a process pool.
+    """
+    return aberth_fixed_step(*args)
+
+#-------------------------------------------------------------------------------
+# Driver
+#-------------------------------------------------------------------------------
+
+def mpc_polyroots(coeffs, prec, tolprec, maxsteps, executor=None, chunks=1,
+    error=True):
+    """
+    Find all roots of the polynomial with the given raw mpc coefficients
+    (highest degree first; the leading coefficient must be nonzero).
+    The iteration uses prec bits and stops when every correction is
+    smaller than 2**(-tolprec) relative to the root (or to 1, if the
+    root is smaller).
+
+    Returns (roots, errs, steps): the roots as raw mpcs, a raw mpf bound
+    for the error of each root (the radius of a disk around the rounded
+    root which contains a root of the polynomial), and the number of
+    steps performed. If steps > maxsteps, the iteration did not converge.
+    With error=False, the bounds (which cost about as much as one step)
+    are not computed and errs is None.
+
+    If executor is given, the fixed-point steps are distributed over the
+    executor in the given number of chunks.
+    """
+    fz = (0, MPZ(0), 0, 0)
+    n = len(coeffs) - 1
+    # Exact zero roots
+    zeros = 0
+    while n > 0 and coeffs[n] == (fz, fz):
+        n -= 1
+        zeros += 1
+    coeffs = coeffs[:n+1]
+    roots = [(fz, fz)] * zeros
+    errs = [fz] * zeros
+    if not n:
+        return roots, errs, 0
+    logs = [mpc_log2abs(c) for c in coeffs[::-1]]
+    nonzero = [y for y in logs if y is not None]
+    top = int(math.ceil(max(nonzero)))
+    spread = top - int(math.floor(min(nonzero)))
+    wp = prec + spread + n.bit_length() + 10
+    steps = 0
+    if spread < DOUBLE_SPREAD:
+        cs = [complex(_to_float_shift(re, -top), _to_float_shift(im, -top))
+            for (re, im) in coeffs]
+        zs, _, steps, _ = complex_polyroots(cs, maxsteps, DOUBLE_TOL)
+        current = [(to_fixed(from_float(z.real), wp),
+            to_fixed(from_float(z.imag), wp)) for z in zs]
+    else:
+        guesses = polygon_guesses(newton_polygon(logs))
+        current = [_fixed_from_polar(logr, t, wp) for (logr, t) in guesses]
+    C = [(to_fixed(mpf_shift(re, -top), wp), to_fixed(mpf_shift(im, -top), wp))
+        for (re, im) in coeffs]
+    R = C[::-1]
+    active = list(xrange(n))
+    while active:
+        steps += 1
+        if steps > maxsteps:
+            break
+        if executor is not None and chunks > 1 and len(active) > 1:
+            size = -(-len(active) // chunks)
+            tasks = [(C, R, current, active[k:k+size], wp, tolprec)
+                for k in xrange(0, len(active), size)]
+            imap = getattr(executor, 'imap', executor.map)
+            updates = [u for part in imap(aberth_fixed_task, tasks)
+                for u in part]
+        else:
+            updates = aberth_fixed_step(C, R, current, active, wp, tolprec)
+        still = []
+        for i, z, c in updates:
+            current[i] = z
+            # c = None means the correction is below the tolerance
+            if c is not None:
+                still.append(i)
+        active = still
+    for zr, zi in current:
+        z = (from_man_exp(zr, -wp, prec, round_fast),
+            from_man_exp(zi, -wp, prec, round_fast))
+        roots.append(z)
+        if not error:
+            continue
+        # The size of the last correction says little about the error
+        # near multiple roots, where the corrections become small long
+        # before the roots are accurate
+        c = fixed_inclusion_bits(C, R, to_fixed(z[0], wp),
+            to_fixed(z[1], wp), wp)
+        if c is None:
+            c = max(abs(zr).bit_length(), abs(zi).bit_length(), wp)
+        errs.append(from_man_exp(MPZ(1), c-wp))
+    if not error:
+        errs = None
+    return roots, errs, steps
+
+#-------------------------------------------------------------------------------
+# Multipoint evaluation
+#-------------------------------------------------------------------------------
+
+def polyval_bits(hull, top, n, logx, prec):
+    """
+    Return the number of bits W needed to evaluate a polynomial of
+    degree n with fixed-point Horner's scheme at a point with
+    log2(abs(x)) = logx, with an error of about 2**(-prec) times
+    sum(abs(c_k*x**k)), where the coefficients are stored as integers
+    with a common exponent such that the largest one, of magnitude
+    2**top, has W bits, and x is stored with W fractional bits.
+    The hull is that of the coefficients as computed by upper_hull().
+
+    Each step of Horner's scheme adds an error of one unit, which
+    grows by a factor abs(x) per remaining step; the sum is bounded
+    below by its largest term, which is attained at a hull vertex.
+    """
+    L = max(y + k*logx for (k, y) in hull)
+    return prec + int(top + n*max(logx, 0) - L) + n.bit_length() + 10
+
+def _polyval_plan(parts, logs, logxs, prec, derivative):
+    # Common part of the real and complex evaluation: choose the working
+    # precision of each point (rounded up to a multiple of 32 bits, so
+    # that few distinct shifted copies of the coefficients are needed)
+    # and convert the coefficient parts at the largest of them.
+    n = len(logs) - 1
+    hull = upper_hull(logs)
+    top = int(math.ceil(max(y for (k, y) in hull)))
+    # The terms k*c_k*x**(k-1) of the derivative can be much smaller
+    # than those of the polynomial, so they need their own bound; the
+    # errors of p enter each step for p', hence the extra log2(n) bits
+    dhull = None
+    if derivative:
+        dlogs = [None if y is None else y + math.log(k, 2)
+            for (k, y) in enumerate(logs) if k]
+        if [y for y in dlogs if y is not None]:
+            dhull = upper_hull(dlogs)
+    bits = []
+    for logx in logxs:
+        if logx is None:
+            bits.append(None)
+        else:
+            W = polyval_bits(hull, top, n, logx, prec)
+            if dhull is not None:
+                W = max(W, polyval_bits(dhull, top, n, logx, prec) +
+                    n.bit_length())
+            bits.append(-(-W // 32) * 32)
+    wmax = max([w for w in bits if w is not None] or [prec])
+    mans, exp = mpf_vector_to_fixed_round(parts, wmax)
+    return bits, wmax, mans, exp
+
+def mpf_polyval_multi(coeffs, xs, prec, rnd=round_fast, derivative=False):
+    """
+    Evaluate the polynomial with the given raw mpf coefficients (highest
+    degree first) at each of the raw mpfs in xs, returning a list of raw
+    mpfs, or of pairs (p(x), p'(x)) if derivative is set. The error in
+    p(x) is about 2**(-prec) times the sum of the absolute values of the
+    terms. The coefficients and points must be finite.
+
+    The coefficients are converted to integers with a common exponent,
+    and each point to an integer with as many fractional bits as it
+    needs, so that Horner's scheme only involves integer multiplications
+    and shifts, and a single rounding per value.
+    """
+    n = len(coeffs) - 1
+    logs = [mpf_log2abs(c) for c in coeffs[::-1]]
+    if all(y is None for y in logs):
+        if derivative:
+            return [(fzero, fzero)] * len(xs)
+        return [fzero] * len(xs)
+    bits, wmax, C, exp = _polyval_plan(coeffs, logs,
+        [mpf_log2abs(x) for x in xs], prec, derivative)
+    shifted = {}
+    out = []
+    for x, W in zip(xs, bits):
+        if W is None:
+            # x = 0
+            p = coeffs[-1]
+            d = coeffs[-2] if n else fzero
+            out.append((mpf_pos(p, prec, rnd), mpf_pos(d, prec, rnd)))
+            continue
+        s = wmax - W
+        if s not in shifted:
+            shifted[s] = [c >> s for c in C]
+        Cx = shifted[s]
+        X = to_fixed(x, W)
+        p = Cx[0]
+        d = 0
+        if derivative:
+            for c in Cx[1:]:
+                d = ((d*X) >> W) + p
+                p = ((p*X) >> W) + c
+        else:
+            for c in Cx[1:]:
+                p = ((p*X) >> W) + c
+        out.append((from_man_exp(p, exp+s, prec, rnd),
+            from_man_exp(d, exp+s, prec, rnd)))
+    if derivative:
+        return out
+    return [p for (p, d) in out]
+
+def mpc_polyval_multi(coeffs, xs, prec, rnd=round_fast, derivative=False):
+    """
+    Complex version of mpf_polyval_multi(), with raw mpc coefficients
+    and points.
+    """
+    n = len(coeffs) - 1
+    logs = [mpc_log2abs(c) for c in coeffs[::-1]]
+    if all(y is None for y in logs):
+        if derivative:
+            return [(mpc_zero, mpc_zero)] * len(xs)
+        return [mpc_zero] * len(xs)
+    bits, wmax, C, exp = _polyval_plan([c[0] for c in coeffs] + \
+        [c[1] for c in coeffs], logs, [mpc_log2abs(x) for x in xs], prec,
+        derivative)
+    C = list(zip(C[:n+1], C[n+1:]))
+    shifted = {}
+    out = []
+    for x, W in zip(xs, bits):
+        if W is None:
+            p = coeffs[-1]
+            d = coeffs[-2] if n else mpc_zero
+            out.append((mpc_pos(p, prec, rnd), mpc_pos(d, prec, rnd)))
+            continue
+        s = wmax - W
+        if s not in shifted:
+            shifted[s] = [(a >> s, b >> s) for (a, b) in C]
+        Cx = shifted[s]
+        xr = to_fixed(x[0], W)
+        xi = to_fixed(x[1], W)
+        pr, pi = Cx[0]
+        dr = di = 0
+        for cr, ci in Cx[1:]:
+            if derivative:
+                dr, di = ((dr*xr - di*xi) >> W) + pr, ((dr*xi + di*xr) >> W) + pi
+            pr, pi = ((pr*xr - pi*xi) >> W) + cr, ((pr*xi + pi*xr) >> W) + ci
+        e = exp + s
+        out.append(((from_man_exp(pr, e, prec, rnd),
+            from_man_exp(pi, e, prec, rnd)),
+            (from_man_exp(dr, e, prec, rnd), from_man_exp(di, e, prec, rnd))))
+    if derivative:
+        return out
+    return [p for (p, d) in out]
+
+#-------------------------------------------------------------------------------
+# Interpolation
+#-------------------------------------------------------------------------------
+
+def _polyinterp(xs, ys, prec, rnd, sub, mul, div, pos):
+    n = len(xs)
+    if len(set(xs)) < n:
+        raise ValueError("the interpolation nodes must be distinct")
+    wp = prec + n.bit_length() + 20
+    # Newton divided differences
+    d = list(ys)
+    for k in xrange(1, n):
+        for i in xrange(n-1, k-1, -1):
+            d[i] = div(sub(d[i], d[i-1], wp), sub(xs[i], xs[i-k], wp), wp)
+    # Expansion of the Newton form, with coefficients in ascending order
+    c = [d[n-1]]
+    for k in xrange(n-2, -1, -1):
+        x = xs[k]
+        new = [sub(d[k], mul(x, c[0], wp), wp)]
+        for j in xrange(1, len(c)):
+            new.append(sub(c[j-1], mul(x, c[j], wp), wp))
+        new.append(c[-1])
+        c = new
+    return [pos(v, prec, rnd) for v in c[::-1]]
+
+def mpf_polyinterp(xs, ys, prec, rnd=round_fast):
+    """
+    Return the coefficients (highest degree first) of the polynomial of
+    degree at most n-1 taking the values ys at the n distinct points xs,
+    all given as raw mpfs.
+    """
+    if not xs:
+        return []
+    return _polyinterp(xs, ys, prec, rnd, mpf_sub, mpf_mul, mpf_div, mpf_pos)
+
+def mpc_polyinterp(xs, ys, prec, rnd=round_fast):
+    """
+    Complex version of mpf_polyinterp(), with raw mpc points and values.
+    """
+    if not xs:
+        return []
+    return _polyinterp(xs, ys, prec, rnd, mpc_sub, mpc_mul, mpc_div, mpc_pos)
+
+#-------------------------------------------------------------------------------
+# Polynomial arithmetic
+#-------------------------------------------------------------------------------
+
+def int_poly_mul(a, b):
+    """
+    Return the exact product of two polynomials with integer coefficients
+    (given in the same order, either ascending or descending). Unless
+    one factor is short, the product is computed with a single big
+    integer multiplication by Kronecker substitution.
+    """
+    la = len(a)
+    lb = len(b)
+    if not (la and lb):
+        return []
+    L = la + lb - 1
+    if min(la, lb) <= KRONECKER_CUTOFF:
+        if la < lb:
+            a, b = b, a
+        c = [MPZ_ZERO] * L
+        for j, y in enumerate(b):
+            if y:
+                for i, x in enumerate(a):
+                    c[i+j] += x*y
+        return c
+    abits = bitcount(max(abs(x) for x in a))
+    bbits = bitcount(max(abs(x) for x in b))
+    if not (abits and bbits):
+        return [MPZ_ZERO] * L
+    # each coefficient is a sum of at most min(la, lb) products
+    k = abits + bbits + bitcount(min(la, lb)) + 1
+    k += (-k) % 4
+    w = k // 4
+    # adding 2**(k-1) to every coefficient makes them all nonnegative
+    half = MPZ(1) << (k - 1)
+    bias = (((MPZ(1) << (k*L)) - 1) // ((MPZ(1) << k) - 1)) << (k - 1)
+    size = L * w
+    digits = ('%x' % (_kronecker_pack(a, k) * _kronecker_pack(b, k) + \
+        bias)).zfill(size)
+    return [MPZ(digits[size-(t+1)*w:size-t*w], 16) - half for t in xrange(L)]
+
+def int_cpoly_mul(ar, ai, br, bi):
+    """
+    Return the exact product (re, im) of two polynomials with Gaussian
+    integer coefficients, given by the lists of real and imaginary parts,
+    using three real products.
+    """
+    rr = int_poly_mul(ar, br)
+    ii = int_poly_mul(ai, bi)
+    ss = int_poly_mul([x+y for (x, y) in zip(ar, ai)],
+        [x+y for (x, y) in zip(br, bi)])
+    return [x-y for (x, y) in zip(rr, ii)], \
+        [z-x-y for (x, y, z) in zip(rr, ii, ss)]
+
+def _poly_scale(*vectors):
+    # Choose s such that the coefficients a_k*2**(s*k) of the vectors
+    # (lists of log2 magnitudes) vary little in magnitude, from the
+    # slope between the extreme vertices of their upper hulls
+    slopes = []
+    for logs in vectors:
+        hull = upper_hull(logs)
+        if len(hull) > 1:
+            (k0, y0), (k1, y1) = hull[0], hull[-1]
+            slopes.append((y1-y0)/(k1-k0))
+    if not slopes:
+        return 0
+    return -int(round(sum(slopes)/len(slopes)))
+
+def _vector_to_fixed(xs, prec):
+    # Convert exactly if the magnitudes do not differ too much; otherwise
+    # round so that the largest element has that many bits
+    maxbits = 2*prec + 100
+    v = mpf_vector_to_fixed(xs, maxbits)
+    if v is None:
+        v = mpf_vector_to_fixed_round(xs, maxbits)
+        if v is not None and v[1] is None:
+            v = v[0], 0
+    return v
+
+def _fixed_bits(prec, la, lb):
+    # Beyond this many bits per coefficient (after rescaling the
+    # variable), the Kronecker product costs more than the la*lb
+    # products of the direct method
+    return prec*min(la, lb) + 100
+
+def mpf_poly_mul(a, b, prec, rnd=round_fast):
+    """
+    Multiply two polynomials with raw mpf coefficients (given in the same
+    order), returning the coefficients of the product rounded to prec
+    bits. Each coefficient is rounded once from the exact result. The
+    coefficients are converted exactly to integers for a Kronecker
+    product, unless their magnitudes differ so much (after rescaling
+    the variable) that the products are cheaper to form directly.
+    """
+    if not (a and b):
+        return []
+    s = _poly_scale([mpf_log2abs(x) for x in a], [mpf_log2abs(x) for x in b])
+    maxbits = _fixed_bits(prec, len(a), len(b))
+    va = mpf_vector_to_fixed([mpf_shift(x, s*k) for k, x in enumerate(a)],
+        maxbits)
+    vb = mpf_vector_to_fixed([mpf_shift(x, s*k) for k, x in enumerate(b)],
+        maxbits)
+    if va is None or vb is None:
+        # infinities or nans, or a large spread
+        L = len(a) + len(b) - 1
+        return [mpf_sum([mpf_mul(a[i], b[k-i]) for i in xrange(max(0, k-len(b)+1),
+            min(k, len(a)-1)+1)], prec, rnd) for k in xrange(L)]
+    (A, ea), (B, eb) = va, vb
+    e = ea + eb
+    return [from_man_exp(c, e-s*k, prec, rnd)
+        for k, c in enumerate(int_poly_mul(A, B))]
+
+def mpc_poly_mul(a, b, prec, rnd=round_fast):
+    """
+    Complex version of mpf_poly_mul(), with raw mpc coefficients.
+    """
+    if not (a and b):
+        return []
+    s = _poly_scale([mpc_log2abs(x) for x in a], [mpc_log2abs(x) for x in b])
+    la = len(a)
+    lb = len(b)
+    maxbits = _fixed_bits(prec, la, lb)
+    va = mpf_vector_to_fixed([mpf_shift(x[0], s*k) for k, x in enumerate(a)] + \
+        [mpf_shift(x[1], s*k) for k, x in enumerate(a)], maxbits)
+    vb = mpf_vector_to_fixed([mpf_shift(x[0], s*k) for k, x in enumerate(b)] + \
+        [mpf_shift(x[1], s*k) for k, x in enumerate(b)], maxbits)
+    if va is None or vb is None:
+        c = []
+        for k in xrange(la+lb-1):
+            re = []
+            im = []
+            for i in xrange(max(0, k-lb+1), min(k, la-1)+1):
+                (x, y), (u, v) = a[i], b[k-i]
+                re += [mpf_mul(x, u), mpf_neg(mpf_mul(y, v))]
+                im += [mpf_mul(x, v), mpf_mul(y, u)]
+            c.append((mpf_sum(re, prec, rnd), mpf_sum(im, prec, rnd)))
+        return c
+    (A, ea), (B, eb) = va, vb
+    e = ea + eb
+    re, im = int_cpoly_mul(A[:la], A[la:], B[:lb], B[lb:])
+    return [(from_man_exp(x, e-s*k, prec, rnd), from_man_exp(y, e-s*k, prec, rnd))
+        for k, (x, y) in enumerate(zip(re, im))]
+
+def _is_real_vector(*vectors):
+    for v in vectors:
+        for x in v:
+            if len(x) == 2:
+                return False
+    return True
+
+def _to_complex(v):
+    return [x if len(x) == 2 else (x, fzero) for x in v]
+
+class _RealOps(object):
+    zero = fzero
+    one = fone
+    add = staticmethod(mpf_add)
+    sub = staticmethod(mpf_sub)
+    neg = staticmethod(mpf_neg)
+    mul = staticmethod(mpf_mul)
+    div = staticmethod(mpf_div)
+    exp = staticmethod(mpf_exp)
+    log = staticmethod(mpf_log)
+    poly_mul = staticmethod(mpf_poly_mul)
+    @staticmethod
+    def scale(x, n, prec):
+        return mpf_mul(x, from_int(n), prec)
+    @staticmethod
+    def divint(x, n, prec):
+        return mpf_div(x, from_int(n), prec)
+
+class _ComplexOps(object):
+    zero = mpc_zero
+    one = mpc_one
+    add = staticmethod(mpc_add)
+    sub = staticmethod(mpc_sub)
+    neg = staticmethod(mpc_neg)
+    mul = staticmethod(mpc_mul)
+    div = staticmethod(mpc_div)
+    exp = staticmethod(mpc_exp)
+    log = staticmethod(mpc_log)
+    poly_mul = staticmethod(mpc_poly_mul)
+    @staticmethod
+    def scale(x, n, prec):
+        return mpc_mul_int(x, n, prec)
+    @staticmethod
+    def divint(x, n, prec):
+        return (mpf_div(x[0], from_int(n), prec),
+            mpf_div(x[1], from_int(n), prec))
+
+def _ops(*vectors):
+    # Return the arithmetic for the given vectors, and the vectors
+    # converted to complex if any of them is complex
+    if _is_real_vector(*vectors):
+        return (_RealOps,) + vectors
+    return (_ComplexOps,) + tuple(_to_complex(v) for v in vectors)
+
+def _vec_sub(ops, a, b, prec):
+    n = max(len(a), len(b))
+    a = a + [ops.zero] * (n - len(a))
+    b = b + [ops.zero] * (n - len(b))
+    return [ops.sub(x, y, prec) for (x, y) in zip(a, b)]
+
+def _series_inv(ops, a, n, wp):
+    # Newton iteration b -> b - b*(a*b - 1), doubling the number of
+    # correct terms in each step
+    b = [ops.div(ops.one, a[0], wp)]
+    m = 1
+    while m < n:
+        m2 = min(2*m, n)
+        e = ops.poly_mul(a[:m2], b, wp)[m:m2]
+        t = ops.poly_mul(b[:m2-m], e, wp)[:m2-m]
+        b = b + [ops.neg(x) for x in t]
+        m = m2
+    return b
+
+def _series_log(ops, a, n, wp):
+    # log(a) = log(a_0) + integral of a'/a
+    d = [ops.scale(x, k, wp) for k, x in enumerate(a[1:n], 1)]
+    q = ops.poly_mul(d, _series_inv(ops, a, n-1, wp), wp)[:n-1]
+    return [ops.log(a[0], wp)] + \
+        [ops.divint(x, k, wp) for k, x in enumerate(q, 1)]
+
+def _series_exp(ops, a, n, wp):
+    # Newton iteration g -> g*(1 + a - log(g))
+    g = [ops.exp(a[0], wp)]
+    m = 1
+    while m < n:
+        m2 = min(2*m, n)
+        t = _vec_sub(ops, a[:m2], _series_log(ops, g + [ops.zero]*(m2-m),
+            m2, wp), wp)
+        t[0] = ops.zero
+        g = g + ops.poly_mul(g, t, wp)[m:m2]
+        m = m2
+    return g
+
+def _pad(a, n, zero):
+    a = list(a[:n])
+    return a + [zero] * (n - len(a))
+
+def mp_series_inv(a, n, prec, rnd=round_fast):
+    """
+    Return the first n coefficients of the power series 1/a(x), where a
+    is given by a list of raw mpf or mpc coefficients in ascending order
+    (missing coefficients are zero). The constant term must be nonzero.
+    """
+    ops, a = _ops(a)
+    wp = prec + bitcount(n) + 10
+    v = _series_inv(ops, _pad(a, n, ops.zero), n, wp)
+    return [_round(ops, x, prec, rnd) for x in v]
+
+def mp_series_div(a, b, n, prec, rnd=round_fast):
+    """
+    Return the first n coefficients of the power series a(x)/b(x)
+    (see mp_series_inv()).
+    """
+    ops, a, b = _ops(a, b)
+    wp = prec + bitcount(n) + 10
+    v = ops.poly_mul(_pad(a, n, ops.zero),
+        _series_inv(ops, _pad(b, n, ops.zero), n, wp), wp)[:n]
+    return [_round(ops, x, prec, rnd) for x in v]
+
+def mp_series_log(a, n, prec, rnd=round_fast):
+    """
+    Return the first n coefficients of the power series log(a(x))
+    (see mp_series_inv()), using the principal branch for the constant
+    term. The constant term of a must be nonzero, and positive if a is
+    real.
+    """
+    ops, a = _ops(a)
+    wp = prec + bitcount(n) + 10
+    v = _series_log(ops, _pad(a, n, ops.zero), n, wp)
+    return [_round(ops, x, prec, rnd) for x in v]
+
+def mp_series_exp(a, n, prec, rnd=round_fast):
+    """
+    Return the first n coefficients of the power series exp(a(x))
+    (see mp_series_inv()).
+    """
+    ops, a = _ops(a)
+    wp = prec + bitcount(n) + 10
+    v = _series_exp(ops, _pad(a, n, ops.zero), n, wp)
+    return [_round(ops, x, prec, rnd) for x in v]
+
+def _round(ops, x, prec, rnd):
+    if ops is _RealOps:
+        return mpf_pos(x, prec, rnd)
+    return mpc_pos(x, prec, rnd)
+
+def mp_poly_mul(a, b, prec, rnd=round_fast):
+    """
+    Multiply two polynomials with raw mpf or mpc coefficients.
+    """
+    ops, a, b = _ops(a, b)
+    return ops.poly_mul(a, b, prec, rnd)
+
+def mp_poly_divmod(a, b, prec, rnd=round_fast):
+    """
+    Divide the polynomial a by the polynomial b (both given as lists of
+    raw mpf or mpc coefficients, highest degree first, with nonzero
+    leading coefficient of b), returning the quotient and the remainder.
+    The quotient is computed from the reversed polynomials as a power
+    series quotient, and the remainder as a - b*q, which has the length
+    of b minus one (at least one).
+    """
+    ops, a, b = _ops(a, b)
+    n = len(a)
+    m = len(b)
+    if n < m:
+        q = []
+        r = [_round(ops, x, prec, rnd) for x in a]
+    else:
+        wp = prec + bitcount(n) + 10
+        k = n - m + 1
+        q = ops.poly_mul(a[:k], _series_inv(ops, _pad(b, k, ops.zero), k, wp),
+            wp)[:k]
+        bq = ops.poly_mul(b, q, wp)
+        r = [ops.sub(x, y, prec, rnd) for (x, y) in zip(a[k:], bq[k:])]
+        q = [_round(ops, x, prec, rnd) for x in q]
+    r = [ops.zero] * (m - 1 - len(r)) + r
+    return q, r or [ops.zero]
+
+def mp_poly_compose(a, b, prec, rnd=round_fast):
+    """
+    Return the coefficients (highest degree first) of the composition
+    a(b(x)) of two polynomials with raw mpf or mpc coefficients.
+    With a of degree n, this is computed as a_lo(b) + b^h a_hi(b) for
+    a split of a into halves, recursively, using the powers of b with
+    exponents that are powers of two.
+    """
+    ops, a, b = _ops(a, b)
+    if not a:
+        return []
+    if not b:
+        return [_round(ops, a[-1], prec, rnd)]
+    wp = prec + bitcount(len(a)) + 10
+    # work in ascending order
+    a = a[::-1]
+    b = b[::-1]
+    powers = [b]
+    while (1 << len(powers)) < len(a):
+        powers.append(ops.poly_mul(powers[-1], powers[-1], wp))
+    def add(u, v):
+        if len(u) < len(v):
+            u, v = v, u
+        return [ops.add(x, y, wp) for (x, y) in zip(u, v)] + u[len(v):]
+    def compose(c, k):
+        # c has at most 2**k coefficients
+        if len(c) == 1:
+            return c
+        h = 1 << (k - 1)
+        if len(c) <= h:
+            return compose(c, k - 1)
+        lo = compose(c[:h], k - 1)
+        hi = compose(c[h:], k - 1)
+        return add(lo, ops.poly_mul(powers[k-1], hi, wp))
+    k = 0
+    while (1 << k) < len(a):
+        k += 1
+    c = compose(a, k)
+    return [_round(ops, x, prec, rnd) for x in c[::-1]]
+
+def mpf_forward_differences(xs, prec, rnd=round_fast):
+    """
+    Return the forward differences Delta^j x_0 = sum_i (-1)^(j-i) C(j,i) x_i,
+    j = 0, ..., n, of the raw mpfs x_0, ..., x_n. The values are converted
+    to integers with a common exponent (exactly, unless their magnitudes
+    differ greatly), and the differences are obtained exactly by repeated
+    subtraction, which only costs O(n^2) additions of integers with
+    about prec + n bits.
+    """
+    if not xs:
+        return []
+    v = _vector_to_fixed(xs, prec)
+    if v is None:
+        return [fnan] * len(xs)
+    X, e = v
+    out = []
+    while X:
+        out.append(from_man_exp(X[0], e, prec, rnd))
+        X = [X[i+1]-X[i] for i in xrange(len(X)-1)]
+    return out
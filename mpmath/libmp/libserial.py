@@ -0,0 +1,225 @@
+"""
+Compact binary serialization of raw mpf and mpc values.
+
+A raw mpf (sign, man, exp, bc) is encoded as
+
+    varint(2*n + sign)   zigzag varint(exp)   n bytes of man
+
+where the mantissa is stored as n little-endian bytes and bc is
+recomputed when decoding. The special values (zero, infinities and nan)
+have n = 0 and are identified by their exponent. A raw mpc is encoded
+as its real part followed by its imaginary part.
+
+Lists of values are encoded with encode_values() into a bytearray,
+which can be passed directly to anything supporting the buffer
+protocol (files, sockets, shared memory); each value is preceded by a
+tag byte telling whether it is real or complex.
+"""
+
+import binascii
+import struct
+
+from .backend import MPZ, xrange
+from .libmpf import bitcount, fzero, finf, fninf, fnan
+
+# Version of the serialization format used by dumps/loads and pickling
+SERIAL_VERSION = 1
+SERIAL_MAGIC = b'MPB'
+
+TAG_MPF = 0
+TAG_MPC = 1
+
+special_exps = {fzero[2]:fzero, finf[2]:finf, fninf[2]:fninf, fnan[2]:fnan}
+
+if hasattr(MPZ, 'from_bytes') and hasattr(MPZ, 'to_bytes'):
+    # Python 3 ints and gmpy2 >= 2.2
+    def man_to_bytes(man, n):
+        return man.to_bytes(n, 'little')
+    def man_from_bytes(data):
+        return MPZ.from_bytes(data, 'little')
+elif hasattr(int, 'from_bytes'):
+    def man_to_bytes(man, n):
+        return int(man).to_bytes(n, 'little')
+    def man_from_bytes(data):
+        return MPZ(int.from_bytes(data, 'little'))
+else:
+    def man_to_bytes(man, n):
+        return binascii.unhexlify('%0*x' % (2*n, man))[::-1]
+    def man_from_bytes(data):
+        return MPZ(int(binascii.hexlify(bytes(data[::-1])), 16))
+
+def encode_varint(n, out):
+    """Append the unsigned integer n to the bytearray out."""
+    while n >= 0x80:
+        out.append((n & 0x7f) | 0x80)
+        n >>= 7
+    out.append(n)
+
+def decode_varint(data, offset):
+    """Read an unsigned integer from data at offset. Returns the
+    integer and the new offset."""
+    n = shift = 0
+    while 1:
+        if offset >= len(data):
+            raise ValueError("truncated data")
+        b = data[offset]
+        offset += 1
+        n |= (b & 0x7f) << shift
+        if b < 0x80:
+            return n, offset
+        shift += 7
+
+def encode_mpf(x, out):
+    """Append the raw mpf x to the bytearray out."""
+    sign, man, exp, bc = x
+    n = (bc+7)//8 if man else 0
+    encode_varint(2*n + sign, out)
+    # zigzag encoding of the signed exponent
+    if exp >= 0:
+        encode_varint(2*exp, out)
+    else:
+        encode_varint(-2*exp-1, out)
+    if n:
+        out += man_to_bytes(man, n)
+
+def decode_mpf(data, offset):
+    """Read a raw mpf from data at offset. Returns the mpf and the new
+    offset."""
+    head, offset = decode_varint(data, offset)
+    exp, offset = decode_varint(data, offset)
+    if exp & 1:
+        exp = -(exp >> 1) - 1
+    else:
+        exp >>= 1
+    n = head >> 1
+    if not n:
+        if exp not in special_exps:
+            raise ValueError("invalid special value")
+        return special_exps[exp], offset
+    end = offset + n
+    if end > len(data):
+        raise ValueError("truncated data")
+    man = man_from_bytes(data[offset:end])
+    return (head & 1, man, exp, bitcount(man)), end
+
+def encode_mpc(z, out):
+    """Append the raw mpc z to the bytearray out."""
+    encode_mpf(z[0], out)
+    encode_mpf(z[1], out)
+
+def decode_mpc(data, offset):
+    """Read a raw mpc from data at offset. Returns the mpc and the new
+    offset."""
+    re, offset = decode_mpf(data, offset)
+    im, offset = decode_mpf(data, offset)
+    return (re, im), offset
+
+def as_buffer(data):
+    """Return data (any object supporting the buffer protocol) in a
+    form that can be indexed to give integers."""
+    if str is bytes or not isinstance(data, (bytes, bytearray)):
+        return bytearray(data)
+    return data
+
+def encode_values(values, out=None):
+    """Append the count and the values of the list of raw mpfs and mpcs
+    to the bytearray out (a new bytearray if None), and return out."""
+    if out is None:
+        out = bytearray()
+    encode_varint(len(values), out)
+    for v in values:
+        if len(v) == 2:
+            out.append(TAG_MPC)
+            encode_mpc(v, out)
+        else:
+            out.append(TAG_MPF)
+            encode_mpf(v, out)
+    return out
+
+def decode_values(data, offset=0):
+    """Read a list of raw mpfs and mpcs written by encode_values() from
+    data at offset. Returns the list and the new offset."""
+    data = as_buffer(data)
+    count, offset = decode_varint(data, offset)
+    values = []
+    append = values.append
+    for i in xrange(count):
+        if offset >= len(data):
+            raise ValueError("truncated data")
+        tag = data[offset]
+        if tag == TAG_MPF:
+            v, offset = decode_mpf(data, offset+1)
+        elif tag == TAG_MPC:
+            v, offset = decode_mpc(data, offset+1)
+        else:
+            raise ValueError("invalid tag")
+        append(v)
+    return values, offset
+
+def mpf_to_bytes(x):
+    """Encode a raw mpf as a bytes object."""
+    sign, man, exp, bc = x
+    # Fast path (used for pickling) for mantissas with less than 64
+    # bytes and exponents less than 2^13 in magnitude
+    if man and bc < 505 and -8192 <= exp < 8192:
+        n = (bc+7)>>3
+        if exp >= 0:
+            exp = 2*exp
+        else:
+            exp = -2*exp-1
+        if exp < 0x80:
+            head = struct.pack('BB', 2*n + sign, exp)
+        else:
+            head = struct.pack('BBB', 2*n + sign, (exp & 0x7f) | 0x80,
+                exp >> 7)
+        return head + man_to_bytes(man, n)
+    out = bytearray()
+    encode_mpf(x, out)
+    return bytes(out)
+
+def mpf_from_bytes(data):
+    """Decode a raw mpf encoded with mpf_to_bytes()."""
+    data = as_buffer(data)
+    head = data[0]
+    exp = data[1]
+    # Fast path corresponding to that in mpf_to_bytes
+    if 1 < head < 0x80 and exp < 0x80:
+        offset = 2
+    elif 1 < head < 0x80 and data[2] < 0x80:
+        exp = (exp & 0x7f) | (data[2] << 7)
+        offset = 3
+    else:
+        return decode_mpf(data, 0)[0]
+    if exp & 1:
+        exp = -(exp >> 1) - 1
+    else:
+        exp >>= 1
+    if len(data) != offset + (head >> 1):
+        raise ValueError("invalid data")
+    man = man_from_bytes(data[offset:])
+    return (head & 1, man, exp, bitcount(man))
+
+def mpc_to_bytes(z):
+    """Encode a raw mpc as a bytes object."""
+    out = bytearray()
+    encode_mpc(z, out)
+    return bytes(out)
+
+def mpc_from_bytes(data):
+    """Decode a raw mpc encoded with mpc_to_bytes()."""
+    return decode_mpc(as_buffer(data), 0)[0]
+
+def serial_header(kind):
+    """Header of a serialized object of the given kind (b'f' for an
+    mpf, b'c' for an mpc, b'l' for a list and b'm' for a matrix)."""
+    return bytearray(SERIAL_MAGIC + struct.pack('B', SERIAL_VERSION) + kind)
+
+def read_serial_header(data):
+    """Check the header of a serialized object and return its kind
+    and the offset of the payload."""
+    n = len(SERIAL_MAGIC)
+    if bytes(data[:n]) != SERIAL_MAGIC:
+        raise ValueError("not a serialized mpmath object")
+    if data[n] != SERIAL_VERSION:
+        raise ValueError("unsupported serialization version %i" % data[n])
+    return bytes(data[n+1:n+2]), n+2
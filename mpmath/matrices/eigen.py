@@ -23,7 +23,7 @@
   schur : reduction of a real or complex square matrix to upper Schur form
   eig : eigenvalues and eigenvectors of a real or complex square matrix
 
-low level routines:
+low level routines (these work in place on the rows of dense matrices):
 
   hessenberg_reduce_0 : reduction of a real or complex square matrix to upper Hessenberg form
   hessenberg_reduce_1 : auxiliary routine to hessenberg_reduce_0
@@ -76,13 +76,15 @@ def hessenberg_reduce_0(ctx, A, T):
     n = A.rows
     if n <= 2: return
 
+    a = A._get_rows()
+
     for i in xrange(n-1, 1, -1):
 
         # scale the vector
 
         scale = 0
         for k in xrange(0, i):
-            scale += abs(ctx.re(A[i,k])) + abs(ctx.im(A[i,k]))
+            scale += abs(ctx.re(a[i][k])) + abs(ctx.im(a[i][k]))
 
         scale_inv = 0
         if scale != 0:
@@ -91,58 +93,58 @@ def hessenberg_reduce_0(ctx, A, T):
         if scale == 0 or ctx.isinf(scale_inv):
             # sadly there are floating point numbers not equal to zero whose reciprocal is infinity
             T[i] = 0
-            A[i,i-1] = 0
+            a[i][i-1] = ctx.zero
             continue
 
         # calculate parameters for housholder transformation
 
         H = 0
         for k in xrange(0, i):
-            A[i,k] *= scale_inv
-            rr = ctx.re(A[i,k])
-            ii = ctx.im(A[i,k])
+            a[i][k] *= scale_inv
+            rr = ctx.re(a[i][k])
+            ii = ctx.im(a[i][k])
             H += rr * rr + ii * ii
 
-        F = A[i,i-1]
+        F = a[i][i-1]
         f = abs(F)
         G = ctx.sqrt(H)
-        A[i,i-1] = - G * scale
+        a[i][i-1] = - G * scale
 
         if f == 0:
             T[i] = G
         else:
             ff = F / f
             T[i] = F + G * ff
-            A[i,i-1] *= ff
+            a[i][i-1] *= ff
 
         H += G * f
         H = 1 / ctx.sqrt(H)
 
         T[i] *= H
         for k in xrange(0, i - 1):
-            A[i,k] *= H
+            a[i][k] *= H
 
         for j in xrange(0, i):
             # apply housholder transformation (from right)
 
-            G = ctx.conj(T[i]) * A[j,i-1]
+            G = ctx.conj(T[i]) * a[j][i-1]
             for k in xrange(0, i-1):
-                G += ctx.conj(A[i,k]) * A[j,k]
+                G += ctx.conj(a[i][k]) * a[j][k]
 
-            A[j,i-1] -= G * T[i]
+            a[j][i-1] -= G * T[i]
             for k in xrange(0, i-1):
-                A[j,k] -= G * A[i,k]
+                a[j][k] -= G * a[i][k]
 
         for j in xrange(0, n):
             # apply housholder transformation (from left)
 
-            G = T[i] * A[i-1,j]
+            G = T[i] * a[i-1][j]
             for k in xrange(0, i-1):
-                G += A[i,k] * A[k,j]
+                G += a[i][k] * a[k][j]
 
-            A[i-1,j] -= G * ctx.conj(T[i])
+            a[i-1][j] -= G * ctx.conj(T[i])
             for k in xrange(0, i-1):
-                A[k,j] -= G * ctx.conj(A[i,k])
+                a[k][j] -= G * ctx.conj(a[i][k])
 
 
 
@@ -158,29 +160,30 @@ def hessenberg_reduce_1(ctx, A, T):
     """
 
     n = A.rows
+    a = A._get_rows()
 
     if n == 1:
-        A[0,0] = 1
+        a[0][0] = ctx.one
         return
 
-    A[0,0] = A[1,1] = 1
-    A[0,1] = A[1,0] = 0
+    a[0][0] = a[1][1] = ctx.one
+    a[0][1] = a[1][0] = ctx.zero
 
     for i in xrange(2, n):
         if T[i] != 0:
 
             for j in xrange(0, i):
-                G = T[i] * A[i-1,j]
+                G = T[i] * a[i-1][j]
                 for k in xrange(0, i-1):
-                    G += A[i,k] * A[k,j]
+                    G += a[i][k] * a[k][j]
 
-                A[i-1,j] -= G * ctx.conj(T[i])
+                a[i-1][j] -= G * ctx.conj(T[i])
                 for k in xrange(0, i-1):
-                    A[k,j] -= G * ctx.conj(A[i,k])
+                    a[k][j] -= G * ctx.conj(a[i][k])
 
-        A[i,i] = 1
+        a[i][i] = ctx.one
         for j in xrange(0, i):
-            A[j,i] = A[i,j] = 0
+            a[j][i] = a[i][j] = ctx.zero
 
 
 
@@ -225,8 +228,11 @@ def hessenberg(ctx, A, overwrite_a = False):
     if n == 1:
         return (ctx.matrix([[1]]), A)
 
-    if not overwrite_a:
-        A = A.copy()
+    if overwrite_a and not A.sparse:
+        # A is used as workspace, so its LU decomposition becomes invalid
+        A._LU = None
+    else:
+        A = A.copy(sparse=False)
 
     T = ctx.matrix(n, 1)
 
@@ -288,12 +294,15 @@ def qr_step(ctx, n0, n1, A, Q, shift):
     # the matrix on the left is our Givens rotation.
 
     n = A.rows
+    a = A._get_rows()
+    if not isinstance(Q, bool):
+        q = Q._get_rows()
 
     # first step
 
     # calculate givens rotation
-    c = A[n0  ,n0] - shift
-    s = A[n0+1,n0]
+    c = a[n0  ][n0] - shift
+    s = a[n0+1][n0]
 
     v = ctx.hypot(ctx.hypot(ctx.re(c), ctx.im(c)), ctx.hypot(ctx.re(s), ctx.im(s)))
 
@@ -307,69 +316,69 @@ def qr_step(ctx, n0, n1, A, Q, shift):
 
     for k in xrange(n0, n):
         # apply givens rotation from the left
-        x = A[n0  ,k]
-        y = A[n0+1,k]
-        A[n0  ,k] = ctx.conj(c) * x + ctx.conj(s) * y
-        A[n0+1,k] =         -s  * x +          c  * y
+        x = a[n0  ][k]
+        y = a[n0+1][k]
+        a[n0  ][k] = ctx.conj(c) * x + ctx.conj(s) * y
+        a[n0+1][k] =         -s  * x +          c  * y
 
     for k in xrange(min(n1, n0+3)):
         # apply givens rotation from the right
-        x = A[k,n0  ]
-        y = A[k,n0+1]
-        A[k,n0  ] =           c  * x +          s  * y
-        A[k,n0+1] = -ctx.conj(s) * x + ctx.conj(c) * y
+        x = a[k][n0  ]
+        y = a[k][n0+1]
+        a[k][n0  ] =           c  * x +          s  * y
+        a[k][n0+1] = -ctx.conj(s) * x + ctx.conj(c) * y
 
     if not isinstance(Q, bool):
         for k in xrange(n):
             # eigenvectors
-            x = Q[k,n0  ]
-            y = Q[k,n0+1]
-            Q[k,n0  ] =           c  * x +          s  * y
-            Q[k,n0+1] = -ctx.conj(s) * x + ctx.conj(c) * y
+            x = q[k][n0  ]
+            y = q[k][n0+1]
+            q[k][n0  ] =           c  * x +          s  * y
+            q[k][n0+1] = -ctx.conj(s) * x + ctx.conj(c) * y
 
     # chase the bulge
 
     for j in xrange(n0, n1 - 2):
         # calculate givens rotation
 
-        c = A[j+1,j]
-        s = A[j+2,j]
+        c = a[j+1][j]
+        s = a[j+2][j]
 
         v = ctx.hypot(ctx.hypot(ctx.re(c), ctx.im(c)), ctx.hypot(ctx.re(s), ctx.im(s)))
 
         if v == 0:
-            A[j+1,j] = 0
+            a[j+1][j] = ctx.zero
             v = 1
             c = 1
             s = 0
         else:
-            A[j+1,j] = v
+            a[j+1][j] = v
             c /= v
             s /= v
 
-        A[j+2,j] = 0
+        a[j+2][j] = ctx.zero
 
         for k in xrange(j+1, n):
             # apply givens rotation from the left
-            x = A[j+1,k]
-            y = A[j+2,k]
-            A[j+1,k] = ctx.conj(c) * x + ctx.conj(s) * y
-            A[j+2,k] =         -s  * x +          c  * y
+            x = a[j+1][k]
+            y = a[j+2][k]
+            a[j+1][k] = ctx.conj(c) * x + ctx.conj(s) * y
+            a[j+2][k] =         -s  * x +          c  * y
 
         for k in xrange(0, min(n1, j+4)):
             # apply givens rotation from the right
-            x = A[k,j+1]
-            y = A[k,j+2]
-            A[k,j+1] =           c  * x +          s  * y
-            A[k,j+2] = -ctx.conj(s) * x + ctx.conj(c) * y
+            x = a[k][j+1]
+            y = a[k][j+2]
+            a[k][j+1] =           c  * x +          s  * y
+            a[k][j+2] = -ctx.conj(s) * x + ctx.conj(c) * y
 
         if not isinstance(Q, bool):
             for k in xrange(0, n):
                 # eigenvectors
-                x = Q[k,j+1]
-                y = Q[k,j+2]
-                Q[k,j+1] =           c  * x +          s  * y
-                Q[k,j+2] = -ctx.conj(s) * x + ctx.conj(c) * y
+                x = q[k][j+1]
+                y = q[k][j+2]
+                q[k][j+1] =           c  * x +          s  * y
+                q[k][j+2] = -ctx.conj(s) * x + ctx.conj(c) * y
 
 
 
@@ -393,11 +402,12 @@ def hessenberg_qr(ctx, A, Q):
     """
 
     n = A.rows
+    h = A._get_rows()
 
     norm = 0
     for x in xrange(n):
         for y in xrange(min(x+2, n)):
-            norm += ctx.re(A[y,x]) ** 2 + ctx.im(A[y,x]) ** 2
+            norm += ctx.re(h[y][x]) ** 2 + ctx.im(h[y][x]) ** 2
     norm = ctx.sqrt(norm) / n
 
     if norm == 0:
@@ -418,17 +428,17 @@ def hessenberg_qr(ctx, A, Q):
         k = n0
 
         while k + 1 < n1:
-            s = abs(ctx.re(A[k,k])) + abs(ctx.im(A[k,k])) + abs(ctx.re(A[k+1,k+1])) + abs(ctx.im(A[k+1,k+1]))
+            s = abs(ctx.re(h[k][k])) + abs(ctx.im(h[k][k])) + abs(ctx.re(h[k+1][k+1])) + abs(ctx.im(h[k+1][k+1]))
             if s < eps * norm:
                 s = norm
-            if abs(A[k+1,k]) < eps * s:
+            if abs(h[k+1][k]) < eps * s:
                 break
             k += 1
 
         if k + 1 < n1:
             # deflation found at position (k+1, k)
 
-            A[k+1,k] = 0
+            h[k+1][k] = ctx.zero
             n0 = k + 1
 
             its = 0
@@ -443,10 +453,10 @@ def hessenberg_qr(ctx, A, Q):
         else:
             if (its % 30) == 10:
                 # exceptional shift
-                shift = A[n1-1,n1-2]
+                shift = h[n1-1][n1-2]
             elif (its % 30) == 20:
                 # exceptional shift
-                shift = abs(A[n1-1,n1-2])
+                shift = abs(h[n1-1][n1-2])
             elif (its % 30) == 29:
                 # exceptional shift
                 shift = norm
@@ -459,15 +469,15 @@ def hessenberg_qr(ctx, A, Q):
                 #
                 # eigenvalues good:     (a+d+sqrt((a-d)**2+4*b*c))/2
 
-                t =  A[n1-2,n1-2] + A[n1-1,n1-1]
-                s = (A[n1-1,n1-1] - A[n1-2,n1-2]) ** 2 + 4 * A[n1-1,n1-2] * A[n1-2,n1-1]
+                t =  h[n1-2][n1-2] + h[n1-1][n1-1]
+                s = (h[n1-1][n1-1] - h[n1-2][n1-2]) ** 2 + 4 * h[n1-1][n1-2] * h[n1-2][n1-1]
                 if ctx.re(s) > 0:
                     s = ctx.sqrt(s)
                 else:
                     s = ctx.sqrt(-s) * 1j
                 a = (t + s) / 2
                 b = (t - s) / 2
-                if abs(A[n1-1,n1-1] - a) > abs(A[n1-1,n1-1] - b):
+                if abs(h[n1-1][n1-1] - a) > abs(h[n1-1][n1-1] - b):
                     shift = b
                 else:
                     shift = a
@@ -524,8 +534,11 @@ def schur(ctx, A, overwrite_a = False):
     if n == 1:
         return (ctx.matrix([[1]]), A)
 
-    if not overwrite_a:
-        A = A.copy()
+    if overwrite_a and not A.sparse:
+        # A is used as workspace, so its LU decomposition becomes invalid
+        A._LU = None
+    else:
+        A = A.copy(sparse=False)
 
     T = ctx.matrix(n, 1)
 
@@ -560,6 +573,8 @@ def eig_tr_r(ctx, A):
     n = A.rows
 
     ER = ctx.eye(n)
+    a = A._get_rows()
+    er = ER._get_rows()
 
     eps = ctx.eps
 
@@ -573,7 +588,7 @@ def eig_tr_r(ctx, A):
     rmax = 1
 
     for i in xrange(1, n):
-        s = A[i,i]
+        s = a[i][i]
 
         smin = max(eps * abs(s), smlnum)
 
@@ -581,24 +596,24 @@ def eig_tr_r(ctx, A):
 
             r = 0
             for k in xrange(j + 1, i + 1):
-                r += A[j,k] * ER[k,i]
+                r += a[j][k] * er[k][i]
 
-            t = A[j,j] - s
+            t = a[j][j] - s
             if abs(t) < smin:
                 t = smin
 
             r = -r / t
-            ER[j,i] = r
+            er[j][i] = r
 
             rmax = max(rmax, abs(r))
             if rmax > simin:
                 for k in xrange(j, i+1):
-                    ER[k,i] /= rmax
+                    er[k][i] /= rmax
                 rmax = 1
 
         if rmax != 1:
             for k in xrange(0, i + 1):
-                ER[k,i] /= rmax
+                er[k][i] /= rmax
 
     return ER
 
@@ -618,6 +633,8 @@ def eig_tr_l(ctx, A):
     n = A.rows
 
     EL = ctx.eye(n)
+    a = A._get_rows()
+    el = EL._get_rows()
 
     eps = ctx.eps
 
@@ -631,7 +648,7 @@ def eig_tr_l(ctx, A):
     rmax = 1
 
     for i in xrange(0, n - 1):
-        s = A[i,i]
+        s = a[i][i]
 
         smin = max(eps * abs(s), smlnum)
 
@@ -639,24 +656,24 @@ def eig_tr_l(ctx, A):
 
             r = 0
             for k in xrange(i, j):
-                r += EL[i,k] * A[k,j]
+                r += el[i][k] * a[k][j]
 
-            t = A[j,j] - s
+            t = a[j][j] - s
             if abs(t) < smin:
                 t = smin
 
             r = -r / t
-            EL[i,j] = r
+            el[i][j] = r
 
             rmax = max(rmax, abs(r))
             if rmax > simin:
                 for k in xrange(i, j + 1):
-                    EL[i,k] /= rmax
+                    el[i][k] /= rmax
                 rmax = 1
 
         if rmax != 1:
             for k in xrange(i, n):
-                EL[i,k] /= rmax
+                el[i][k] /= rmax
 
     return EL
 
@@ -735,8 +752,11 @@ def eig(ctx, A, left = False, right = True, overwrite_a = False):
 
         return ([A[0]], ctx.matrix([[1]]), ctx.matrix([[1]]))
 
-    if not overwrite_a:
-        A = A.copy()
+    if overwrite_a and not A.sparse:
+        # A is used as workspace, so its LU decomposition becomes invalid
+        A._LU = None
+    else:
+        A = A.copy(sparse=False)
 
     T = ctx.zeros(n, 1)
 
@@ -919,12 +919,12 @@ def svd_r_raw(ctx, A, V = False, calc_u = False):
       V : n*n       orthogonal: V V' = V' V = 1
 
     parameters:
-      A        (input/output) On input, A contains a real matrix of shape m*n.
+      A        (input/output) On input, A contains a real dense matrix of shape m*n.
                On output, if calc_u is true A contains the column-orthogonal
                matrix U; otherwise A is simply used as workspace and thus destroyed.
 
       V        (input/output) if false, the matrix V is not calculated. otherwise
-               V must be a matrix of shape n*n.
+               V must be a dense matrix of shape n*n.
 
       calc_u   (input) If true, the matrix U is calculated and replaces A.
                if false, U is not calculated and A is simply destroyed
@@ -942,6 +942,9 @@ def svd_r_raw(ctx, A, V = False, calc_u = False):
     """
 
     m, n = A.rows, A.cols
+    a = A._get_rows()
+    if not isinstance(V, bool):
+        v = V._get_rows()
 
     S = ctx.zeros(n, 1)
 
@@ -956,77 +959,77 @@ def svd_r_raw(ctx, A, V = False, calc_u = False):
         g = s = scale = 0
         if i < m:
             for k in xrange(i, m):
-                scale += ctx.fabs(A[k,i])
+                scale += ctx.fabs(a[k][i])
             if scale != 0:
                 for k in xrange(i, m):
-                    A[k,i] /= scale
-                    s += A[k,i] * A[k,i]
-                f = A[i,i]
+                    a[k][i] /= scale
+                    s += a[k][i] * a[k][i]
+                f = a[i][i]
                 g = -ctx.sqrt(s)
                 if f < 0:
                     g = -g
                 h = f * g - s
-                A[i,i] = f - g
+                a[i][i] = f - g
                 for j in xrange(i+1, n):
                     s = 0
                     for k in xrange(i, m):
-                        s += A[k,i] * A[k,j]
+                        s += a[k][i] * a[k][j]
                     f = s / h
                     for k in xrange(i, m):
-                        A[k,j] += f * A[k,i]
+                        a[k][j] += f * a[k][i]
                 for k in xrange(i,m):
-                    A[k,i] *= scale
+                    a[k][i] *= scale
 
         S[i] = scale * g
         g = s = scale = 0
 
         if i < m and i != n - 1:
             for k in xrange(i+1, n):
-                scale += ctx.fabs(A[i,k])
+                scale += ctx.fabs(a[i][k])
             if scale:
                 for k in xrange(i+1, n):
-                    A[i,k] /= scale
-                    s += A[i,k] * A[i,k]
-                f = A[i,i+1]
+                    a[i][k] /= scale
+                    s += a[i][k] * a[i][k]
+                f = a[i][i+1]
                 g = -ctx.sqrt(s)
                 if f < 0:
                     g = -g
                 h = f * g - s
-                A[i,i+1] = f - g
+                a[i][i+1] = f - g
 
                 for k in xrange(i+1, n):
-                    work[k] = A[i,k] / h
+                    work[k] = a[i][k] / h
 
                 for j in xrange(i+1, m):
                     s = 0
                     for k in xrange(i+1, n):
-                        s += A[j,k] * A[i,k]
+                        s += a[j][k] * a[i][k]
                     for k in xrange(i+1, n):
-                        A[j,k] += s * work[k]
+                        a[j][k] += s * work[k]
 
                 for k in xrange(i+1, n):
-                    A[i,k] *= scale
+                    a[i][k] *= scale
 
         anorm = max(anorm, ctx.fabs(S[i]) + ctx.fabs(work[i]))
 
     if not isinstance(V, bool):
         for i in xrange(n-2, -1, -1):     # accumulation of right hand transformations
-            V[i+1,i+1] = 1
+            v[i+1][i+1] = ctx.one
 
             if work[i+1] != 0:
                 for j in xrange(i+1, n):
-                    V[i,j] = (A[i,j] / A[i,i+1]) / work[i+1]
+                    v[i][j] = (a[i][j] / a[i][i+1]) / work[i+1]
                 for j in xrange(i+1, n):
                     s = 0
                     for k in xrange(i+1, n):
-                        s += A[i,k] * V[j,k]
+                        s += a[i][k] * v[j][k]
                     for k in xrange(i+1, n):
-                        V[j,k] += s * V[i,k]
+                        v[j][k] += s * v[i][k]
 
             for j in xrange(i+1, n):
-                V[j,i] = V[i,j] = 0
+                v[j][i] = v[i][j] = ctx.zero
 
-        V[0,0] = 1
+        v[0][0] = ctx.one
 
     if m<n : minnm = m
     else   : minnm = n
@@ -1035,22 +1038,22 @@ def svd_r_raw(ctx, A, V = False, calc_u = False):
         for i in xrange(minnm-1, -1, -1): # accumulation of left hand transformations
             g = S[i]
             for j in xrange(i+1, n):
-                A[i,j] = 0
+                a[i][j] = ctx.zero
             if g != 0:
                 g = 1 / g
                 for j in xrange(i+1, n):
                     s = 0
                     for k in xrange(i+1, m):
-                        s += A[k,i] * A[k,j]
-                    f = (s / A[i,i]) * g
+                        s += a[k][i] * a[k][j]
+                    f = (s / a[i][i]) * g
                     for k in xrange(i, m):
-                        A[k,j] += f * A[k,i]
+                        a[k][j] += f * a[k][i]
                 for j in xrange(i, m):
-                    A[j,i] *= g
+                    a[j][i] *= g
             else:
                 for j in xrange(i, m):
-                    A[j,i] = 0
-            A[i,i] += 1
+                    a[j][i] = ctx.zero
+            a[i][i] += 1
 
     for k in xrange(n - 1, -1, -1):
         # diagonalization of the bidiagonal form:
@@ -1088,10 +1091,10 @@ def svd_r_raw(ctx, A, V = False, calc_u = False):
 
                     if calc_u:
                         for j in xrange(m):
-                            y = A[j,nm]
-                            z = A[j,i]
-                            A[j,nm] = y * c + z * s
-                            A[j,i]  = z * c - y * s
+                            y = a[j][nm]
+                            z = a[j][i]
+                            a[j][nm] = y * c + z * s
+                            a[j][i]  = z * c - y * s
 
             z = S[k]
 
@@ -1100,7 +1103,7 @@ def svd_r_raw(ctx, A, V = False, calc_u = False):
                     S[k] = -z
                     if not isinstance(V, bool):
                         for j in xrange(n):
-                            V[k,j] = -V[k,j]
+                            v[k][j] = -v[k][j]
                 break
 
             if its >= maxits:
@@ -1133,10 +1136,10 @@ def svd_r_raw(ctx, A, V = False, calc_u = False):
                 y *= c
                 if not isinstance(V, bool):
                     for jj in xrange(n):
-                        x = V[j  ,jj]
-                        z = V[j+1,jj]
-                        V[j    ,jj]= x * c + z * s
-                        V[j+1  ,jj]= z * c - x * s
+                        x = v[j  ][jj]
+                        z = v[j+1][jj]
+                        v[j    ][jj]= x * c + z * s
+                        v[j+1  ][jj]= z * c - x * s
                 z = ctx.hypot(f, h)
                 S[j] = z
                 if z != 0:            # rotation can be arbitray if z=0
@@ -1148,10 +1151,10 @@ def svd_r_raw(ctx, A, V = False, calc_u = False):
 
                 if calc_u:
                     for jj in xrange(m):
-                        y = A[jj,j  ]
-                        z = A[jj,j+1]
-                        A[jj,j    ] = y * c + z * s
-                        A[jj,j+1  ] = z * c - y * s
+                        y = a[jj][j  ]
+                        z = a[jj][j+1]
+                        a[jj][j    ] = y * c + z * s
+                        a[jj][j+1  ] = z * c - y * s
 
             work[l] = 0
             work[k] = f
@@ -1180,15 +1183,15 @@ def svd_r_raw(ctx, A, V = False, calc_u = False):
 
             if calc_u:
                 for j in xrange(m):
-                    z = A[j,i]
-                    A[j,i] = A[j,imax]
-                    A[j,imax] = z
+                    z = a[j][i]
+                    a[j][i] = a[j][imax]
+                    a[j][imax] = z
 
             if not isinstance(V, bool):
                 for j in xrange(n):
-                    z = V[i,j]
-                    V[i,j] = V[imax,j]
-                    V[imax,j] = z
+                    z = v[i][j]
+                    v[i][j] = v[imax][j]
+                    v[imax][j] = z
 
     return S
 
@@ -1219,12 +1222,12 @@ def svd_c_raw(ctx, A, V = False, calc_u = False):
       V : n*n       unitary: V V' = V' V = 1
 
     parameters:
-      A        (input/output) On input, A contains a complex matrix of shape m*n.
+      A        (input/output) On input, A contains a complex dense matrix of shape m*n.
                On output, if calc_u is true A contains the column-unitary
                matrix U; otherwise A is simply used as workspace and thus destroyed.
 
       V        (input/output) if false, the matrix V is not calculated. otherwise
-               V must be a matrix of shape n*n.
+               V must be a dense matrix of shape n*n.
 
       calc_u   (input) If true, the matrix U is calculated and replaces A.
                if false, U is not calculated and A is simply destroyed
@@ -1242,6 +1245,9 @@ def svd_c_raw(ctx, A, V = False, calc_u = False):
     """
 
     m, n = A.rows, A.cols
+    a = A._get_rows()
+    if not isinstance(V, bool):
+        v = V._get_rows()
 
     S = ctx.zeros(n, 1)
 
@@ -1259,14 +1265,14 @@ def svd_c_raw(ctx, A, V = False, calc_u = False):
         g = s = scale = 0
         if i < m:
             for k in xrange(i, m):
-                scale += ctx.fabs(ctx.re(A[k,i])) + ctx.fabs(ctx.im(A[k,i]))
+                scale += ctx.fabs(ctx.re(a[k][i])) + ctx.fabs(ctx.im(a[k][i]))
             if scale != 0:
                 for k in xrange(i, m):
-                    A[k,i] /= scale
-                    ar = ctx.re(A[k,i])
-                    ai = ctx.im(A[k,i])
+                    a[k][i] /= scale
+                    ar = ctx.re(a[k][i])
+                    ai = ctx.im(a[k][i])
                     s += ar * ar + ai * ai
-                f = A[i,i]
+                f = a[i][i]
                 g = -ctx.sqrt(s)
                 if ctx.re(f) < 0:
                     beta = -g - ctx.conj(f)
@@ -1276,32 +1282,32 @@ def svd_c_raw(ctx, A, V = False, calc_u = False):
                 beta /= ctx.conj(beta)
                 beta += 1
                 h = 2 * (ctx.re(f) * g - s)
-                A[i,i] = f - g
+                a[i][i] = f - g
                 beta /= h
                 lbeta[i] = (beta / scale) / scale
                 for j in xrange(i+1, n):
                     s = 0
                     for k in xrange(i, m):
-                        s += ctx.conj(A[k,i]) * A[k,j]
+                        s += ctx.conj(a[k][i]) * a[k][j]
                     f = beta * s
                     for k in xrange(i, m):
-                        A[k,j] += f * A[k,i]
+                        a[k][j] += f * a[k][i]
                 for k in xrange(i, m):
-                    A[k,i] *= scale
+                    a[k][i] *= scale
 
         S[i] = scale * g     # S are the diagonal elements
         g = s = scale = 0
 
         if i < m and i != n - 1:
             for k in xrange(i+1, n):
-                scale += ctx.fabs(ctx.re(A[i,k])) + ctx.fabs(ctx.im(A[i,k]))
+                scale += ctx.fabs(ctx.re(a[i][k])) + ctx.fabs(ctx.im(a[i][k]))
             if scale:
                 for k in xrange(i+1, n):
-                    A[i,k] /= scale
-                    ar = ctx.re(A[i,k])
-                    ai = ctx.im(A[i,k])
+                    a[i][k] /= scale
+                    ar = ctx.re(a[i][k])
+                    ai = ctx.im(a[i][k])
                     s += ar * ar + ai * ai
-                f = A[i,i+1]
+                f = a[i][i+1]
                 g = -ctx.sqrt(s)
                 if ctx.re(f) < 0:
                     beta = -g - ctx.conj(f)
@@ -1313,46 +1319,46 @@ def svd_c_raw(ctx, A, V = False, calc_u = False):
                 beta += 1
 
                 h = 2 * (ctx.re(f) * g - s)
-                A[i,i+1] = f - g
+                a[i][i+1] = f - g
 
                 beta /= h
                 rbeta[i] = (beta / scale) / scale
 
                 for k in xrange(i+1, n):
-                    work[k] = A[i, k]
+                    work[k] = a[i][ k]
 
                 for j in xrange(i+1, m):
                     s = 0
                     for k in xrange(i+1, n):
-                        s += ctx.conj(A[i,k]) * A[j,k]
+                        s += ctx.conj(a[i][k]) * a[j][k]
                     f = s * beta
                     for k in xrange(i+1,n):
-                        A[j,k] += f * work[k]
+                        a[j][k] += f * work[k]
 
                 for k in xrange(i+1, n):
-                    A[i,k] *= scale
+                    a[i][k] *= scale
 
         anorm = max(anorm,ctx.fabs(S[i]) + ctx.fabs(dwork[i]))
 
     if not isinstance(V, bool):
         for i in xrange(n-2, -1, -1):     # accumulation of right hand transformations
-            V[i+1,i+1] = 1
+            v[i+1][i+1] = ctx.one
 
             if dwork[i+1] != 0:
                 f = ctx.conj(rbeta[i])
                 for j in xrange(i+1, n):
-                    V[i,j] = A[i,j] * f
+                    v[i][j] = a[i][j] * f
                 for j in xrange(i+1, n):
                     s = 0
                     for k in xrange(i+1, n):
-                        s += ctx.conj(A[i,k]) * V[j,k]
+                        s += ctx.conj(a[i][k]) * v[j][k]
                     for k in xrange(i+1, n):
-                        V[j,k] += s * V[i,k]
+                        v[j][k] += s * v[i][k]
 
             for j in xrange(i+1,n):
-                V[j,i] = V[i,j] = 0
+                v[j][i] = v[i][j] = ctx.zero
 
-        V[0,0] = 1
+        v[0][0] = ctx.one
 
     if m < n : minnm = m
     else     : minnm = n
@@ -1361,22 +1367,22 @@ def svd_c_raw(ctx, A, V = False, calc_u = False):
         for i in xrange(minnm-1, -1, -1): # accumulation of left hand transformations
             g = S[i]
             for j in xrange(i+1, n):
-                A[i,j] = 0
+                a[i][j] = ctx.zero
             if g != 0:
                 g = 1 / g
                 for j in xrange(i+1, n):
                     s = 0
                     for k in xrange(i+1, m):
-                        s += ctx.conj(A[k,i]) * A[k,j]
+                        s += ctx.conj(a[k][i]) * a[k][j]
                     f = s * ctx.conj(lbeta[i])
                     for k in xrange(i, m):
-                        A[k,j] += f * A[k,i]
+                        a[k][j] += f * a[k][i]
                 for j in xrange(i, m):
-                    A[j,i] *= g
+                    a[j][i] *= g
             else:
                 for j in xrange(i, m):
-                    A[j,i] = 0
-            A[i,i] += 1
+                    a[j][i] = ctx.zero
+            a[i][i] += 1
 
     for k in xrange(n-1, -1, -1):
         # diagonalization of the bidiagonal form:
@@ -1414,10 +1420,10 @@ def svd_c_raw(ctx, A, V = False, calc_u = False):
 
                     if calc_u:
                         for j in xrange(m):
-                            y = A[j,nm]
-                            z = A[j,i]
-                            A[j,nm]= y * c + z * s
-                            A[j,i] = z * c - y * s
+                            y = a[j][nm]
+                            z = a[j][i]
+                            a[j][nm]= y * c + z * s
+                            a[j][i] = z * c - y * s
 
             z = S[k]
 
@@ -1426,7 +1432,7 @@ def svd_c_raw(ctx, A, V = False, calc_u = False):
                     S[k] = -z
                     if not isinstance(V, bool):
                         for j in xrange(n):
-                            V[k,j] = -V[k,j]
+                            v[k][j] = -v[k][j]
                 break
 
             if its >= maxits:
@@ -1459,10 +1465,10 @@ def svd_c_raw(ctx, A, V = False, calc_u = False):
                 y *= c
                 if not isinstance(V, bool):
                     for jj in xrange(n):
-                        x = V[j  ,jj]
-                        z = V[j+1,jj]
-                        V[j    ,jj]= x * c + z * s
-                        V[j+1,jj  ]= z * c - x * s
+                        x = v[j  ][jj]
+                        z = v[j+1][jj]
+                        v[j    ][jj]= x * c + z * s
+                        v[j+1][jj  ]= z * c - x * s
                 z = ctx.hypot(f, h)
                 S[j] = z
                 if z != 0:            # rotation can be arbitray if z=0
@@ -1473,10 +1479,10 @@ def svd_c_raw(ctx, A, V = False, calc_u = False):
                 x = c * y - s * g
                 if calc_u:
                     for jj in xrange(m):
-                        y = A[jj,j  ]
-                        z = A[jj,j+1]
-                        A[jj,j    ]= y * c + z * s
-                        A[jj,j+1  ]= z * c - y * s
+                        y = a[jj][j  ]
+                        z = a[jj][j+1]
+                        a[jj][j    ]= y * c + z * s
+                        a[jj][j+1  ]= z * c - y * s
 
             dwork[l] = 0
             dwork[k] = f
@@ -1505,15 +1511,15 @@ def svd_c_raw(ctx, A, V = False, calc_u = False):
 
             if calc_u:
                 for j in xrange(m):
-                    z = A[j,i]
-                    A[j,i] = A[j,imax]
-                    A[j,imax] = z
+                    z = a[j][i]
+                    a[j][i] = a[j][imax]
+                    a[j][imax] = z
 
             if not isinstance(V, bool):
                 for j in xrange(n):
-                    z = V[i,j]
-                    V[i,j] = V[imax,j]
-                    V[imax,j] = z
+                    z = v[i][j]
+                    v[i][j] = v[imax][j]
+                    v[imax][j] = z
 
     return S
 
@@ -1591,8 +1597,11 @@ def svd_r(ctx, A, full_matrices = False, compute_uv = True, overwrite_a = False)
     m, n = A.rows, A.cols
 
     if not compute_uv:
-        if not overwrite_a:
-            A = A.copy()
+        if overwrite_a and not A.sparse:
+            # A is used as workspace
+            A._LU = None
+        else:
+            A = A.copy(sparse=False)
         S = svd_r_raw(ctx, A, V = False, calc_u = False)
         S = S[:min(m,n)]
         return S
@@ -1608,8 +1617,11 @@ def svd_r(ctx, A, full_matrices = False, compute_uv = True, overwrite_a = False)
 
         return (A0, S, V)
     else:
-        if not overwrite_a:
-            A = A.copy()
+        if overwrite_a and not A.sparse:
+            # A is used as workspace
+            A._LU = None
+        else:
+            A = A.copy(sparse=False)
         V = ctx.zeros(n, n)
         S = svd_r_raw(ctx, A, V, calc_u = True)
 
@@ -1695,8 +1707,11 @@ def svd_c(ctx, A, full_matrices = False, compute_uv = True, overwrite_a = False)
     m, n = A.rows, A.cols
 
     if not compute_uv:
-        if not overwrite_a:
-            A = A.copy()
+        if overwrite_a and not A.sparse:
+            # A is used as workspace
+            A._LU = None
+        else:
+            A = A.copy(sparse=False)
         S = svd_c_raw(ctx, A, V = False, calc_u = False)
         S = S[:min(m,n)]
         return S
@@ -1712,8 +1727,11 @@ def svd_c(ctx, A, full_matrices = False, compute_uv = True, overwrite_a = False)
 
         return (A0, S, V)
     else:
-        if not overwrite_a:
-            A = A.copy()
+        if overwrite_a and not A.sparse:
+            # A is used as workspace
+            A._LU = None
+        else:
+            A = A.copy(sparse=False)
         V = ctx.zeros(n, n)
         S = svd_c_raw(ctx, A, V, calc_u = True)
 
@@ -127,33 +127,58 @@ def LU_decomp(ctx, A, overwrite=False, use_cache=True):
             A = A.copy()
         tol = ctx.absmin(ctx.mnorm(A,1) * ctx.eps) # each pivot element has to be bigger
         n = A.rows
+        rows = A._get_rows()
+        p = ctx._LU_decomp_rows(rows, tol)
+        A._set_rows(rows)
+        if ctx.absmin(A[n - 1,n - 1]) <= tol:
+            raise ZeroDivisionError('matrix is numerically singular')
+        # cache decomposition
+        if not overwrite and isinstance(orig, ctx.matrix):
+            orig._LU = (A, p)
+        return A, p
+
+    def _LU_decomp_rows(ctx, rows, tol):
+        """
+        Perform the Gauss elimination of LU_decomp in place on a square
+        matrix given as a list of rows and return the pivot indices.
+        """
+        n = len(rows)
         p = [None]*(n - 1)
         for j in xrange(n - 1):
             # pivoting, choose max(abs(reciprocal row sum)*abs(pivot element))
             biggest = 0
             for k in xrange(j, n):
-                s = ctx.fsum([ctx.absmin(A[k,l]) for l in xrange(j, n)])
+                s = ctx.fsum([ctx.absmin(a) for a in rows[k][j:]])
                 if ctx.absmin(s) <= tol:
                     raise ZeroDivisionError('matrix is numerically singular')
-                current = 1/s * ctx.absmin(A[k,j])
+                current = 1/s * ctx.absmin(rows[k][j])
                 if current > biggest: # TODO: what if equal?
                     biggest = current
                     p[j] = k
             # swap rows according to p
-            ctx.swap_row(A, j, p[j])
-            if ctx.absmin(A[j,j]) <= tol:
+            rows[j], rows[p[j]] = rows[p[j]], rows[j]
+            pivot_row = rows[j]
+            if ctx.absmin(pivot_row[j]) <= tol:
                 raise ZeroDivisionError('matrix is numerically singular')
             # calculate elimination factors and add rows
             for i in xrange(j + 1, n):
-                A[i,j] /= A[j,j]
+                row = rows[i]
+                row[j] = f = row[j] / pivot_row[j]
                 for k in xrange(j + 1, n):
-                    A[i,k] -= A[i,j]*A[j,k]
-        if ctx.absmin(A[n - 1,n - 1]) <= tol:
-            raise ZeroDivisionError('matrix is numerically singular')
-        # cache decomposition
-        if not overwrite and isinstance(orig, ctx.matrix):
-            orig._LU = (A, p)
-        return A, p
+                    row[k] -= f*pivot_row[k]
+        return p
+
+    def _LU_solve(ctx, A, p, B):
+        """
+        Solve the LU factorized system for all columns of the matrix B.
+        """
+        X = ctx.matrix(B.rows, B.cols)
+        for j in xrange(B.cols):
+            y = ctx.L_solve(A, B.column(j), p)
+            x = ctx.U_solve(A, y)
+            for i in xrange(B.rows):
+                X[i,j] = x[i]
+        return X
 
     def L_solve(ctx, L, b, p=None):
         """
@@ -225,8 +250,7 @@ def lu_solve(ctx, A, b, **kwargs):
             else:
                 # LU factorization
                 A, p = ctx.LU_decomp(A)
-                b = ctx.L_solve(A, b, p)
-                x = ctx.U_solve(A, b)
+                x = ctx._LU_solve(A, p, b)
         finally:
             ctx.prec = prec
         return x
@@ -303,20 +327,9 @@ def inverse(ctx, A, **kwargs):
             n = A.rows
             # get LU factorisation
             A, p = ctx.LU_decomp(A)
-            cols = []
-            # calculate unit vectors and solve corresponding system to get columns
-            for i in xrange(1, n + 1):
-                e = ctx.unitvector(n, i)
-                y = ctx.L_solve(A, e, p)
-                cols.append(ctx.U_solve(A, y))
-            # convert columns to matrix
-            inv = []
-            for i in xrange(n):
-                row = []
-                for j in xrange(n):
-                    row.append(cols[j][i])
-                inv.append(row)
-            result = ctx.matrix(inv, **kwargs)
+            # solve for the columns of the unit matrix
+            inv = ctx._LU_solve(A, p, ctx.eye(n))
+            result = ctx.matrix(inv.tolist(), **kwargs)
         finally:
             ctx.prec = prec
         return result
@@ -654,7 +667,10 @@ def qr(ctx, A, mode = 'full', edps = 10):
         # temporarily increase the precision and initialize
         with ctx.extradps(edps):
             tau = ctx.matrix(n,1)
-            A = A.copy()
+            # work on the rows of a dense copy, this avoids the overhead
+            # of indexing
+            A = A.copy(sparse=False)
+            a = A._get_rows()
 
             # ---------------
             # FACTOR MATRIX A
@@ -666,12 +682,12 @@ def qr(ctx, A, mode = 'full', edps = 10):
 
                 # main loop to factor A (complex)
                 for j in xrange(0, n):
-                    alpha = A[j,j]
+                    alpha = a[j][j]
                     alphr = ctx.re(alpha)
                     alphi = ctx.im(alpha)
 
                     if (m-j) >= 2:
-                        xnorm = ctx.fsum( A[i,j]*ctx.conj(A[i,j]) for i in xrange(j+1, m) )
+                        xnorm = ctx.fsum( a[i][j]*ctx.conj(a[i][j]) for i in xrange(j+1, m) )
                         xnorm = ctx.re( ctx.sqrt(xnorm) )
                     else:
                         xnorm = rzero
@@ -690,29 +706,29 @@ def qr(ctx, A, mode = 'full', edps = 10):
                     za = one / (alpha - beta)
 
                     for i in xrange(j+1, m):
-                        A[i,j] *= za
+                        a[i][j] *= za
 
-                    A[j,j] = one
+                    a[j][j] = one
                     for k in xrange(j+1, n):
-                        y = ctx.fsum(A[i,j] * ctx.conj(A[i,k]) for i in xrange(j, m))
+                        y = ctx.fsum(a[i][j] * ctx.conj(a[i][k]) for i in xrange(j, m))
                         temp = t * ctx.conj(y)
                         for i in xrange(j, m):
-                            A[i,k] += A[i,j] * temp
+                            a[i][k] += a[i][j] * temp
 
-                    A[j,j] = ctx.mpc(beta, '0.0')
+                    a[j][j] = ctx.mpc(beta, '0.0')
             else:
                 one = ctx.mpf('1.0')
                 zero = ctx.mpf('0.0')
 
                 # main loop to factor A (real)
                 for j in xrange(0, n):
-                    alpha = A[j,j]
+                    alpha = a[j][j]
 
                     if (m-j) > 2:
-                        xnorm = ctx.fsum( (A[i,j])**2 for i in xrange(j+1, m) )
+                        xnorm = ctx.fsum( (a[i][j])**2 for i in xrange(j+1, m) )
                         xnorm = ctx.sqrt(xnorm)
                     elif (m-j) == 2:
-                        xnorm = abs( A[m-1,j] )
+                        xnorm = abs( a[m-1][j] )
                     else:
                         xnorm = zero
 
@@ -730,18 +746,19 @@ def qr(ctx, A, mode = 'full', edps = 10):
                     da = one / (alpha - beta)
 
                     for i in xrange(j+1, m):
-                        A[i,j] *= da
+                        a[i][j] *= da
 
-                    A[j,j] = one
+                    a[j][j] = one
                     for k in xrange(j+1, n):
-                        y = ctx.fsum( A[i,j] * A[i,k] for i in xrange(j, m) )
+                        y = ctx.fsum( a[i][j] * a[i][k] for i in xrange(j, m) )
                         temp = t * y
                         for i in xrange(j,m):
-                            A[i,k] += A[i,j] * temp
+                            a[i][k] += a[i][j] * temp
 
-                    A[j,j] = beta
+                    a[j][j] = beta
 
             # return factorization in same internal format as LAPACK
+            A._set_rows(a)
             if (mode == 'raw') or (mode == 'RAW'):
                 return A, tau
 
@@ -763,29 +780,30 @@ def qr(ctx, A, mode = 'full', edps = 10):
             # add columns to A if needed and initialize
             A.cols += (p-n)
             for j in xrange(0, p):
-                A[j,j] = one
+                a[j][j] = one
                 for i in xrange(0, j):
-                    A[i,j] = zero
+                    a[i][j] = zero
 
             # main loop to form Q
             for j in xrange(n-1, -1, -1):
                 t = -tau[j]
-                A[j,j] += t
+                a[j][j] += t
 
                 for k in xrange(j+1, p):
                     if cmplx:
-                        y = ctx.fsum(A[i,j] * ctx.conj(A[i,k]) for i in xrange(j+1, m))
+                        y = ctx.fsum(a[i][j] * ctx.conj(a[i][k]) for i in xrange(j+1, m))
                         temp = t * ctx.conj(y)
                     else:
-                        y = ctx.fsum(A[i,j] * A[i,k] for i in xrange(j+1, m))
+                        y = ctx.fsum(a[i][j] * a[i][k] for i in xrange(j+1, m))
                         temp = t * y
-                    A[j,k] = temp
+                    a[j][k] = temp
                     for i in xrange(j+1, m):
-                        A[i,k] += A[i,j] * temp
+                        a[i][k] += a[i][j] * temp
 
                 for i in xrange(j+1, m):
-                    A[i, j] *= t
+                    a[i][j] *= t
 
+            A._set_rows(a)
             return A, R[0:p,0:n]
 
         # ------------------
@@ -1,4 +1,5 @@
 from ..libmp.backend import xrange
+from ..libmp.libmatrix import matrix_mul_strassen
 
 # TODO: interpret list as vectors (for multiplication)
 
@@ -20,8 +21,10 @@ class _matrix(object):
     Creating matrices
     -----------------
 
-    Matrices in mpmath are implemented using dictionaries. Only non-zero values
-    are stored, so it is cheap to represent sparse matrices.
+    By default, matrices in mpmath are dense: the elements are stored as a
+    list of rows, which gives fast element and row access. Pass
+    ``sparse=True`` to store the elements in a dictionary instead. Then only
+    non-zero values are stored, so it is cheap to represent sparse matrices.
 
     The most basic way to create one is to use the ``matrix`` class directly.
     You can create an empty matrix specifying the dimensions:
@@ -230,7 +233,7 @@ class _matrix(object):
          ['1.5', '-0.5']])
         >>> A * A**-1
         matrix(
-        [['1.0', '1.0842021724855e-19'],
+        [['1.0', '0.0'],
          ['-2.16840434497101e-19', '1.0']])
 
     Matrix transposition is straightforward::
@@ -284,11 +287,16 @@ class _matrix(object):
     """
 
     def __init__(self, *args, **kwargs):
-        self.__data = {}
         # LU decompostion cache, this is useful when solving the same system
         # multiple times, when calculating the inverse and when calculating the
         # determinant
         self._LU = None
+        if isinstance(args[0], _matrix):
+            sparse = kwargs.get('sparse', args[0]._matrix__sparse)
+        else:
+            sparse = kwargs.get('sparse', False)
+        self.__sparse = bool(sparse)
+        self.__data = {}
         convert = kwargs.get('force_type', self.ctx.convert)
         if not convert:
             convert = lambda x: x
@@ -298,6 +306,7 @@ def __init__(self, *args, **kwargs):
                 A = args[0]
                 self.__rows = len(A)
                 self.__cols = len(A[0])
+                self.__init_data()
                 for i, row in enumerate(A):
                     for j, a in enumerate(row):
                         self[i, j] = convert(a)
@@ -306,6 +315,7 @@ def __init__(self, *args, **kwargs):
                 v = args[0]
                 self.__rows = len(v)
                 self.__cols = 1
+                self.__init_data()
                 for i, e in enumerate(v):
                     self[i, 0] = e
         elif isinstance(args[0], int):
@@ -317,8 +327,9 @@ def __init__(self, *args, **kwargs):
                     raise TypeError("expected int")
                 self.__rows = args[0]
                 self.__cols = args[1]
+            self.__init_data()
         elif isinstance(args[0], _matrix):
-            A = args[0].copy()
+            A = args[0].copy(sparse=self.__sparse)
             self.__data = A._matrix__data
             self.__rows = A._matrix__rows
             self.__cols = A._matrix__cols
@@ -326,13 +337,74 @@ def __init__(self, *args, **kwargs):
                 for j in xrange(A.__cols):
                     A[i,j] = convert(A[i,j])
         elif hasattr(args[0], 'tolist'):
-            A = self.ctx.matrix(args[0].tolist())
-            self.__data = A._matrix__data
-            self.__rows = A._matrix__rows
-            self.__cols = A._matrix__cols
+            # NumPy arrays, etc.; for arrays of object dtype the elements
+            # are taken over without being copied
+            A = args[0].tolist()
+            if not isinstance(A[0], list):
+                # interpret as column vector
+                A = [[a] for a in A]
+            if 'force_type' in kwargs:
+                A = [[convert(a) for a in row] for row in A]
+            self.__rows = len(A)
+            self.__cols = len(A[0])
+            self._set_rows(A)
         else:
             raise TypeError('could not interpret given arguments')
 
+    def __init_data(self):
+        # allocate empty storage for the current dimensions
+        if self.__sparse:
+            self.__data = {}
+        else:
+            zero = self.ctx.zero
+            self.__data = [[zero] * self.__cols for i in xrange(self.__rows)]
+
+    def __getsparse(self):
+        return self.__sparse
+
+    sparse = property(__getsparse,
+        doc='whether the elements are stored in a dictionary')
+
+    def _get_rows(self):
+        '''
+        Return the elements as a list of rows.
+            This function is for private use only because is unsafe:
+                1. For a dense matrix the rows are the internal storage and are
+                   returned by reference, so modifying them modifies the matrix
+                2. For a sparse matrix fresh lists are built, so modifications
+                   only take effect after calling _set_rows
+            Callers that modify the rows should always finish with _set_rows.
+        '''
+        if self.__sparse:
+            zero = self.ctx.zero
+            data = self.__data
+            return [[data.get((i, j), zero) for j in xrange(self.__cols)]
+                    for i in xrange(self.__rows)]
+        return self.__data
+
+    def _set_rows(self, rows):
+        '''
+        Replace all elements by the given list of rows.
+            The dimensions of the matrix must agree with the rows. Elements are
+            converted to the context type, so raw arithmetic results (including
+            Python ints) may be stored.
+        '''
+        convert = self.ctx.convert
+        if self.__sparse:
+            data = {}
+            for i, row in enumerate(rows):
+                for j, a in enumerate(row):
+                    a = convert(a)
+                    if a:
+                        data[i, j] = a
+            self.__data = data
+        else:
+            zero = self.ctx.zero
+            for row in rows:
+                row[:] = [convert(a) or zero for a in row]
+            self.__data = rows
+        self._LU = None
+
     def apply(self, f):
         """
         Return a copy of self with the function `f` applied elementwise.
@@ -397,6 +469,40 @@ def tolist(self):
         """
         return [[self[i,j] for j in range(self.__cols)] for i in range(self.__rows)]
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_LU'] = None
+        # Store the elements in the compact binary format of
+        # ctx.dumps if the context supports it
+        try:
+            state['_matrix__data'] = self.ctx.dumps(self)
+        except (AttributeError, TypeError):
+            pass
+        return state
+
+    def __setstate__(self, state):
+        data = state['_matrix__data']
+        if isinstance(data, bytes):
+            state['_matrix__data'] = self.ctx.loads(data)._matrix__data
+        self.__dict__.update(state)
+
+    def __array__(self, dtype=None, copy=None):
+        """
+        Convert the matrix to a two-dimensional NumPy array. By default,
+        the array has object dtype and refers to the elements of the
+        matrix, which are not copied.
+        """
+        import numpy
+        if copy is False:
+            raise ValueError("a matrix cannot be converted to an array "
+                "without copying")
+        A = numpy.empty((self.__rows, self.__cols), dtype=object)
+        for i, row in enumerate(self._get_rows()):
+            A[i,:] = row
+        if dtype is not None:
+            A = A.astype(dtype)
+        return A
+
     def __repr__(self):
         if self.ctx.pretty:
             return self.__str__()
@@ -411,6 +517,8 @@ def __get_element(self, key):
                 1. Does not check on the value of key it expects key to be a integer tuple (i,j)
                 2. Does not check bounds
         '''
+        if not self.__sparse:
+            return self.__data[key[0]][key[1]]
         if key in self.__data:
             return self.__data[key]
         else:
@@ -424,7 +532,10 @@ def __set_element(self, key, value):
                 2. Does not check bounds
                 3. Does not check the value type
         '''
-        if value: # only store non-zeros
+        if not self.__sparse:
+            # zeros are normalized as if they were not stored
+            self.__data[key[0]][key[1]] = value or self.ctx.zero
+        elif value: # only store non-zeros
             self.__data[key] = value
         elif key in self.__data:
             del self.__data[key]
@@ -477,7 +588,7 @@ def __getitem__(self, key):
                 columns = [key[1]]
 
             # Create matrix slice
-            m = self.ctx.matrix(len(rows),len(columns))
+            m = self.ctx.matrix(len(rows),len(columns),sparse=self.__sparse)
 
             # Assign elements to the output matrix
             for i,x in enumerate(rows):
@@ -490,6 +601,10 @@ def __getitem__(self, key):
             # single element extraction
             if key[0] >= self.__rows or key[1] >= self.__cols:
                 raise IndexError('matrix index out of range')
+            if not self.__sparse:
+                if key[0] < 0 or key[1] < 0:
+                    raise IndexError('matrix index out of range')
+                return self.__data[key[0]][key[1]]
             if key in self.__data:
                 return self.__data[key]
             else:
@@ -559,7 +674,11 @@ def __setitem__(self, key, value):
                 raise IndexError('matrix index out of range')
             # Convert and store value
             value = self.ctx.convert(value)
-            if value: # only store non-zeros
+            if not self.__sparse:
+                if key[0] < 0 or key[1] < 0:
+                    raise IndexError('matrix index out of range')
+                self.__data[key[0]][key[1]] = value or self.ctx.zero
+            elif value: # only store non-zeros
                 self.__data[key] = value
             elif key in self.__data:
                 del self.__data[key]
@@ -569,16 +688,24 @@ def __setitem__(self, key, value):
         return
 
     def __iter__(self):
+        if not self.__sparse:
+            for row in self.__data:
+                for a in row:
+                    yield a
+            return
         for i in xrange(self.__rows):
             for j in xrange(self.__cols):
                 yield self[i,j]
 
     def __mul__(self, other):
         if isinstance(other, self.ctx.matrix):
-            # dot multiplication  TODO: use Strassen's method?
+            # dot multiplication
             if self.__cols != other.__rows:
                 raise ValueError('dimensions not compatible for multiplication')
-            new = self.ctx.matrix(self.__rows, other.__cols)
+            if not (self.__sparse and other.__sparse):
+                # dense product using fast row access
+                return self.ctx.matmul(self, other)
+            new = self.ctx.matrix(self.__rows, other.__cols, sparse=True)
             for i in xrange(self.__rows):
                 for j in xrange(other.__cols):
                     new[i, j] = self.ctx.fdot((self[i,k], other[k,j])
@@ -669,8 +796,11 @@ def __rsub__(self, other):
         return -self + other
 
     def __eq__(self, other):
-        return self.__rows == other.__rows and self.__cols == other.__cols \
-               and self.__data == other.__data
+        if not (self.__rows == other.__rows and self.__cols == other.__cols):
+            return False
+        if self.__sparse == other.__sparse:
+            return self.__data == other.__data
+        return self._get_rows() == other._get_rows()
 
     def __len__(self):
         if self.rows == 1:
@@ -684,9 +814,15 @@ def __getrows(self):
         return self.__rows
 
     def __setrows(self, value):
-        for key in self.__data.copy():
-            if key[0] >= value:
-                del self.__data[key]
+        if not self.__sparse:
+            del self.__data[value:]
+            zero = self.ctx.zero
+            for i in xrange(self.__rows, value):
+                self.__data.append([zero] * self.__cols)
+        else:
+            for key in self.__data.copy():
+                if key[0] >= value:
+                    del self.__data[key]
         self.__rows = value
 
     rows = property(__getrows, __setrows, doc='number of rows')
@@ -695,15 +831,25 @@ def __getcols(self):
         return self.__cols
 
     def __setcols(self, value):
-        for key in self.__data.copy():
-            if key[1] >= value:
-                del self.__data[key]
+        if not self.__sparse:
+            zero = self.ctx.zero
+            for row in self.__data:
+                del row[value:]
+                row.extend([zero] * (value - self.__cols))
+        else:
+            for key in self.__data.copy():
+                if key[1] >= value:
+                    del self.__data[key]
         self.__cols = value
 
     cols = property(__getcols, __setcols, doc='number of columns')
 
     def transpose(self):
-        new = self.ctx.matrix(self.__cols, self.__rows)
+        new = self.ctx.matrix(self.__cols, self.__rows, sparse=self.__sparse)
+        if not self.__sparse:
+            if self.__rows:
+                new.__data = [list(col) for col in zip(*self.__data)]
+            return new
         for i in xrange(self.__rows):
             for j in xrange(self.__cols):
                 new[j,i] = self[i,j]
@@ -719,9 +865,21 @@ def transpose_conj(self):
 
     H = property(transpose_conj)
 
-    def copy(self):
-        new = self.ctx.matrix(self.__rows, self.__cols)
-        new.__data = self.__data.copy()
+    def copy(self, sparse=None):
+        """
+        Return a copy of self. Use ``sparse`` to change the storage format
+        of the copy; by default it is the same as for self.
+        """
+        if sparse is None:
+            sparse = self.__sparse
+        new = self.ctx.matrix(self.__rows, self.__cols, sparse=sparse)
+        if sparse == self.__sparse:
+            if sparse:
+                new.__data = self.__data.copy()
+            else:
+                new.__data = [row[:] for row in self.__data]
+        else:
+            new._set_rows([row[:] for row in self._get_rows()])
         return new
 
     __copy__ = copy
@@ -740,6 +898,67 @@ def __init__(ctx):
         ctx.matrix.ctx = ctx
         ctx.matrix.convert = ctx.convert
 
+    def _mul_rows(ctx, A, B, method='auto'):
+        """
+        Multiply two matrices given as lists of rows and return the
+        product as a list of rows. The 'kronecker' method needs
+        fixed-point arithmetic and falls back to dot products here.
+        """
+        if method == 'strassen':
+            return matrix_mul_strassen(A, B, ctx._mul_rows)
+        fdot = ctx.fdot
+        cols = list(zip(*B))
+        return [[fdot(zip(row, col)) for col in cols] for row in A]
+
+    def matmul(ctx, A, B, method='auto'):
+        """
+        Computes the matrix product `AB`, using one of the following
+        methods:
+
+        * ``'naive'`` - one dot product per entry
+        * ``'strassen'`` - the Strassen-Winograd algorithm, which replaces
+          8 block products by 7 at the cost of extra additions
+        * ``'kronecker'`` - Kronecker substitution, packing a row of `A`
+          and all of `B` into big integers so that a row of the product
+          is obtained from a single integer multiplication
+        * ``'auto'`` - choose automatically based on the size and the
+          working precision (the default, also used by ``A * B``)
+
+        With the multiprecision context, all methods work on exact
+        fixed-point representations of the matrices and round each entry
+        of the product once, so they give identical results. At high
+        precision, where a multiplication is much more expensive than an
+        addition, the Strassen-Winograd algorithm is faster.
+        In other contexts, Strassen-Winograd uses ordinary arithmetic and
+        Kronecker substitution is not available.
+
+        >>> from mpmath import mp, matmul, matrix, randmatrix, mnorm
+        >>> mp.dps = 15; mp.pretty = False
+        >>> A = matrix([[1, 2], [3, 4]])
+        >>> matmul(A, A)
+        matrix(
+        [['7.0', '10.0'],
+         ['15.0', '22.0']])
+        >>> mp.dps = 300
+        >>> A = randmatrix(20); B = randmatrix(20)
+        >>> matmul(A, B, method='strassen') == matmul(A, B, method='naive')
+        True
+        >>> mp.dps = 15
+
+        """
+        if method not in ('auto', 'naive', 'strassen', 'kronecker'):
+            raise ValueError("unknown matrix multiplication method: %r" %
+                method)
+        if not isinstance(A, ctx.matrix):
+            A = ctx.matrix(A)
+        if not isinstance(B, ctx.matrix):
+            B = ctx.matrix(B)
+        if A.cols != B.rows:
+            raise ValueError('dimensions not compatible for multiplication')
+        C = ctx.matrix(A.rows, B.cols)
+        C._set_rows(ctx._mul_rows(A._get_rows(), B._get_rows(), method))
+        return C
+
     def eye(ctx, n, **kwargs):
         """
         Create square identity matrix n x n.
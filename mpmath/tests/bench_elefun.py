@@ -0,0 +1,70 @@
+"""
+Benchmark for the bit-burst algorithm used by exp, cos and sin at very
+high precision.
+
+For each working precision, exp_bitburst and cos_sin_bitburst are timed
+against the Taylor series with argument reduction (exponential_series)
+that is used at lower precision, and the speedup is reported together
+with the method chosen by exp_basecase and cos_sin_basecase. The results
+of both methods are also checked to agree.
+
+Run with:
+
+    python bench_elefun.py [-nogmpy] [prec1 prec2 ...]
+
+The crossovers depend on the integer backend (gmpy or pure Python),
+which is why the cutoffs EXP_BITBURST_CUTOFF and COS_SIN_BITBURST_CUTOFF
+in mpmath.libmp.libelefun depend on it as well.
+"""
+
+import sys, os
+from timeit import default_timer as clock
+
+if "-nogmpy" in sys.argv:
+    sys.argv.remove('-nogmpy')
+    os.environ['MPMATH_NOGMPY'] = 'Y'
+
+from mpmath.libmp import libelefun
+from mpmath.libmp.libelefun import exp_bitburst, cos_sin_bitburst, \
+    exponential_series
+from mpmath.libmp.backend import BACKEND, MPZ
+
+def timing(f, *args):
+    best = None
+    for i in range(3):
+        t1 = clock()
+        f(*args)
+        t2 = clock()
+        if best is None or t2-t1 < best:
+            best = t2-t1
+        if t2-t1 > 1:
+            break
+    return best
+
+def bench(prec):
+    # a fixed-point number in [0, 1) with all bits nonzero
+    x = (MPZ(1) << prec) // 3 + (MPZ(1) << (prec//2)) // 7
+    print("prec = %i" % prec)
+    print("%10s%12s%12s%10s%10s" % ("", "series", "bit-burst", "speedup",
+        "auto"))
+    a = exponential_series(x, prec, 0)
+    b = exp_bitburst(x, prec)
+    assert abs(a-b) < 1000
+    t1 = timing(exponential_series, x, prec, 0)
+    t2 = timing(exp_bitburst, x, prec)
+    auto = ["series", "bit-burst"][prec > libelefun.EXP_BITBURST_CUTOFF]
+    print("%10s%12.5f%12.5f%10.2f%10s" % ("exp", t1, t2, t1/t2, auto))
+    a = exponential_series(x, prec, 2)
+    b = cos_sin_bitburst(x, prec)
+    assert abs(a[0]-b[0]) < 1000 and abs(a[1]-b[1]) < 1000
+    t1 = timing(exponential_series, x, prec, 2)
+    t2 = timing(cos_sin_bitburst, x, prec)
+    auto = ["series", "bit-burst"][prec > libelefun.COS_SIN_BITBURST_CUTOFF]
+    print("%10s%12.5f%12.5f%10.2f%10s" % ("cos_sin", t1, t2, t1/t2, auto))
+    print("")
+
+if __name__ == '__main__':
+    precs = [int(a) for a in sys.argv[1:]] or [10**4, 10**5, 10**6]
+    print("backend: %s" % BACKEND)
+    for prec in precs:
+        bench(prec)
@@ -0,0 +1,71 @@
+"""
+Benchmark for the matrix multiplication methods of matmul().
+
+For each working precision, the methods 'naive', 'strassen' and
+'kronecker' are timed on random square matrices of increasing size,
+and the smallest size at which each method beats the naive method is
+reported together with the method chosen by method='auto'. The results
+of all methods are also checked to agree exactly.
+
+Run with:
+
+    python bench_matmul.py [-nogmpy] [prec1 prec2 ...]
+
+The crossovers depend on the integer backend (gmpy or pure Python),
+which is why the tuning parameters in mpmath.libmp.libmatrix depend on
+it as well.
+"""
+
+import sys, os
+from timeit import default_timer as clock
+
+if "-nogmpy" in sys.argv:
+    sys.argv.remove('-nogmpy')
+    os.environ['MPMATH_NOGMPY'] = 'Y'
+
+from mpmath import mp, randmatrix, matmul
+from mpmath.libmp import matrix_mul_method
+from mpmath.libmp.backend import BACKEND
+
+METHODS = ['naive', 'strassen', 'kronecker']
+SIZES = [4, 8, 16, 32, 64]
+
+def timing(f, *args):
+    best = None
+    for i in range(3):
+        t1 = clock()
+        f(*args)
+        t2 = clock()
+        if best is None or t2-t1 < best:
+            best = t2-t1
+        if t2-t1 > 1:
+            break
+    return best
+
+def bench(prec, sizes=SIZES):
+    mp.prec = prec
+    crossover = {}
+    print("prec = %i" % prec)
+    print("%6s" % "n" + "".join("%12s" % m for m in METHODS) + "%12s" % "auto")
+    for n in sizes:
+        A = randmatrix(n)
+        B = randmatrix(n)
+        C = matmul(A, B, 'naive')
+        times = {}
+        for method in METHODS:
+            assert matmul(A, B, method) == C
+            times[method] = timing(matmul, A, B, method)
+            if method not in crossover and times[method] < times['naive']:
+                crossover[method] = n
+        print("%6i" % n + "".join("%12.5f" % times[m] for m in METHODS) +
+            "%12s" % matrix_mul_method(n, n, n, prec))
+    for method in METHODS[1:]:
+        print("%s faster than naive from n = %s" % (method,
+            crossover.get(method, "(none)")))
+    print("")
+
+if __name__ == '__main__':
+    precs = [int(a) for a in sys.argv[1:]] or [53, 300, 1000, 4000, 16000]
+    print("backend: %s" % BACKEND)
+    for prec in precs:
+        bench(prec)
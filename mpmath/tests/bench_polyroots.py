@@ -0,0 +1,75 @@
+"""
+Benchmark for polyroots() with the Aberth-Ehrlich and Durand-Kerner
+methods.
+
+For each working precision and degree, all roots of a polynomial with
+pseudorandom complex coefficients are computed with both methods, and
+the maximum of the error estimates returned by polyroots() is reported.
+Since the Durand-Kerner method takes time cubic in the degree, it is
+only run up to the degree given by -dkmax (default 100).
+
+Run with:
+
+    python bench_polyroots.py [-nogmpy] [-dkmax N] [-workers N] [dps1 dps2 ...]
+"""
+
+import sys, os, random
+from timeit import default_timer as clock
+
+if "-nogmpy" in sys.argv:
+    sys.argv.remove('-nogmpy')
+    os.environ['MPMATH_NOGMPY'] = 'Y'
+
+def option(name, default):
+    if name in sys.argv:
+        i = sys.argv.index(name)
+        value = int(sys.argv[i+1])
+        del sys.argv[i:i+2]
+        return value
+    return default
+
+DKMAX = option('-dkmax', 100)
+WORKERS = option('-workers', 0)
+
+from mpmath import mp, mpc, polyroots
+from mpmath.libmp.backend import BACKEND
+
+DEGREES = [10, 20, 50, 100, 200, 500, 1000]
+
+def coefficients(n):
+    rnd = random.Random(n)
+    return [mpc(rnd.gauss(0, 1), rnd.gauss(0, 1)) for k in range(n+1)]
+
+def run(p, **kwargs):
+    t1 = clock()
+    try:
+        roots, err = polyroots(p, error=True, maxsteps=500, **kwargs)
+    except mp.NoConvergence:
+        return clock()-t1, None
+    return clock()-t1, err
+
+def bench(dps):
+    mp.dps = dps
+    print("dps = %i" % dps)
+    print("%8s %12s %10s %12s %10s %8s" % \
+        ("degree", "d-k", "err", "aberth", "err", "speedup"))
+    for n in DEGREES:
+        p = coefficients(n)
+        if WORKERS:
+            ta, ea = run(p, workers=WORKERS)
+        else:
+            ta, ea = run(p)
+        if n <= DKMAX:
+            td, ed = run(p, method='durand-kerner')
+            print("%8i %12.4f %10s %12.4f %10s %8.2f" % (n, td,
+                mp.nstr(ed, 2), ta, mp.nstr(ea, 2), td/ta))
+        else:
+            print("%8i %12s %10s %12.4f %10s %8s" % (n, "-", "-", ta,
+                mp.nstr(ea, 2), "-"))
+    print("")
+
+if __name__ == '__main__':
+    print("backend: %s" % BACKEND)
+    dpss = [int(p) for p in sys.argv[1:]] or [15, 50]
+    for dps in dpss:
+        bench(dps)
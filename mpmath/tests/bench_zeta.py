@@ -0,0 +1,53 @@
+"""
+Benchmark for zeta_batch() against pointwise evaluation of zeta(s, a).
+
+For each working precision, the Hurwitz zeta function and its first
+derivatives are evaluated on a grid of s values for a few fixed values
+of a, once with zeta_batch() and once with zeta() at each point, and
+the maximum relative difference between the results is reported.
+
+Run with:
+
+    python bench_zeta.py [-nogmpy] [dps1 dps2 ...]
+"""
+
+import sys, os
+from timeit import default_timer as clock
+
+if "-nogmpy" in sys.argv:
+    sys.argv.remove('-nogmpy')
+    os.environ['MPMATH_NOGMPY'] = 'Y'
+
+from mpmath import mp, mpf, mpc, zeta, zeta_batch
+from mpmath.libmp.backend import BACKEND
+
+COUNT = 50
+
+def grids():
+    yield "real", [mpf(1.5) + mpf(k)/COUNT for k in range(COUNT)]
+    yield "complex", [mpc(0.5, 10+k) for k in range(COUNT)]
+
+def bench(dps):
+    mp.dps = dps
+    print("dps = %i" % dps)
+    print("%8s %8s %10s %12s %12s %8s %10s" % \
+        ("grid", "a", "derivs", "pointwise", "batch", "speedup", "maxerr"))
+    for a in [3, mpf(1)/3]:
+        for name, ss in grids():
+            for ds in [[0], [0, 1, 2]]:
+                t1 = clock()
+                ref = [[zeta(s, a, d) for d in ds] for s in ss]
+                t2 = clock()
+                val = zeta_batch(ss, a, ds)
+                t3 = clock()
+                err = max(abs(x-y)/abs(y) for (u, v) in zip(val, ref)
+                    for (x, y) in zip(u, v))
+                print("%8s %8s %10s %12.4f %12.4f %8.2f %10.1e" % (name,
+                    mp.nstr(a, 3), ds, t2-t1, t3-t2, (t2-t1)/(t3-t2), err))
+    print("")
+
+if __name__ == '__main__':
+    print("backend: %s" % BACKEND)
+    dpss = [int(p) for p in sys.argv[1:]] or [15, 50]
+    for dps in dpss:
+        bench(dps)
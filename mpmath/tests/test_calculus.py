@@ -1,3 +1,4 @@
+import random
 from mpmath import *
 
 def test_approximation():
@@ -23,6 +24,145 @@ def test_polyval():
     assert polyval(p,4) == 253
     assert polyval(p,4,derivative=True) == (253, 190)
 
+def test_polyval_multi():
+    mp.dps = 15
+    assert polyval_multi([], [1, 2]) == [0, 0]
+    assert polyval_multi([4, 0, -2, 5], [4, 0]) == [253, 5]
+    assert polyval_multi([4, 0, -2, 5], [4, 0], derivative=True) == \
+        [(253, 190), (5, -2)]
+    assert polyval_multi([1j, 2], [3, 1+1j]) == [2+3j, 1+1j]
+    assert polyval_multi([0, 0], [1, 2j]) == [0, 0]
+    assert polyval_multi([fp.inf, 1], [2]) == [inf]
+    # other contexts evaluate with polyval
+    assert iv.polyval_multi([1, 2, 3], [1, 2]) == \
+        [iv.polyval([1, 2, 3], 1), iv.polyval([1, 2, 3], 2)]
+    assert iv.polyval_multi([1, 2, 3], [iv.mpf([1, 2])], derivative=True) == \
+        [iv.polyval([1, 2, 3], iv.mpf([1, 2]), derivative=True)]
+    assert fp.polyval_multi([1, 2, 3], [1, 2j]) == [6, -1+4j]
+    # derivative terms much smaller than the terms of the value
+    p, d = polyval_multi([mpf('1e-30'), 1], [2], derivative=True)[0]
+    assert p == 1 and abs(d - 1e-30) < 1e-44
+    p, d = polyval_multi([1, 0, 1e20], [1e-3], derivative=True)[0]
+    assert p.ae(1e20) and d.ae(0.002)
+    p, d = polyval_multi([mpc(0, 1e-30), 1], [1j], derivative=True)[0]
+    assert p == 1 and abs(d - 1e-30j) < 1e-44
+    mp.dps = 30
+    c = [mpf(k**3-7*k+1)/(k+21)*2**(5*k-50) for k in range(-20, 21)]
+    cc = [x*mpc(1, k) for k, x in enumerate(c)]
+    xs = [mpf(10)**k/3 for k in range(-10, 3)] + [-mpf(1)/7, 0]
+    random.seed(2)
+    r = [mpf(random.uniform(-1, 1))*10**random.randint(-40, 40)
+        for k in range(30)]
+    pts = [mpf(random.uniform(-1, 1))*10**random.randint(-8, 8)
+        for k in range(10)]
+    for coeffs, pts in [(c, xs), (cc, xs), (c, [x*(1+2j) for x in xs]),
+        (r[:8], pts), (r[8:], pts), (r[::-3], pts)]:
+        for (x, (p, d)) in zip(pts, polyval_multi(coeffs, pts, True)):
+            with extraprec(100):
+                v, w = polyval(coeffs, x, True)
+                s = sum(abs(a*x**k) for k, a in enumerate(coeffs[::-1]))
+                t = sum(abs(k*a*x**(k-1))
+                    for k, a in enumerate(coeffs[::-1]) if k)
+            assert abs(p-v) <= 2*eps*s
+            assert abs(d-w) <= 2*eps*t
+
+def test_polyinterp():
+    mp.dps = 15
+    assert polyinterp([], []) == []
+    assert polyinterp([2], [3]) == [3]
+    assert polyinterp([1, 2, 3], [2, 3, 6]) == [1, -2, 3]
+    c = polyinterp([1, -1, 2j, 3], [1+1j, 4, 1, 0])
+    assert all(abs(v-w) < 1e-14 for v, w in
+        zip(polyval_multi(c, [1, -1, 2j, 3]), [1+1j, 4, 1, 0]))
+    mp.dps = 40
+    c = [mpf(k)/7 - 2 for k in range(15)]
+    xs = [mpf(k)/5 - 1 for k in range(15)]
+    d = polyinterp(xs, polyval_multi(c, xs))
+    assert max(abs(a-b) for (a, b) in zip(c, d)) < 1e-25
+    assert fp.polyinterp([1, 2, 3], [2, 3, 6]) == [1, -2, 3]
+    mp.dps = 15
+    try:
+        polyinterp([1, 2, 1], [1, 2, 3])
+        assert False
+    except ValueError:
+        pass
+
+def test_polymul():
+    mp.dps = 15
+    assert polymul([], [1, 2]) == []
+    assert polymul([1, 2], [1, -2]) == [1, 0, -4]
+    assert polymul([1]*20, [1, -1]) == [1] + [0]*19 + [-1]
+    assert fp.polymul([1, 2], [3]) == [3, 6]
+    mp.dps = 30
+    p = [mpf(k)/3 - 5 for k in range(40)]
+    q = [mpc(k, 1)/7 for k in range(30)]
+    r = polymul(p, q)
+    assert len(r) == 69
+    for x in [mpf('0.5'), mpc(-1, 0.25)]:
+        assert abs(polyval(r, x) - polyval(p, x)*polyval(q, x)) < 1e-25
+    # coefficients of very different magnitude
+    p = [ldexp(1, -40*k) for k in range(20)]
+    r = polymul(p, p)
+    assert all(r[k] == (k+1)*ldexp(1, -40*k) for k in range(20))
+    mp.dps = 15
+
+def test_polydiv():
+    mp.dps = 15
+    assert polydiv([1, 0, 0, -1], [1, -1]) == ([1, 1, 1], [0])
+    assert polydiv([1, 2, 3, 4, 5], [2, 0, 1]) == ([0.5, 1, 1.25], [3, 3.75])
+    assert polydiv([1, 2], [1, 0, 0]) == ([], [1, 2])
+    assert fp.polydiv([1, 2, 3, 4, 5], [2, 0, 1]) == \
+        ([0.5, 1, 1.25], [3, 3.75])
+    try:
+        polydiv([1, 2], [0, 1])
+        assert False
+    except ZeroDivisionError:
+        pass
+    mp.dps = 30
+    p = [mpf(k)/3 - 5 for k in range(40)]
+    q = [mpc(k, 1)/7 + 1 for k in range(12)]
+    s, r = polydiv(p, q)
+    assert len(s) == 29 and len(r) == 11
+    x = mpf('0.75')
+    assert polyval(p, x).ae(polyval(q, x)*polyval(s, x) + polyval(r, x))
+    mp.dps = 15
+    # the inverse series of the divisor decays geometrically
+    for c in [mpf('1e-7'), mpc(0, '1e-7')]:
+        s, r = polydiv([1]*30, [1, c])
+        t = []
+        u = [mpf(1)]*30
+        for k in range(29):
+            t.append(u[k])
+            u[k+1] -= c*u[k]
+        assert all(x.ae(y, rel_eps=1e-14, abs_eps=0) for (x, y) in zip(s, t))
+        assert r[0].ae(u[29])
+
+def test_polycompose():
+    mp.dps = 15
+    assert polycompose([], [1, 2]) == []
+    assert polycompose([1, 0, 1], [1, 1]) == [1, 2, 2]
+    assert polycompose([3, 2], []) == [2]
+    assert fp.polycompose([1, 0, 1], [1, 1]) == [1, 2, 2]
+    mp.dps = 30
+    p = [mpf(k)/3 - 5 for k in range(21)]
+    q = [mpf(1)/(k+2) for k in range(4)]
+    r = polycompose(p, q)
+    assert len(r) == 61
+    x = mpf('-0.625')
+    assert polyval(r, x).ae(polyval(p, polyval(q, x)))
+    mp.dps = 15
+
+def test_forward_differences():
+    from mpmath.libmp import mpf_forward_differences
+    mp.dps = 15
+    xs = [mpf(k)**3/8 + 1 for k in range(6)] + [mpf(1)/3]
+    d = [mpf(v) for v in mpf_forward_differences([x._mpf_ for x in xs], mp.prec, 'n')]
+    assert d[:6] == [1, 0.125, 0.75, 0.75, 0, 0]
+    with workprec(200):
+        s = fsum((-1)**(6-i) * binomial(6, i) * xs[i] for i in range(7))
+    assert d[6] == +s
+    assert mpf_forward_differences([], 53) == []
+
 def test_polyroots():
     p = polyroots([1,-4])
     assert p[0].ae(4)
@@ -96,6 +236,53 @@ def test_polyroots_legendre():
             '0.813', '0.841', '0.866', '0.889', '0.911', '0.93', '0.946',
             '0.961', '0.973', '0.983', '0.991', '0.996', '0.999']
 
+def test_polyroots_aberth():
+    mp.dps = 15
+    # roots of very different magnitudes, and exact zero roots
+    p = [1, -1001001, 1001001000, -1000000000, 0, 0]
+    for method in ['aberth', 'durand-kerner']:
+        roots = polyroots(p, method=method, maxsteps=100)
+        assert roots[:2] == [0, 0]
+        assert roots[2].ae(1) and roots[3].ae(1000) and roots[4].ae(10**6)
+    mp.dps = 50
+    p = [mpc(k**2+1, 3*k-7) for k in range(41)]
+    roots, err = polyroots(p, error=True, cleanup=False)
+    assert len(roots) == 40 and err < 10**-49
+    for r in roots:
+        v, d = polyval(p, r, derivative=True)
+        assert abs(v/d) < 10**-49
+    r2 = polyroots(p, method='durand-kerner', maxsteps=200, cleanup=False)
+    assert all(x.ae(y) for (x, y) in zip(roots, r2))
+    from multiprocessing import Pool
+    pool = Pool(2)
+    try:
+        assert all(x.ae(y) for (x, y) in
+            zip(polyroots(p, executor=pool), polyroots(p)))
+    finally:
+        pool.close()
+    mp.dps = 15
+    # the error estimate must cover the error of multiple roots
+    for p, r in [([1, -2, 1], 1), ([1, -3, 3, -1], 1), ([1, 4, 6, 4, 1], -1),
+                 ([1, -2j, -1], 1j)]:
+        roots, err = polyroots(p, error=True)
+        assert max(abs(x - r) for x in roots) <= err < 10**-3
+    roots, err = polyroots([1, -3, 2], error=True)
+    assert err < 10**-15
+    # roots far from 1, also beyond the range of the double phase
+    for p, r in [([1, -mpf('1e400')], mpf('1e400')), ([1, 1e300, 1], -1e300),
+                 ([1, 1e200, 1], -1e200)]:
+        roots, err = polyroots(p, error=True)
+        x = roots[0]
+        assert x.ae(r) and abs(x - r) <= err < abs(r)*10**-14
+    roots = polyroots([mpf('1e-300'), 1, 1e300])
+    assert roots[0].ae(1e300*(-1-sqrt(3)*j)/2)
+    assert roots[1].ae(1e300*(-1+sqrt(3)*j)/2)
+    try:
+        polyroots([1, 2, 3], method='foo')
+        assert False
+    except ValueError:
+        pass
+
 def test_pade():
     one = mpf(1)
     mp.dps = 20
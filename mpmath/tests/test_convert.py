@@ -90,6 +90,64 @@ def test_str_bugs():
     assert str(mpf('1e600')) == '1.0e+600'
     assert str(mpf('1e10000')) == '1.0e+10000'
 
+def test_str_huge():
+    from mpmath.libmp import libintmath
+    class Writer(list):
+        write = list.append
+        def getvalue(self):
+            return "".join(self)
+    random.seed(1)
+    orig = libintmath.RADIX_RECIPROCAL_BITS
+    try:
+        for i in range(20):
+            n = random.getrandbits(random.randint(0, 60000))
+            size = random.randint(0, 20000)
+            # Plain long division vs multiplication by reciprocals
+            libintmath.RADIX_RECIPROCAL_BITS = None
+            s = libintmath.numeral_python(n, 10, size)
+            assert s[-100:].lstrip('0') == str(n % 10**100).lstrip('0')
+            libintmath.radix_power_cache.clear()
+            libintmath.RADIX_RECIPROCAL_BITS = 200
+            assert libintmath.numeral_python(n, 10, size) == s
+            assert libintmath.parse_numeral_python(s) == n
+            assert libintmath.parse_numeral_python('-' + s) == -n
+            assert parse_numeral(s) == n
+            f = Writer()
+            write_numeral(f, n, 10, size)
+            assert f.getvalue() == numeral(n, 10, size)
+            f = Writer()
+            write_numeral(f, n, 10, size, width=30000)
+            assert f.getvalue() == numeral(n, 10, size).rjust(30000, '0')
+    finally:
+        libintmath.RADIX_RECIPROCAL_BITS = orig
+    # the size defaults to 0 but the digits are still written in chunks
+    n = MPZ(7)**120000
+    f = Writer()
+    write_numeral(f, n)
+    assert len(f) > 8 and max(len(s) for s in f) <= 10000
+    assert f.getvalue() == numeral(n)
+    # Longer than Python's limit for integer string conversion
+    mp.dps = 6000
+    try:
+        s = '0.' + '3'*6000
+        x = mpf(s + '3'*20)
+        assert x == mpf(1)/3
+        assert str(x) == s
+        assert str(mpf('0.' + '9'*6010)) == '1.0'
+        x = mpf(1)/7
+        assert eval(repr(x)) == x
+    finally:
+        mp.dps = 15
+    # conversions at ordinary precisions do not use the cache
+    libintmath.radix_power_cache.clear()
+    try:
+        for mp.dps in [15, 30, 100]:
+            assert mpf(str(+pi)).ae(pi)
+            assert mpf('1.25e-300') == mpf(125)/10**302
+    finally:
+        mp.dps = 15
+    assert len(libintmath.radix_power_cache) == 0
+
 def test_str_prec0():
     assert to_str(from_float(1.234), 0) == '.0e+0'
     assert to_str(from_float(1e-15), 0) == '.0e-15'
@@ -23,10 +23,84 @@ def test_diffs():
     assert [chop(d) for d in diffs(sin, 0, 2)] == [0, 1, 0]
     assert [chop(d) for d in diffs(sin, 0, 2, method='quad')] == [0, 1, 0]
 
+def test_diffs_prod_exp():
+    mp.dps = 15
+    u = diffs_prod([diffs(exp, 1), diffs(cos, 1), diffs(sin, 1)])
+    v = diffs(lambda x: exp(x)*cos(x)*sin(x), 1)
+    for k in range(6):
+        assert next(u).ae(next(v))
+    # high orders: exp(x)*exp(2x) and exp(exp(x)) at 0
+    def expdiffs(a):
+        d = mpf(1)
+        while 1:
+            yield d
+            d *= a
+    u = diffs_prod([expdiffs(1), expdiffs(2)])
+    assert all(next(u).ae(3**k) for k in range(80))
+    u = diffs_exp(expdiffs(1))
+    d = [next(u) for k in range(60)]
+    assert all(d[k].ae(e*bell(k)) for k in range(60))
+    # exact derivatives and intervals stay exact
+    u = diffs_prod([iter([1, 2, 3, 4, 5]), iter([3, 1, 4, 1, 5]),
+        iter([2, 7, 1, 8, 2])])
+    assert [next(u) for k in range(5)] == [6, 35, 135, 494, 1852]
+    u = iv.diffs_prod([(iv.mpf(x) for x in [1, 2, 3, 4, 5]),
+        (iv.mpf(x) for x in [3, 1, 4, 1, 5]),
+        (iv.mpf(x) for x in [2, 7, 1, 8, 2])])
+    for c in [6, 35, 135, 494, 1852]:
+        d = next(u)
+        assert d.a == d.b == c
+
 def test_taylor():
     mp.dps = 15
     # Easy to test since the coefficients are exact in floating-point
     assert taylor(sqrt, 1, 4) == [1, 0.5, -0.125, 0.0625, -0.0390625]
+    assert taylor(sqrt, 1, 4, method='step') == \
+        [1, 0.5, -0.125, 0.0625, -0.0390625]
+    assert taylor(lambda x: quad(exp, [0, x]), 0, 3)[3].ae(mpf(1)/6)
+    assert fp.taylor(fp.sin, 0, 1)[1] == 1
+    # jets are only used when asked for
+    f = lambda x: exp(x) if isinstance(x, mpf) else mpf(0)
+    assert taylor(f, 2, 4)[4].ae(exp(2)/24)
+    assert taylor(lambda x: mpf(str(x))**2, 3, 2) == [9, 6, 1]
+    assert taylor(lambda x: findroot(lambda y: y**3-x, 1), 8, 1)[1].ae(mpf(1)/12)
+
+def test_diff_ad():
+    mp.dps = 30
+    fs = [exp, ln, sqrt, cbrt, sin, cos, tan, sinh, cosh, tanh, atan, asin,
+        acos, asinh, atanh, sinpi, cospi, expj, expjpi, gamma, loggamma,
+        digamma, factorial, lambda x: x**2.5, lambda x: 3**x,
+        lambda x: x**x, lambda x: 1/(1+x**3), lambda x: abs(x-1),
+        cot, sec, csc, coth, sech, csch, acot, asec, acsc, acoth, asech, acsch,
+        lambda x: root(x, 3), lambda x: root(x, 3, 1), lambda x: power(x, 2),
+        lambda x: power(2, x), lambda x: power(x, x)]
+    for x in [mpf('0.3'), mpc('0.3', '0.2')]:
+        for f in fs:
+            a = taylor(f, x, 6, method='ad')
+            b = taylor(f, x, 6, method='step')
+            assert max(abs(u-v) for (u, v) in zip(a, b)) < 1e-20
+    assert taylor(acosh, 2, 4, method='ad')[4].ae(taylor(acosh, 2, 4,
+        method='step')[4])
+    f = lambda x: exp(x**2)
+    assert diff(f, 0.5, 20, method='ad').ae(diff(f, 0.5, 20))
+    d = list(diffs(f, 0.5, 20, method='ad'))
+    assert len(d) == 21 and d[20].ae(diff(f, 0.5, 20))
+    g = diffs(f, 0.5, method='ad')
+    assert [next(g) for k in range(30)][29].ae(diff(f, 0.5, 29))
+    assert diff(lambda x: 3, 1, 2, method='ad') == 0
+    # degree 40 uses polymul for the products
+    c = taylor(lambda x: 1/(1-x)**2, 0, 40, method='ad')
+    assert all(c[k].ae(k+1) for k in range(41))
+    x = jet([2, 1, 0, 0])
+    assert x**3 == jet([8, 12, 6, 1])
+    assert (x - x) == 0 and not (x - x)
+    assert x > 1 and x < 3
+    try:
+        diff(lambda x: floor(x), 0.5, 1, method='ad')
+        assert False
+    except NotImplementedError:
+        pass
+    mp.dps = 15
 
 def test_diff_partial():
     mp.dps = 15
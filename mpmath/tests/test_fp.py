@@ -1669,3 +1669,22 @@ def test_fp_stress_ei_e1():
     assert ae(v, (-9.9960598637998647276e+135 + 2.6855081527595608863e+136j), tol=ATOL)
     assert ae(v.real, -9.9960598637998647276e+135, tol=PTOL)
     assert ae(v.imag, 2.6855081527595608863e+136, tol=PTOL)
+
+def test_fp_vectorize_numpy():
+    try:
+        import numpy
+    except ImportError:
+        return
+    x = numpy.array([0.5, 1.0, 5.0])
+    y = fp.vectorize(fp.gamma)(x)
+    assert y.dtype == numpy.float64
+    assert list(y) == [fp.gamma(t) for t in x]
+    y = fp.vectorize(fp.sqrt)(numpy.array([-4.0, 4.0]))
+    assert y.dtype == numpy.complex128 and list(y) == [2j, 2]
+    y = fp.vectorize(fp.zeta)(numpy.array([2.0, 3.0]), numpy.array([[1.0], [2.0]]))
+    assert y.shape == (2, 2) and y[1,0] == fp.zeta(2, 2)
+    assert list(fp.vectorize(fp.erf)(x)) == [fp.erf(t) for t in x]
+    assert list(fp.vectorize(fp.ei)(x)) == [fp.ei(t) for t in x]
+    from mpmath import mp
+    y = mp.vectorize(mp.exp)(numpy.array([1, 2]))
+    assert y.dtype == object and list(y) == [mp.exp(1), mp.exp(2)]
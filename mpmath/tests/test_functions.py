@@ -64,6 +64,69 @@ def test_constants():
     assert pi > 3
     assert pi < 4
 
+def test_constants_binary_splitting():
+    from mpmath.libmp import libelefun, gammazeta
+    prec = 400
+    P, Q, T = gammazeta.bs_catalan(1, prec//2+10)
+    assert mpf(tcatalan) == mpf(from_man_exp((T << (prec-6)) // Q, -prec, 53))
+    P, Q, T = gammazeta.bs_apery(0, prec//10+10)
+    assert mpf(tapery) == mpf(from_man_exp((T << (prec-6)) // Q, -prec, 53))
+    cases = [(libelefun.bs_chudnovsky, libelefun.bs_chudnovsky_merge,
+              (), (0, False), 0, 50),
+             (libelefun.bspe, libelefun.bspe_merge, (), (), 0, 200),
+             (libelefun.bsp_acot, libelefun.bsp_acot_merge,
+              (MPZ(26),), (True,), 0, 100),
+             (gammazeta.bs_catalan, gammazeta.bs_pqt_merge, (), (), 1, 300),
+             (gammazeta.bs_apery, gammazeta.bs_pqt_merge, (), (), 0, 100)]
+    serial = [libelefun.bs_parallel(bs, merge, a, b, 1000, before, after) \
+        for bs, merge, before, after, a, b in cases]
+    orig = libelefun.BS_WORKERS, libelefun.BS_PARALLEL_PREC
+    try:
+        libelefun.set_bs_workers(3, 0)
+        for case, v in zip(cases, serial):
+            bs, merge, before, after, a, b = case
+            assert libelefun.bs_parallel(bs, merge, a, b, 1000,
+                before, after) == v
+    finally:
+        libelefun.set_bs_workers(*orig)
+
+def test_constant_store():
+    import os, shutil, tempfile
+    from mpmath.libmp import libelefun
+    calls = []
+    def make():
+        def store_test_fixed(prec):
+            calls.append(prec)
+            return pi_fixed(prec)
+        return libelefun.constant_memo(store_test_fixed)
+    orig = libelefun.CONSTANT_STORE_DIR, libelefun.CONSTANT_STORE_PREC
+    d = tempfile.mkdtemp()
+    try:
+        set_constant_store(d, 100)
+        f = make()
+        v = f(1000)
+        assert len(calls) == 1
+        assert libelefun.load_constant('store_test_fixed')[0] == calls[0]
+        # A fresh memo (e.g. in another process) loads the stored value
+        f = make()
+        assert f(500) == v >> 500
+        assert f(1000) == v
+        assert len(calls) == 1
+        # Higher precision is computed and written back
+        assert f(2000) >> 1000 == v
+        assert len(calls) == 2
+        assert libelefun.load_constant('store_test_fixed')[0] == calls[1]
+        # Corrupted files are ignored
+        path = libelefun.constant_file('store_test_fixed')
+        data = open(path, 'rb').read()
+        open(path, 'wb').write(data[:-1] + b'x')
+        assert libelefun.load_constant('store_test_fixed') is None
+        assert make()(1000) == v
+        assert len(calls) == 3
+    finally:
+        set_constant_store(*orig)
+        shutil.rmtree(d)
+
 def test_exact_sqrts():
     for i in range(20000):
         assert sqrt(mpf(i*i)) == i
@@ -911,3 +974,45 @@ def test_cyclotomic():
     assert cyclotomic(2,2.5) == 2.5+1
     assert cyclotomic(3,2.5) == 2.5**2 + 2.5 + 1
     assert cyclotomic(7,2.5) == 406.234375
+
+def test_batch_evaluation():
+    mp.dps = 30
+    try:
+        xs = [mpf(k)/3 - 40 for k in range(200)] + [0, inf, -inf]
+        for f in [exp, ln, sin, cos, tan, sinpi, cospi]:
+            ys = [x for x in xs if f is not ln or x >= 0]
+            assert [y._mpf_ for y in f.batch(ys)] == [f(y)._mpf_ for y in ys]
+        assert exp.batch([1, '2', 1j]) == [exp(1), exp(2), exp(1j)]
+        assert ln.batch([-1, 1]) == [ln(-1), 0]
+        assert exp.batch([1], dps=50) == [exp(1, dps=50)]
+        assert vectorize(exp)((0, 1)) == [1, e]
+        assert vectorize(besselj)(1, [1, 2]) == [besselj(1, 1), besselj(1, 2)]
+        assert vectorize(hypot)([3, 5], [4, 12]) == [5, 13]
+        assert vectorize(exp)(1) == e
+        assert fp.vectorize(fp.exp)([0, 1]) == [1.0, math.e]
+        try:
+            vectorize(hypot)([1, 2], [3])
+            assert 0
+        except ValueError:
+            pass
+    finally:
+        mp.dps = 15
+
+def test_bitburst():
+    from mpmath.libmp import libelefun
+    mp.dps = 1000
+    try:
+        xs = [mpf(1)/3, -pi/7, mpf(2)**-500 + mpf(1)/7, mpf('123.456'), 1e-10]
+        ref = [(exp(x), cos(x), sin(x), sinh(x)) for x in xs]
+        orig = libelefun.EXP_BITBURST_CUTOFF, libelefun.COS_SIN_BITBURST_CUTOFF
+        try:
+            libelefun.EXP_BITBURST_CUTOFF = 100
+            libelefun.COS_SIN_BITBURST_CUTOFF = 100
+            for x, v in zip(xs, ref):
+                w = exp(x), cos(x), sin(x), sinh(x)
+                for a, b in zip(v, w):
+                    assert a.ae(b, 10**-995)
+        finally:
+            libelefun.EXP_BITBURST_CUTOFF, libelefun.COS_SIN_BITBURST_CUTOFF = orig
+    finally:
+        mp.dps = 15
@@ -1458,3 +1458,69 @@ def test_issue_239():
         raise AssertionError("hyp2f1(-5,5,0.5,0.5) (failed zero detection)")
     except (mp.NoConvergence, ValueError):
         pass
+
+def test_hypsum_export_import():
+    import os, shutil, tempfile
+    from mpmath import libmp
+    mp.dps = 15
+    key = (2, 1, ('Z', 'R', 'Q'), 'R')
+    v = hyp2f1(1, pi, '1/3', 0.25)
+    assert key in hypsum_list()
+    hypsum_prewarm([(1, 1, ['R', 'C'], 'C')])
+    assert (1, 1, ('R', 'C'), 'C') in hypsum_list()
+    assert len(libmp.common_hyp_summator_keys()) == 336
+    d = tempfile.mkdtemp()
+    try:
+        path = os.path.join(d, 'hypsum.bin')
+        hypsum_export(path, [key])
+        saved = mp.hyp_summators
+        mp.hyp_summators = {}
+        try:
+            assert hypsum_import(path) == 1
+            assert hypsum_list() == [key]
+            assert hyp2f1(1, pi, '1/3', 0.25) == v
+        finally:
+            mp.hyp_summators = saved
+        f = open(path, 'wb')
+        f.write(b'MPHS\x00\x00garbage')
+        f.close()
+        try:
+            hypsum_import(path)
+            assert 0
+        except ValueError:
+            pass
+    finally:
+        shutil.rmtree(d)
+
+def test_hypsum_binary_splitting():
+    from mpmath import libmp
+    from mpmath.libmp import mpf_hypsum_rational
+    try:
+        mp.dps = 700
+        v = mpf_hypsum_rational(1, 1, [(1, 2), (3, 2)], mpf(-0.75)._mpf_, mp.prec)
+        assert mpf(v).ae(hyp1f1(0.5, 1.5, -0.75))
+        v = mpf_hypsum_rational(0, 1, [(-7, 2)], mpf(-100)._mpf_, mp.prec)
+        assert mpf(v).ae(hyp0f1(-3.5, -100))
+        v = mpf_hypsum_rational(1, 1, [(-5, 1), (3, 2)], mpf(2)._mpf_, mp.prec)
+        assert mpf(v).ae(hyp1f1(-5, 1.5, 2))
+        # divergent, pole, too many bits in z
+        assert mpf_hypsum_rational(2, 0, [(1, 1), (1, 1)], mpf(0.5)._mpf_, mp.prec) is None
+        assert mpf_hypsum_rational(2, 1, [(1, 1), (1, 1), (1, 1)], mpf(2)._mpf_, mp.prec) is None
+        assert mpf_hypsum_rational(0, 1, [(-2, 1)], mpf(2)._mpf_, mp.prec) is None
+        assert mpf_hypsum_rational(0, 1, [(1, 1)], mpf(0.1)._mpf_, mp.prec) is None
+        # converges too slowly
+        z = mpf(15)/16
+        assert mpf_hypsum_rational(2, 1, [(1, 1), (1, 1), (2, 1)], z._mpf_, mp.prec) is None
+        assert hyper([1, 1], [2], z).ae(-log(1-z)/z)
+        mp.dps = 1000
+        orig = libmp.HYPSUM_BS_PREC
+        try:
+            libmp.HYPSUM_BS_PREC = mp.prec
+            a = besselj(0, 0.5), hyp2f1('1/3', '2/3', '3/2', 0.125)
+            libmp.HYPSUM_BS_PREC = mp.prec + 1
+            b = besselj(0, 0.5), hyp2f1('1/3', '2/3', '3/2', 0.125)
+        finally:
+            libmp.HYPSUM_BS_PREC = orig
+        assert a[0].ae(b[0]) and a[1].ae(b[1])
+    finally:
+        mp.dps = 15
@@ -49,6 +49,35 @@ def test_bernoulli():
 
     mp.dps = 15
 
+def test_bernoulli_table():
+    from mpmath.libmp.gammazeta import bernoulli_table_cache
+    bernoulli_table_cache.clear()
+    for dps in [15, 50, 5]:
+        mp.dps = dps
+        T = bernoulli_table(300)
+        assert len(T) == 301
+        for n in range(301):
+            p, q = bernfrac(n)
+            assert abs(T[n] - mpf(p)/q) <= abs(mpf(p)/q) * eps
+    # the cached table is kept at the highest precision
+    assert bernoulli_table_cache[0][0] > 160
+    mp.dps = 15
+    T = bernoulli_table(600, prec=200)
+    p, q = bernfrac(600)
+    with workprec(300):
+        assert abs(T[600] - mpf(p)/q) <= abs(T[600]) * 2**-198
+    assert bernoulli_table(600)[600] == bernoulli(600) == +T[600]
+    assert bernoulli_table(0) == [1] and bernoulli_table(1) == [1, -0.5]
+    assert fp.bernoulli_table(4) == [1, -0.5, 1/6., 0, -1/30.]
+    # the entries are correctly rounded
+    from mpmath.libmp import mpf_bernoulli_table, from_rational
+    for prec, n, rnd in [(53, 448, 'n'), (10, 314, 'n'), (10, 110, 'f'),
+        (20, 418, 'd'), (100, 500, 'f')]:
+        bernoulli_table_cache.clear()
+        p, q = bernfrac(n)
+        assert mpf_bernoulli_table(n, prec, rnd)[n] == from_rational(p, q, prec, rnd)
+    bernoulli_table_cache.clear()
+
 def test_bernpoly_eulerpoly():
     mp.dps = 15
     assert bernpoly(0,-1).ae(1)
@@ -667,7 +696,82 @@ def test_siegelz():
     assert siegelz(100000, derivative=3).ae(-278.930831343966552538)
     assert siegelz(100000+j,derivative=1).ae(678.214511857070283307-379.742160779916375413j)
 
+def test_siegelz_grid():
+    mp.dps = 15
+    for t0, dt, n in [(100000, 0.3, 3), (-123456.5, -0.3, 4), (10**8, 0.01, 5)]:
+        ts = [fadd(t0, fmul(dt, k, exact=True), exact=True) for k in range(n)]
+        mp.dps = 30
+        vs = [siegelz(t) for t in ts]
+        mp.dps = 15
+        zs = siegelz_grid(t0, dt, n)
+        assert len(zs) == n
+        for z, v in zip(zs, vs):
+            assert z.ae(v)
+    # The number of terms of the Riemann-Siegel correction drops from
+    # 8 to 7 at t = 74045.98..., so the grid is split between two plans
+    from mpmath.functions.rszeta import Rzeta_plan
+    t0, dt, n = mpf(74045), mpf(0.25), 8
+    keys = []
+    for t in [t0, t0+(n-1)*dt]:
+        keys.append(Rzeta_plan(mp, t, mpf(0.5))['key'])
+        mp.dps = 15
+    assert keys[0][0] == 8 and keys[1][0] == 7
+    mp.dps = 30
+    vs = [siegelz(t0+k*dt) for k in range(n)]
+    mp.dps = 15
+    zs = siegelz_grid(t0, dt, n)
+    for z, v in zip(zs, vs):
+        assert z.ae(v)
+    assert siegelz_grid(3, 1, 3) == [siegelz(3), siegelz(4), siegelz(5)]
+    assert siegelz_grid(3, 1, 0) == []
+    assert fp.siegelz_grid(100000, 0.5, 2) == [fp.siegelz(100000), fp.siegelz(100000.5)]
+
+
 
+def test_zeta_batch():
+    mp.dps = 30
+    ss = [mpf(2.5), mpc(0.5,14), mpc(3,-7), mpf('0.3'), mpc(-1,2), mpf(40),
+        mpc(25,3)]
+    for a in [1, 3, mpf(1)/3, 0.5]:
+        vals = zeta_batch(ss, a, [0, 1, 2])
+        for s, v in zip(ss, vals):
+            mp.dps = 60
+            ref = [zeta(s, a, d) for d in range(3)]
+            mp.dps = 30
+            assert type(v[0]) is type(+ref[0])
+            for x, y in zip(v, ref):
+                assert abs(x-y) <= abs(y) * mpf(10)**-28
+    assert zeta_batch([2, 3], 1) == [zeta(2), zeta(3)]
+    assert zeta_batch([], 2) == []
+    mp.dps = 15
+    assert zeta_batch([0.5+100j], 2.5, 3)[0].ae(zeta(0.5+100j, 2.5, 3))
+    assert fp.zeta_batch([2, 3], 0.5) == [fp.zeta(2, 0.5), fp.zeta(3, 0.5)]
+
+def test_zetazeros():
+    import os, shutil, tempfile
+    mp.dps = 15
+    v = [zetazero(n) for n in range(1, 8)]
+    assert zetazeros(1, 8) == v
+    assert zetazeros(5, 5) == []
+    assert zetazeros(1, 3, workers=2) == v[:2]
+    d = tempfile.mkdtemp()
+    try:
+        f = os.path.join(d, 'zeros')
+        assert zetazeros(1, 4, checkpoint=f) == v[:3]
+        # simulate an interrupted run
+        with open(f, 'a') as g:
+            g.write('4 4d50')
+        assert zetazeros(2, 8, checkpoint=f) == v[1:]
+        assert len(open(f).readlines()) == 8
+        mp.dps = 30
+        try:
+            zetazeros(1, 2, checkpoint=f)
+            assert False
+        except ValueError:
+            pass
+    finally:
+        mp.dps = 15
+        shutil.rmtree(d)
 
 def test_zeta_near_1():
     # Test for a former bug in mpf_zeta and mpc_zeta
@@ -689,3 +793,82 @@ def test_zeta_near_1():
     z = zeta(s3)
     assert z.real.ae('0.57721566490153286060651209008240243104215933593992')
     assert z.imag.ae('-1e50')
+
+def test_cache_registry():
+    from mpmath.libmp import LRUCache
+    c = LRUCache('test', maxsize=3)
+    for k in range(5):
+        c[k] = [k]*k
+        if k == 2:
+            c[0]
+    assert sorted(c) == [0, 3, 4]
+    assert c.info()['evictions'] == 2
+    assert c.info()['misses'] == 5
+    assert c.info()['hits'] == 1
+    assert c.get(1) is None and c.get(3) == [3, 3, 3]
+    c.maxsize = None
+    c.maxbytes = c.nbytes
+    c.grow(4, [10**100])
+    assert sorted(c) == [4]
+    del c[4]
+    c.clear()
+    assert c.nbytes == 0
+    # module-level caches
+    mp.dps = 15
+    clear_caches()
+    info = cache_info()
+    assert sum(i['size'] for i in info.values()) == 0
+    assert gamma(mpf('1.3')).ae('0.897470696306277188')
+    assert cache_info('gamma_taylor')['misses'] == 1
+    assert cache_info('gamma_taylor')['bytes'] > 0
+    # hits are only counted on request, starting from the current state
+    assert cache_info('gamma_taylor')['hits'] is None
+    try:
+        set_cache_stats(True, 'gamma_taylor')
+        nbytes = cache_info('gamma_taylor')['bytes']
+        assert gamma(mpf('1.7')).ae('0.908638732853290135')
+        info = cache_info('gamma_taylor')
+        assert info['hits'] == 1 and info['bytes'] == nbytes
+    finally:
+        set_cache_stats(False)
+    assert type(libmp.gammazeta.gamma_taylor_cache) is libmp.LRUCache
+    try:
+        set_cache_limit('bernoulli', maxsize=1)
+        clear_caches('bernoulli')
+        for mp.dps in [15, 30, 60]:
+            b = bernoulli(10)
+        assert cache_info('bernoulli')['size'] == 1
+        assert cache_info('bernoulli')['evictions'] == 2
+        assert b.ae(mpf(5)/66)
+    finally:
+        set_cache_limit('bernoulli')
+        mp.dps = 15
+
+def test_primes():
+    from mpmath.libmp import list_primes, count_primes, odd_sieve
+    from mpmath.libmp.libintmath import odd_sieve_cache
+    from mpmath.libmp.gammazeta import primesieve, sieve_cache
+    def isprime_brute(n):
+        return n > 1 and all(n % d for d in range(2, int(n**0.5)+1))
+    P = [n for n in range(3000) if isprime_brute(n)]
+    # extending a cached sieve and slicing a longer one
+    odd_sieve_cache.clear()
+    for n in [2999, 10, 0, 1, 2, 3, 4, 9, 25, 120, 1000, 2999]:
+        assert list_primes(n) == [p for p in P if p <= n]
+    assert [primepi(n) for n in range(3000)] == \
+        [len([p for p in P if p <= n]) for n in range(3000)]
+    assert primepi(-3) == 0 and primepi(10.5) == 4
+    # around the switch to the Meissel-Lehmer method
+    Q = list_primes(2*10**6)
+    for x in [10**6-1, 10**6, 10**6+3, 1234567, 1999993, 2*10**6]:
+        assert count_primes(x) == len([p for p in Q if p <= x])
+    assert primepi(10**10) == 455052511
+    assert len(odd_sieve(10**7)) == 5*10**6
+    sieve_cache.clear()
+    for n in [500, 100]:
+        sieve, primes, mult = primesieve(n)
+        assert primes == [p for p in P if p <= n]
+        for k in range(2, n+1):
+            p, m = sieve[k], mult[k]
+            assert isprime_brute(p) and k % p**m == 0 and (k//p**m) % p
+            assert all(q <= p for q in P if k % q == 0)
@@ -185,9 +185,9 @@ def test_det():
 def test_cond():
     mp.dps = 15
     A = matrix([[1.2969, 0.8648], [0.2161, 0.1441]])
-    assert cond(A, lambda x: mnorm(x,1)) == mpf('327065209.73817754')
-    assert cond(A, lambda x: mnorm(x,inf)) == mpf('327065209.73817754')
-    assert cond(A, lambda x: mnorm(x,'F')) == mpf('249729266.80008656')
+    assert cond(A, lambda x: mnorm(x,1)) == mpf('327065209.73836917')
+    assert cond(A, lambda x: mnorm(x,inf)) == mpf('327065209.73836911')
+    assert cond(A, lambda x: mnorm(x,'F')) == mpf('249729266.80023283')
 
 @extradps(50)
 def test_precision():
@@ -214,6 +214,83 @@ def test_LU_cache():
     A[0,0] = -1000
     assert A._LU is None
 
+def test_matrix_kernels():
+    mp.dps = 30
+    A = randmatrix(6, 5)
+    B = randmatrix(5, 4)
+    C = randmatrix(5, 4) + j*randmatrix(5, 4)
+    B[2,1] = mpf('1e-40')
+    B[3,2] = inf
+    # products are rounded once, like fdot
+    for X, Y in [(A, B), (A, C), (C.T, A.T)]:
+        Z = X * Y
+        for i in range(X.rows):
+            for k in range(Y.cols):
+                z = fdot([(X[i,l], Y[l,k]) for l in range(X.cols)])
+                assert Z[i,k] == z or (isnan(Z[i,k]) and isnan(z))
+    assert type((A*B)[0,0]) is mpf
+    assert type((A*C)[0,0]) is mpc
+    # factorization and solving
+    A = randmatrix(8) - 0.5
+    b = randmatrix(8, 1)
+    x = lu_solve(A, b)
+    mp.dps = 60
+    assert mnorm(A*x - b, 1) < 1e-28
+    mp.dps = 30
+    assert mnorm(inverse(A)*A - eye(8), 1) < 1e-27
+    assert abs(det(A) - det(A.T)) < 1e-27 * abs(det(A))
+    mp.dps = 15
+
+def test_lu_hilbert():
+    # ill-conditioned but not numerically singular
+    for dps, n in [(15, 12), (15, 13), (30, 19), (30, 20), (50, 27),
+                   (50, 28)]:
+        mp.dps = dps
+        H = hilbert(n)
+        b = ones(n, 1)
+        x = lu_solve(H, b)
+        d = det(H)
+        Hi = inverse(H)
+        c = cond(H)
+        mp.dps = 3*dps
+        H = hilbert(n)
+        assert norm(H*x - b) < eps**(1/3) * norm(H, 1) * norm(x)
+        if n in (12, 19, 27):
+            xe = lu_solve(H, b)
+            Hie = inverse(H)
+            assert norm(x - xe) < 0.1 * norm(xe)
+            assert abs(d/det(H) - 1) < 0.1
+            assert mnorm(Hi - Hie, 1) < 0.1 * mnorm(Hie, 1)
+            assert abs(c/cond(H) - 1) < 0.1
+    mp.dps = 15
+
+def test_lu_graded():
+    mp.dps = 15
+    # the small entries must not be lost next to the large ones
+    A = matrix([[1, mpf('1e-30'), mpf('1e-50')],
+                [mpf('1e-40'), 1, mpf('3e-30')],
+                [0, mpf('2e-35'), 1]])
+    x = lu_solve(A, [0, 0, 1])
+    X = inverse(A)
+    for y, z in [(x[0], '-9.999999997e-51'), (x[1], '-3e-30'),
+                 (X[0,1], '-1e-30'), (X[0,2], '-9.999999997e-51'),
+                 (X[1,0], '-1e-40'), (X[2,0], '2e-75')]:
+        assert y.ae(mpf(z), rel_eps=1e-14, abs_eps=0)
+
+def test_lu_solve_nonfinite():
+    mp.dps = 15
+    for A in [[[nan, 2], [3, 4]], [[1, 2], [3, nan]]]:
+        x = lu_solve(A, [1, 2])
+        assert isnan(x[0]) and isnan(x[1])
+    x = lu_solve([[1, 2], [3, 4]], [nan, 1])
+    assert isnan(x[0]) and isnan(x[1])
+    for A in [[[inf, 2], [3, 4]], [[1, inf], [3, 4]]]:
+        try:
+            lu_solve(A, [1, 2])
+            assert False
+        except ZeroDivisionError:
+            pass
+
 def test_improve_solution():
     A = randmatrix(5, min=1e-20, max=1e20)
     b = randmatrix(5, 1, min=-1000, max=1000)
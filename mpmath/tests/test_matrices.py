@@ -7,8 +7,8 @@ def test_matrix_basic():
     assert A1 == eye(3)
     assert A1 == matrix(A1)
     A2 = matrix(3, 2)
-    assert not A2._matrix__data
-    A3 = matrix([[1, 2, 3], [4, 5, 6], [7, 8, 9]])
+    assert not matrix(3, 2, sparse=True)._matrix__data
+    A3 = matrix([[1, 2, 3], [4, 5, 6], [7, 8, 9]], sparse=True)
     assert list(A3) == list(range(1, 10))
     A3[1,1] = 0
     assert not (1, 1) in A3._matrix__data
@@ -172,7 +172,7 @@ def test_norms():
     assert norm(x, inf) == 12
 
 def test_vector():
-    x = matrix([0, 1, 2, 3, 4])
+    x = matrix([0, 1, 2, 3, 4], sparse=True)
     assert x == matrix([[0], [1], [2], [3], [4]])
     assert x[3] == 3
     assert len(x._matrix__data) == 4
@@ -183,6 +183,72 @@ def test_vector():
     assert len(x) == len(x.T) == 5
     assert x.T*x == matrix([[114]])
 
+def test_matrix_sparse():
+    A = matrix([[1, 0, 2], [0, 0, 3]])
+    B = matrix([[1, 0, 2], [0, 0, 3]], sparse=True)
+    assert not A.sparse
+    assert B.sparse
+    assert A == B and B == A
+    assert len(B._matrix__data) == 3
+    assert matrix(B).sparse
+    assert not matrix(B, sparse=False).sparse
+    assert B.copy(sparse=False) == A
+    assert A.copy(sparse=True) == B
+    assert A * B.T == B * A.T == matrix([[5, 6], [6, 9]])
+    assert (B * B.T).sparse
+    assert B.T.sparse and B.T == A.T
+    assert A[:,1:3] == B[:,1:3]
+    A.cols = B.cols = 2
+    A.rows = B.rows = 3
+    assert A == B == matrix([[1, 0], [0, 0], [0, 0]])
+    try:
+        A[-1,0]
+        assert False
+    except IndexError:
+        pass
+
+def test_matrix_rows():
+    A = matrix([[1, 2], [3, 4]])
+    rows = A._get_rows()
+    assert rows == [[1, 2], [3, 4]]
+    rows[0][1] = 0
+    A._set_rows(rows)
+    assert A == matrix([[1, 0], [3, 4]])
+    assert type(A[0,1]) is mpf
+    B = matrix(2, sparse=True)
+    B._set_rows([[0, 1], [0, mpc(0)]])
+    assert B._matrix__data == {(0, 1): 1}
+
+def test_matmul():
+    methods = ['naive', 'strassen', 'kronecker', 'auto']
+    for dps in [15, 100]:
+        mp.dps = dps
+        A = randmatrix(19, 21) - 0.5
+        B = randmatrix(21, 18)
+        A[3,4] = mpf('1e-100')
+        C = B + j*randmatrix(21, 18)
+        for X, Y in [(A, B), (A, C), (C.T, A.T)]:
+            Z = X * Y
+            for method in methods:
+                assert matmul(X, Y, method) == Z
+    mp.dps = 15
+    # special values use the naive method
+    B[2,5] = inf
+    Z = A * B
+    for method in methods:
+        assert str(matmul(A, B, method)) == str(Z)
+    assert matmul([[1, 2]], [[3], [4]]) == matrix([[11]])
+    A = fp.randmatrix(20)
+    B = fp.randmatrix(20)
+    assert fp.mnorm(fp.matmul(A, B, 'strassen') - A*B, 1) < 1e-12
+    assert fp.matmul(A, B, 'kronecker') == A*B
+    for args in [(A, B, 'fast'), (ones(2, 3), ones(2, 3))]:
+        try:
+            matmul(*args)
+            assert False
+        except ValueError:
+            pass
+
 def test_matrix_copy():
     A = ones(6)
     B = A.copy()
@@ -198,3 +264,30 @@ def test_matrix_numpy():
     l = [[1, 2], [3, 4], [5, 6]]
     a = numpy.matrix(l)
     assert matrix(l) == matrix(a)
+
+def test_matrix_numpy_object_array():
+    try:
+        import numpy
+    except ImportError:
+        return
+    A = matrix([[1, 2], [3, mpc(1, 2)]])
+    a = numpy.array(A)
+    assert a.dtype == object and a.shape == (2, 2)
+    assert a[1,1] is A[1,1]
+    B = matrix(a)
+    assert B == A and B[1,0] is A[1,0]
+    assert matrix(a, sparse=True) == A
+    assert numpy.asarray(matrix([[1.5, 2]]), dtype=float).tolist() == [[1.5, 2.0]]
+    assert matrix(numpy.arange(3.0)) == matrix([0, 1, 2])
+    assert fp.matrix(numpy.eye(2)) == fp.eye(2)
+
+def test_matrix_numpy_force_type():
+    try:
+        import numpy
+    except ImportError:
+        return
+    a = numpy.array([[1.5, 2.5], [-0.5, 3.0]])
+    assert matrix(a, force_type=int) == matrix([[1.5, 2.5], [-0.5, 3]], force_type=int)
+    assert matrix(a, force_type=int) == matrix([[1, 2], [0, 3]])
+    assert matrix(numpy.array([1.5, 2.5]), force_type=int) == matrix([1, 2])
+    assert matrix(a, force_type=None) == matrix(a.tolist())
@@ -1,5 +1,6 @@
 #from mpmath.calculus import ODE_step_euler, ODE_step_rk4, odeint, arange
-from mpmath import odefun, cos, sin, mpf, sinc, mp
+from mpmath import odefun, odestream, cos, sin, exp, atan, asin, mpf, sinc, pi, mp
+from pytest import raises
 
 '''
 solvers = [ODE_step_euler, ODE_step_rk4]
@@ -71,3 +72,66 @@ def test_odefun_harmonic():
         c, s = f(x)
         assert c.ae(cos(x))
         assert s.ae(sin(x))
+
+def test_odefun_ad():
+    mp.dps = 15
+    f = odefun(lambda x, y: [-y[1], y[0]], 0, [1, 0], method='ad')
+    for x in [0, 1, 2.5, 8, 3.7]:
+        c, s = f(x)
+        assert c.ae(cos(x))
+        assert s.ae(sin(x))
+    mp.dps = 50
+    f = odefun(lambda x, y: x*sin(y), 0, pi/2, method='ad')
+    assert f(3).ae(2*atan(exp(mpf(9)/2)))
+    mp.dps = 15
+    g = odefun(lambda x, y: -2*x*y**2, 0, 1, method='ad')
+    assert g(10).ae(mpf(1)/101)
+    # the error is relative to the size of the solution
+    g = odefun(lambda x, y: -y, 0, 1, method='ad')
+    assert g(100).ae(exp(-100), abs_eps=0)
+    raises(ValueError, lambda: odefun(lambda x, y: y, 0, 1, method='foo'))
+
+def test_odestream():
+    mp.dps = 15
+    points = list(odestream(lambda x, y: y, 0, 1, 2))
+    assert points[0] == (0, 1)
+    assert points[-1][0] == 2
+    for x, y in points:
+        assert y.ae(exp(x))
+    # dense output, backwards
+    points = list(odestream(lambda x, y: [y[1], -y[0]], 0, [0, 1], -3,
+        step=0.5))
+    assert [x for x, y in points] == [-0.5*k for k in range(7)]
+    for x, (s, c) in points:
+        assert s.ae(sin(x), abs_eps=1e-14)
+        assert c.ae(cos(x), abs_eps=1e-14)
+    for x, y in odestream(lambda x, y: -y, 0, 1, 1000):
+        pass
+    assert x == 1000 and y.ae(exp(-1000), abs_eps=0)
+    # unbounded stream
+    stream = odestream(lambda x, y: 1, 0, 0, step=0.25)
+    for k in range(10):
+        x, y = next(stream)
+        assert x == y == 0.25*k
+
+def test_odestream_events():
+    mp.dps = 15
+    F = lambda x, y: [y[1], -y[0]]
+    zeros = lambda x, y: y[0]
+    maxima = lambda x, y: y[1]
+    points = list(odestream(F, 0, [0, 1], 10, events=[zeros, maxima]))
+    assert points[-1][:1] == (10,) and points[-1][2] is None
+    events = [(x, k) for x, y, k in points if k is not None]
+    assert [k for x, k in events] == [1, 0, 1, 0, 1, 0]
+    for j, (x, k) in enumerate(events):
+        assert x.ae((j+1)*pi/2)
+    # two crossings within one step are found on a fine enough grid
+    near_max = lambda x, y: y[0] - 0.999999
+    points = list(odestream(F, 0, [0, 1], 3, events=[near_max], step=0.001))
+    events = [x for x, y, k in points if k is not None]
+    assert len(events) == 2
+    assert events[0].ae(asin(0.999999)) and events[1].ae(pi-asin(0.999999))
+    points = list(odestream(F, 0, [0, 1], events=[zeros], terminal=True))
+    x, y, k = points[-1]
+    assert k == 0 and x.ae(pi)
+    assert y[1].ae(-1)
@@ -25,3 +25,61 @@ def test_pickle():
 
     obj = mpc('0.5','0.2')
     assert obj == pickler(obj)
+
+def test_pickle_matrix():
+    mp.dps = 30
+    try:
+        A = matrix([[1, pi], [mpc(2, 3), 0]])
+        B = pickler(A)
+        assert type(B) is type(A)
+        assert B == A
+        A = matrix(3, 4, sparse=True)
+        A[2, 1] = pi
+        B = pickler(A)
+        assert B.sparse and B == A
+        assert B._matrix__data == {(2, 1): +pi}
+    finally:
+        mp.dps = 15
+
+def test_pickle_old_format():
+    # Pickles written by older versions store tuples of hex strings
+    x = mpf(0)
+    x.__setstate__((0, '5', -1, 3))
+    assert x == 2.5
+    z = mpc(0)
+    z.__setstate__(((0, '5', -1, 3), (1, '3', 0, 2)))
+    assert z == mpc(2.5, -3)
+
+def test_dumps_loads():
+    mp.dps = 50
+    try:
+        values = [mpf(0), mpf(1)/3, -pi, inf, -inf, mpf(2)**-(10**8),
+            mpf(2)**(10**9), mpc(1, -2), mpc(0, pi), mpf(10)**-300]
+        for x in values:
+            assert loads(dumps(x)) == x
+            assert type(loads(dumps(x))) is type(x)
+        assert isnan(loads(dumps(nan)))
+        assert loads(dumps(values)) == values
+        assert loads(dumps(tuple(values))) == values
+        assert loads(memoryview(dumps(values))) == values
+        buf = bytearray(b'xy')
+        assert dumps(values, out=buf) is buf
+        assert loads(buf[2:]) == values
+        A = randmatrix(4, 3)
+        A[1, 2] = mpc(2, 3)
+        assert loads(dumps(A)) == A
+        assert loads(bytearray(dumps(A))) == A
+        s = dumps(pi)
+        for t in [s[:-1], s + b'x', b'xyz' + s[3:], s[:3] + b'\xff' + s[4:]]:
+            try:
+                loads(t)
+                assert False
+            except ValueError:
+                pass
+        try:
+            dumps('a')
+            assert False
+        except (TypeError, ValueError):
+            pass
+    finally:
+        mp.dps = 15
@@ -1,3 +1,4 @@
+import os
 from mpmath import *
 
 def ae(a, b):
@@ -88,3 +89,89 @@ def xtest_expmath_fail():
     assert ae(quadts(lambda x: atan(x)/(x*sqrt(1-x**2)), [0, 1]), pi*log(1+sqrt(2))/2)
     assert ae(quadts(lambda x: log(1+x**2)/x**2, [0, 1]),         pi/2-log(2))
     assert ae(quadts(lambda x: x**2/((1+x**4)*sqrt(1-x**4)), [0, 1]),     pi/8)
+
+# Integrands for parallel quadrature must be picklable
+def _integrand_1(x):
+    return besselj(0, x) / (1 + x**2)
+
+def _integrand_2(x, y):
+    return exp(-x*y) * cos(x + y)
+
+def _integrand_fp(x):
+    return fp.besselj(0, x) / (1 + x**2)
+
+def test_quad_parallel():
+    from multiprocessing import Pool
+    pool = Pool(2)
+    try:
+        for dps in [15, 30]:
+            mp.dps = dps
+            for method in ['tanh-sinh', 'gauss-legendre']:
+                for points in [[0, 1], [0, 2, inf], [-inf, inf]]:
+                    v, err = quad(_integrand_1, points, method=method,
+                        error=True)
+                    assert quad(_integrand_1, points, method=method,
+                        error=True, executor=pool) == (v, err)
+        mp.dps = 15
+        v = quad(_integrand_2, [0, 1], [1, 2])
+        assert quad(_integrand_2, [0, 1], [1, 2], executor=pool) == v
+        assert quadts(_integrand_1, [0, 3], workers=2) == \
+            quadts(_integrand_1, [0, 3])
+        assert quadgl(_integrand_1, [0, 3], workers=2) == \
+            quadgl(_integrand_1, [0, 3])
+        assert fp.quad(_integrand_fp, [0, 1], executor=pool) == \
+            fp.quad(_integrand_fp, [0, 1])
+    finally:
+        pool.close()
+        pool.join()
+        mp.dps = 15
+
+def test_quad_node_store():
+    import shutil, tempfile
+    directory = tempfile.mkdtemp()
+    orig = mp.quad_cache_dir
+    try:
+        mp.dps = 30
+        mp.quad_cache_dir = directory
+        rules = [mp._tanh_sinh, mp._gauss_legendre]
+        for rule in rules:
+            rule.clear()
+        v1 = quadts(lambda x: exp(-x**2), [0, inf])
+        v2 = quadgl(lambda x: exp(-x**2), [0, 1])
+        mp.dps = 20
+        quad_prewarm('gauss-legendre', maxdegree=3)
+        for degree in [1, 2, 3]:
+            assert os.path.exists(mp._gauss_legendre.node_file(degree, mp.prec))
+        mp.dps = 30
+        # nodes are now loaded from disk, not computed
+        def fail(*args):
+            raise AssertionError
+        for rule in rules:
+            rule.clear()
+            rule.calc_nodes = fail
+        assert quadts(lambda x: exp(-x**2), [0, inf]) == v1
+        assert quadgl(lambda x: exp(-x**2), [0, 1]) == v2
+        # corrupt or incompatible files are ignored
+        path = mp._tanh_sinh.node_file(1, mp.prec)
+        f = open(path, 'wb')
+        f.write(b'MPQN\x00\x63garbage')
+        f.close()
+        assert mp._tanh_sinh.load_nodes(1, mp.prec) is None
+        # and so are truncated files
+        path = mp._gauss_legendre.node_file(2, mp.prec)
+        f = open(path, 'rb')
+        data = f.read()
+        f.close()
+        assert mp._gauss_legendre.load_nodes(2, mp.prec)
+        for n in range(len(data)):
+            f = open(path, 'wb')
+            f.write(data[:n])
+            f.close()
+            assert mp._gauss_legendre.load_nodes(2, mp.prec) is None
+    finally:
+        for rule in rules:
+            del rule.calc_nodes
+            rule.clear()
+        mp.quad_cache_dir = orig
+        mp.dps = 15
+        shutil.rmtree(directory)